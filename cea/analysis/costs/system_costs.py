@@ -25,26 +25,30 @@ def costs_main(locator, config):
     capital = config.costs.capital
     operational = config.costs.operational
 
-    # get demand
-    demand = pd.read_csv(locator.get_total_demand())
+    heating_final_services = ['OIL_hs', 'NG_hs', 'WOOD_hs', 'COAL_hs', 'GRID_hs', 'DH_hs']
+    hot_water_final_services = ['OIL_ww', 'NG_ww', 'WOOD_ww', 'COAL_ww', 'GRID_ww', 'DH_ww']
+    cooling_final_services = ['GRID_cs', 'GRID_cdata', 'GRID_cre', 'DC_cs']
+    electricity_final_services = ['GRID_pro', 'GRID_l', 'GRID_aux', 'GRID_v', 'GRID_a', 'GRID_data', 'GRID_ve']
+
+    # get demand (only the peak loads and yearly demands of the services costed here)
+    all_final_services = (heating_final_services + hot_water_final_services + cooling_final_services +
+                          electricity_final_services)
+    demand = locator.get_total_demand.read(columns=['Name'] + [field for service in all_final_services
+                                                               for field in (service + '0_kW', service + '_MWhyr')])
 
     # get the databases for each main system
     cooling_db, hot_water_db, electricity_db, heating_db = get_databases(demand, locator)
 
     # COSTS DUE TO HEATING SERIVICES (EXCEPT HOTWATER)
-    heating_final_services = ['OIL_hs', 'NG_hs', 'WOOD_hs', 'COAL_hs', 'GRID_hs', 'DH_hs']
     costs_heating_services_dict = calc_costs_per_energy_service(heating_db, heating_final_services)
 
     # COSTS DUE TO HOT WATER SERVICES
-    hot_water_final_services = ['OIL_ww', 'NG_ww', 'WOOD_ww', 'COAL_ww', 'GRID_ww', 'DH_ww']
     costs_hot_water_services_dict = calc_costs_per_energy_service(hot_water_db, hot_water_final_services)
 
     # COSTS DUE TO COOLING SERVICES
-    cooling_final_services = ['GRID_cs', 'GRID_cdata', 'GRID_cre', 'DC_cs']
     costs_cooling_services_dict = calc_costs_per_energy_service(cooling_db, cooling_final_services)
 
     # COSTS DUE TO ELECTRICITY SERVICES
-    electricity_final_services = ['GRID_pro', 'GRID_l', 'GRID_aux', 'GRID_v', 'GRID_a', 'GRID_data', 'GRID_ve']
     costs_electricity_services_dict = calc_costs_per_energy_service(electricity_db, electricity_final_services)
 
     # COMBINE INTO ONE DICT
@@ -46,8 +46,11 @@ def lca_operation(locator):
     """
 
     # get local files
-    ## get demand results for the scenario
-    demand = pd.read_csv(locator.get_total_demand())
+    ## get demand results for the scenario (only the yearly demands used for the emissions below)
+    demand = locator.get_total_demand.read(columns=['Name', 'GFA_m2'] + [service + '_MWhyr' for service in [
+        'DH_hs', 'SOLAR_hs', 'NG_hs', 'COAL_hs', 'OIL_hs', 'WOOD_hs',
+        'DH_ww', 'SOLAR_ww', 'NG_ww', 'COAL_ww', 'OIL_ww', 'WOOD_ww',
+        'DC_cs', 'DC_cdata', 'DC_cre', 'GRID', 'PV']])
     ## get the supply systems for each building in the scenario
     supply_systems = gpdf.from_file(locator.get_building_supply()).drop('geometry', axis=1)
     ## get the non-renewable primary energy and greenhouse gas emissions factors for each supply system in the database
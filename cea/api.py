@@ -8,6 +8,7 @@ import datetime
 def register_scripts():
     import cea.config
     import cea.scripts
+    import cea.utilities.profiling
     import importlib
 
     def script_wrapper(cea_script):
@@ -34,7 +35,8 @@ def register_scripts():
                 raise cea.MissingInputDataException()
             t0 = datetime.datetime.now()
             # run the script
-            script_module.main(config)
+            with cea.utilities.profiling.profile_script(cea_script.name, config):
+                script_module.main(config)
 
             # print success message
             msg = "Script completed. Execution time: %.2fs" % (datetime.datetime.now() - t0).total_seconds()
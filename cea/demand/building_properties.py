@@ -11,6 +11,7 @@ from cea.constants import HOURS_IN_YEAR
 from cea.demand import constants
 from cea.demand.sensible_loads import calc_hr, calc_hc
 from cea.utilities.dbf import dbf_to_dataframe
+from cea.utilities import profiling
 from cea.technologies import blinds
 from typing import List
 
@@ -924,10 +925,11 @@ def get_prop_solar(locator, building_names, prop_rc_model, prop_envelope, weathe
 
     # for every building
     for building_name in building_names:
-        thermal_resistance_surface = dict(zip(['RSE_wall', 'RSE_roof', 'RSE_win'],
-                                              get_thermal_resistance_surface(prop_envelope.loc[building_name],
-                                                                             weather_data)))
-        I_sol = calc_Isol_daysim(building_name, locator, prop_envelope, prop_rc_model, thermal_resistance_surface)
+        with profiling.stage("solar gains", building_name):
+            thermal_resistance_surface = dict(zip(['RSE_wall', 'RSE_roof', 'RSE_win'],
+                                                  get_thermal_resistance_surface(prop_envelope.loc[building_name],
+                                                                                 weather_data)))
+            I_sol = calc_Isol_daysim(building_name, locator, prop_envelope, prop_rc_model, thermal_resistance_surface)
         list_Isol.append(I_sol)
 
     result = pd.DataFrame({'Name': list(building_names), 'I_sol': list_Isol})
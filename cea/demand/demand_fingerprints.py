@@ -0,0 +1,187 @@
+"""
+Remember the inputs of the last demand calculation of each building, so that the demand script only simulates the
+buildings whose inputs changed since (e.g. after editing the properties of a handful of buildings).
+
+The fingerprint of a building is a hash of everything its demand calculation depends on: the building properties
+(``BuildingPropertiesRow`` - this includes the rows of the databases used by the building and the solar radiation on
+its surfaces), its occupancy schedules, the weather file, the parameters of the demand script and the version of the
+CEA. The fingerprints are stored in a SQLite database next to the demand results (see
+:py:meth:`cea.inputlocator.InputLocator.get_demand_fingerprints`), together with the size and modification time of the
+results file of the building and its row of ``Total_demand.csv``. A building is skipped if neither its fingerprint nor
+its results file changed, the totals are then rebuilt from the stored rows.
+
+The rows of ``Total_demand.csv`` of the last calculation of the full year are also kept with their fingerprints: they
+are the reference for the demand calculated with typical days (see ``demand:typical-days``), as long as the inputs of
+the buildings did not change.
+"""
+
+import hashlib
+import os
+import sqlite3
+
+import numpy as np
+import pandas as pd
+
+import cea
+
+__author__ = "Daren Thomas"
+__copyright__ = "Copyright 2021, Architecture and Building Systems - ETH Zurich"
+__credits__ = ["Daren Thomas"]
+__license__ = "MIT"
+__version__ = "0.1"
+__maintainer__ = "Daren Thomas"
+__email__ = "cea@arch.ethz.ch"
+__status__ = "Production"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS buildings (
+    name TEXT PRIMARY KEY,
+    fingerprint TEXT NOT NULL,
+    results_file TEXT NOT NULL,
+    totals TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS full_year (
+    name TEXT PRIMARY KEY,
+    fingerprint TEXT NOT NULL,
+    totals TEXT NOT NULL
+);
+"""
+
+# the parameters of the demand script that change the results of a building
+DEMAND_PARAMETERS = ['use_dynamic_infiltration_calculation', 'resolution_output', 'loads_output', 'massflows_output',
+                     'temperatures_output', 'overheating_warning', 'typical_days']
+
+
+class DemandFingerprints(object):
+    """The fingerprints of the buildings of a scenario, stored at ``path``. Use as a context manager to close the
+    connection to the database."""
+
+    def __init__(self, path):
+        self.path = path
+        self._connection = sqlite3.connect(path)
+        with self._connection:
+            self._connection.executescript(SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        self._connection.close()
+
+    def read_totals(self, building, fingerprint, results_file):
+        """
+        Return the row of ``Total_demand.csv`` (as csv) of a building if it was simulated with the same ``fingerprint``
+        and its results file was not changed since - else ``None`` (the building needs to be simulated).
+        """
+        row = self._connection.execute("SELECT fingerprint, results_file, totals FROM buildings WHERE name = ?",
+                                       (building,)).fetchone()
+        if row is None or row[0] != fingerprint or row[1] != file_signature(results_file):
+            return None
+        return row[2]
+
+    def write(self, buildings):
+        """
+        Remember the inputs and results of simulated buildings.
+
+        :param buildings: a (name, fingerprint, results file, row of ``Total_demand.csv`` as csv) tuple per building
+        :type buildings: list[tuple[str, str, str, str]]
+        """
+        rows = [(building, fingerprint, file_signature(results_file), totals)
+                for building, fingerprint, results_file, totals in buildings]
+        with self._connection:
+            self._connection.executemany("INSERT OR REPLACE INTO buildings (name, fingerprint, results_file, totals) "
+                                         "VALUES (?, ?, ?, ?)", rows)
+
+    def read_full_year(self, building, fingerprint):
+        """
+        Return the row of ``Total_demand.csv`` (as csv) of the last calculation of the full year of a building if it
+        was calculated with the same ``fingerprint`` - else ``None``.
+        """
+        row = self._connection.execute("SELECT fingerprint, totals FROM full_year WHERE name = ?",
+                                       (building,)).fetchone()
+        if row is None or row[0] != fingerprint:
+            return None
+        return row[1]
+
+    def write_full_year(self, buildings):
+        """
+        Remember the yearly results of buildings calculated for the full year.
+
+        :param buildings: a (name, fingerprint, row of ``Total_demand.csv`` as csv) tuple per building
+        :type buildings: list[tuple[str, str, str]]
+        """
+        with self._connection:
+            self._connection.executemany("INSERT OR REPLACE INTO full_year (name, fingerprint, totals) VALUES (?, ?, ?)",
+                                         buildings)
+
+
+def file_signature(path):
+    """The size and modification time of a file - changes whenever the file is written"""
+    if not os.path.exists(path):
+        return ''
+    stat = os.stat(path)
+    return '{size}:{mtime}'.format(size=stat.st_size, mtime=stat.st_mtime_ns)
+
+
+def hash_file(path):
+    """The hash of the contents of a file"""
+    file_hash = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            file_hash.update(block)
+    return file_hash.hexdigest()
+
+
+def demand_parameters(config):
+    """The values of the parameters of the demand script that change the results of a building"""
+    return {parameter: getattr(config.demand, parameter) for parameter in DEMAND_PARAMETERS}
+
+
+def calc_fingerprint(bpr, locator, weather_hash, parameters):
+    """
+    Calculate the fingerprint of the inputs of the demand calculation of a building.
+
+    :param bpr: the properties of the building
+    :type bpr: cea.demand.building_properties.BuildingPropertiesRow
+    :param locator: An InputLocator to locate the schedules of the building
+    :type locator: cea.inputlocator.InputLocator
+    :param str weather_hash: the hash of the weather file (see ``hash_file``)
+    :param dict parameters: the parameters of the demand script (see ``demand_parameters``)
+    :rtype: str
+    """
+    fingerprint = hashlib.sha256()
+    update_hash(fingerprint, [cea.__version__, weather_hash, hash_file(locator.get_schedule_model_file(bpr.name)),
+                              parameters, bpr])
+    return fingerprint.hexdigest()
+
+
+def update_hash(value_hash, value):
+    """Feed ``value`` to ``value_hash`` - the building properties are nested dicts, pandas Series, arrays and objects
+    with attributes, which are hashed by their contents"""
+    if isinstance(value, dict):
+        value_hash.update(b'{')
+        for key in sorted(value, key=str):
+            update_hash(value_hash, key)
+            update_hash(value_hash, value[key])
+        value_hash.update(b'}')
+    elif isinstance(value, pd.Series):
+        update_hash(value_hash, dict(zip(value.index, value.values)))
+    elif isinstance(value, (list, tuple)):
+        value_hash.update(b'[')
+        for item in value:
+            update_hash(value_hash, item)
+        value_hash.update(b']')
+    elif isinstance(value, np.ndarray) and value.dtype != object:
+        value_hash.update(repr((value.dtype.str, value.shape)).encode('utf-8'))
+        value_hash.update(np.ascontiguousarray(value).tobytes())
+    elif isinstance(value, np.ndarray):
+        update_hash(value_hash, list(value))
+    elif hasattr(value, '__dict__') or hasattr(value, '__slots__'):
+        attributes = value.__dict__ if hasattr(value, '__dict__') else {slot: getattr(value, slot)
+                                                                       for slot in value.__slots__}
+        update_hash(value_hash, (type(value).__name__, attributes))
+    else:
+        value_hash.update(repr(value).encode('utf-8'))
@@ -3,21 +3,25 @@
 Analytical energy demand model algorithm
 """
 
+import io
 import os
 import time
 import warnings
 from itertools import repeat
 
+import pandas as pd
+
 import cea.config
 import cea.inputlocator
 import cea.utilities.parallel
 from cea import MissingInputDataException
 from cea.demand import thermal_loads
 from cea.demand.building_properties import BuildingProperties
-from cea.utilities import epwreader
+from cea.utilities import epwreader, profiling
 from cea.utilities.date import get_date_range_hours_from_year
-from cea.demand import demand_writers
+from cea.demand import demand_writers, hourly_loads_store, demand_fingerprints
 from cea.datamanagement.data_migrator import is_3_22
+from cea.utilities.typical_days import calc_errors, cluster_typical_days, compare_totals
 
 warnings.filterwarnings("ignore")
 
@@ -31,7 +35,7 @@ __email__ = "cea@arch.ethz.ch"
 __status__ = "Production"
 
 
-def demand_calculation(locator, config):
+def demand_calculation(locator, config, write_totals=True):
     """
     Algorithm to calculate the hourly demand of energy services in buildings
     using the integrated model of [Fonseca2015]_.
@@ -39,10 +43,19 @@ def demand_calculation(locator, config):
     Produces a demand file per building and a total demand file for the whole zone of interest:
       - a csv file for every building with hourly demand data.
       - ``Total_demand.csv``, csv file of yearly demand data per building.
+      - ``hourly_loads``, a store of the hourly demand data of all buildings for the plots
+        (see :py:mod:`cea.demand.hourly_loads_store`).
+
+    Buildings whose inputs did not change since the last calculation are not simulated again (see
+    :py:mod:`cea.demand.demand_fingerprints`). For screening, the heating and cooling loads can be simulated for a few
+    typical days only (``demand:typical-days``, see :py:mod:`cea.utilities.typical_days`).
 
 
     :param locator: An InputLocator to locate input files
     :type locator: cea.inputlocator.InputLocator
+    :param bool write_totals: write ``Total_demand.csv`` and the ``hourly_loads`` store - ``False`` keeps those of the
+        previous calculation and only writes the results of each building (e.g. to calculate a few buildings of a
+        scenario, see :py:func:`read_totals` for the yearly results of a building)
 
     :returns: None
     :rtype: NoneType
@@ -69,8 +82,8 @@ def demand_calculation(locator, config):
     temperatures_output = config.demand.temperatures_output
     debug = config.debug
     weather_path = locator.get_weather_file()
-    weather_data = epwreader.epw_reader(weather_path)[['year', 'drybulb_C', 'wetbulb_C',
-                                                       'relhum_percent', 'windspd_ms', 'skytemp_C']]
+    weather_data = epwreader.epw_reader(weather_path, columns=['year', 'drybulb_C', 'wetbulb_C',
+                                                                'relhum_percent', 'windspd_ms', 'skytemp_C'])
     year = weather_data['year'][0]
     # create date range for the calculation year
     date_range = get_date_range_hours_from_year(year)
@@ -79,7 +92,8 @@ def demand_calculation(locator, config):
     print('Running demand calculation for the following buildings=%s' % building_names)
 
     # CALCULATE OBJECT WITH PROPERTIES OF ALL BUILDINGS
-    building_properties = BuildingProperties(locator, weather_data, building_names)
+    with profiling.stage("building properties"):
+        building_properties = BuildingProperties(locator, weather_data, building_names)
 
     # add a message i2065 of warning. This needs a more elegant solution
     def calc_buildings_less_100m2(building_properties):
@@ -98,32 +112,174 @@ def demand_calculation(locator, config):
         print(
             'Warning! The following list of buildings have less than 100 m2 of gross floor area, CEA might fail: %s' % list_buildings_less_100m2)
 
+    # REDUCE THE YEAR TO TYPICAL DAYS (SCREENING)
+    typical_days = None
+    if config.demand.typical_days:
+        with profiling.stage("typical days"):
+            typical_days = calc_typical_days(locator, weather_path, building_names, config.demand.typical_days)
+        typical_days.to_csv(locator.get_demand_typical_days())
+        print('Simulating the heating and cooling loads of {n} typical days'.format(n=len(typical_days)))
+    else:
+        remove_typical_days(locator)
+
+    # SKIP THE BUILDINGS WHOSE INPUTS DID NOT CHANGE SINCE THE LAST CALCULATION
+    with profiling.stage("fingerprints"):
+        bprs = {b: building_properties[b] for b in building_names}
+        weather_hash = demand_fingerprints.hash_file(weather_path)
+        parameters = demand_fingerprints.demand_parameters(config)
+        full_year_fingerprints = None
+        if typical_days is not None:
+            # the fingerprints of a calculation of the full year, to find the reference for the typical days
+            full_year_parameters = dict(parameters, typical_days=0)
+            full_year_fingerprints = {b: demand_fingerprints.calc_fingerprint(bprs[b], locator, weather_hash,
+                                                                              full_year_parameters)
+                                      for b in building_names}
+            # the typical days depend on the schedules of all the buildings
+            parameters['typical_days_assignment'] = typical_days.assignment
+        fingerprints = {b: demand_fingerprints.calc_fingerprint(bprs[b], locator, weather_hash, parameters)
+                        for b in building_names}
+        fingerprints_store = demand_fingerprints.DemandFingerprints(locator.get_demand_fingerprints())
+        changed_buildings = building_names
+        if config.demand.skip_unchanged_buildings and not debug:
+            changed_buildings = [b for b in building_names if not restore_totals(locator, fingerprints_store, b,
+                                                                                 fingerprints[b])]
+            if len(changed_buildings) < len(building_names):
+                print('Skipping {n} buildings with unchanged inputs'.format(
+                    n=len(building_names) - len(changed_buildings)))
+
     # DEMAND CALCULATION
-    n = len(building_names)
+    n = len(changed_buildings)
     calc_thermal_loads = cea.utilities.parallel.vectorize(thermal_loads.calc_thermal_loads,
                                                           config.get_number_of_processes(), on_complete=print_progress)
 
-    calc_thermal_loads(
-        building_names,
-        [building_properties[b] for b in building_names],
-        repeat(weather_data, n),
-        repeat(date_range, n),
-        repeat(locator, n),
-        repeat(use_dynamic_infiltration, n),
-        repeat(resolution_output, n),
-        repeat(loads_output, n),
-        repeat(massflows_output, n),
-        repeat(temperatures_output, n),
-        repeat(config, n),
-        repeat(debug, n))
+    with profiling.stage("thermal loads"):
+        if changed_buildings:
+            calc_thermal_loads(
+                changed_buildings,
+                [bprs[b] for b in changed_buildings],
+                repeat(weather_data, n),
+                repeat(date_range, n),
+                repeat(locator, n),
+                repeat(use_dynamic_infiltration, n),
+                repeat(resolution_output, n),
+                repeat(loads_output, n),
+                repeat(massflows_output, n),
+                repeat(temperatures_output, n),
+                repeat(config, n),
+                repeat(debug, n),
+                repeat(typical_days, n))
+
+    if not debug:
+        fingerprints_store.write([(b, fingerprints[b], locator.get_demand_results_file(b), read_totals(locator, b))
+                                  for b in changed_buildings])
+        if typical_days is None:
+            # the reference for the typical days
+            fingerprints_store.write_full_year([(b, fingerprints[b], read_totals(locator, b)) for b in building_names])
+    full_year_totals = None
+    if typical_days is not None:
+        full_year_totals = read_full_year_totals(fingerprints_store, full_year_fingerprints)
+    fingerprints_store.close()
+
+    if not write_totals:
+        print('done - time elapsed: %d.2 seconds' % (time.perf_counter() - t0))
+        return
 
     # WRITE TOTAL YEARLY VALUES
-    writer_totals = demand_writers.YearlyDemandWriter(loads_output, massflows_output, temperatures_output)
-    writer_totals.write_to_csv(building_names, locator)
+    with profiling.stage("write totals"):
+        writer_totals = demand_writers.YearlyDemandWriter(loads_output, massflows_output, temperatures_output)
+        writer_totals.write_to_csv(building_names, locator)
+    if typical_days is not None:
+        write_typical_days_errors(locator, full_year_totals)
+    if resolution_output == 'hourly' and not debug and not hourly_loads_store_up_to_date(locator, building_names):
+        with profiling.stage("write hourly loads store"):
+            hourly_loads_store.write_hourly_loads_store(locator, building_names)
     time_elapsed = time.perf_counter() - t0
     print('done - time elapsed: %d.2 seconds' % time_elapsed)
 
 
+def calc_typical_days(locator, weather_path, building_names, number_of_days):
+    """Cluster the days of the year by their weather and the occupancy of the buildings, keeping the hottest and the
+    coldest day (see :py:mod:`cea.utilities.typical_days`)"""
+    profiles = pd.DataFrame(epwreader.epw_reader(weather_path, columns=['drybulb_C', 'relhum_percent',
+                                                                        'glohorrad_Whm2']))
+    profiles['people_p'] = sum(pd.read_csv(locator.get_schedule_model_file(b), usecols=['people_p'])['people_p'].values
+                               for b in building_names)
+    typical_days = cluster_typical_days(profiles, number_of_days,
+                                        extreme_days=[('drybulb_C', 'max'), ('drybulb_C', 'min')])
+    print('Error of the typical days in representing the weather and occupancy of the year:')
+    print(calc_errors(profiles, typical_days)[['error_total_%', 'error_peak_%', 'rmse_%']].round(2))
+    return typical_days
+
+
+def read_full_year_totals(fingerprints_store, full_year_fingerprints):
+    """
+    Return the yearly results of the last calculation of the full year (indexed by building) of the buildings whose
+    inputs did not change since - or ``None`` if there are none.
+
+    :param fingerprints_store: the fingerprints of the demand calculations of the scenario
+    :type fingerprints_store: cea.demand.demand_fingerprints.DemandFingerprints
+    :param dict full_year_fingerprints: the fingerprint of each building for a calculation of the full year
+    """
+    rows = [fingerprints_store.read_full_year(b, fingerprint) for b, fingerprint in full_year_fingerprints.items()]
+    rows = [pd.read_csv(io.StringIO(row)) for row in rows if row is not None]
+    if not rows:
+        return None
+    if len(rows) < len(full_year_fingerprints):
+        print('Comparing the typical days to the full year for the {n} buildings whose inputs did not change'.format(
+            n=len(rows)))
+    return pd.concat(rows, ignore_index=True).set_index('Name')
+
+
+def write_typical_days_errors(locator, full_year_totals):
+    """Compare the yearly results of the typical days to those of the last calculation of the full year (with the same
+    inputs, see :py:func:`read_full_year_totals`)"""
+    if full_year_totals is None:
+        print('Run the demand for the full year (typical-days = 0) with the same inputs before the typical days to '
+              'compare the results')
+        if os.path.exists(locator.get_demand_typical_days_errors()):
+            os.remove(locator.get_demand_typical_days_errors())
+        return
+    typical_days_totals = pd.read_csv(locator.get_total_demand()).set_index('Name')
+    columns = [column for column in typical_days_totals.columns if column in full_year_totals.columns
+               and (column.endswith('_MWhyr') or column.endswith('0_kW'))]
+    errors = compare_totals(full_year_totals, typical_days_totals, columns)
+    errors.to_csv(locator.get_demand_typical_days_errors(), index_label='variable', float_format='%.3f')
+    print('Error of the typical days compared to the full year (see {path}):'.format(
+        path=locator.get_demand_typical_days_errors()))
+    print(errors.loc[[column for column in ['QH_sys_MWhyr', 'QH_sys0_kW', 'QC_sys_MWhyr', 'QC_sys0_kW', 'E_sys_MWhyr']
+                      if column in errors.index], ['error_%', 'mean_absolute_error_buildings_%']].round(2))
+
+
+def remove_typical_days(locator):
+    """Remove the typical days and their errors - they don't describe the results of a calculation of the full year"""
+    for path in [locator.get_demand_typical_days(), locator.get_demand_typical_days_errors()]:
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def restore_totals(locator, fingerprints_store, building, fingerprint):
+    """Write the yearly results of the last calculation of a building to the temporary file read by the
+    ``YearlyDemandWriter`` - if its inputs and results did not change since. Returns ``False`` if the building needs
+    to be simulated."""
+    totals = fingerprints_store.read_totals(building, fingerprint, locator.get_demand_results_file(building))
+    if totals is None:
+        return False
+    with open(locator.get_temporary_file('%(building)sT.csv' % locals()), 'w') as f:
+        f.write(totals)
+    return True
+
+
+def read_totals(locator, building):
+    """The yearly results of the last calculation of a building (its row of ``Total_demand.csv``, as csv)"""
+    with open(locator.get_temporary_file('%(building)sT.csv' % locals()), 'r') as f:
+        return f.read()
+
+
+def hourly_loads_store_up_to_date(locator, building_names):
+    store = hourly_loads_store.HourlyLoadsStore.open(locator, building_names)
+    return store is not None and store.buildings == list(building_names)
+
+
 def print_progress(i, n, args, _):
     print("Building No. {i} completed out of {n}: {building}".format(i=i + 1, n=n, building=args[0]))
 
@@ -0,0 +1,432 @@
+"""
+Surrogate of the demand model for the rapid screening of many building variants (e.g. retrofit options).
+
+The surrogate is trained on the results of the demand script in a scenario (``mode = train``). It maps the properties
+of a building (see :py:class:`cea.demand.building_properties.BuildingProperties`: geometry, envelope, HVAC systems,
+comfort, internal loads and solar gains) and statistics of the weather to the yearly and monthly end-use demand and the
+peaks of the building, per m2 of gross floor area. The regression is a ridge regression on the standardized features,
+their squares and the categories (use type, HVAC systems), with the regularization chosen by k-fold cross validation.
+The out-of-fold predictions are written to a validation report. The uncertainty of a prediction is the predictive
+standard deviation of the equivalent Bayesian linear regression, which grows for buildings unlike those it was
+trained on.
+
+A prediction (``mode = predict``) is only trusted within the training domain: the numeric features within the range of
+the training buildings (extended by ``DOMAIN_TOLERANCE``) and the categories seen in training. The buildings outside are
+simulated with the demand script instead (``demand-surrogate:fallback-to-demand``).
+"""
+
+import copy
+import io
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+import cea
+import cea.config
+import cea.inputlocator
+from cea import MissingInputDataException
+from cea.demand import demand_main
+from cea.demand.building_properties import BuildingProperties
+from cea.utilities import epwreader
+
+__author__ = "Daren Thomas"
+__copyright__ = "Copyright 2021, Architecture and Building Systems - ETH Zurich"
+__credits__ = ["Daren Thomas"]
+__license__ = "MIT"
+__version__ = "0.1"
+__maintainer__ = "Daren Thomas"
+__email__ = "cea@arch.ethz.ch"
+__status__ = "Production"
+
+END_USES = ['QH_sys', 'QC_sys', 'Qww_sys', 'E_sys']
+PEAK_END_USES = ['QH_sys', 'QC_sys', 'E_sys']
+MONTHS = ['january', 'february', 'march', 'april', 'may', 'june', 'july', 'august', 'september', 'october',
+          'november', 'december']
+ANNUAL_TARGETS = [end_use + '_MWhyr' for end_use in END_USES] + [end_use + '0_kW' for end_use in PEAK_END_USES]
+MONTHLY_TARGETS = ['{end_use}_{month}_MWh'.format(end_use=end_use, month=month) for month in MONTHS
+                   for end_use in END_USES]
+
+ENVELOPE_FEATURES = ['U_wall', 'U_roof', 'U_win', 'U_base', 'G_win', 'n50', 'Cm_Af', 'Es', 'Hs_ag', 'Ns']
+COMFORT_FEATURES = ['Ths_set_C', 'Ths_setb_C', 'Tcs_set_C', 'Tcs_setb_C', 'RH_min_pc', 'RH_max_pc', 'Ve_lsp']
+INTERNAL_LOADS_FEATURES = ['Occ_m2p', 'Qs_Wp', 'X_ghp', 'Ea_Wm2', 'El_Wm2', 'Epro_Wm2', 'Qcre_Wm2', 'Ed_Wm2',
+                           'Qcpro_Wm2', 'Qhpro_Wm2', 'Vww_ldp', 'Vw_ldp']
+VENTILATION_FEATURES = ['MECH_VENT', 'WIN_VENT', 'HEAT_REC', 'NIGHT_FLSH', 'ECONOMIZER']
+HVAC_CATEGORIES = ['class_hs', 'class_cs', 'type_dhw', 'type_ctrl', 'type_vent', 'has-heating-season',
+                   'has-cooling-season']
+
+HEATING_BASE_TEMPERATURE_C = 18.0
+COOLING_BASE_TEMPERATURE_C = 24.0
+
+ALPHAS = [0.01, 0.1, 1.0, 10.0, 100.0]  # regularization strengths tried in the cross validation
+NUMBER_OF_FOLDS = 5
+MIN_TRAINING_BUILDINGS = 10
+DOMAIN_TOLERANCE = 0.05  # share of the range of a feature in the training data a prediction may extrapolate by
+
+
+class DemandSurrogate(object):
+    """A regression of the demand of buildings (per m2 of gross floor area) on their features. Use ``fit`` to train
+    it."""
+
+    def __init__(self, numeric_features, categories, targets, mean, scale, domain_min, domain_max, alpha,
+                 coefficients=None, covariance=None, sigma=None):
+        self.numeric_features = list(numeric_features)
+        self.categories = {column: list(values) for column, values in categories.items()}
+        self.targets = list(targets)
+        self.mean = np.asarray(mean, dtype=float)
+        self.scale = np.asarray(scale, dtype=float)
+        self.domain_min = np.asarray(domain_min, dtype=float)
+        self.domain_max = np.asarray(domain_max, dtype=float)
+        self.alpha = alpha
+        self.coefficients = None if coefficients is None else np.asarray(coefficients, dtype=float)
+        self.covariance = None if covariance is None else np.asarray(covariance, dtype=float)
+        self.sigma = None if sigma is None else np.asarray(sigma, dtype=float)
+
+    @classmethod
+    def fit(cls, features, targets, alpha):
+        """
+        Train the surrogate.
+
+        :param features: the features of the training buildings (see ``calc_building_features``) - text columns are
+            categories, all other columns are numeric
+        :type features: pd.DataFrame
+        :param targets: the demand of the training buildings per m2 of gross floor area (see ``read_targets``)
+        :type targets: pd.DataFrame
+        :param float alpha: the strength of the regularization of the coefficients
+        :rtype: DemandSurrogate
+        """
+        categorical = [column for column in features.columns if features[column].dtype == object]
+        numeric_features = [column for column in features.columns if column not in categorical]
+        values = features[numeric_features].values.astype(float)
+        if np.isnan(values).any():
+            raise ValueError('Missing values in the features: {columns}'.format(
+                columns=', '.join(np.array(numeric_features)[np.isnan(values).any(axis=0)])))
+        scale = values.std(axis=0)
+        scale[scale == 0.0] = 1.0
+        model = cls(numeric_features, {column: sorted(features[column].unique()) for column in categorical},
+                    targets.columns, values.mean(axis=0), scale, values.min(axis=0), values.max(axis=0), alpha)
+
+        x = model.design_matrix(features)
+        y = targets.loc[features.index].values.astype(float)
+        penalty = alpha * np.eye(x.shape[1])
+        penalty[0, 0] = 0.0  # the intercept is not regularized
+        model.covariance = np.linalg.pinv(x.T.dot(x) + penalty)
+        model.coefficients = model.covariance.dot(x.T).dot(y)
+        residuals = y - x.dot(model.coefficients)
+        degrees_of_freedom = np.trace(model.covariance.dot(x.T).dot(x))
+        model.sigma = np.sqrt((residuals ** 2).sum(axis=0) / max(len(x) - degrees_of_freedom, 1.0))
+        return model
+
+    def design_matrix(self, features):
+        """The intercept, the standardized numeric features and their squares and the categories (one-hot)"""
+        z = (features[self.numeric_features].values.astype(float) - self.mean) / self.scale
+        one_hot = [(features[column].values[:, np.newaxis] == np.array(values, dtype=object)).astype(float)
+                   for column, values in self.categories.items()]
+        return np.hstack([np.ones((len(features), 1)), z, z ** 2] + one_hot)
+
+    def predict(self, features):
+        """
+        Predict the demand of buildings per m2 of gross floor area.
+
+        :return: the predictions and their standard deviations (a column per target)
+        :rtype: tuple[pd.DataFrame, pd.DataFrame]
+        """
+        x = self.design_matrix(features)
+        prediction = np.maximum(x.dot(self.coefficients), 0.0)
+        leverage = np.einsum('ij,jk,ik->i', x, self.covariance, x)
+        std = np.sqrt(1.0 + leverage)[:, np.newaxis] * self.sigma
+        return (pd.DataFrame(prediction, index=features.index, columns=self.targets),
+                pd.DataFrame(std, index=features.index, columns=self.targets))
+
+    def in_domain(self, features):
+        """True for the buildings whose features are within the training domain of the surrogate
+
+        :rtype: pd.Series
+        """
+        values = features[self.numeric_features].values.astype(float)
+        margin = (DOMAIN_TOLERANCE * (self.domain_max - self.domain_min)
+                  + 1e-9 * (1.0 + np.maximum(np.abs(self.domain_min), np.abs(self.domain_max))))
+        inside = ((values >= self.domain_min - margin) & (values <= self.domain_max + margin)).all(axis=1)
+        for column, values in self.categories.items():
+            inside &= features[column].isin(values).values
+        return pd.Series(inside, index=features.index)
+
+    def to_json(self, path):
+        with open(path, 'w') as f:
+            json.dump({'cea_version': cea.__version__,
+                       'numeric_features': self.numeric_features,
+                       'categories': self.categories,
+                       'targets': self.targets,
+                       'mean': self.mean.tolist(),
+                       'scale': self.scale.tolist(),
+                       'domain_min': self.domain_min.tolist(),
+                       'domain_max': self.domain_max.tolist(),
+                       'alpha': self.alpha,
+                       'coefficients': self.coefficients.tolist(),
+                       'covariance': self.covariance.tolist(),
+                       'sigma': self.sigma.tolist()}, f)
+
+    @classmethod
+    def from_json(cls, path):
+        with open(path, 'r') as f:
+            model = json.load(f)
+        model.pop('cea_version')
+        return cls(**model)
+
+
+def train_surrogate(features, targets, alphas=ALPHAS, number_of_folds=NUMBER_OF_FOLDS):
+    """
+    Train the surrogate with the regularization that predicts the held out buildings of a k-fold cross validation
+    best.
+
+    :return: the surrogate trained on all buildings and the out-of-fold predictions and standard deviations of the
+        cross validation
+    :rtype: tuple[DemandSurrogate, pd.DataFrame, pd.DataFrame]
+    """
+    if len(features) < 2:
+        raise ValueError('At least two buildings are needed to train the surrogate')
+    folds = np.random.RandomState(0).permutation(len(features)) % min(number_of_folds, len(features))
+    target_std = targets.values.std(axis=0)
+    best = None
+    for alpha in alphas:
+        prediction, std = cross_validate(features, targets, alpha, folds)
+        rmse = np.sqrt(((prediction.values - targets.values) ** 2).mean(axis=0))
+        score = np.mean(rmse[target_std > 0.0] / target_std[target_std > 0.0]) if (target_std > 0.0).any() else 0.0
+        if best is None or score < best[0]:
+            best = (score, alpha, prediction, std)
+    _, alpha, prediction, std = best
+    return DemandSurrogate.fit(features, targets, alpha), prediction, std
+
+
+def cross_validate(features, targets, alpha, folds):
+    """Predict each fold of buildings with a surrogate trained on the other folds"""
+    prediction = pd.DataFrame(index=features.index, columns=targets.columns, dtype=float)
+    std = pd.DataFrame(index=features.index, columns=targets.columns, dtype=float)
+    for fold in np.unique(folds):
+        test = features.index[folds == fold]
+        train = features.index[folds != fold]
+        model = DemandSurrogate.fit(features.loc[train], targets.loc[train], alpha)
+        prediction.loc[test], std.loc[test] = model.predict(features.loc[test])
+    return prediction, std
+
+
+def calc_validation_report(targets, prediction, std, floor_area):
+    """
+    The accuracy of the out-of-fold predictions of each target: the coefficient of determination, the root mean square
+    error relative to the mean, the error of the sum over all buildings and the share of buildings within the 95%
+    prediction interval.
+
+    :param floor_area: the gross floor area of the buildings, to weigh the targets (per m2) for the sum
+    :type floor_area: pd.Series
+    :rtype: pd.DataFrame
+    """
+    y = targets.values
+    y_hat = prediction.loc[targets.index].values
+    residual_sum_of_squares = ((y - y_hat) ** 2).sum(axis=0)
+    total_sum_of_squares = ((y - y.mean(axis=0)) ** 2).sum(axis=0)
+    weights = floor_area.loc[targets.index].values[:, np.newaxis]
+    total = (y * weights).sum(axis=0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        report = pd.DataFrame({'r2': 1.0 - residual_sum_of_squares / total_sum_of_squares,
+                               'cv_rmse_%': np.sqrt(residual_sum_of_squares / len(y)) / y.mean(axis=0) * 100.0,
+                               'error_total_%': ((y_hat * weights).sum(axis=0) - total) / total * 100.0,
+                               'coverage_95_%': (np.abs(y - y_hat) <= 1.96 * std.loc[targets.index].values).mean(
+                                   axis=0) * 100.0},
+                              index=targets.columns)
+    return report.replace([np.inf, -np.inf], np.nan)
+
+
+def calc_weather_statistics(weather_data):
+    """The statistics of the weather used as features: heating and cooling degree days, yearly global horizontal
+    radiation and mean relative humidity"""
+    temperature = weather_data['drybulb_C'].values
+    return {'HDD_Kd': np.maximum(HEATING_BASE_TEMPERATURE_C - temperature, 0.0).sum() / 24.0,
+            'CDD_Kd': np.maximum(temperature - COOLING_BASE_TEMPERATURE_C, 0.0).sum() / 24.0,
+            'glohorrad_kWhm2': weather_data['glohorrad_Whm2'].sum() / 1000.0,
+            'relhum_percent': weather_data['relhum_percent'].mean()}
+
+
+def calc_building_features(bpr, weather_statistics):
+    """
+    The features of a building for the surrogate: areas, heat transfer coefficients and solar gains per m2 of gross
+    floor area, the envelope, comfort, internal loads and ventilation properties and the statistics of the weather
+    (numeric) and the use type and HVAC systems (categories).
+
+    :param bpr: the properties of the building
+    :type bpr: cea.demand.building_properties.BuildingPropertiesRow
+    :param dict weather_statistics: see ``calc_weather_statistics``
+    :rtype: dict
+    """
+    gfa = bpr.rc_model['GFA_m2']
+    features = {'GFA_m2': gfa,
+                'Af_GFA': bpr.rc_model['Af'] / gfa,
+                'Awall_ag_GFA': bpr.rc_model['Awall_ag'] / gfa,
+                'Awin_ag_GFA': bpr.rc_model['Awin_ag'] / gfa,
+                'Aroof_GFA': bpr.rc_model['Aroof'] / gfa,
+                'Htr_op_GFA': bpr.rc_model['Htr_op'] / gfa,
+                'Htr_w_GFA': bpr.rc_model['Htr_w'] / gfa,
+                'Cm_GFA': bpr.rc_model['Cm'] / gfa,
+                'I_sol_kWhm2': np.sum(bpr.solar.I_sol) / 1000.0 / gfa}
+    features.update({feature: float(getattr(bpr.architecture, feature)) for feature in ENVELOPE_FEATURES})
+    features.update({feature: float(bpr.comfort[feature]) for feature in COMFORT_FEATURES})
+    features.update({feature: float(bpr.internal_loads[feature]) for feature in INTERNAL_LOADS_FEATURES})
+    features.update({feature: float(bpr.hvac[feature]) for feature in VENTILATION_FEATURES})
+    features.update(weather_statistics)
+    features['1ST_USE'] = str(bpr.typology['1ST_USE'])
+    features.update({feature: str(bpr.hvac[feature]) for feature in HVAC_CATEGORIES})
+    return features
+
+
+def read_building_features(locator, building_names):
+    """The features of the buildings (see ``calc_building_features``), indexed by building"""
+    weather_data = epwreader.epw_reader(locator.get_weather_file(),
+                                        columns=['year', 'drybulb_C', 'wetbulb_C', 'relhum_percent', 'windspd_ms',
+                                                 'skytemp_C', 'glohorrad_Whm2'])
+    weather_statistics = calc_weather_statistics(weather_data)
+    building_properties = BuildingProperties(locator, weather_data, building_names)
+    return pd.DataFrame([calc_building_features(building_properties[building], weather_statistics)
+                         for building in building_names], index=pd.Index(building_names, name='Name'))
+
+
+def read_targets(locator, building_names, floor_area, totals=None):
+    """The yearly and monthly demand and the peaks of the buildings calculated by the demand script, per m2 of gross
+    floor area (kWh/m2 and W/m2)
+
+    :param totals: the yearly results of the buildings, indexed by building - defaults to ``Total_demand.csv``
+    :type totals: pd.DataFrame
+    """
+    if totals is None:
+        totals = pd.read_csv(locator.get_total_demand()).set_index('Name')
+    rows = []
+    for building in building_names:
+        row = totals.loc[building, ANNUAL_TARGETS].to_dict()
+        monthly = read_monthly_demand(locator, building)
+        row.update({'{end_use}_{month}_MWh'.format(end_use=end_use, month=month): monthly.loc[month, end_use]
+                    for month in MONTHS for end_use in END_USES})
+        rows.append(row)
+    targets = pd.DataFrame(rows, index=pd.Index(building_names, name='Name'))[ANNUAL_TARGETS + MONTHLY_TARGETS]
+    return targets.multiply(1000.0 / floor_area.loc[building_names], axis=0)
+
+
+def read_monthly_demand(locator, building):
+    """The monthly end-use demand of a building [MWh] from its demand results file (hourly or monthly)"""
+    results = pd.read_csv(locator.get_demand_results_file(building))
+    if 'Month' in results.columns:
+        columns = [end_use + '_MWhyr' for end_use in END_USES]
+        monthly = results.set_index('Month')
+    else:
+        columns = [end_use + '_kWh' for end_use in END_USES]
+        monthly = results.groupby(pd.to_datetime(results['DATE']).dt.month).sum(numeric_only=True) / 1000.0
+        monthly.index = [MONTHS[month - 1] for month in monthly.index]
+    missing = [column for column in columns if column not in monthly.columns]
+    if missing:
+        raise ValueError('The demand results of {building} do not include {columns} (see demand:loads-output)'.format(
+            building=building, columns=', '.join(missing)))
+    monthly = monthly[columns].reindex(MONTHS, fill_value=0.0)
+    monthly.columns = END_USES
+    return monthly
+
+
+def train(locator, config):
+    """Train the surrogate on the demand results of the scenario"""
+    if not os.path.exists(locator.get_total_demand()):
+        raise MissingInputDataException("Missing demand results in scenario. Consider running demand script first.")
+    simulated_buildings = set(pd.read_csv(locator.get_total_demand(), usecols=['Name'])['Name'])
+    building_names = [building for building in config.demand.buildings if building in simulated_buildings]
+    if len(building_names) < MIN_TRAINING_BUILDINGS:
+        raise ValueError('At least {n} buildings with demand results are needed to train the surrogate, found {m}'
+                         .format(n=MIN_TRAINING_BUILDINGS, m=len(building_names)))
+
+    features = read_building_features(locator, building_names)
+    targets = read_targets(locator, building_names, features['GFA_m2'])
+    model, prediction, std = train_surrogate(features, targets)
+    model.to_json(locator.get_demand_surrogate_model())
+
+    report = calc_validation_report(targets, prediction, std, features['GFA_m2'])
+    report.to_csv(locator.get_demand_surrogate_validation(), index_label='target', float_format='%.3f')
+    print('Trained the surrogate on {n} buildings (alpha={alpha}). Cross validation (see {path}):'.format(
+        n=len(building_names), alpha=model.alpha, path=locator.get_demand_surrogate_validation()))
+    print(report.loc[ANNUAL_TARGETS].round(2))
+
+
+def predict(locator, config):
+    """Predict the demand of the buildings of the scenario with the surrogate - simulating the buildings outside its
+    training domain with the demand script"""
+    model_path = config.demand_surrogate.model or locator.get_demand_surrogate_model()
+    if not os.path.exists(model_path):
+        raise MissingInputDataException("Missing surrogate model {path}. Consider running demand-surrogate with "
+                                        "mode=train first.".format(path=model_path))
+    model = DemandSurrogate.from_json(model_path)
+    building_names = config.demand.buildings
+
+    features = read_building_features(locator, building_names)
+    prediction, std = model.predict(features)
+    in_domain = model.in_domain(features)
+    simulated = pd.Series(False, index=features.index)
+    outside = list(in_domain.index[~in_domain])
+    if outside and config.demand_surrogate.fallback_to_demand:
+        print('Simulating the buildings outside the training domain of the surrogate: {buildings}'.format(
+            buildings=outside))
+        prediction.loc[outside] = simulate_targets(locator, config, outside, features['GFA_m2'])[model.targets]
+        std.loc[outside] = 0.0
+        simulated.loc[outside] = True
+    elif outside:
+        print('Warning! The following buildings are outside the training domain of the surrogate, their predictions '
+              'may be inaccurate: {buildings}'.format(buildings=outside))
+
+    write_predictions(locator, features['GFA_m2'], prediction, std, in_domain, simulated)
+    print('Predicted the demand of {n} buildings (see {path})'.format(n=len(building_names),
+                                                                     path=locator.get_demand_surrogate_totals()))
+
+
+def simulate_targets(locator, config, building_names, floor_area):
+    """
+    Simulate the buildings with the demand script and return their targets (see ``read_targets``). ``Total_demand.csv``
+    and the hourly loads store of the scenario are kept as they are, the targets are read from the results of each
+    building.
+    """
+    demand_config = copy.deepcopy(config)
+    demand_config.demand.buildings = building_names
+    if not demand_main.radiation_files_exist(locator, demand_config):
+        raise MissingInputDataException("Missing radiation data in scenario. Consider running radiation script first.")
+    demand_main.demand_calculation(locator, demand_config, write_totals=False)
+    totals = pd.concat([pd.read_csv(io.StringIO(demand_main.read_totals(locator, building)))
+                        for building in building_names], ignore_index=True).set_index('Name')
+    return read_targets(locator, building_names, floor_area, totals)
+
+
+def write_predictions(locator, floor_area, prediction, std, in_domain, simulated):
+    """Write the yearly and monthly predictions (and their standard deviations) in MWh and kW"""
+    prediction = prediction.multiply(floor_area / 1000.0, axis=0)
+    std = std.multiply(floor_area / 1000.0, axis=0)
+
+    totals = pd.DataFrame({'GFA_m2': floor_area, 'in_training_domain': in_domain, 'simulated': simulated})
+    for target in ANNUAL_TARGETS:
+        totals[target] = prediction[target]
+        totals[target + '_std'] = std[target]
+    totals.to_csv(locator.get_demand_surrogate_totals(), index_label='Name', float_format='%.3f')
+
+    monthly = []
+    for month in MONTHS:
+        month_df = pd.DataFrame({'Name': prediction.index, 'Month': month})
+        for end_use in END_USES:
+            target = '{end_use}_{month}_MWh'.format(end_use=end_use, month=month)
+            month_df[end_use + '_MWh'] = prediction[target].values
+            month_df[end_use + '_MWh_std'] = std[target].values
+        monthly.append(month_df)
+    pd.concat(monthly, ignore_index=True).to_csv(locator.get_demand_surrogate_monthly(), index=False,
+                                                 float_format='%.3f')
+
+
+def main(config):
+    assert os.path.exists(config.scenario), 'Scenario not found: %s' % config.scenario
+    locator = cea.inputlocator.InputLocator(scenario=config.scenario)
+    if config.demand_surrogate.mode == 'train':
+        train(locator, config)
+    else:
+        predict(locator, config)
+
+
+if __name__ == '__main__':
+    main(cea.config.Configuration())
@@ -0,0 +1,127 @@
+"""
+A compact store of the hourly demand results of all the buildings in a scenario, written by the demand script next to
+``Total_demand.csv`` (see :py:meth:`cea.inputlocator.InputLocator.get_demand_hourly_loads_folder`).
+
+The store holds a buildings x hours x variables array, chunked by variable: each variable (column of the
+``{building}.csv`` files) is a ``{variable}.npy`` file with one row of ``float32`` values per building. The chunks are
+memory-mapped when read, so summing a variable over any subset of buildings only reads the rows of those buildings and
+never touches the per-building csv files. ``index.json`` lists the buildings, dates and variables of the store.
+
+Use :py:meth:`HourlyLoadsStore.open` to get a store that is up to date with the csv files of a list of buildings.
+"""
+
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+__author__ = "Daren Thomas"
+__copyright__ = "Copyright 2021, Architecture and Building Systems - ETH Zurich"
+__credits__ = ["Daren Thomas"]
+__license__ = "MIT"
+__version__ = "0.1"
+__maintainer__ = "Daren Thomas"
+__email__ = "cea@arch.ethz.ch"
+__status__ = "Production"
+
+STORE_VERSION = 1
+INDEX_FILE = 'index.json'
+STORE_DTYPE = np.float32
+
+
+def write_hourly_loads_store(locator, building_names):
+    """
+    Collect the hourly demand results (``{building}.csv``) of ``building_names`` into the store. The store is written
+    to a temporary folder first and then replaces the previous store, so readers never see a half-written store.
+
+    :param locator: An InputLocator to locate the demand results
+    :type locator: cea.inputlocator.InputLocator
+    :param building_names: the buildings to include in the store (in this order)
+    :type building_names: list[str]
+    """
+    store_folder = locator.get_demand_hourly_loads_folder()
+    temp_folder = store_folder + '.tmp'
+    if os.path.exists(temp_folder):
+        shutil.rmtree(temp_folder)
+    os.makedirs(temp_folder)
+
+    chunks = {}
+    dates = variables = None
+    for i, building in enumerate(building_names):
+        hourly_df = pd.read_csv(locator.get_demand_results_file(building)).set_index('DATE')
+        if variables is None:
+            dates = list(hourly_df.index)
+            variables = [column for column in hourly_df.columns if column != 'Name']
+            chunks = {variable: np.lib.format.open_memmap(os.path.join(temp_folder, variable + '.npy'), mode='w+',
+                                                          dtype=STORE_DTYPE,
+                                                          shape=(len(building_names), len(dates)))
+                      for variable in variables}
+        hourly_df = hourly_df.reindex(columns=variables)
+        for variable in variables:
+            chunks[variable][i, :] = hourly_df[variable].values
+    for chunk in chunks.values():
+        chunk.flush()
+    del chunks
+
+    with open(os.path.join(temp_folder, INDEX_FILE), 'w') as index_fp:
+        json.dump({'version': STORE_VERSION, 'buildings': list(building_names), 'dates': dates or [],
+                   'variables': variables or []}, index_fp)
+
+    if os.path.exists(store_folder):
+        shutil.rmtree(store_folder)
+    os.rename(temp_folder, store_folder)
+
+
+class HourlyLoadsStore(object):
+    """Read access to the store written by :py:func:`write_hourly_loads_store`"""
+
+    def __init__(self, store_folder):
+        self.store_folder = store_folder
+        with open(os.path.join(store_folder, INDEX_FILE), 'r') as index_fp:
+            index = json.load(index_fp)
+        if index.get('version') != STORE_VERSION:
+            raise ValueError('Unknown version of the hourly loads store: {folder}'.format(folder=store_folder))
+        self.buildings = index['buildings']
+        self.dates = pd.Index(index['dates'], name='DATE')
+        self.variables = index['variables']
+        self._building_rows = {building: row for row, building in enumerate(self.buildings)}
+
+    @classmethod
+    def open(cls, locator, buildings):
+        """
+        Return the store of the scenario if it contains ``buildings`` and none of their ``{building}.csv`` files
+        changed since the store was written - else ``None`` (the csv files should be read instead).
+        """
+        store_folder = locator.get_demand_hourly_loads_folder()
+        index_file = os.path.join(store_folder, INDEX_FILE)
+        try:
+            store = cls(store_folder)
+            store_time = os.path.getmtime(index_file)
+            if not all(building in store._building_rows
+                       and os.path.getmtime(locator.get_demand_results_file(building)) <= store_time
+                       for building in buildings):
+                return None
+        except (IOError, OSError, ValueError, KeyError):
+            return None
+        return store
+
+    def read(self, variable, buildings):
+        """Return the hourly values of ``variable`` for ``buildings`` as an array (buildings x hours)"""
+        chunk = np.load(os.path.join(self.store_folder, variable + '.npy'), mmap_mode='r')
+        rows = [self._building_rows[building] for building in buildings]
+        return np.asarray(chunk[rows, :], dtype=np.float64)
+
+    def sum(self, variables, buildings):
+        """Return the hourly values of ``variables``, summed up for ``buildings``, as a DataFrame indexed by DATE"""
+        return pd.DataFrame({variable: self.read(variable, buildings).sum(axis=0) for variable in variables},
+                            index=self.dates, columns=variables)
+
+    def read_building(self, building):
+        """Return the hourly demand results of a single building - the same data as ``{building}.csv``, indexed by
+        DATE"""
+        building_df = pd.DataFrame({variable: self.read(variable, [building])[0] for variable in self.variables},
+                                   index=self.dates, columns=self.variables)
+        building_df.insert(0, 'Name', building)
+        return building_df
@@ -17,12 +17,12 @@ from cea.demand import sensible_loads, electrical_loads, hotwater_loads, refrige
 from cea.demand import ventilation_air_flows_detailed, control_heating_cooling_systems
 from cea.demand.building_properties import get_thermal_resistance_surface
 from cea.demand.latent_loads import convert_rh_to_moisture_content
-from cea.utilities import reporting
+from cea.utilities import profiling, reporting
 
 
 def calc_thermal_loads(building_name, bpr, weather_data, date_range, locator,
                        use_dynamic_infiltration_calculation, resolution_outputs, loads_output, massflows_output,
-                       temperatures_output, config, debug):
+                       temperatures_output, config, debug, typical_days=None):
     """
     Calculate thermal loads of a single building with mechanical or natural ventilation.
     Calculation procedure follows the methodology of ISO 13790
@@ -68,11 +68,17 @@ def calc_thermal_loads(building_name, bpr, weather_data, date_range, locator,
     :param locator:
     :param use_dynamic_infiltration_calculation:
 
+    :param typical_days: only simulate the heating and cooling loads of these days and reconstruct the rest of the year
+        from them (for screening, see :py:mod:`cea.utilities.typical_days`) - ``None`` simulates the whole year
+    :type typical_days: cea.utilities.typical_days.TypicalDays
+
     :returns: This function does not return anything
     :rtype: NoneType
 
 """
+    timer = profiling.StageTimer(building_name)
     schedules, tsd = initialize_inputs(bpr, weather_data, locator)
+    timer.lap("read inputs")
 
     # CALCULATE ELECTRICITY LOADS
     tsd = electrical_loads.calc_Eal_Epro(tsd, schedules)
@@ -101,6 +107,7 @@ def calc_thermal_loads(building_name, bpr, weather_data, date_range, locator,
         tsd['DC_cdata'] = tsd['Qcdata_sys'] = tsd['Qcdata'] = np.zeros(HOURS_IN_YEAR)
         tsd['mcpcdata_sys'] = tsd['Tcdata_sys_re'] = tsd['Tcdata_sys_sup'] = np.zeros(HOURS_IN_YEAR)
         tsd['Edata'] = tsd['E_cdata'] = np.zeros(HOURS_IN_YEAR)
+    timer.lap("internal loads")
 
     # CALCULATE SPACE CONDITIONING DEMANDS
     if np.isclose(bpr.rc_model['Af'], 0.0):  # if building does not have conditioned area
@@ -117,9 +124,12 @@ def calc_thermal_loads(building_name, bpr, weather_data, date_range, locator,
         # calculate heat gains
         tsd = latent_loads.calc_Qgain_lat(tsd, schedules)
         tsd = calc_set_points(bpr, date_range, tsd, building_name, config, locator,
-                              schedules)  # calculate the setpoints for every hour
+                              schedules, typical_days)  # calculate the setpoints for every hour
+        timer.lap("set points")
         tsd = calc_Qhs_Qcs(bpr, tsd,
-                           use_dynamic_infiltration_calculation, config)  # end-use demand latent and sensible + ventilation
+                           use_dynamic_infiltration_calculation, config,
+                           typical_days)  # end-use demand latent and sensible + ventilation
+        timer.lap("RC loop")
         tsd = sensible_loads.calc_Qhs_Qcs_loss(bpr, tsd)  # losses
         tsd = sensible_loads.calc_Qhs_sys_Qcs_sys(tsd)  # system (incl. losses)
         tsd = sensible_loads.calc_temperatures_emission_systems(bpr, tsd)  # calculate temperatures
@@ -157,10 +167,12 @@ def calc_thermal_loads(building_name, bpr, weather_data, date_range, locator,
     tsd = electrical_loads.calc_Eaux(tsd)  # auxiliary totals
     tsd = electrical_loads.calc_E_sys(tsd)  # system (incl. losses)
     tsd = electrical_loads.calc_Ef(bpr, tsd)  # final (incl. self. generated)
+    timer.lap("HVAC")
 
     # WRITE SOLAR RESULTS
     write_results(bpr, building_name, date_range, loads_output, locator, massflows_output,
                   resolution_outputs, temperatures_output, tsd, debug)
+    timer.lap("writing")
 
     return
 
@@ -300,23 +312,34 @@ def calc_Qhs_sys(bpr, tsd):
     return tsd
 
 
-def calc_set_points(bpr, date, tsd, building_name, config, locator, schedules):
+def calc_set_points(bpr, date, tsd, building_name, config, locator, schedules, typical_days=None):
     # get internal comfort properties
     tsd = control_heating_cooling_systems.get_temperature_setpoints_incl_seasonality(tsd, bpr, schedules)
 
-    t_prev = next(get_hours(bpr)) - 1
-    tsd['T_int'][t_prev] = tsd['T_ext'][t_prev]
-    tsd['x_int'][t_prev] = latent_loads.convert_rh_to_moisture_content(tsd['rh_ext'][t_prev], tsd['T_ext'][t_prev])
+    if typical_days is None:
+        start_hours = [next(get_hours(bpr))]
+    else:
+        start_hours = [start for start, _ in typical_days.simulation_periods()]
+    for t_start in start_hours:
+        t_prev = t_start - 1
+        tsd['T_int'][t_prev] = tsd['T_ext'][t_prev]
+        tsd['x_int'][t_prev] = latent_loads.convert_rh_to_moisture_content(tsd['rh_ext'][t_prev],
+                                                                           tsd['T_ext'][t_prev])
     return tsd
 
 
-def calc_Qhs_Qcs(bpr, tsd, use_dynamic_infiltration_calculation, config):
+def calc_Qhs_Qcs(bpr, tsd, use_dynamic_infiltration_calculation, config, typical_days=None):
     # get ventilation flows
     ventilation_air_flows_simple.calc_m_ve_required(tsd)
     ventilation_air_flows_simple.calc_m_ve_leakage_simple(bpr, tsd)
 
     # end-use demand calculation
-    for t in get_hours(bpr):
+    if typical_days is None:
+        hours = get_hours(bpr)
+    else:
+        hours = typical_days.simulation_hours()
+        tsd_before_rc_loop = {key: np.array(value) for key, value in tsd.items() if is_hourly(value)}
+    for t in hours:
 
         # heat flows in [W]
         tsd = sensible_loads.calc_Qgain_sen(t, tsd, bpr)
@@ -341,9 +364,35 @@ def calc_Qhs_Qcs(bpr, tsd, use_dynamic_infiltration_calculation, config):
         hourly_procedure_heating_cooling_system_load.calc_heating_cooling_loads(bpr, tsd, t, config)
 
         # END OF FOR LOOP
+    if typical_days is not None:
+        tsd = expand_typical_days(tsd, typical_days, tsd_before_rc_loop)
     return tsd
 
 
+def expand_typical_days(tsd, typical_days, tsd_before_rc_loop):
+    """
+    Reconstruct the values of the whole year calculated by the RC loop from the hours of the typical days. The values
+    calculated by the RC loop are those that changed in the simulated hours (compared to ``tsd_before_rc_loop``), the
+    other values of the time step data are already calculated for the whole year and are kept.
+    """
+    hours = typical_days.simulation_hours()
+
+    def is_rc_loop_output(key, value):
+        if not is_hourly(value):
+            return False
+        if key not in tsd_before_rc_loop:
+            return True
+        value = np.asarray(value)
+        return not np.array_equal(value[hours], tsd_before_rc_loop[key][hours], equal_nan=value.dtype.kind in 'fc')
+
+    return {key: typical_days.expand(value) if is_rc_loop_output(key, value) else value
+            for key, value in tsd.items()}
+
+
+def is_hourly(value):
+    return len(np.shape(value)) == 1 and len(value) == HOURS_IN_YEAR
+
+
 def initialize_inputs(bpr, weather_data, locator):
     """
     :param bpr: a collection of building properties for the building used for thermal loads calculation
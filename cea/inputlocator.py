@@ -2,11 +2,14 @@
 inputlocator.py - locate input files by name based on the reference folder structure.
 """
 
+import collections
+import functools
 import os
 import cea.schemas
 import shutil
 import tempfile
 import time
+import types
 
 __author__ = "Daren Thomas"
 __copyright__ = "Copyright 2017, Architecture and Building Systems - ETH Zurich"
@@ -36,40 +39,50 @@ class InputLocator(object):
 
         self._temp_directory = tempfile.TemporaryDirectory()
 
-    def __getstate__(self):
-        """Make sure we can pickle an InputLocator..."""
-        return {
-            "scenario": self.scenario,
-            "db_path": self.db_path,
-            "weather_path": self.weather_path,
-            "plugins": [str(p) for p in self.plugins],
-            "_temp_directory": self._temp_directory
-        }
+    def __reduce__(self):
+        """
+        Pickle an InputLocator as just the scenario, the paths, the plugin names and the temporary folder.
+        Unpickling is done by :py:func:`restore_locator`, which re-uses the locator restored from the same state
+        in this process - so ``repeat(locator, n)`` only instantiates the plugins once per worker process.
+
+        NOTE: the locators unpickled from the same state are the same object - changing an attribute of one (e.g.
+        ``scenario``) changes it for all the others. Use ``copy.copy`` or ``copy.deepcopy`` to get a locator that can
+        be changed.
+        """
+        return restore_locator, (self.__class__, self.scenario, self.db_path, self.weather_path,
+                                 tuple(str(p) for p in self.plugins), self._temp_directory)
 
-    def __setstate__(self, state):
-        from cea.plugin import instantiate_plugin
+    def __copy__(self):
+        """A copy is always a new locator (unpickling may return a locator shared with other unpickled copies)"""
+        return _new_locator(self.__class__, self.scenario, self.db_path, self.weather_path,
+                            tuple(str(p) for p in self.plugins), self._temp_directory)
 
-        self.scenario = state["scenario"]
-        self.db_path = state["db_path"]
-        self.weather_path = state["weather_path"]
-        self.plugins = [instantiate_plugin(plugin_fqname) for plugin_fqname in state["plugins"]]
-        self._wrap_locator_methods(self.plugins)
+    def __deepcopy__(self, memo):
+        return self.__copy__()
 
-        self._temp_directory = state["_temp_directory"]
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        _make_locator_methods_lazy(cls)
 
     def _wrap_locator_methods(self, plugins):
         """
-        For each locator method defined in schemas.yml, wrap it in a callable object (preserving the
-        original interface) that allows for read() and write() operations.
+        Remember the schemas for the locator methods. Each locator method defined in schemas.yml is wrapped in a
+        callable object (preserving the original interface) that allows for read() and write() operations - the
+        first time it is accessed (see :py:class:`LazySchemaIo` and :py:meth:`__getattr__`).
         """
-        schemas = cea.schemas.schemas(plugins)
-        for lm in schemas.keys():
-            if hasattr(self, lm):
-                # allow cea.inputlocator.InputLocator to define locator methods
-                setattr(self, lm, cea.schemas.create_schema_io(self, lm, schemas[lm], getattr(self.__class__, lm)))
-            else:
-                # create locator methods based on schemas if not overriden in InputLocator
-                setattr(self, lm, cea.schemas.create_schema_io(self, lm, schemas[lm]))
+        self._schemas = cea.schemas.schemas(plugins)
+
+    def __getattr__(self, lm):
+        """Create locator methods based on schemas if not defined in InputLocator"""
+        schemas = self.__dict__.get("_schemas", {})
+        if lm not in schemas:
+            raise AttributeError("'{cls}' object has no attribute '{lm}'".format(cls=self.__class__.__name__, lm=lm))
+        schema_io = cea.schemas.create_schema_io(self, lm, schemas[lm])
+        setattr(self, lm, schema_io)
+        return schema_io
+
+    def __dir__(self):
+        return sorted(set(super().__dir__()) | set(self.__dict__.get("_schemas", {}).keys()))
 
     @staticmethod
     def _ensure_folder(*components):
@@ -234,6 +247,12 @@ class InputLocator(object):
         return os.path.join(self.get_optimization_slave_generation_results_folder(gen_num),
                             'gen_%(gen_num)s_total_performance.csv' % locals())
 
+    def get_optimization_generation_results_store(self, gen_num):
+        """scenario/outputs/data/optimization/slave/gen_{gen_num}/gen_{gen_num}_results.sqlite - the results of all the
+        individuals of a generation, see :py:mod:`cea.optimization.result_store`"""
+        return os.path.join(self.get_optimization_slave_generation_results_folder(gen_num),
+                            'gen_%(gen_num)s_results.sqlite' % locals())
+
     def get_optimization_generation_total_performance_pareto(self, gen_num):
         """scenario/outputs/data/calibration/clustering/checkpoints/..."""
         return os.path.join(self.get_optimization_slave_generation_results_folder(gen_num),
@@ -308,6 +327,18 @@ class InputLocator(object):
         return os.path.join(self.get_optimization_network_results_folder(),
                             network_type + "_all_individuals.csv")
 
+    def get_optimization_network_archive(self, network_type):
+        """scenario/outputs/data/optimization/network/DC_archive.sqlite
+        Costs of all the networks evaluated by the thermal network optimization and the population of each generation
+        """
+        return os.path.join(self.get_optimization_network_results_folder(), network_type + "_archive.sqlite")
+
+    def get_optimization_network_worker_folder(self):
+        """scenario/outputs/data/optimization/network/workers/{pid}
+        Scratch folder for the thermal network simulations of a worker process of the thermal network optimization
+        """
+        return self._ensure_folder(self.get_optimization_network_results_folder(), "workers", str(os.getpid()))
+
     def get_optimization_decentralized_folder(self):
         """scenario/outputs/data/optimization/decentralized
         Operation pattern for decentralized buildings"""
@@ -902,6 +933,11 @@ class InputLocator(object):
         """scenario/outputs/data/solar-radiation/{building}_geometrgy.csv"""
         return os.path.join(self.get_solar_radiation_folder(), 'buidling_materials.csv')
 
+    def get_radiation_fingerprints(self):
+        """scenario/outputs/data/solar-radiation/radiation_fingerprints.sqlite - the inputs of the last radiation
+        calculation of each building, see :py:mod:`cea.resources.radiation_daysim.radiation_fingerprints`"""
+        return os.path.join(self.get_solar_radiation_folder(), 'radiation_fingerprints.sqlite')
+
     def solar_potential_folder(self):
         return self._ensure_folder(self.scenario, 'outputs', 'data', 'potentials', 'solar')
 
@@ -968,6 +1004,62 @@ class InputLocator(object):
         """scenario/outputs/data/demand/{building}.csv"""
         return os.path.join(self.get_demand_results_folder(), '%(building)s.%(format)s' % locals())
 
+    def get_demand_fingerprints(self):
+        """scenario/outputs/data/demand/demand_fingerprints.sqlite - the inputs of the last demand calculation of each
+        building, see :py:mod:`cea.demand.demand_fingerprints`"""
+        return os.path.join(self.get_demand_results_folder(), 'demand_fingerprints.sqlite')
+
+    def get_demand_hourly_loads_folder(self):
+        """scenario/outputs/data/demand/hourly_loads - the hourly results of all buildings, see
+        :py:mod:`cea.demand.hourly_loads_store`"""
+        return os.path.join(self.get_demand_results_folder(), 'hourly_loads')
+
+    def get_demand_surrogate_model(self):
+        """scenario/outputs/data/demand/demand_surrogate_model.json - the surrogate of the demand model trained on the
+        demand results of the scenario, see :py:mod:`cea.demand.demand_surrogate`"""
+        return os.path.join(self.get_demand_results_folder(), 'demand_surrogate_model.json')
+
+    def get_demand_surrogate_validation(self):
+        """scenario/outputs/data/demand/demand_surrogate_validation.csv - the cross validation of the surrogate of the
+        demand model"""
+        return os.path.join(self.get_demand_results_folder(), 'demand_surrogate_validation.csv')
+
+    def get_demand_surrogate_totals(self):
+        """scenario/outputs/data/demand/Total_demand_surrogate.csv - the yearly demand of the buildings predicted by the
+        surrogate of the demand model"""
+        return os.path.join(self.get_demand_results_folder(), 'Total_demand_surrogate.csv')
+
+    def get_demand_surrogate_monthly(self):
+        """scenario/outputs/data/demand/monthly_demand_surrogate.csv - the monthly demand of the buildings predicted by
+        the surrogate of the demand model"""
+        return os.path.join(self.get_demand_results_folder(), 'monthly_demand_surrogate.csv')
+
+    def get_demand_typical_days(self):
+        """scenario/outputs/data/demand/typical_days.csv - the typical day representing each day of the year when the
+        demand is simulated for typical days, see :py:mod:`cea.utilities.typical_days`"""
+        return os.path.join(self.get_demand_results_folder(), 'typical_days.csv')
+
+    def get_demand_typical_days_errors(self):
+        """scenario/outputs/data/demand/typical_days_errors.csv - the error of the yearly results of the typical days
+        compared to the full year"""
+        return os.path.join(self.get_demand_results_folder(), 'typical_days_errors.csv')
+
+    # TIMING
+    def get_timing_folder(self):
+        """scenario/outputs/data/timing"""
+        return self._ensure_folder(self.scenario, 'outputs', 'data', 'timing')
+
+    def get_timing_file(self, script):
+        """scenario/outputs/data/timing/{script}_timing.csv"""
+        return os.path.join(self.get_timing_folder(), '%(script)s_timing.csv' % locals())
+
+    # WORKFLOW
+    def get_workflow_step_hashes(self):
+        """scenario/outputs/data/workflow/workflow_step_hashes.sqlite - the inputs and outputs of the workflow steps run
+        on the scenario, see :py:mod:`cea.workflows.workflow`"""
+        return os.path.join(self._ensure_folder(self.scenario, 'outputs', 'data', 'workflow'),
+                            'workflow_step_hashes.sqlite')
+
     # EMISSIONS
     def get_lca_emissions_results_folder(self):
         """scenario/outputs/data/emissions"""
@@ -1031,6 +1123,72 @@ class InputLocator(object):
         return os.path.join(self.get_temporary_folder(), filename)
 
 
+class LazySchemaIo(object):
+    """
+    Wraps a locator method defined in InputLocator. The first time the method is accessed on a locator, it is
+    replaced (for that locator only) by the SchemaIo created from its entry in schemas.yml - or just returned as a
+    normal bound method if schemas.yml doesn't describe it.
+    """
+
+    def __init__(self, function):
+        self.function = function
+        functools.update_wrapper(self, function)
+
+    def __get__(self, locator, owner=None):
+        if locator is None:
+            # allow accessing the original function through the class (e.g. ``InputLocator.get_zone_geometry``)
+            return self.function
+        lm = self.function.__name__
+        schemas = locator.__dict__.get("_schemas", {})
+        if lm not in schemas:
+            return types.MethodType(self.function, locator)
+        schema_io = cea.schemas.create_schema_io(locator, lm, schemas[lm], self.function)
+        locator.__dict__[lm] = schema_io
+        return schema_io
+
+
+def _make_locator_methods_lazy(cls):
+    """Replace the public methods defined in ``cls`` with :py:class:`LazySchemaIo` wrappers"""
+    for name, function in list(vars(cls).items()):
+        if not name.startswith("_") and isinstance(function, types.FunctionType):
+            setattr(cls, name, LazySchemaIo(function))
+
+
+# keep the locators restored by unpickling, so workers can re-use them from task to task - only the most recently used
+# ones are kept, a worker usually works with one or two locators at a time
+MAX_RESTORED_LOCATORS = 4
+__restored_locators = collections.OrderedDict()
+
+
+def restore_locator(cls, scenario, db_path, weather_path, plugins, temp_directory):
+    """
+    Used by ``InputLocator.__reduce__`` to unpickle an InputLocator. The locators unpickled from the same state are
+    shared (treat unpickled locators as read-only), use ``copy.copy`` or ``copy.deepcopy`` to get an independent
+    locator.
+    """
+    key = (cls, scenario, db_path, weather_path, plugins, temp_directory.name)
+    if key in __restored_locators:
+        __restored_locators.move_to_end(key)
+    else:
+        __restored_locators[key] = _new_locator(cls, scenario, db_path, weather_path, plugins, temp_directory)
+        while len(__restored_locators) > MAX_RESTORED_LOCATORS:
+            __restored_locators.popitem(last=False)
+    return __restored_locators[key]
+
+
+def _new_locator(cls, scenario, db_path, weather_path, plugins, temp_directory):
+    from cea.plugin import instantiate_plugin
+
+    locator = cls.__new__(cls)
+    locator.scenario = scenario
+    locator.db_path = db_path
+    locator.weather_path = weather_path
+    locator.plugins = [instantiate_plugin(plugin_fqname) for plugin_fqname in plugins]
+    locator._wrap_locator_methods(locator.plugins)
+    locator._temp_directory = temp_directory
+    return locator
+
+
 def check_cpg(shapefile_path):
     # ensures that the CPG file is the correct one
     if os.path.isfile(shapefile_path):
@@ -1038,6 +1196,9 @@ def check_cpg(shapefile_path):
         ensure_cpg_file(shapefile_path)
 
 
+_make_locator_methods_lazy(InputLocator)
+
+
 class ReferenceCaseOpenLocator(InputLocator):
     """This is a special InputLocator that extracts the builtin reference case
     (``cea/examples/reference-case-open.zip``) to the temporary folder and uses the baseline scenario in there"""
@@ -13,6 +13,7 @@ import importlib
 import datetime
 import cea.config
 import cea.scripts
+import cea.utilities.profiling
 import cea
 from typing import List
 
@@ -53,6 +54,9 @@ def main(config=None):
     if args[0].lower() == '--version':
         print('City Energy Analyst version %s' % cea.__version__)
         sys.exit(0)
+    if args[0].lower() == '--profile-startup':
+        profile_startup(config, args[1:])
+        sys.exit(0)
     script_name = args.pop(0)
     cea_script = cea.scripts.by_name(script_name, config.plugins)
     config.restrict_to(cea_script.parameters)
@@ -69,7 +73,8 @@ def main(config=None):
 
     script_module = importlib.import_module(cea_script.module)
     try:
-        script_module.main(config)
+        with cea.utilities.profiling.profile_script(cea_script.name, config):
+            script_module.main(config)
         print("Execution time: %.2fs" % (datetime.datetime.now() - t0).total_seconds())
     except cea.ConfigError as config_error:
         print('ERROR: %s' % config_error)
@@ -104,9 +109,49 @@ def print_help(config, remaining_args):
         print("       to run a specific script")
         print("usage: cea --help SCRIPT")
         print("       to get additional help specific to a script")
+        print("usage: cea --profile-startup [SCRIPT]")
+        print("       to show the time it takes to import the cea (and SCRIPT)")
         print_valid_script_names(config.plugins)
 
 
+def profile_startup(config, remaining_args, top=30):
+    """
+    Print the time it takes to import the ``cea`` command line interface (and the module of the script in
+    ``remaining_args``, if given) in a fresh python interpreter, along with the modules that take the longest to
+    import. Use this to make sure heavy libraries (pandas, geopandas, plotly, ...) are only imported by the scripts that
+    need them.
+    """
+    import subprocess
+    modules = ['cea.interfaces.cli.cli']
+    if remaining_args:
+        modules.append(cea.scripts.by_name(remaining_args[0], config.plugins).module)
+    process = subprocess.run([sys.executable, '-X', 'importtime', '-c', '; '.join('import ' + m for m in modules)],
+                             stderr=subprocess.PIPE, universal_newlines=True)
+    import_times = parse_import_times(process.stderr)
+    total_us = sum(self_us for _, self_us, _ in import_times)
+
+    print("Startup time for importing %s: %.3fs (%i modules)" % (', '.join(modules), total_us / 1e6,
+                                                                  len(import_times)))
+    print("")
+    print("%10s %10s  %s" % ("self [s]", "total [s]", "module"))
+    for module, self_us, cumulative_us in sorted(import_times, key=lambda t: t[2], reverse=True)[:top]:
+        print("%10.3f %10.3f  %s" % (self_us / 1e6, cumulative_us / 1e6, module))
+
+
+def parse_import_times(importtime_output):
+    """
+    Parse the output of ``python -X importtime`` to a list of tuples (module, self [us], cumulative [us]). The
+    module names keep their indentation, which shows which module imported them.
+    """
+    import_times = []
+    for line in importtime_output.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, module = line[len('import time:'):].split('|')
+        import_times.append((module.rstrip(), int(self_us), int(cumulative_us)))
+    return import_times
+
+
 def print_valid_script_names(plugins):
     """Print out the list of scripts by category.
 
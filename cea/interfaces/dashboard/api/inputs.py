@@ -229,7 +229,7 @@ def get_building_properties():
                     table_df.set_index('Name').to_json(orient='index'))
             else:
                 assert file_type == 'dbf', 'Unexpected database type: %s' % file_type
-                table_df = cea.utilities.dbf.dbf_to_dataframe(file_path)
+                table_df = cea.utilities.dbf.dbf_to_dataframe(file_path, cache=True)
                 if 'REFERENCE' in db_columns and 'REFERENCE' not in table_df.columns:
                     table_df['REFERENCE'] = None
                 store['tables'][db] = json.loads(
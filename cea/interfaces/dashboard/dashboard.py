@@ -1,3 +1,5 @@
+import os
+
 from flask import Flask
 from flask_cors import CORS
 from flask_socketio import SocketIO
@@ -11,7 +13,9 @@ socketio = None
 
 def main(config):
     config.restricted_to = None  # allow access to the whole config file
-    plot_cache = cea.plots.cache.MemoryPlotCache(config.project)
+    plot_cache = cea.plots.cache.MemoryPlotCache(config.project,
+                                                 max_disk_size_mb=config.server.plot_cache_disk_size,
+                                                 max_memory_size_mb=config.server.plot_cache_memory_size)
     app = Flask(__name__, static_folder='base/static', )
     CORS(app)
     app.config.from_mapping({'SECRET_KEY': 'secret'})
@@ -21,8 +25,26 @@ def main(config):
 
     from cea.interfaces.dashboard.plots.routes import blueprint as plots_blueprint
     from cea.interfaces.dashboard.server import blueprint as server_blueprint
+    from cea.interfaces.dashboard.server.jobs import api as jobs_api, job_info_model
+    from cea.interfaces.dashboard.job_store import JobStore, WorkerPool
     from cea.interfaces.dashboard.api import blueprint as api_blueprint
 
+    job_store = JobStore(config.server.job_store or os.path.join(os.path.dirname(cea.config.CEA_CONFIG),
+                                                                 'cea-jobs.sqlite'),
+                         max_output_size_kb=config.server.job_output_size,
+                         max_jobs=config.server.job_history)
+    job_store.recover()
+
+    def on_output(jobid, msg):
+        job_store.append_output(jobid, msg)
+        socketio.emit("cea-worker-message", {"message": msg, "jobid": jobid})
+
+    worker_pool = WorkerPool(job_store, config.server.max_workers,
+                             on_worker_died=lambda job: socketio.emit("cea-worker-error",
+                                                                      jobs_api.marshal(job, job_info_model)),
+                             on_output=on_output, transport=config.server.worker_transport,
+                             sleep=socketio.sleep)
+
     app.register_blueprint(plots_blueprint)
     app.register_blueprint(api_blueprint)
     app.register_blueprint(server_blueprint)
@@ -31,6 +53,11 @@ def main(config):
     app.cea_config = config
     app.plot_cache = plot_cache
     app.socketio = socketio
+    app.job_store = job_store
+    app.worker_pool = worker_pool
+
+    # start the jobs queued before a restart and notice workers that die without reporting back
+    socketio.start_background_task(worker_pool.watch, socketio.sleep)
 
     print("start socketio.run")
     socketio.run(app, host=config.server.host, port=config.server.port)
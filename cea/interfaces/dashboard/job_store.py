@@ -0,0 +1,341 @@
+"""
+job_store: keep the jobs of the dashboard and their output in a SQLite database, so they survive a restart of the
+server, and run them with a bounded pool of ``cea-worker`` processes.
+
+Jobs that are started are queued and run by the :py:class:`WorkerPool` in order of their priority (highest first) and
+then in the order they were submitted, with at most ``server:max-workers`` running at the same time. The output of each
+job is capped at ``server:job-output-size`` - the oldest output is dropped first - and only the last
+``server:job-history`` finished jobs are kept.
+"""
+
+import codecs
+import json
+import os
+import sqlite3
+import subprocess
+import sys
+import threading
+import time
+
+import psutil
+
+from cea.worker import StreamBatcher, TRANSPORT_PIPE, start_thread
+
+__author__ = "Daren Thomas"
+__copyright__ = "Copyright 2021, Architecture and Building Systems - ETH Zurich"
+__credits__ = ["Daren Thomas"]
+__license__ = "MIT"
+__version__ = "0.1"
+__maintainer__ = "Daren Thomas"
+__email__ = "cea@arch.ethz.ch"
+__status__ = "Production"
+
+# Job states
+JOB_STATE_PENDING = 0
+JOB_STATE_STARTED = 1
+JOB_STATE_SUCCESS = 2
+JOB_STATE_ERROR = 3
+JOB_STATE_CANCELED = 4
+
+FINISHED_STATES = (JOB_STATE_SUCCESS, JOB_STATE_ERROR, JOB_STATE_CANCELED)
+
+# how long to wait for the rest of the output of a worker that reported the end of its job (pipe transport)
+OUTPUT_FLUSH_TIMEOUT = 5.0
+
+TRUNCATED_OUTPUT_MESSAGE = "[... older output was dropped ...]\n"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    script TEXT NOT NULL,
+    parameters TEXT,
+    state INTEGER NOT NULL,
+    error TEXT,
+    priority INTEGER NOT NULL DEFAULT 0,
+    queued INTEGER NOT NULL DEFAULT 0,
+    created REAL,
+    finished REAL,
+    output_size INTEGER NOT NULL DEFAULT 0,
+    output_truncated INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS output (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    jobid INTEGER NOT NULL,
+    message TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS output_jobid ON output (jobid);
+"""
+
+
+class JobInfo(object):
+    """Store all the information required to run a job"""
+    def __init__(self, id, script, parameters, state=JOB_STATE_PENDING, error=None, priority=0):
+        self.id = id
+        self.script = script
+        self.parameters = parameters
+        self.state = state
+        self.error = error
+        self.priority = priority
+
+    def __repr__(self):
+        return "<JobInfo(id={id}, script={script}, state={state}>".format(**self.__dict__)
+
+
+class JobStore(object):
+    """The jobs and their output, stored in a SQLite database at ``path``. All methods are thread-safe."""
+
+    def __init__(self, path, max_output_size_kb=1024, max_jobs=500):
+        self.path = path
+        self.max_output_size = max_output_size_kb * 1024
+        self.max_jobs = max_jobs
+        self._lock = threading.RLock()
+        self._connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.executescript(SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+    def _execute(self, sql, parameters=()):
+        with self._lock:
+            return self._connection.execute(sql, parameters).fetchall()
+
+    @staticmethod
+    def _job_info(row):
+        id, script, parameters, state, error, priority = row
+        return JobInfo(id=id, script=script, parameters=json.loads(parameters) if parameters else None, state=state,
+                       error=error, priority=priority)
+
+    def new_job(self, script, parameters, priority=0):
+        """Add a new (pending) job and return its ``JobInfo``"""
+        with self._lock:
+            cursor = self._connection.execute(
+                "INSERT INTO jobs (script, parameters, state, priority, created) VALUES (?, ?, ?, ?, ?)",
+                (script, json.dumps(parameters), JOB_STATE_PENDING, priority or 0, time.time()))
+            jobid = cursor.lastrowid
+            self._prune_history()
+        return self.get(jobid)
+
+    def get(self, jobid):
+        """Return the ``JobInfo`` of the job - raises a ``KeyError`` for unknown jobs"""
+        rows = self._execute("SELECT id, script, parameters, state, error, priority FROM jobs WHERE id = ?", (jobid,))
+        if not rows:
+            raise KeyError(jobid)
+        return self._job_info(rows[0])
+
+    def list(self):
+        return [self._job_info(row) for row in
+                self._execute("SELECT id, script, parameters, state, error, priority FROM jobs ORDER BY id")]
+
+    def set_state(self, jobid, state, error=None):
+        """Update the state of the job - jobs that are finished are no longer queued"""
+        finished = time.time() if state in FINISHED_STATES else None
+        self._execute("UPDATE jobs SET state = ?, error = ?, finished = ?, queued = queued AND ? WHERE id = ?",
+                      (state, error, finished, finished is None, jobid))
+        return self.get(jobid)
+
+    def queue(self, jobid, priority=None):
+        """Queue the job to be run by the ``WorkerPool``"""
+        if priority is None:
+            self._execute("UPDATE jobs SET queued = 1 WHERE id = ?", (jobid,))
+        else:
+            self._execute("UPDATE jobs SET queued = 1, priority = ? WHERE id = ?", (priority, jobid))
+
+    def next_queued(self, running=()):
+        """Return the ``JobInfo`` of the next job to run (or ``None`` if the queue is empty). Jobs stay queued until
+        they are finished - ``running`` are the ids of queued jobs that already have a worker."""
+        running = list(running)
+        rows = self._execute("SELECT id, script, parameters, state, error, priority FROM jobs "
+                             "WHERE queued = 1 AND state = ? AND id NOT IN ({running}) "
+                             "ORDER BY priority DESC, id LIMIT 1".format(running=", ".join("?" * len(running))),
+                             [JOB_STATE_PENDING] + running)
+        return self._job_info(rows[0]) if rows else None
+
+    def recover(self):
+        """
+        Called when the server starts: jobs that were running when the server stopped are marked as errors. Queued
+        jobs that had not started yet stay in the queue.
+        """
+        self._execute("UPDATE jobs SET state = ?, error = ?, finished = ?, queued = 0 WHERE state = ?",
+                      (JOB_STATE_ERROR, "Interrupted by a restart of the server", time.time(), JOB_STATE_STARTED))
+
+    def append_output(self, jobid, message):
+        """Append a message to the output of a job, dropping the oldest output if it grows beyond the limit"""
+        with self._lock:
+            self._connection.execute("INSERT INTO output (jobid, message) VALUES (?, ?)", (jobid, message))
+            self._connection.execute("UPDATE jobs SET output_size = output_size + ? WHERE id = ?",
+                                     (len(message), jobid))
+            rows = self._connection.execute("SELECT output_size FROM jobs WHERE id = ?", (jobid,)).fetchall()
+            if rows and rows[0][0] > self.max_output_size:
+                self._rotate_output(jobid, rows[0][0])
+
+    def _rotate_output(self, jobid, output_size):
+        """Delete the oldest messages of the job until its output fits into ``max_output_size``"""
+        to_delete = []
+        for id, size in self._connection.execute("SELECT id, length(message) FROM output WHERE jobid = ? ORDER BY id",
+                                                 (jobid,)):
+            if output_size <= self.max_output_size:
+                break
+            to_delete.append((id,))
+            output_size -= size
+        self._connection.executemany("DELETE FROM output WHERE id = ?", to_delete)
+        self._connection.execute("UPDATE jobs SET output_size = ?, output_truncated = 1 WHERE id = ?",
+                                 (output_size, jobid))
+
+    def read_output(self, jobid):
+        with self._lock:
+            truncated = self._connection.execute("SELECT output_truncated FROM jobs WHERE id = ?",
+                                                 (jobid,)).fetchall()
+            messages = [message for message, in self._connection.execute(
+                "SELECT message FROM output WHERE jobid = ? ORDER BY id", (jobid,))]
+        if truncated and truncated[0][0]:
+            messages.insert(0, TRUNCATED_OUTPUT_MESSAGE)
+        return ''.join(messages)
+
+    def _prune_history(self):
+        """Delete the oldest finished jobs (and their output) beyond ``max_jobs``"""
+        old_jobs = self._connection.execute(
+            "SELECT id FROM jobs WHERE state IN (?, ?, ?) ORDER BY id DESC LIMIT -1 OFFSET ?",
+            FINISHED_STATES + (self.max_jobs,)).fetchall()
+        self._connection.executemany("DELETE FROM output WHERE jobid = ?", old_jobs)
+        self._connection.executemany("DELETE FROM jobs WHERE id = ?", old_jobs)
+
+
+class WorkerPool(object):
+    """
+    Run the queued jobs of a ``JobStore`` with at most ``number_of_workers`` ``cea-worker`` processes at the same time.
+    Call :py:meth:`schedule` whenever a job is queued or finished, and regularly to notice worker processes that died
+    without reporting back (see :py:meth:`watch`).
+    """
+
+    def __init__(self, store, number_of_workers, on_worker_died=None, on_output=None, transport=TRANSPORT_PIPE,
+                 sleep=time.sleep):
+        """
+        :param on_worker_died: called with the ``JobInfo`` of a job whose worker process exited without reporting the
+                               success or failure of the job
+        :param on_output: called with the jobid and the output of the job (in batches) for the "pipe" transport
+        :param transport: "pipe" to read the output of the workers from their STDOUT or "http" to let the workers post
+                          their output to the /server/streams/ api (see :py:mod:`cea.worker`)
+        :param sleep: used to wait for the output of a finished job without blocking the server - the server passes
+                      ``socketio.sleep``. The output itself is read in OS threads (see :py:func:`cea.worker.start_thread`)
+        """
+        self.store = store
+        self.number_of_workers = max(1, number_of_workers)
+        self.on_worker_died = on_worker_died
+        self.on_output = on_output
+        self.transport = transport
+        self.sleep = sleep
+        self.worker_processes = {}  # jobid -> subprocess.Popen
+        self.output_readers = {}  # jobid -> thread reading the output of the worker (pipe transport)
+        self._lock = threading.RLock()
+
+    def submit(self, jobid, priority=None):
+        """Queue the job and start it if a worker is free"""
+        self.store.queue(jobid, priority)
+        self.schedule()
+
+    def schedule(self):
+        """Start queued jobs until all workers are busy"""
+        with self._lock:
+            self.reap()
+            while len(self.worker_processes) < self.number_of_workers:
+                job = self.store.next_queued(running=self.worker_processes.keys())
+                if job is None:
+                    break
+                print("starting cea-worker for job {jobid} ({script})".format(jobid=job.id, script=job.script))
+                self.worker_processes[job.id] = self.start_worker(job.id)
+
+    def start_worker(self, jobid):
+        """Start a ``cea-worker`` subprocess for the job. (FUTURE: add support for cloud-based workers)"""
+        if self.transport != TRANSPORT_PIPE:
+            return subprocess.Popen(self.worker_command(jobid))
+
+        # unbuffered, so the output arrives while the job runs - batching is done by read_output
+        env = dict(os.environ, PYTHONIOENCODING="utf-8")
+        popen = subprocess.Popen(self.worker_command(jobid), stdout=subprocess.PIPE, stderr=subprocess.STDOUT, env=env)
+        self.output_readers[jobid] = start_thread(self.read_output, jobid, popen.stdout)
+        return popen
+
+    def worker_command(self, jobid):
+        """The command line of the ``cea-worker`` process of the job"""
+        if self.transport != TRANSPORT_PIPE:
+            return [sys.executable, "-m", "cea.worker", "{jobid}".format(jobid=jobid)]
+        return [sys.executable, "-u", "-m", "cea.worker", "--transport", TRANSPORT_PIPE, "{jobid}".format(jobid=jobid)]
+
+    def read_output(self, jobid, pipe):
+        """Pass the output of a worker process (including its child processes) to ``on_output`` in batches"""
+        batcher = StreamBatcher(lambda msg: self.on_output(jobid, msg) if self.on_output else None)
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        try:
+            for chunk in iter(lambda: os.read(pipe.fileno(), 64 * 1024), b""):
+                batcher.write(decoder.decode(chunk))
+            batcher.write(decoder.decode(b"", final=True))
+        finally:
+            batcher.close()
+            pipe.close()
+
+    def finished(self, jobid):
+        """The worker of the job reported back - wait for the rest of its output and make room for the next job"""
+        self.flush_output(jobid)
+        with self._lock:
+            self.worker_processes.pop(jobid, None)
+        self.schedule()
+
+    def flush_output(self, jobid, timeout=OUTPUT_FLUSH_TIMEOUT):
+        """Wait until all the output of the worker was passed to ``on_output`` - the worker closes its STDOUT before
+        reporting the end of the job (see :py:func:`cea.worker.release_pipe`)"""
+        with self._lock:
+            reader = self.output_readers.pop(jobid, None)
+        deadline = time.time() + timeout
+        while reader is not None and reader.is_alive() and time.time() < deadline:
+            self.sleep(0.05)
+
+    def reap(self):
+        """Forget worker processes that have exited and mark their jobs as errors if they did not report back"""
+        with self._lock:
+            for jobid, popen in list(self.worker_processes.items()):
+                if popen.poll() is None:
+                    continue
+                del self.worker_processes[jobid]
+                self.output_readers.pop(jobid, None)
+                try:
+                    job = self.store.get(jobid)
+                except KeyError:
+                    continue
+                if job.state not in FINISHED_STATES:
+                    job = self.store.set_state(jobid, JOB_STATE_ERROR, "The cea-worker process exited unexpectedly")
+                    if self.on_worker_died:
+                        self.on_worker_died(job)
+
+    def kill(self, jobid):
+        """Kill the processes associated with a jobid"""
+        with self._lock:
+            popen = self.worker_processes.pop(jobid, None)
+            self.output_readers.pop(jobid, None)
+        if popen is None:
+            return
+        # using code from here: https://stackoverflow.com/a/4229404/2260
+        # to terminate child processes too
+        print("killing child processes of {jobid} ({pid})".format(jobid=jobid, pid=popen.pid))
+        try:
+            process = psutil.Process(popen.pid)
+        except psutil.NoSuchProcess:
+            return
+        children = process.children(recursive=True)
+        for child in children:
+            print("-- killing child {pid}".format(pid=child.pid))
+            child.kill()
+        process.kill()
+        popen.wait()
+
+    def shutdown(self):
+        """When shutting down the server, make sure any subprocesses are also terminated. See issue #2408."""
+        for jobid in list(self.worker_processes.keys()):
+            self.kill(jobid)
+
+    def watch(self, sleep=time.sleep, interval=5):
+        """Call :py:meth:`schedule` every ``interval`` seconds - run this as a background task of the server"""
+        while True:
+            sleep(interval)
+            self.schedule()
@@ -8,7 +8,7 @@ werkzeug.cached_property = werkzeug.utils.cached_property
 
 from flask import Blueprint, current_app
 from flask_restplus import Api, Resource
-from .jobs import api as jobs, worker_processes, kill_job
+from .jobs import api as jobs
 from .streams import api as streams
 
 __author__ = "Daren Thomas"
@@ -30,8 +30,7 @@ api.add_namespace(streams, path='/streams')
 
 def shutdown_worker_processes():
     """When shutting down the flask server, make sure any subprocesses are also terminated. See issue #2408."""
-    for jobid in worker_processes.keys():
-        kill_job(jobid)
+    current_app.worker_pool.shutdown()
 
 
 @api.route("/alive")
@@ -1,16 +1,17 @@
 """
-jobs: maintain a list of jobs to be simulated.
+jobs: maintain a list of jobs to be simulated. The jobs are kept in the ``JobStore`` of the server and run by its
+``WorkerPool`` (see :py:mod:`cea.interfaces.dashboard.job_store`).
 """
 
 
 
 
-import subprocess
-import psutil
-
 from flask_restplus import Namespace, Resource, fields, reqparse
 from flask import request, current_app
 
+from cea.interfaces.dashboard.job_store import (JOB_STATE_STARTED, JOB_STATE_SUCCESS, JOB_STATE_ERROR,
+                                                JOB_STATE_CANCELED)
+
 __author__ = "Daren Thomas"
 __copyright__ = "Copyright 2019, Architecture and Building Systems - ETH Zurich"
 __credits__ = ["Daren Thomas"]
@@ -23,19 +24,13 @@ __status__ = "Production"
 
 api = Namespace('Jobs', description='A job server for cea-worker processes')
 
-# Job states
-JOB_STATE_PENDING = 0
-JOB_STATE_STARTED = 1
-JOB_STATE_SUCCESS = 2
-JOB_STATE_ERROR = 3
-JOB_STATE_CANCELED = 4
-
 job_info_model = api.model('JobInfo', {
     'id': fields.Integer,
     'script': fields.String,
     'state': fields.Integer,
     'error': fields.String,
     'parameters': fields.Raw,
+    'priority': fields.Integer,
 })
 
 job_info_request_parser = reqparse.RequestParser()
@@ -44,37 +39,18 @@ job_info_request_parser.add_argument("script", type=str, required=True, location
 job_info_request_parser.add_argument("state", location="json")
 job_info_request_parser.add_argument("error", location="json")
 job_info_request_parser.add_argument("parameters", type=dict, location="json")
+job_info_request_parser.add_argument("priority", type=int, location="json")
 
-
-worker_processes = {}  # jobid -> subprocess.Popen
+job_start_request_parser = reqparse.RequestParser()
+job_start_request_parser.add_argument("priority", type=int, location="json")
 
 
-def next_id():
-    """FIXME: replace with better solution"""
+def get_job(jobid):
+    """Return the JobInfo of a job stored in the job store of the server"""
     try:
-        return max(jobs.keys()) + 1
-    except ValueError:
-        # this is the first job...
-        return 1
-
-
-# FIXME: replace with database or similar solution
-class JobInfo(object):
-    """Store all the information required to run a job"""
-    def __init__(self, id, script, parameters):
-        self.id = id
-        self.script = script
-        self.parameters = parameters
-        self.state = JOB_STATE_PENDING
-        self.error = None
-
-    def __repr__(self):
-        return "<JobInfo(id={id}, script={script}, state={state}>".format(**self.__dict__)
-
-
-jobs = {
-    # jobid -> JobInfo
-}
+        return current_app.job_store.get(jobid)
+    except KeyError:
+        api.abort(404, "Job {jobid} not found".format(jobid=jobid))
 
 
 @api.route("/<int:jobid>")
@@ -82,7 +58,7 @@ class Job(Resource):
     @api.marshal_with(job_info_model)
     def get(self, jobid):
         """Return a JobInfo by id"""
-        return jobs[jobid]
+        return get_job(jobid)
 
 
 @api.route("/new")
@@ -92,24 +68,24 @@ class NewJob(Resource):
         """Post a new job to the list of jobs to complete"""
         args = job_info_request_parser.parse_args()
         print("NewJob: args={args}".format(**locals()))
-        job = JobInfo(id=next_id(), script=args.script, parameters=args.parameters)
-        jobs[job.id] = job
+        job = current_app.job_store.new_job(script=args.script, parameters=args.parameters, priority=args.priority)
         current_app.socketio.emit("cea-job-created", api.marshal(job, job_info_model))
         return job
 
 
 @api.route("/list")
 class ListJobs(Resource):
+    @api.marshal_list_with(job_info_model)
     def get(self):
-        return list(jobs.values())
+        return current_app.job_store.list()
 
 
 @api.route("/started/<int:jobid>")
 class JobStarted(Resource):
     @api.marshal_with(job_info_model)
     def post(self, jobid):
-        job = jobs[jobid]
-        job.state = JOB_STATE_STARTED
+        get_job(jobid)
+        job = current_app.job_store.set_state(jobid, JOB_STATE_STARTED)
         current_app.socketio.emit("cea-worker-started", api.marshal(job, job_info_model))
         return job
 
@@ -118,11 +94,9 @@ class JobStarted(Resource):
 class JobSuccess(Resource):
     @api.marshal_with(job_info_model)
     def post(self, jobid):
-        job = jobs[jobid]
-        job.state = JOB_STATE_SUCCESS
-        job.error = None
-        if job.id in worker_processes:
-            del worker_processes[job.id]
+        get_job(jobid)
+        job = current_app.job_store.set_state(jobid, JOB_STATE_SUCCESS)
+        current_app.worker_pool.finished(jobid)
         current_app.socketio.emit("cea-worker-success", api.marshal(job, job_info_model))
         return job
 
@@ -131,11 +105,9 @@ class JobSuccess(Resource):
 class JobError(Resource):
     @api.marshal_with(job_info_model)
     def post(self, jobid):
-        job = jobs[jobid]
-        job.state = JOB_STATE_ERROR
-        job.error = request.data
-        if job.id in worker_processes:
-            del worker_processes[job.id]
+        get_job(jobid)
+        job = current_app.job_store.set_state(jobid, JOB_STATE_ERROR, request.get_data(as_text=True))
+        current_app.worker_pool.finished(jobid)
         current_app.socketio.emit("cea-worker-error", api.marshal(job, job_info_model))
         return job
 
@@ -143,9 +115,11 @@ class JobError(Resource):
 @api.route('/start/<int:jobid>')
 class JobStart(Resource):
     def post(self, jobid):
-        """Start a ``cea-worker`` subprocess for the script. (FUTURE: add support for cloud-based workers"""
+        """Queue the job - it is run by a ``cea-worker`` subprocess as soon as the worker pool has room for it"""
         print("tools/route_start: {jobid}".format(**locals()))
-        worker_processes[jobid] = subprocess.Popen(["python", "-m", "cea.worker", "{jobid}".format(jobid=jobid)])
+        get_job(jobid)
+        args = job_start_request_parser.parse_args()
+        current_app.worker_pool.submit(jobid, args.priority)
         return jobid
 
 
@@ -153,30 +127,9 @@ class JobStart(Resource):
 class JobCanceled(Resource):
     @api.marshal_with(job_info_model)
     def post(self, jobid):
-        job = jobs[jobid]
-        job.state = JOB_STATE_CANCELED
-        job.error = "Canceled by user"
-        kill_job(jobid)
+        get_job(jobid)
+        job = current_app.job_store.set_state(jobid, JOB_STATE_CANCELED, "Canceled by user")
+        current_app.worker_pool.kill(jobid)
+        current_app.worker_pool.schedule()
         current_app.socketio.emit("cea-worker-canceled", api.marshal(job, job_info_model))
         return job
-
-
-def kill_job(jobid):
-    """Kill the processes associated with a jobid"""
-    if not jobid in worker_processes:
-        return
-
-    popen = worker_processes[jobid]
-    # using code from here: https://stackoverflow.com/a/4229404/2260
-    # to terminate child processes too
-    print("killing child processes of {jobid} ({pid})".format(jobid=jobid, pid=popen.pid))
-    try:
-        process = psutil.Process(popen.pid)
-    except psutil.NoSuchProcess:
-        return
-    children = process.children(recursive=True)
-    for child in children:
-        print("-- killing child {pid}".format(pid=child.pid))
-        child.kill()
-    process.kill()
-    del worker_processes[jobid]
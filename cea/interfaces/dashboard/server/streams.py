@@ -1,7 +1,8 @@
 """
 streams: maintain a list of streams containing ``cea-worker`` output for jobs.
 
-FIXME: when does this data get cleared?
+The output is kept in the ``JobStore`` of the server, capped at ``server:job-output-size`` per job, and removed together
+with the job (see :py:mod:`cea.interfaces.dashboard.job_store`).
 """
 
 from flask import request, current_app
@@ -18,24 +19,18 @@ __status__ = "Production"
 
 api = Namespace('Streams', description='A collection of output from cea-worker processes')
 
-# map jobid to a list of messages
-streams = {}
-
 
 @api.route("/read/<int:jobid>")
 class ReadStream(Resource):
     def get(self, jobid):
-        try:
-            return ''.join(streams[jobid])
-        except KeyError:
-            return ''
+        return current_app.job_store.read_output(jobid)
 
 
 @api.route("/write/<int:jobid>")
 class WriteStream(Resource):
     def put(self, jobid):
         msg = request.get_data(as_text=True)
-        streams.setdefault(jobid, []).append(msg)
+        current_app.job_store.append_output(jobid, msg)
 
         # emit the message using socket.io
         current_app.socketio.emit('cea-worker-message', {"message": msg, "jobid": jobid})
@@ -3,8 +3,16 @@
 
 
 
+"""
+Save the results of an individual evaluated by the optimization to the result store of its generation (see
+:py:mod:`cea.optimization.result_store`).
+"""
+
 import pandas as pd
 
+from cea.optimization.result_store import GenerationResultStore
+
+
 def save_results(locator,
                  date_array,
                  individual_number,
@@ -25,75 +33,38 @@ def save_results(locator,
                  buildings_building_scale_heating_capacities,
                  buildings_building_scale_cooling_capacities
                  ):
-    # SAVE INDIVIDUAL DISTRICT HEATING INSTALLED CAPACITIES
-    pd.DataFrame(district_heating_capacity_installed_dict, index=[0]).to_csv(
-        locator.get_optimization_district_scale_heating_capacity(individual_number,
-                                                            generation_number),
-        index=False, float_format='%.3f')
-    pd.DataFrame(district_cooling_capacity_installed_dict, index=[0]).to_csv(
-        locator.get_optimization_district_scale_cooling_capacity(individual_number,
-                                                            generation_number),
-        index=False, float_format='%.3f')
-    pd.DataFrame(district_electricity_capacity_installed_dict, index=[0]).to_csv(
-        locator.get_optimization_district_scale_electricity_capacity(individual_number,
-                                                                generation_number),
-        index=False, float_format='%.3f')
-
-    buildings_building_scale_heating_capacities.to_csv(
-        locator.get_optimization_building_scale_heating_capacity(individual_number,
-                                                               generation_number),
-        index=False, float_format='%.3f')
-
-    buildings_building_scale_cooling_capacities.to_csv(
-        locator.get_optimization_building_scale_cooling_capacity(individual_number,
-                                                               generation_number),
-        index=False, float_format='%.3f')
-
-    # SAVE BUILDING CONNECTIVITY
-    pd.DataFrame(building_connectivity_dict).to_csv(
-        locator.get_optimization_slave_building_connectivity(individual_number,
-                                                             generation_number),
-        index=False, float_format='%.3f')
-
-    # SAVE PERFORMANCE RELATED FILES
-    # export all including performance heating and performance cooling since we changed them
-    performance_building_scale_dict = dict(buildings_building_scale_costs, **buildings_building_scale_emissions)
-    pd.DataFrame(performance_building_scale_dict, index=[0]).to_csv(
-        locator.get_optimization_slave_building_scale_performance(individual_number,
-                                                                generation_number),
-        index=False, float_format='%.3f')
-
-    performance_district_scale_dict = dict(buildings_district_scale_costs, **buildings_district_scale_emissions)
-    pd.DataFrame(performance_district_scale_dict, index=[0]).to_csv(
-        locator.get_optimization_slave_district_scale_performance(individual_number,
-                                                             generation_number),
-        index=False, float_format='%.3f')
-
-    pd.DataFrame(performance_totals_dict, index=[0]).to_csv(
-        locator.get_optimization_slave_total_performance(individual_number,
-                                                         generation_number),
-        index=False, float_format='%.3f')
-
     # add date and plot
     electricity_dispatch['DATE'] = date_array
     cooling_dispatch['DATE'] = date_array
     heating_dispatch['DATE'] = date_array
     electricity_requirements['DATE'] = date_array
 
-    pd.DataFrame(electricity_requirements).to_csv(
-        locator.get_optimization_slave_electricity_requirements_data(individual_number,
-                                                                     generation_number), index=False,
-        float_format='%.3f')
-
-    pd.DataFrame(electricity_dispatch).to_csv(
-        locator.get_optimization_slave_electricity_activation_pattern(individual_number,
-                                                                      generation_number),
-        index=False, float_format='%.3f')
-
-    pd.DataFrame(cooling_dispatch).to_csv(locator.get_optimization_slave_cooling_activation_pattern(individual_number,
-                                                                                                    generation_number),
-                                          index=False, float_format='%.3f')
+    # export all including performance heating and performance cooling since we changed them
+    performance_building_scale_dict = dict(buildings_building_scale_costs, **buildings_building_scale_emissions)
+    performance_district_scale_dict = dict(buildings_district_scale_costs, **buildings_district_scale_emissions)
 
-    pd.DataFrame(heating_dispatch).to_csv(locator.get_optimization_slave_heating_activation_pattern(individual_number,
-                                                                                                    generation_number),
-                                          index=False, float_format='%.3f')
\ No newline at end of file
+    tables = {
+        # SAVE INDIVIDUAL DISTRICT HEATING INSTALLED CAPACITIES
+        'district_scale_heating_capacity': pd.DataFrame(district_heating_capacity_installed_dict, index=[0]),
+        'district_scale_cooling_capacity': pd.DataFrame(district_cooling_capacity_installed_dict, index=[0]),
+        'district_scale_electricity_capacity': pd.DataFrame(district_electricity_capacity_installed_dict, index=[0]),
+        'building_scale_heating_capacity': buildings_building_scale_heating_capacities,
+        'building_scale_cooling_capacity': buildings_building_scale_cooling_capacities,
+
+        # SAVE BUILDING CONNECTIVITY
+        'building_connectivity': pd.DataFrame(building_connectivity_dict),
+
+        # SAVE PERFORMANCE RELATED FILES
+        'building_scale_performance': pd.DataFrame(performance_building_scale_dict, index=[0]),
+        'district_scale_performance': pd.DataFrame(performance_district_scale_dict, index=[0]),
+        'total_performance': pd.DataFrame(performance_totals_dict, index=[0]),
+
+        'electricity_requirements': pd.DataFrame(electricity_requirements),
+        'electricity_activation_pattern': pd.DataFrame(electricity_dispatch),
+        'cooling_activation_pattern': pd.DataFrame(cooling_dispatch),
+        'heating_activation_pattern': pd.DataFrame(heating_dispatch),
+    }
+
+    # all individuals of a generation share a single store (instead of a dozen csv files per individual)
+    with GenerationResultStore(locator.get_optimization_generation_results_store(generation_number)) as store:
+        store.write(individual_number, tables)
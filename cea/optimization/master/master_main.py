@@ -16,6 +16,7 @@ from cea.optimization.constants import DH_CONVERSION_TECHNOLOGIES_SHARE, DC_CONV
 from cea.optimization.master import evaluation
 from cea.optimization.master.crossover import crossover_main
 from cea.optimization.master.data_saver import save_results
+from cea.optimization.result_store import GenerationResultStore
 from cea.optimization.master.generation import generate_main
 from cea.optimization.master.generation import individual_to_barcode
 from cea.optimization.master.mutations import mutation_main
@@ -504,7 +505,6 @@ def save_final_generation_pareto_individuals(toolbox,
                                              technologies_cooling_allowed,
                                              column_names):
     # local variables
-    performance_totals_pareto = pd.DataFrame()
     individual_number_list = []
     generation_number_list = []
     individual_in_pareto_list = []
@@ -548,12 +548,7 @@ def save_final_generation_pareto_individuals(toolbox,
     # fitnesses is a map object of lazy results - iterate over it to actually evaluate
     fitnesses = list(fitnesses)
 
-    for individual_number, generation_number in zip(individual_number_list, generation_number_list):
-        performance_totals_pareto = pd.concat([performance_totals_pareto,
-                                               pd.read_csv(
-                                                   locator.get_optimization_slave_total_performance(
-                                                       individual_number, generation_number))],
-                                              ignore_index=True)
+    performance_totals_pareto = read_total_performances(locator, individual_number_list, generation_number_list)
 
     systems_name_list = ["sys_" + str(genNum) + "_" + str(indNum) for
                          indNum, genNum in
@@ -568,7 +563,6 @@ def save_final_generation_pareto_individuals(toolbox,
 
 
 def save_generation_pareto_individuals(locator, generation, record_individuals_tested, paretofrontier):
-    performance_totals_pareto = pd.DataFrame()
     individual_list = []
     generation_list = []
 
@@ -578,10 +572,7 @@ def save_generation_pareto_individuals(locator, generation, record_individuals_t
             gen = record_individuals_tested['generation'][i]
             individual_list.append(ind)
             generation_list.append(gen)
-            performance_totals_pareto = pd.concat([performance_totals_pareto,
-                                                   pd.read_csv(
-                                                       locator.get_optimization_slave_total_performance(ind, gen))],
-                                                  ignore_index=True)
+    performance_totals_pareto = read_total_performances(locator, individual_list, generation_list)
 
     systems_name_list = ["sys_" + str(genNum) + "_" + str(indNum) 
                          for indNum, genNum 
@@ -602,22 +593,10 @@ def save_generation_dataframes(generation,
                                DHN_network_list_selected):
     individual_list = range(len(slected_individuals))
     individual_name_list = ["sys_" + str(generation) + "_" + str(indNum) for indNum in individual_list]
-    performance_disconnected = pd.DataFrame()
-    performance_connected = pd.DataFrame()
-    performance_totals = pd.DataFrame()
-    for ind, DCN_barcode, DHN_barcode in zip(individual_list, DCN_network_list_selected, DHN_network_list_selected):
-        performance_connected = pd.concat([performance_connected,
-                                           pd.read_csv(
-                                               locator.get_optimization_slave_district_scale_performance(ind,
-                                                                                                         generation))],
-                                          ignore_index=True)
-
-        performance_disconnected = pd.concat([performance_disconnected, pd.read_csv(
-            locator.get_optimization_slave_building_scale_performance(ind, generation))], ignore_index=True)
-        performance_totals = pd.concat([performance_totals,
-                                        pd.read_csv(
-                                            locator.get_optimization_slave_total_performance(ind, generation))],
-                                       ignore_index=True)
+    with GenerationResultStore(locator.get_optimization_generation_results_store(generation)) as store:
+        performance_connected = store.read_all('district_scale_performance', individual_list)
+        performance_disconnected = store.read_all('building_scale_performance', individual_list)
+        performance_totals = store.read_all('total_performance', individual_list)
 
     performance_disconnected['individual'] = individual_list
     performance_connected['individual'] = individual_list
@@ -637,6 +616,23 @@ def save_generation_dataframes(generation,
     performance_totals.to_csv(locator.get_optimization_generation_total_performance(generation), index=False)
 
 
+def read_total_performances(locator, individual_list, generation_list):
+    """Read the total performance of individuals from the result stores of their generations - with a single query
+    per generation"""
+    if not len(individual_list):
+        return pd.DataFrame()
+    individuals_per_generation = {}
+    for individual, generation in zip(individual_list, generation_list):
+        individuals_per_generation.setdefault(generation, []).append(individual)
+    performance_totals = {}
+    for generation, individuals in individuals_per_generation.items():
+        with GenerationResultStore(locator.get_optimization_generation_results_store(generation)) as store:
+            performance_totals[generation] = store.read_all('total_performance', individuals)
+        performance_totals[generation].index = individuals
+    performance_totals = pd.concat(performance_totals)
+    return performance_totals.loc[list(zip(generation_list, individual_list))].reset_index(drop=True)
+
+
 def save_generation_individuals(columns_of_saved_files, generation, invalid_ind, locator):
     # now get information about individuals and save to disk
     individual_list = range(len(invalid_ind))
@@ -7,7 +7,6 @@ Operation for decentralized buildings
 
 import time
 from math import ceil
-import random
 
 import numpy as np
 import pandas as pd
@@ -28,7 +27,7 @@ from cea.constants import HEAT_CAPACITY_OF_WATER_JPERKGK
 from cea.optimization.constants import (T_GENERATOR_FROM_FP_C, T_GENERATOR_FROM_ET_C,
                                         Q_LOSS_DISCONNECTED, ACH_TYPE_SINGLE, VCC_CODE_DECENTRALIZED)
 from cea.optimization.lca_calculations import LcaCalculations
-from cea.optimization.preprocessing.decentralized_buildings_heating import get_unique_keys_from_dicts
+from cea.optimization.preprocessing.decentralized_buildings_heating import get_unique_keys_from_dicts, rank_results
 from cea.technologies.thermal_network.thermal_network import calculate_ground_temperature
 from cea.technologies.supply_systems_database import SupplySystemsDatabase
 import cea.utilities.parallel
@@ -120,20 +119,57 @@ def disconnected_cooling_for_building(building_name, supply_systems, lca, locato
     ## Initialize table to save results
     # save costs of all supply configurations
     operation_results = initialize_result_tables_for_supply_configurations(Qc_nom_SCU_W)
+    number_of_configurations = len(operation_results)
+    number_of_hours = len(mdot_AHU_ARU_SCU_kgpers)
+    # hourly heat rejected to the cooling towers, electricity and natural gas demand (configuration x hour)
+    q_CT_Wh = np.zeros((number_of_configurations, number_of_hours))
+    el_total_Wh = np.zeros((number_of_configurations, number_of_hours))
+    q_gas_total_Wh = np.zeros((number_of_configurations, number_of_hours))
     # save supply system activation of all supply configurations
     cooling_dispatch = {}
     ## HOURLY OPERATION
     print('{building_name} decentralized cooling supply system simulations...'.format(building_name=building_name))
     T_re_AHU_ARU_SCU_K = np.where(T_re_AHU_ARU_SCU_K > 0.0, T_re_AHU_ARU_SCU_K, T_sup_AHU_ARU_SCU_K)
     ## 0. DX operation
-    print('{building_name} Config 0: Direct Expansion Units -> AHU,ARU,SCU'.format(building_name=building_name))
-    el_DX_hourly_Wh, \
-    q_DX_chw_Wh = np.vectorize(dx.calc_DX)(mdot_AHU_ARU_SCU_kgpers, T_sup_AHU_ARU_SCU_K, T_re_AHU_ARU_SCU_K)
-    DX_Status = np.where(q_DX_chw_Wh > 0.0, 1, 0)
-    # add electricity costs, CO2, PE
-    operation_results[0][7] += sum(prices.ELEC_PRICE * el_DX_hourly_Wh)
-    operation_results[0][8] += sum(calc_emissions_Whyr_to_tonCO2yr(el_DX_hourly_Wh, lca.EL_TO_CO2_EQ))  # ton CO2
-    # activation
+    el_DX_hourly_Wh, q_DX_chw_Wh = dx.calc_DX_array(mdot_AHU_ARU_SCU_kgpers, T_sup_AHU_ARU_SCU_K, T_re_AHU_ARU_SCU_K)
+    ## 1. VCC (AHU + ARU + SCU) + CT
+    el_VCC_Wh, q_VCC_cw_Wh, q_VCC_chw_Wh = calc_VCC_operation(T_re_AHU_ARU_SCU_K, T_sup_AHU_ARU_SCU_K,
+                                                              mdot_AHU_ARU_SCU_kgpers, VCC_chiller)
+    q_CT_Wh[1] = q_VCC_cw_Wh
+    ## 2 & 3: SC_FP / SC_ET + single-effect ACH (AHU + ARU + SCU) + CT + Boiler / Burner
+    # both configurations are calculated together, one row per solar collector type (FP, ET)
+    T_hw_out_single_ACH_K, \
+    el_single_ACH_Wh, \
+    q_cw_single_ACH_Wh, \
+    q_hw_single_ACH_Wh, \
+    q_chw_single_ACH_Wh = calc_ACH_operation(T_ground_K, np.vstack([T_hw_in_FP_C, T_hw_in_ET_C]), T_re_AHU_ARU_SCU_K,
+                                             T_sup_AHU_ARU_SCU_K, chiller_prop, mdot_AHU_ARU_SCU_kgpers,
+                                             ACH_TYPE_SINGLE)
+    q_CT_Wh[2] = q_cw_single_ACH_Wh[0]
+    q_CT_Wh[3] = q_cw_single_ACH_Wh[1]
+    # these two configurations are only activated when SCU is in use
+    if Qc_nom_SCU_W > 0.0:
+        ## 4: VCC (AHU + ARU) + VCC (SCU) + CT
+        el_VCC_to_AHU_ARU_Wh, \
+        q_cw_VCC_to_AHU_ARU_Wh, \
+        q_chw_VCC_to_AHU_ARU_Wh = calc_VCC_operation(T_re_AHU_ARU_K, T_sup_AHU_ARU_K, mdot_AHU_ARU_kgpers, VCC_chiller)
+        el_VCC_to_SCU_Wh, \
+        q_cw_VCC_to_SCU_Wh, \
+        q_chw_VCC_to_SCU_Wh = calc_VCC_operation(T_re_SCU_K, T_sup_SCU_K, mdot_SCU_kgpers, VCC_chiller)
+        q_CT_Wh[4] = q_cw_VCC_to_AHU_ARU_Wh + q_cw_VCC_to_SCU_Wh
+        ## 5: VCC (AHU + ARU) + ACH (SCU) + CT
+        T_hw_FP_ACH_to_SCU_K, \
+        el_FP_ACH_to_SCU_Wh, \
+        q_cw_FP_ACH_to_SCU_Wh, \
+        q_hw_FP_ACH_to_SCU_Wh, \
+        q_chw_FP_ACH_to_SCU_Wh = calc_ACH_operation(T_ground_K, T_hw_in_FP_C, T_re_SCU_K, T_sup_SCU_K, chiller_prop,
+                                                    mdot_SCU_kgpers, ACH_TYPE_SINGLE)
+        q_CT_Wh[5] = q_cw_VCC_to_AHU_ARU_Wh + q_cw_FP_ACH_to_SCU_Wh
+    # CT operation of all configurations (configuration 0 does not reject heat to a cooling tower)
+    Q_nom_CT_W, el_CT_Wh = calc_CT_operation(q_CT_Wh)
+
+    ## 0. DX -> AHU,ARU,SCU
+    el_total_Wh[0] = el_DX_hourly_Wh
     cooling_dispatch[0] = {'Q_DX_AS_gen_directload_W': q_DX_chw_Wh,
                            'E_DX_AS_req_W': el_DX_hourly_Wh,
                            'E_cs_cre_cdata_req_W': el_DX_hourly_Wh,
@@ -141,222 +177,113 @@ def disconnected_cooling_for_building(building_name, supply_systems, lca, locato
     # capacity of cooling technologies
     operation_results[0][0] = Qc_nom_AHU_ARU_SCU_W
     operation_results[0][1] = Qc_nom_AHU_ARU_SCU_W  # 1: DX_AS
-    system_COP = np.nanmedian(np.divide(q_DX_chw_Wh[None, :], el_DX_hourly_Wh[None, :]).flatten())
-    operation_results[0][9] += system_COP
+    operation_results[0][9] += np.nanmedian(np.divide(q_DX_chw_Wh, el_DX_hourly_Wh))
+
     ## 1. VCC (AHU + ARU + SCU) + CT
-    print('{building_name} Config 1: Vapor Compression Chillers -> AHU,ARU,SCU'.format(building_name=building_name))
-    # VCC operation
-    el_VCC_Wh, q_VCC_cw_Wh, q_VCC_chw_Wh = calc_VCC_operation(T_re_AHU_ARU_SCU_K, T_sup_AHU_ARU_SCU_K,
-                                                              mdot_AHU_ARU_SCU_kgpers, VCC_chiller)
-    VCC_Status = np.where(q_VCC_chw_Wh > 0.0, 1, 0)
-    # CT operation
-    q_CT_VCC_to_AHU_ARU_SCU_Wh = q_VCC_cw_Wh
-    Q_nom_CT_VCC_to_AHU_ARU_SCU_W, el_CT_Wh = calc_CT_operation(q_CT_VCC_to_AHU_ARU_SCU_Wh)
-    # add costs
-    el_total_Wh = el_VCC_Wh + el_CT_Wh
-    operation_results[1][7] += sum(prices.ELEC_PRICE * el_total_Wh)  # CHF
-    operation_results[1][8] += sum(calc_emissions_Whyr_to_tonCO2yr(el_total_Wh, lca.EL_TO_CO2_EQ))  # ton CO2
-    system_COP_list = np.divide(q_VCC_chw_Wh[None, :], el_total_Wh[None, :]).flatten()
-    system_COP = np.nansum(q_VCC_chw_Wh[None, :] * system_COP_list) / np.nansum(
-        q_VCC_chw_Wh[None, :])  # weighted average of the system efficiency
-    operation_results[1][9] += system_COP
+    el_total_Wh[1] = el_VCC_Wh + el_CT_Wh[1]
     cooling_dispatch[1] = {'Q_BaseVCC_AS_gen_directload_W': q_VCC_chw_Wh,
                            'E_BaseVCC_AS_req_W': el_VCC_Wh,
-                           'E_CT_req_W': el_CT_Wh,
-                           'E_cs_cre_cdata_req_W': el_total_Wh,
+                           'E_CT_req_W': el_CT_Wh[1],
+                           'E_cs_cre_cdata_req_W': el_total_Wh[1],
                            }
     # capacity of cooling technologies
     operation_results[1][0] = Qc_nom_AHU_ARU_SCU_W
     operation_results[1][2] = Qc_nom_AHU_ARU_SCU_W  # 2: BaseVCC_AS
+    operation_results[1][9] += calc_system_COP(q_VCC_chw_Wh, el_total_Wh[1])
+
     ## 2: SC_FP + single-effect ACH (AHU + ARU + SCU) + CT + Boiler + SC_FP
-    print(
-        '{building_name} Config 2: Flat-plate Solar Collectors + Single-effect Absorption chillers -> AHU,ARU,SCU'.format(
-            building_name=building_name))
-    # ACH operation
-    T_hw_out_single_ACH_K, \
-    el_single_ACH_Wh, \
-    q_cw_single_ACH_Wh, \
-    q_hw_single_ACH_Wh, \
-    q_chw_single_ACH_Wh = calc_ACH_operation(T_ground_K, T_hw_in_FP_C, T_re_AHU_ARU_SCU_K, T_sup_AHU_ARU_SCU_K,
-                                             chiller_prop, mdot_AHU_ARU_SCU_kgpers, ACH_TYPE_SINGLE)
-    ACH_Status = np.where(q_chw_single_ACH_Wh > 0.0, 1, 0)
-    # CT operation
-    q_CT_FP_to_single_ACH_to_AHU_ARU_SCU_Wh = q_cw_single_ACH_Wh
-    Q_nom_CT_FP_to_single_ACH_to_AHU_ARU_SCU_W, el_CT_Wh = calc_CT_operation(
-        q_CT_FP_to_single_ACH_to_AHU_ARU_SCU_Wh)
-    # boiler operation
     q_gas_Boiler_FP_to_single_ACH_to_AHU_ARU_SCU_Wh, \
     Q_nom_Boiler_FP_to_single_ACH_to_AHU_ARU_SCU_W, \
     q_load_Boiler_FP_to_single_ACH_to_AHU_ARU_SCU_Wh = calc_boiler_operation(Qc_nom_AHU_ARU_SCU_W,
-                                                                             T_hw_out_single_ACH_K,
-                                                                             q_hw_single_ACH_Wh,
+                                                                             T_hw_out_single_ACH_K[0],
+                                                                             q_hw_single_ACH_Wh[0],
                                                                              q_sc_gen_FP_Wh)
-    # add electricity costs
-    el_total_Wh = el_single_ACH_Wh + el_aux_SC_FP_Wh + el_CT_Wh
-    operation_results[2][7] += sum(prices.ELEC_PRICE * el_total_Wh)  # CHF
-    operation_results[2][8] += sum(calc_emissions_Whyr_to_tonCO2yr(el_total_Wh, lca.EL_TO_CO2_EQ))  # ton CO2
-    # add gas costs
-    q_gas_total_Wh = q_gas_Boiler_FP_to_single_ACH_to_AHU_ARU_SCU_Wh
-    operation_results[2][7] += sum(prices.NG_PRICE * q_gas_total_Wh)  # CHF
-    operation_results[2][8] += sum(calc_emissions_Whyr_to_tonCO2yr(q_gas_total_Wh, lca.NG_TO_CO2_EQ))  # ton CO2
-    # add activation
-    cooling_dispatch[2] = {'Q_ACH_gen_directload_W': q_chw_single_ACH_Wh,
+    el_total_Wh[2] = el_single_ACH_Wh[0] + el_aux_SC_FP_Wh + el_CT_Wh[2]
+    q_gas_total_Wh[2] = q_gas_Boiler_FP_to_single_ACH_to_AHU_ARU_SCU_Wh
+    cooling_dispatch[2] = {'Q_ACH_gen_directload_W': q_chw_single_ACH_Wh[0],
                            'Q_Boiler_NG_ACH_W': q_load_Boiler_FP_to_single_ACH_to_AHU_ARU_SCU_Wh,
                            'Q_SC_FP_ACH_W': q_sc_gen_FP_Wh,
-                           'E_ACH_req_W': el_single_ACH_Wh,
-                           'E_CT_req_W': el_CT_Wh,
+                           'E_ACH_req_W': el_single_ACH_Wh[0],
+                           'E_CT_req_W': el_CT_Wh[2],
                            'E_SC_FP_req_W': el_aux_SC_FP_Wh,
-                           'E_cs_cre_cdata_req_W': el_total_Wh,
+                           'E_cs_cre_cdata_req_W': el_total_Wh[2],
                            'NG_Boiler_req': q_gas_Boiler_FP_to_single_ACH_to_AHU_ARU_SCU_Wh,
                            }
     # capacity of cooling technologies
     operation_results[2][0] = Qc_nom_AHU_ARU_SCU_W
     operation_results[2][4] = Qc_nom_AHU_ARU_SCU_W  # 4: ACH_SC_FP
-    q_total_load = q_chw_single_ACH_Wh[None, :] + q_sc_gen_FP_Wh[None,
-                                                  :] + q_load_Boiler_FP_to_single_ACH_to_AHU_ARU_SCU_Wh[None, :]
-    system_COP_list = np.divide(q_total_load, (
-            el_total_Wh[None, :] + q_gas_Boiler_FP_to_single_ACH_to_AHU_ARU_SCU_Wh[None, :])).flatten()
-    system_COP = np.nansum(q_total_load * system_COP_list) / np.nansum(
-        q_total_load)  # weighted average of the system efficiency
-    operation_results[2][9] += system_COP
-
-    # 3: SC_ET + single-effect ACH (AHU + ARU + SCU) + CT + Boiler + SC_ET
-    print(
-        '{building_name} Config 3: Evacuated Tube Solar Collectors + Single-effect Absorption chillers -> AHU,ARU,SCU'.format(
-            building_name=building_name))
-    # ACH operation
-    T_hw_out_single_ACH_K, \
-    el_single_ACH_Wh, \
-    q_cw_single_ACH_Wh, \
-    q_hw_single_ACH_Wh, \
-    q_chw_single_ACH_Wh = calc_ACH_operation(T_ground_K, T_hw_in_ET_C, T_re_AHU_ARU_SCU_K, T_sup_AHU_ARU_SCU_K,
-                                             chiller_prop, mdot_AHU_ARU_SCU_kgpers, ACH_TYPE_SINGLE)
-    # CT operation
-    q_CT_ET_to_single_ACH_to_AHU_ARU_SCU_W = q_cw_single_ACH_Wh
-    Q_nom_CT_ET_to_single_ACH_to_AHU_ARU_SCU_W, el_CT_Wh = calc_CT_operation(q_CT_ET_to_single_ACH_to_AHU_ARU_SCU_W)
-    # burner operation
+    operation_results[2][9] += calc_system_COP(
+        q_chw_single_ACH_Wh[0] + q_sc_gen_FP_Wh + q_load_Boiler_FP_to_single_ACH_to_AHU_ARU_SCU_Wh,
+        el_total_Wh[2] + q_gas_total_Wh[2])
+
+    ## 3: SC_ET + single-effect ACH (AHU + ARU + SCU) + CT + Burner + SC_ET
     q_gas_for_burner_Wh, \
     Q_nom_Burner_ET_to_single_ACH_to_AHU_ARU_SCU_W, \
-    q_burner_load_Wh = calc_burner_operation(Qc_nom_AHU_ARU_SCU_W, q_hw_single_ACH_Wh, q_sc_gen_ET_Wh)
-    # add electricity costs
-    el_total_Wh = el_single_ACH_Wh + el_aux_SC_ET_Wh + el_CT_Wh
-    operation_results[3][7] += sum(prices.ELEC_PRICE * el_total_Wh)  # CHF
-    operation_results[3][8] += sum(calc_emissions_Whyr_to_tonCO2yr(el_total_Wh, lca.EL_TO_CO2_EQ))  # ton CO2
-    # add gas costs
-    operation_results[3][7] += sum(prices.NG_PRICE * q_gas_for_burner_Wh)  # CHF
-    operation_results[3][8] += sum(calc_emissions_Whyr_to_tonCO2yr(q_gas_for_burner_Wh, lca.NG_TO_CO2_EQ))  # ton CO2
-    # add activation
-    cooling_dispatch[3] = {'Q_ACH_gen_directload_W': q_chw_single_ACH_Wh,
+    q_burner_load_Wh = calc_burner_operation(Qc_nom_AHU_ARU_SCU_W, q_hw_single_ACH_Wh[1], q_sc_gen_ET_Wh)
+    el_total_Wh[3] = el_single_ACH_Wh[1] + el_aux_SC_ET_Wh + el_CT_Wh[3]
+    q_gas_total_Wh[3] = q_gas_for_burner_Wh
+    cooling_dispatch[3] = {'Q_ACH_gen_directload_W': q_chw_single_ACH_Wh[1],
                            'Q_Burner_NG_ACH_W': q_burner_load_Wh,
                            'Q_SC_ET_ACH_W': q_sc_gen_ET_Wh,
-                           'E_ACH_req_W': el_single_ACH_Wh,
-                           'E_CT_req_W': el_CT_Wh,
+                           'E_ACH_req_W': el_single_ACH_Wh[1],
+                           'E_CT_req_W': el_CT_Wh[3],
                            'E_SC_ET_req_W': el_aux_SC_ET_Wh,
-                           'E_cs_cre_cdata_req_W': el_total_Wh,
+                           'E_cs_cre_cdata_req_W': el_total_Wh[3],
                            'NG_Burner_req': q_gas_for_burner_Wh,
                            }
     # capacity of cooling technologies
     operation_results[3][0] = Qc_nom_AHU_ARU_SCU_W
     operation_results[3][5] = Qc_nom_AHU_ARU_SCU_W
-    q_total_load = (q_burner_load_Wh[None, :] + q_chw_single_ACH_Wh[None, :] + q_sc_gen_ET_Wh[None, :])
-    system_COP_list = np.divide(q_total_load, (el_total_Wh[None, :] + q_gas_for_burner_Wh[None, :])).flatten()
-    system_COP = np.nansum(q_total_load * system_COP_list) / np.nansum(
-        q_total_load)  # weighted average of the system efficiency
-    operation_results[3][9] += system_COP
+    operation_results[3][9] += calc_system_COP(q_burner_load_Wh + q_chw_single_ACH_Wh[1] + q_sc_gen_ET_Wh,
+                                               el_total_Wh[3] + q_gas_total_Wh[3])
 
     # these two configurations are only activated when SCU is in use
     if Qc_nom_SCU_W > 0.0:
-        # 4: VCC (AHU + ARU) + VCC (SCU) + CT
-        print(
-            '{building_name} Config 4: Vapor Compression Chillers(HT) -> SCU & Vapor Compression Chillers(LT) -> AHU,ARU'.format(
-                building_name=building_name))
-        # VCC (AHU + ARU) operation
-        el_VCC_to_AHU_ARU_Wh, \
-        q_cw_VCC_to_AHU_ARU_Wh, \
-        q_chw_VCC_to_AHU_ARU_Wh = calc_VCC_operation(T_re_AHU_ARU_K, T_sup_AHU_ARU_K, mdot_AHU_ARU_kgpers, VCC_chiller)
-        VCC_LT_Status = np.where(q_chw_VCC_to_AHU_ARU_Wh > 0.0, 1, 0)
-        # VCC(SCU) operation
-        el_VCC_to_SCU_Wh, \
-        q_cw_VCC_to_SCU_Wh, \
-        q_chw_VCC_to_SCU_Wh = calc_VCC_operation(T_re_SCU_K, T_sup_SCU_K, mdot_SCU_kgpers, VCC_chiller)
-        VCC_HT_Status = np.where(q_chw_VCC_to_AHU_ARU_Wh > 0.0, 1, 0)
-        # CT operation
-        q_CT_VCC_to_AHU_ARU_and_VCC_to_SCU_W = q_cw_VCC_to_AHU_ARU_Wh + q_cw_VCC_to_SCU_Wh
-        Q_nom_CT_VCC_to_AHU_ARU_and_VCC_to_SCU_W, el_CT_Wh = calc_CT_operation(q_CT_VCC_to_AHU_ARU_and_VCC_to_SCU_W)
-        # add el costs
-        el_total_Wh = el_VCC_to_AHU_ARU_Wh + el_VCC_to_SCU_Wh + el_CT_Wh
-        operation_results[4][7] += sum(prices.ELEC_PRICE * el_total_Wh)  # CHF
-        operation_results[4][8] += sum(calc_emissions_Whyr_to_tonCO2yr(el_total_Wh, lca.EL_TO_CO2_EQ))  # ton CO2
-        # add activation
+        ## 4: VCC (AHU + ARU) + VCC (SCU) + CT
+        el_total_Wh[4] = el_VCC_to_AHU_ARU_Wh + el_VCC_to_SCU_Wh + el_CT_Wh[4]
         cooling_dispatch[4] = {'Q_BaseVCC_AS_gen_directload_W': q_chw_VCC_to_AHU_ARU_Wh,
                                'Q_BaseVCCHT_AS_gen_directload_W': q_chw_VCC_to_SCU_Wh,
                                'E_BaseVCC_req_W': el_VCC_to_AHU_ARU_Wh,
                                'E_VCC_HT_req_W': el_VCC_to_SCU_Wh,
-                               'E_CT_req_W': el_CT_Wh,
-                               'E_cs_cre_cdata_req_W': el_total_Wh
+                               'E_CT_req_W': el_CT_Wh[4],
+                               'E_cs_cre_cdata_req_W': el_total_Wh[4]
                                }
         # capacity of cooling technologies
         operation_results[4][0] = Qc_nom_AHU_ARU_SCU_W
         operation_results[4][2] = Qc_nom_AHU_ARU_W  # 2: BaseVCC_AS
         operation_results[4][3] = Qc_nom_SCU_W  # 3: VCCHT_AS
-        system_COP_list = np.divide(q_CT_VCC_to_AHU_ARU_and_VCC_to_SCU_W[None, :], el_total_Wh[None, :]).flatten()
-        system_COP = np.nansum(q_CT_VCC_to_AHU_ARU_and_VCC_to_SCU_W[None, :] * system_COP_list) / np.nansum(
-            q_CT_VCC_to_AHU_ARU_and_VCC_to_SCU_W[None, :])  # weighted average of the system efficiency
-        operation_results[4][9] += system_COP
-
-        # 5: VCC (AHU + ARU) + ACH (SCU) + CT
-        print(
-            '{building_name} Config 5: Vapor Compression Chillers(LT) -> AHU,ARU & Flate-place SC + Absorption Chillers(HT) -> SCU'.format(
-                building_name=building_name))
-        # ACH (SCU) operation
-        T_hw_FP_ACH_to_SCU_K, \
-        el_FP_ACH_to_SCU_Wh, \
-        q_cw_FP_ACH_to_SCU_Wh, \
-        q_hw_FP_ACH_to_SCU_Wh, \
-        q_chw_FP_ACH_to_SCU_Wh = calc_ACH_operation(T_ground_K, T_hw_in_FP_C, T_re_SCU_K, T_sup_SCU_K, chiller_prop,
-                                                    mdot_SCU_kgpers, ACH_TYPE_SINGLE)
-        ACH_HT_Status = np.where(q_chw_FP_ACH_to_SCU_Wh > 0.0, 1, 0)
-        # boiler operation
+        operation_results[4][9] += calc_system_COP(q_CT_Wh[4], el_total_Wh[4])
+
+        ## 5: VCC (AHU + ARU) + ACH (SCU) + CT + Boiler + SC_FP
         q_gas_for_boiler_Wh, \
         Q_nom_boiler_VCC_to_AHU_ARU_and_FP_to_single_ACH_to_SCU_W, \
         q_load_from_boiler_Wh = calc_boiler_operation(Qc_nom_SCU_W, T_hw_FP_ACH_to_SCU_K,
                                                       q_hw_FP_ACH_to_SCU_Wh, q_sc_gen_FP_Wh)
-        # CT operation
-        q_CT_VCC_to_AHU_ARU_and_single_ACH_to_SCU_Wh = q_cw_VCC_to_AHU_ARU_Wh + q_cw_FP_ACH_to_SCU_Wh
-        Q_nom_CT_VCC_to_AHU_ARU_and_FP_to_single_ACH_to_SCU_W, \
-        el_CT_Wh = calc_CT_operation(q_CT_VCC_to_AHU_ARU_and_single_ACH_to_SCU_Wh)
-
-        # add electricity costs
-        el_total_Wh = el_VCC_to_AHU_ARU_Wh + el_FP_ACH_to_SCU_Wh + el_aux_SC_FP_Wh + el_CT_Wh
-        operation_results[5][7] += sum(prices.ELEC_PRICE * el_total_Wh)  # CHF
-        operation_results[5][8] += sum(calc_emissions_Whyr_to_tonCO2yr(el_total_Wh, lca.EL_TO_CO2_EQ))  # ton CO2
-        # add gas costs
-        q_gas_total_Wh = q_gas_for_boiler_Wh
-        operation_results[5][7] += sum(prices.NG_PRICE * q_gas_total_Wh)  # CHF
-        operation_results[5][8] += sum(calc_emissions_Whyr_to_tonCO2yr(q_gas_total_Wh, lca.NG_TO_CO2_EQ))  # ton CO2
-        # add activation
+        el_total_Wh[5] = el_VCC_to_AHU_ARU_Wh + el_FP_ACH_to_SCU_Wh + el_aux_SC_FP_Wh + el_CT_Wh[5]
+        q_gas_total_Wh[5] = q_gas_for_boiler_Wh
         cooling_dispatch[5] = {'Q_BaseVCC_AS_gen_directload_W': q_chw_VCC_to_AHU_ARU_Wh,
                                'Q_ACHHT_AS_gen_directload_W': q_chw_FP_ACH_to_SCU_Wh,
                                'E_BaseVCC_req_W': el_VCC_to_AHU_ARU_Wh,
                                'E_ACHHT_req_W': el_FP_ACH_to_SCU_Wh,
                                'E_SC_FP_ACH_req_W': el_aux_SC_FP_Wh,
-                               'E_CT_req_W': el_CT_Wh,
-                               'E_cs_cre_cdata_req_W': el_total_Wh,
+                               'E_CT_req_W': el_CT_Wh[5],
+                               'E_cs_cre_cdata_req_W': el_total_Wh[5],
                                'Q_BaseBoiler_NG_req': q_gas_for_boiler_Wh,
                                }
         # capacity of cooling technologies
         operation_results[5][0] = Qc_nom_AHU_ARU_SCU_W
         operation_results[5][2] = Qc_nom_AHU_ARU_W  # 2: BaseVCC_AS
         operation_results[5][6] = Qc_nom_SCU_W  # 6: ACHHT_SC_FP
-        q_total_load = q_CT_VCC_to_AHU_ARU_and_single_ACH_to_SCU_Wh[None, :] + q_gas_for_boiler_Wh[None, :]
-        system_COP_list = np.divide(q_total_load, el_total_Wh[None, :]).flatten()
-        system_COP = np.nansum(q_total_load * system_COP_list) / np.nansum(
-            q_total_load)  # weighted average of the system efficiency
-        operation_results[5][9] += system_COP
+        operation_results[5][9] += calc_system_COP(q_CT_Wh[5] + q_gas_for_boiler_Wh, el_total_Wh[5])
+
+    ## add variable costs and emissions of electricity and natural gas of all configurations at once
+    operation_results[:, 7] += np.sum(prices.ELEC_PRICE * el_total_Wh + prices.NG_PRICE * q_gas_total_Wh, axis=1)
+    operation_results[:, 8] += np.sum(calc_emissions_Whyr_to_tonCO2yr(el_total_Wh, lca.EL_TO_CO2_EQ) +
+                                      calc_emissions_Whyr_to_tonCO2yr(q_gas_total_Wh, lca.NG_TO_CO2_EQ),
+                                      axis=1)  # ton CO2
 
     ## Calculate Capex/Opex
     # Initialize arrays
-    number_of_configurations = len(operation_results)
     Capex_a_USD = np.zeros((number_of_configurations, 1))
     Capex_total_USD = np.zeros((number_of_configurations, 1))
     Opex_a_fixed_USD = np.zeros((number_of_configurations, 1))
@@ -371,7 +298,7 @@ def disconnected_cooling_for_building(building_name, supply_systems, lca, locato
     Capex_a_VCC_USD, Opex_fixed_VCC_USD, Capex_VCC_USD = chiller_vapor_compression.calc_Cinv_VCC(
         Qc_nom_AHU_ARU_SCU_W, locator, 'CH3')
     Capex_a_CT_USD, Opex_fixed_CT_USD, Capex_CT_USD = cooling_tower.calc_Cinv_CT(
-        Q_nom_CT_VCC_to_AHU_ARU_SCU_W, locator, 'CT1')
+        Q_nom_CT_W[1], locator, 'CT1')
     # add costs
     Capex_a_USD[1][0] = Capex_a_CT_USD + Capex_a_VCC_USD
     Capex_total_USD[1][0] = Capex_CT_USD + Capex_VCC_USD
@@ -380,7 +307,7 @@ def disconnected_cooling_for_building(building_name, supply_systems, lca, locato
     Capex_a_ACH_USD, Opex_fixed_ACH_USD, Capex_ACH_USD = chiller_absorption.calc_Cinv_ACH(
         Qc_nom_AHU_ARU_SCU_W, supply_systems.Absorption_chiller, ACH_TYPE_SINGLE)
     Capex_a_CT_USD, Opex_fixed_CT_USD, Capex_CT_USD = cooling_tower.calc_Cinv_CT(
-        Q_nom_CT_FP_to_single_ACH_to_AHU_ARU_SCU_W, locator, 'CT1')
+        Q_nom_CT_W[2], locator, 'CT1')
     Capex_a_boiler_USD, Opex_fixed_boiler_USD, Capex_boiler_USD = boiler.calc_Cinv_boiler(
         Q_nom_Boiler_FP_to_single_ACH_to_AHU_ARU_SCU_W, 'BO1', boiler_cost_data)
     Capex_a_USD[2][0] = Capex_a_CT_USD + Capex_a_ACH_USD + Capex_a_boiler_USD + Capex_a_SC_FP_USD
@@ -391,7 +318,7 @@ def disconnected_cooling_for_building(building_name, supply_systems, lca, locato
     Capex_a_ACH_USD, Opex_fixed_ACH_USD, Capex_ACH_USD = chiller_absorption.calc_Cinv_ACH(
         Qc_nom_AHU_ARU_SCU_W, supply_systems.Absorption_chiller, ACH_TYPE_SINGLE)
     Capex_a_CT_USD, Opex_fixed_CT_USD, Capex_CT_USD = cooling_tower.calc_Cinv_CT(
-        Q_nom_CT_ET_to_single_ACH_to_AHU_ARU_SCU_W, locator, 'CT1')
+        Q_nom_CT_W[3], locator, 'CT1')
     Capex_a_burner_USD, Opex_fixed_burner_USD, Capex_burner_USD = burner.calc_Cinv_burner(
         Q_nom_Burner_ET_to_single_ACH_to_AHU_ARU_SCU_W, boiler_cost_data, 'BO1')
     Capex_a_USD[3][0] = Capex_a_CT_USD + Capex_a_ACH_USD + Capex_a_burner_USD + Capex_a_SC_ET_USD
@@ -406,7 +333,7 @@ def disconnected_cooling_for_building(building_name, supply_systems, lca, locato
         Capex_a_VCC_S_USD, Opex_VCC_S_USD, Capex_VCC_S_USD = chiller_vapor_compression.calc_Cinv_VCC(
             Qc_nom_SCU_W, locator, 'CH3')
         Capex_a_CT_USD, Opex_fixed_CT_USD, Capex_CT_USD = cooling_tower.calc_Cinv_CT(
-            Q_nom_CT_VCC_to_AHU_ARU_and_VCC_to_SCU_W, locator, 'CT1')
+            Q_nom_CT_W[4], locator, 'CT1')
         Capex_a_USD[4][0] = Capex_a_CT_USD + Capex_a_VCC_AA_USD + Capex_a_VCC_S_USD
         Capex_total_USD[4][0] = Capex_CT_USD + Capex_VCC_AA_USD + Capex_VCC_S_USD
         Opex_a_fixed_USD[4][0] = Opex_fixed_CT_USD + Opex_VCC_AA_USD + Opex_VCC_S_USD
@@ -415,7 +342,7 @@ def disconnected_cooling_for_building(building_name, supply_systems, lca, locato
         Capex_a_ACH_S_USD, Opex_fixed_ACH_S_USD, Capex_ACH_S_USD = chiller_absorption.calc_Cinv_ACH(
             Qc_nom_SCU_W, supply_systems.Absorption_chiller, ACH_TYPE_SINGLE)
         Capex_a_CT_USD, Opex_fixed_CT_USD, Capex_CT_USD = cooling_tower.calc_Cinv_CT(
-            Q_nom_CT_VCC_to_AHU_ARU_and_FP_to_single_ACH_to_SCU_W, locator, 'CT1')
+            Q_nom_CT_W[5], locator, 'CT1')
         Capex_a_boiler_USD, Opex_fixed_boiler_USD, Capex_boiler_USD = boiler.calc_Cinv_boiler(
             Q_nom_boiler_VCC_to_AHU_ARU_and_FP_to_single_ACH_to_SCU_W, 'BO1', boiler_cost_data)
         Capex_a_USD[5][0] = Capex_a_CT_USD + Capex_a_VCC_AA_USD + Capex_a_ACH_S_USD + \
@@ -464,20 +391,18 @@ def calc_VCC_operation(T_chw_re_K, T_chw_sup_K, mdot_kgpers, VCC_chiller):
     from cea.optimization.constants import VCC_T_COOL_IN
     q_chw_Wh = mdot_kgpers * HEAT_CAPACITY_OF_WATER_JPERKGK * (T_chw_re_K - T_chw_sup_K)
     peak_cooling_load = np.nanmax(q_chw_Wh)
-    VCC_operation = np.vectorize(chiller_vapor_compression.calc_VCC)(peak_cooling_load,
-                                                                     q_chw_Wh,
-                                                                     T_chw_sup_K,
-                                                                     T_chw_re_K,
-                                                                     VCC_T_COOL_IN,
-                                                                     VCC_chiller)
-    q_cw_Wh = np.asarray([x['q_cw_W'] for x in VCC_operation])
-    el_VCC_Wh = np.asarray([x['wdot_W'] for x in VCC_operation])
-    return el_VCC_Wh, q_cw_Wh, q_chw_Wh
+    VCC_operation = chiller_vapor_compression.calc_VCC_array(peak_cooling_load, q_chw_Wh, T_chw_sup_K, T_chw_re_K,
+                                                             VCC_T_COOL_IN, VCC_chiller)
+    return VCC_operation['wdot_W'], VCC_operation['q_cw_W'], q_chw_Wh
 
 
 def calc_CT_operation(q_CT_load_Wh):
-    Q_nom_CT_W = np.max(q_CT_load_Wh)
-    el_CT_Wh = np.vectorize(cooling_tower.calc_CT)(q_CT_load_Wh, Q_nom_CT_W)
+    """
+    Sizes the cooling towers to the peak heat rejection and calculates their electricity demand. ``q_CT_load_Wh`` can
+    be a single time series or a (configuration x hour) matrix, in which case one cooling tower is sized per row.
+    """
+    Q_nom_CT_W = np.max(q_CT_load_Wh, axis=-1)
+    el_CT_Wh = cooling_tower.calc_CT_array(q_CT_load_Wh, Q_nom_CT_W[..., None])
     return Q_nom_CT_W, el_CT_Wh
 
 
@@ -486,7 +411,7 @@ def calc_boiler_operation(Q_ACH_size_W, T_hw_out_from_ACH_K, q_hw_single_ACH_Wh,
         q_boiler_load_Wh = q_hw_single_ACH_Wh - q_sc_gen_FP_Wh
         Q_nom_Boilers_W = np.max(q_boiler_load_Wh)
         T_re_boiler_K = T_hw_out_from_ACH_K
-        boiler_eff = np.vectorize(boiler.calc_Cop_boiler)(q_boiler_load_Wh, Q_nom_Boilers_W, T_re_boiler_K)
+        boiler_eff = boiler.calc_Cop_boiler_array(q_boiler_load_Wh, Q_nom_Boilers_W, T_re_boiler_K)
         Q_gas_for_boiler_Wh = np.divide(q_boiler_load_Wh, boiler_eff,
                                         out=np.zeros_like(q_boiler_load_Wh), where=boiler_eff != 0.0)
     else:
@@ -500,7 +425,7 @@ def calc_burner_operation(Q_ACH_size_W, q_hw_single_ACH_Wh, q_sc_gen_ET_Wh):
     if not np.isclose(Q_ACH_size_W, 0.0):
         q_burner_load_Wh = q_hw_single_ACH_Wh - q_sc_gen_ET_Wh
         Q_nom_Burners_W = np.max(q_burner_load_Wh)
-        burner_eff = np.vectorize(burner.calc_cop_burner)(q_burner_load_Wh, Q_nom_Burners_W)
+        burner_eff = np.full_like(q_burner_load_Wh, burner.calc_cop_burner(q_burner_load_Wh, Q_nom_Burners_W))
         q_gas_for_burber_Wh = np.divide(q_burner_load_Wh, burner_eff,
                                         out=np.zeros_like(q_burner_load_Wh), where=burner_eff != 0)
     else:
@@ -511,83 +436,21 @@ def calc_burner_operation(Q_ACH_size_W, q_hw_single_ACH_Wh, q_sc_gen_ET_Wh):
     return q_gas_for_burber_Wh, Q_nom_Burners_W, q_burner_load_Wh
 
 
-def compile_TAC_CO2_Prim(Capex_a_USD, Opex_a_fixed_USD, number_of_configurations, operation_results):
-    TAC_USD = np.zeros((number_of_configurations, 2))
-    TotalCO2 = np.zeros((number_of_configurations, 2))
-    TotalPrim = np.zeros((number_of_configurations, 2))
-    Opex_a_USD = np.zeros((number_of_configurations, 2))
-    for i in range(number_of_configurations):
-        TAC_USD[i][0] = TotalCO2[i][0] = TotalPrim[i][0] = Opex_a_USD[i][0] = i
-        Opex_a_USD[i][1] = Opex_a_fixed_USD[i][0] + operation_results[i][7]
-        TAC_USD[i][1] = Capex_a_USD[i][0] + Opex_a_USD[i][1]
-        TotalCO2[i][1] = operation_results[i][8]
-        TotalPrim[i][1] = operation_results[i][9]
-    return Opex_a_USD, TAC_USD, TotalCO2, TotalPrim
-
-
-def rank_results(TAC_USD, TotalCO2, TotalPrim, number_of_configurations):
+def calc_system_COP(q_load_Wh, energy_input_Wh):
     """
-    This function chooses the best configuration according to the configurations' ranking in terms of cost and
-    emissions.
-    If different configurations have the same rank, just across different objective functions:
-    e.g. config 1: 1st in emissions, 2nd in cost
-         config 2: 2nd in emissions, 1st in cost
-    the function chooses the config that has the lowest value in each of the objective functions, relative to
-    the mean of the all configs:
-    e.g. If config 1: 41000 kgCO2 per year and the mean across all configs is 50000 kgCO2 per year the relative
-         emissions value of config 1 would be 82%.
-         If config 2: 44000 kgCO2 per year its relative emissions value would be 88%.
-         Let's assume the relative cost values of config 1 and 2 are 78% and 75% respectively.
-         The compounded relative objective value (cROV) of config 1 would therefore be 160%,
-         the compounded relative objective value of config 2 would be 163%.
-         -> config 1 would be chosen as the best
-    In the rare case where multiple configurations have the exact same compounded relative objective value
-    one of them is selected at random.
+    Load-weighted average of the hourly system efficiency (delivered energy / required energy) of a configuration.
     """
+    system_COP_list = np.divide(q_load_Wh, energy_input_Wh)
+    return np.nansum(q_load_Wh * system_COP_list) / np.nansum(q_load_Wh)
 
-    # sort TAC_USD and TotalCO2
-    CostsS = TAC_USD[np.argsort(TAC_USD[:, 1])]
-    CO2S = TotalCO2[np.argsort(TotalCO2[:, 1])]
-    # initialize optSearch array
-    optSearch = np.empty(number_of_configurations)
-    number_of_objectives = 2  # TAC_USD and TotalCO2
-    optSearch.fill(number_of_objectives)
-    # rank results
-    rank = 0
-    BestFound = False
-    indexBest = None
-    Best = np.zeros((number_of_configurations, 1))
-    while not BestFound and rank < number_of_configurations:
-        optSearch[int(CostsS[rank][0])] -= 1
-        optSearch[int(CO2S[rank][0])] -= 1
-
-        if np.count_nonzero(optSearch) != number_of_configurations:
-            BestFound = True
-            # in case only one best ranked configuration exists choose that one
-            if np.count_nonzero(optSearch) == number_of_configurations - 1:
-                indexBest = np.where(optSearch == 0)[0][0]
-            # in case different configurations have the same rank, evaluate their compounded relative objective values
-            else:
-                indexesSharedBest = np.where(optSearch == 0)[0]
-                relTAC_USD = TAC_USD[:, 1] / np.mean(TAC_USD[:, 1])
-                relTotalCO2 = TotalCO2[:, 1] / np.mean(TotalCO2[:, 1])
-                relTAC_USDSharedBest = relTAC_USD[indexesSharedBest]
-                relTotalCO2SharedBest = relTotalCO2[indexesSharedBest]
-                cROVsSharedBest = relTAC_USDSharedBest + relTotalCO2SharedBest
-                locBestCROV = np.where(cROVsSharedBest == np.min(cROVsSharedBest))[0]
-                if len(locBestCROV) == 1:
-                    indexBest = indexesSharedBest[locBestCROV[0]]
-                else:
-                    freeChoice = random.randint(0, len(locBestCROV) - 1)
-                    indexBest = indexesSharedBest[locBestCROV[freeChoice]]
-
-        rank += 1
-    # get the best option according to the ranking.
-    if indexBest is not None:
-        Best[indexBest][0] = 1
-    else:
-        raise ('indexBest not found, please check the ranking process or report this issue on GitHub.')
-    return Best, indexBest
+
+def compile_TAC_CO2_Prim(Capex_a_USD, Opex_a_fixed_USD, number_of_configurations, operation_results):
+    configuration_index = np.arange(number_of_configurations)
+    Opex_a_USD = np.column_stack([configuration_index, Opex_a_fixed_USD[:, 0] + operation_results[:, 7]])
+    TAC_USD = np.column_stack([configuration_index, Capex_a_USD[:, 0] + Opex_a_USD[:, 1]])
+    TotalCO2 = np.column_stack([configuration_index, operation_results[:, 8]])
+    TotalPrim = np.column_stack([configuration_index, operation_results[:, 9]])
+    return Opex_a_USD, TAC_USD, TotalCO2, TotalPrim
 
 
 def initialize_result_tables_for_supply_configurations(Qc_nom_SCU_W):
@@ -614,19 +477,23 @@ def initialize_result_tables_for_supply_configurations(Qc_nom_SCU_W):
 
 def calc_ACH_operation(T_ground_K, T_SC_hw_in_C, T_chw_re_K, T_chw_sup_K, absorption_chiller, mdot_chw_kgpers,
                        ACH_type):
+    """
+    Operates the absorption chillers for every hour. ``T_SC_hw_in_C`` may hold one row per supply configuration
+    (e.g. flat-plate and evacuated tube collectors), all outputs then have the same (configuration x hour) shape.
+    """
     absorption_chiller = chiller_absorption.AbsorptionChiller(absorption_chiller, ACH_type)
-    SC_to_single_ACH_operation = np.vectorize(chiller_absorption.calc_chiller_main)(mdot_chw_kgpers,
-                                                                                    T_chw_sup_K,
-                                                                                    T_chw_re_K,
-                                                                                    T_SC_hw_in_C,
-                                                                                    T_ground_K,
-                                                                                    absorption_chiller)
-
-    el_ACH_Wh = np.asarray([x['wdot_W'] for x in SC_to_single_ACH_operation])
-    q_chw_ACH_Wh = np.asarray([x['q_chw_W'] for x in SC_to_single_ACH_operation])
-    q_cw_ACH_Wh = np.asarray([x['q_cw_W'] for x in SC_to_single_ACH_operation])
-    q_hw_ACH_Wh = np.asarray([x['q_hw_W'] for x in SC_to_single_ACH_operation])
-    T_hw_out_ACH_K = np.asarray([x['T_hw_out_C'] + 273.15 for x in SC_to_single_ACH_operation])
+    SC_to_single_ACH_operation = chiller_absorption.calc_chiller_main_array(mdot_chw_kgpers,
+                                                                            T_chw_sup_K,
+                                                                            T_chw_re_K,
+                                                                            T_SC_hw_in_C,
+                                                                            T_ground_K,
+                                                                            absorption_chiller)
+
+    el_ACH_Wh = SC_to_single_ACH_operation['wdot_W']
+    q_chw_ACH_Wh = SC_to_single_ACH_operation['q_chw_W']
+    q_cw_ACH_Wh = SC_to_single_ACH_operation['q_cw_W']
+    q_hw_ACH_Wh = SC_to_single_ACH_operation['q_hw_W']
+    T_hw_out_ACH_K = SC_to_single_ACH_operation['T_hw_out_C'] + 273.15
     return T_hw_out_ACH_K, el_ACH_Wh, q_cw_ACH_Wh, q_hw_ACH_Wh, q_chw_ACH_Wh
 
 
@@ -634,13 +501,14 @@ def get_SC_data(building_name, locator, panel_type):
     SC_data = pd.read_csv(locator.SC_results(building_name, panel_type),
                           usecols=["T_SC_sup_C", "T_SC_re_C", "mcp_SC_kWperC", "Q_SC_gen_kWh", "Area_SC_m2",
                                    "Eaux_SC_kWh"])
-    q_sc_gen_Wh = SC_data['Q_SC_gen_kWh'] * 1000
+    q_sc_gen_Wh = SC_data['Q_SC_gen_kWh'].values * 1000
     q_sc_gen_Wh = np.where(q_sc_gen_Wh < 0.0, 0.0, q_sc_gen_Wh)
-    el_aux_SC_Wh = SC_data['Eaux_SC_kWh'] * 1000
+    el_aux_SC_Wh = SC_data['Eaux_SC_kWh'].values * 1000
+    T_SC_re_C = SC_data['T_SC_re_C'].values
     if panel_type == "FP":
-        T_hw_in_C = [x if x > T_GENERATOR_FROM_FP_C else T_GENERATOR_FROM_FP_C for x in SC_data['T_SC_re_C']]
+        T_hw_in_C = np.where(T_SC_re_C > T_GENERATOR_FROM_FP_C, T_SC_re_C, T_GENERATOR_FROM_FP_C)
     elif panel_type == "ET":
-        T_hw_in_C = [x if x > T_GENERATOR_FROM_ET_C else T_GENERATOR_FROM_ET_C for x in SC_data['T_SC_re_C']]
+        T_hw_in_C = np.where(T_SC_re_C > T_GENERATOR_FROM_ET_C, T_SC_re_C, T_GENERATOR_FROM_ET_C)
     else:
         print('invalid panel type: ', panel_type)
     return SC_data, T_hw_in_C, el_aux_SC_Wh, q_sc_gen_Wh
@@ -658,7 +526,7 @@ def calc_combined_cooling_loads(building_name, locator, total_demand, cooling_co
     T_sup_K = substation_operation["T_supply_DC_space_cooling_data_center_and_refrigeration_result_K"].values
     mdot_kgpers = substation_operation["mdot_space_cooling_data_center_and_refrigeration_result_kgpers"].values
     # calculate combined load
-    Qc_load_W = np.vectorize(calc_new_load)(mdot_kgpers, T_sup_K, T_re_K)
+    Qc_load_W = calc_new_load(mdot_kgpers, T_sup_K, T_re_K)
     Qc_design_W = Qc_load_W.max()
     return Qc_design_W, T_re_K, T_sup_K, mdot_kgpers
 
@@ -682,19 +550,18 @@ def calc_new_load(mdot_kgpers, T_sup_K, T_re_K):
     :param mdot_kgpers: mass flow
     :param T_sup_K: chilled water supply temperautre
     :param T_re_K: chilled water return temperature
-    :type mdot_kgpers: float
-    :type TsupDH: float
-    :type T_re_K: float
+    :type mdot_kgpers: np.ndarray
+    :type TsupDH: np.ndarray
+    :type T_re_K: np.ndarray
     :return: Q_cooling_load: load of the distribution
-    :rtype: float
+    :rtype: np.ndarray
     """
-    if mdot_kgpers > 0:
-        Q_cooling_load_W = mdot_kgpers * HEAT_CAPACITY_OF_WATER_JPERKGK * (T_re_K - T_sup_K) * (
-                1 + Q_LOSS_DISCONNECTED)  # for cooling load
-        if Q_cooling_load_W < 0:
-            raise ValueError('Q_cooling_load less than zero, check temperatures!')
-    else:
-        Q_cooling_load_W = 0
+    Q_cooling_load_W = np.where(mdot_kgpers > 0,
+                                mdot_kgpers * HEAT_CAPACITY_OF_WATER_JPERKGK * (T_re_K - T_sup_K) * (
+                                        1 + Q_LOSS_DISCONNECTED),  # for cooling load
+                                0.0)
+    if np.any(Q_cooling_load_W < 0):
+        raise ValueError('Q_cooling_load less than zero, check temperatures!')
 
     return Q_cooling_load_W
 
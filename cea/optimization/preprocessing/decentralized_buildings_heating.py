@@ -49,7 +49,7 @@ def disconnected_buildings_heating_main(locator, total_demand, building_names, c
     weather_data = epwreader.epw_reader(weather_path)[['year', 'drybulb_C', 'wetbulb_C',
                                                          'relhum_percent', 'windspd_ms', 'skytemp_C']]
 
-    T_ground_K = calc_ground_temperature(weather_data['drybulb_C'], depth_m=10)
+    T_ground_K = calc_ground_temperature(weather_data['drybulb_C'].values, depth_m=10)
     supply_systems = SupplySystemsDatabase(locator)
 
     # This will calculate the substation state if all buildings where connected(this is how we study this)
@@ -77,9 +77,9 @@ def disconnected_heating_for_building(building_name, supply_systems, T_ground_K,
 
     # run substation model to derive temperatures of the building
     substation_results = pd.read_csv(locator.get_optimization_substations_results_file(building_name, "DH", ""))
-    q_load_Wh = np.vectorize(calc_new_load)(substation_results["mdot_DH_result_kgpers"],
-                                            substation_results["T_supply_DH_result_K"],
-                                            substation_results["T_return_DH_result_K"])
+    q_load_Wh = calc_new_load(substation_results["mdot_DH_result_kgpers"].values,
+                              substation_results["T_supply_DH_result_K"].values,
+                              substation_results["T_return_DH_result_K"].values)
     Qnom_W = q_load_Wh.max()
     # Create empty matrices
     Opex_a_var_USD = np.zeros((13, 7))
@@ -105,7 +105,7 @@ def disconnected_heating_for_building(building_name, supply_systems, T_ground_K,
     ## Start Hourly calculation
     Tret_K = np.where(Tret_K > 0.0, Tret_K, Tsup_K)
     ## 0: Boiler NG
-    BoilerEff = np.vectorize(Boiler.calc_Cop_boiler)(q_load_Wh, Qnom_W, Tret_K)
+    BoilerEff = Boiler.calc_Cop_boiler_array(q_load_Wh, Qnom_W, Tret_K)
     Qgas_to_Boiler_Wh = np.divide(q_load_Wh, BoilerEff, out=np.zeros_like(q_load_Wh), where=BoilerEff != 0.0)
     Boiler_Status = np.where(Qgas_to_Boiler_Wh > 0.0, 1, 0)
     # add costs
@@ -149,62 +149,60 @@ def disconnected_heating_for_building(building_name, supply_systems, T_ground_K,
                            'E_Fuelcell_gen_export_W': el_from_FC_Wh,
                            'E_hs_ww_req_W': np.zeros(len(q_load_Wh))}
     # 3-13: Boiler NG + GHP
+    # the ten boiler/GHP size ratios are calculated together, one row per configuration (configuration x hour)
+    boiler_share = np.arange(10) / 10.0
+    QnomBoiler_W = boiler_share * Qnom_W
+    QnomGHP_W = Qnom_W - QnomBoiler_W
+
+    # GHP operation
+    Texit_GHP_nom_K = QnomGHP_W[:, None] / (mdot_kgpers * HEAT_CAPACITY_OF_WATER_JPERKGK) + Tret_K
+    el_GHP_Wh, q_load_NG_Boiler_Wh, \
+    qhot_missing_Wh, \
+    Texit_GHP_K, q_from_GHP_Wh = calc_GHP_operation(QnomGHP_W[:, None], T_ground_K, Texit_GHP_nom_K,
+                                                    Tret_K, Tsup_K, mdot_kgpers, q_load_Wh)
+    GHP_el_size_W[:, 0] = el_GHP_Wh.max(axis=1)
+    GHP_Status = np.where(q_from_GHP_Wh > 0.0, 1, 0)
+
+    # GHP Backup Boiler operation
+    if qhot_missing_Wh.max() > 0.0:
+        print("GHP unable to cover the whole demand, boiler activated!")
+    Qnom_GHP_Backup_Boiler_W = np.maximum(qhot_missing_Wh.max(axis=1), 0.0)
+    BoilerEff = Boiler.calc_Cop_boiler_array(qhot_missing_Wh, Qnom_GHP_Backup_Boiler_W[:, None], Texit_GHP_K)
+    Qgas_to_GHPBoiler_Wh = np.divide(qhot_missing_Wh, BoilerEff,
+                                     out=np.zeros_like(qhot_missing_Wh), where=BoilerEff != 0.0)
+    Q_Boiler_for_GHP_W[:, 0] = Qnom_GHP_Backup_Boiler_W
+    GHPbackupBoiler_Status = np.where(qhot_missing_Wh > 0.0, 1, 0)
+
+    # NG Boiler operation
+    BoilerEff = Boiler.calc_Cop_boiler_array(q_load_NG_Boiler_Wh, QnomBoiler_W[:, None], Texit_GHP_K)
+    Qgas_to_Boiler_Wh = np.divide(q_load_NG_Boiler_Wh, BoilerEff,
+                                  out=np.zeros_like(q_load_NG_Boiler_Wh), where=BoilerEff != 0.0)
+    Boiler_Status = np.where(q_load_NG_Boiler_Wh > 0.0, 1, 0)
+
+    # add costs
+    # electricity
+    el_total_Wh = el_GHP_Wh
+    Opex_a_var_USD[3:, 4] += np.sum(prices.ELEC_PRICE * el_total_Wh, axis=1)
+    GHG_tonCO2[3:, 5] += np.sum(calc_emissions_Whyr_to_tonCO2yr(el_total_Wh, lca.EL_TO_CO2_EQ), axis=1)  # ton CO2
+    # gas
+    Q_gas_total_Wh = Qgas_to_GHPBoiler_Wh + Qgas_to_Boiler_Wh
+    Opex_a_var_USD[3:, 4] += np.sum(prices.NG_PRICE * Q_gas_total_Wh, axis=1)
+    GHG_tonCO2[3:, 5] += np.sum(calc_emissions_Whyr_to_tonCO2yr(Q_gas_total_Wh, lca.NG_TO_CO2_EQ), axis=1)  # ton CO2
+    # add activation
+    resourcesRes[3:, 0] = np.sum(qhot_missing_Wh + q_load_NG_Boiler_Wh, axis=1)
+    resourcesRes[3:, 2] = np.sum(el_GHP_Wh, axis=1)
+    resourcesRes[3:, 3] = np.sum(q_from_GHP_Wh, axis=1)
+
     for i in range(10):
-        # set nominal size for Boiler and GHP
-        QnomBoiler_W = i / 10.0 * Qnom_W
-        QnomGHP_W = Qnom_W - QnomBoiler_W
-
-        # GHP operation
-        Texit_GHP_nom_K = QnomGHP_W / (mdot_kgpers * HEAT_CAPACITY_OF_WATER_JPERKGK) + Tret_K
-        el_GHP_Wh, q_load_NG_Boiler_Wh, \
-        qhot_missing_Wh, \
-        Texit_GHP_K, q_from_GHP_Wh = np.vectorize(calc_GHP_operation)(QnomGHP_W, T_ground_K, Texit_GHP_nom_K,
-                                                                      Tret_K, Tsup_K, mdot_kgpers, q_load_Wh)
-        GHP_el_size_W[i][0] = max(el_GHP_Wh)
-        GHP_Status = np.where(q_from_GHP_Wh > 0.0, 1, 0)
-
-        # GHP Backup Boiler operation
-        if max(qhot_missing_Wh) > 0.0:
-            print("GHP unable to cover the whole demand, boiler activated!")
-            Qnom_GHP_Backup_Boiler_W = max(qhot_missing_Wh)
-            BoilerEff = np.vectorize(Boiler.calc_Cop_boiler)(qhot_missing_Wh, Qnom_GHP_Backup_Boiler_W, Texit_GHP_K)
-            Qgas_to_GHPBoiler_Wh = np.divide(qhot_missing_Wh, BoilerEff,
-                                             out=np.zeros_like(qhot_missing_Wh), where=BoilerEff != 0.0)
-        else:
-            Qgas_to_GHPBoiler_Wh = np.zeros(q_load_Wh.shape[0])
-            Qnom_GHP_Backup_Boiler_W = 0.0
-        Q_Boiler_for_GHP_W[i][0] = Qnom_GHP_Backup_Boiler_W
-        GHPbackupBoiler_Status = np.where(qhot_missing_Wh > 0.0, 1, 0)
-
-        # NG Boiler operation
-        BoilerEff = np.vectorize(Boiler.calc_Cop_boiler)(q_load_NG_Boiler_Wh, QnomBoiler_W, Texit_GHP_K)
-        Qgas_to_Boiler_Wh = np.divide(q_load_NG_Boiler_Wh, BoilerEff,
-                                      out=np.zeros_like(q_load_NG_Boiler_Wh), where=BoilerEff != 0.0)
-        Boiler_Status = np.where(q_load_NG_Boiler_Wh > 0.0, 1, 0)
-
-        # add costs
-        # electricity
-        el_total_Wh = el_GHP_Wh
-        Opex_a_var_USD[3 + i][4] += sum(prices.ELEC_PRICE * el_total_Wh)
-        GHG_tonCO2[3 + i][5] += sum(calc_emissions_Whyr_to_tonCO2yr(el_total_Wh, lca.EL_TO_CO2_EQ))  # ton CO2
-        # gas
-        Q_gas_total_Wh = Qgas_to_GHPBoiler_Wh + Qgas_to_Boiler_Wh
-        Opex_a_var_USD[3 + i][4] += sum(prices.NG_PRICE * Q_gas_total_Wh)
-        GHG_tonCO2[3 + i][5] += sum(calc_emissions_Whyr_to_tonCO2yr(Q_gas_total_Wh, lca.NG_TO_CO2_EQ))  # ton CO2
-        # add activation
-        resourcesRes[3 + i][0] = sum(qhot_missing_Wh + q_load_NG_Boiler_Wh)
-        resourcesRes[3 + i][2] = sum(el_GHP_Wh)
-        resourcesRes[3 + i][3] = sum(q_from_GHP_Wh)
-
-        heating_dispatch[3 + i] = {'Q_GHP_gen_directload_W': q_from_GHP_Wh,
-                                   'Q_BackupBoiler_gen_directload_W': qhot_missing_Wh,
-                                   'Q_Boiler_gen_directload_W': q_load_NG_Boiler_Wh,
-                                   'GHP_Status': GHP_Status,
-                                   'BackupBoiler_Status': GHPbackupBoiler_Status,
-                                   'Boiler_Status': Boiler_Status,
-                                   'NG_BackupBoiler_req_W': Qgas_to_GHPBoiler_Wh,
-                                   'NG_Boiler_req_W': Qgas_to_Boiler_Wh,
-                                   'E_hs_ww_req_W': el_GHP_Wh}
+        heating_dispatch[3 + i] = {'Q_GHP_gen_directload_W': q_from_GHP_Wh[i],
+                                   'Q_BackupBoiler_gen_directload_W': qhot_missing_Wh[i],
+                                   'Q_Boiler_gen_directload_W': q_load_NG_Boiler_Wh[i],
+                                   'GHP_Status': GHP_Status[i],
+                                   'BackupBoiler_Status': GHPbackupBoiler_Status[i],
+                                   'Boiler_Status': Boiler_Status[i],
+                                   'NG_BackupBoiler_req_W': Qgas_to_GHPBoiler_Wh[i],
+                                   'NG_Boiler_req_W': Qgas_to_Boiler_Wh[i],
+                                   'E_hs_ww_req_W': el_GHP_Wh[i]}
     # Add all costs
     # 0: Boiler NG
     Capex_a_Boiler_USD, Opex_a_fixed_Boiler_USD, Capex_Boiler_USD = Boiler.calc_Cinv_boiler(Qnom_W, 'BO1',
@@ -260,64 +258,17 @@ def disconnected_heating_for_building(building_name, supply_systems, T_ground_K,
         Capex_opex_a_fixed_only_USD[3 + i][0] += Capex_a_GHP_USD + Opex_a_fixed_GHP_USD  # TODO:variable price?
     # Compile Objectives
     number_of_configurations = len(GHG_tonCO2) # 13
-    TAC_USD = np.zeros((number_of_configurations, 2))
-    TotalCO2 = np.zeros((number_of_configurations, 2))
-    for i in range(number_of_configurations):
-        TAC_USD[i][0] = TotalCO2[i][0] = i
-        Opex_a_USD[i][1] = Opex_a_fixed_USD[i][0] + Opex_a_var_USD[i][4]
-        TAC_USD[i][1] = Capex_opex_a_fixed_only_USD[i][0] + Opex_a_var_USD[i][4]
-        TotalCO2[i][1] = GHG_tonCO2[i][5]
-    # Rank results and find the best configuration
-    # sort TAC_USD and TotalCO2
-    CostsS = TAC_USD[np.argsort(TAC_USD[:, 1])]
-    CO2S = TotalCO2[np.argsort(TotalCO2[:, 1])]
-    # initialize optSearch array
-    number_of_objectives = 2  # TAC_USD and TotalCO2
-    optSearch = np.empty(number_of_configurations)
-    optSearch.fill(number_of_objectives)
-    Best = np.zeros((number_of_configurations, 1))
+    configuration_index = np.arange(number_of_configurations)
+    Opex_a_USD[:, 1] = Opex_a_fixed_USD[:, 0] + Opex_a_var_USD[:, 4]
+    TAC_USD = np.column_stack([configuration_index, Capex_opex_a_fixed_only_USD[:, 0] + Opex_a_var_USD[:, 4]])
+    TotalCO2 = np.column_stack([configuration_index, GHG_tonCO2[:, 5]])
     # Check the GHP area constraint for configuration 4-13
-    geothermal_potential = geothermal_potential_data.set_index('Name')
-    for i in range(10):
-        QGHP = (1 - i / 10.0) * Qnom_W
-        areaAvail = geothermal_potential.loc[building_name, 'Area_geo']
-        Qallowed = np.ceil(areaAvail / GHP_A) * GHP_HMAX_SIZE  # [W_th]
-        if Qallowed < QGHP:
-            # disqualify the configuration if constraint not met
-            optSearch[i + 3] += 1
-            Best[i + 3][0] = - 1
-    # rank results
-    rank = 0
-    BestFound = False
-    indexBest = None
-    while not BestFound and rank < number_of_configurations:
-        optSearch[int(CostsS[rank][0])] -= 1
-        optSearch[int(CO2S[rank][0])] -= 1
-        if np.count_nonzero(optSearch) != number_of_configurations:
-            BestFound = True
-            # in case only one best ranked configuration exists choose that one
-            if np.count_nonzero(optSearch) == number_of_configurations - 1:
-                indexBest = np.where(optSearch == 0)[0][0]
-            # in case different configurations have the same rank, evaluate their compounded relative objective values
-            else:
-                indexesSharedBest = np.where(optSearch == 0)[0]
-                relTAC_USD = TAC_USD[:, 1] / np.mean(TAC_USD[:, 1])
-                relTotalCO2 = TotalCO2[:, 1] / np.mean(TotalCO2[:, 1])
-                relTAC_USDSharedBest = relTAC_USD[indexesSharedBest]
-                relTotalCO2SharedBest = relTotalCO2[indexesSharedBest]
-                cROVsSharedBest = relTAC_USDSharedBest + relTotalCO2SharedBest
-                locBestCROV = np.where(cROVsSharedBest == np.min(cROVsSharedBest))[0]
-                if len(locBestCROV) == 1:
-                    indexBest = indexesSharedBest[locBestCROV[0]]
-                else:
-                    freeChoice = random.randint(0, len(locBestCROV) - 1)
-                    indexBest = indexesSharedBest[locBestCROV[freeChoice]]
-        rank += 1
-    # get the best option according to the ranking.
-    if indexBest is not None:
-        Best[indexBest][0] = 1
-    else:
-        raise('indexBest not found, please check the ranking process or report this issue on GitHub.')
+    areaAvail = geothermal_potential_data.set_index('Name').loc[building_name, 'Area_geo']
+    Qallowed = np.ceil(areaAvail / GHP_A) * GHP_HMAX_SIZE  # [W_th]
+    disqualified = np.zeros(number_of_configurations, dtype=bool)
+    disqualified[3:] = Qallowed < QnomGHP_W
+    # Rank results and find the best configuration
+    Best, indexBest = rank_results(TAC_USD, TotalCO2, None, number_of_configurations, disqualified)
     # Save results in csv file
     performance_results = {
         "Nominal heating load": Qnom_W,
@@ -356,20 +307,77 @@ def get_unique_keys_from_dicts(heating_dispatch):
     return unique_keys
 
 
-def calc_GHP_operation(QnomGHP_W, T_ground_K, Texit_GHP_nom_K, Tret_K, Tsup_K, mdot_kgpers, q_load_Wh):
-    if q_load_Wh <= QnomGHP_W:
-        q_load_NG_Boiler_Wh = 0.0
-        (el_GHP_Wh, qcolddot_Wh, qhot_missing_Wh, tsup2_K) = HP.calc_Cop_GHP(T_ground_K,
-                                                                             mdot_kgpers,
-                                                                             Tsup_K, Tret_K)
-        q_from_GHP_Wh = q_load_Wh - qhot_missing_Wh
+def rank_results(TAC_USD, TotalCO2, TotalPrim, number_of_configurations, disqualified=None):
+    """
+    This function chooses the best configuration according to the configurations' ranking in terms of cost and
+    emissions.
+    If different configurations have the same rank, just across different objective functions:
+    e.g. config 1: 1st in emissions, 2nd in cost
+         config 2: 2nd in emissions, 1st in cost
+    the function chooses the config that has the lowest value in each of the objective functions, relative to
+    the mean of the all configs:
+    e.g. If config 1: 41000 kgCO2 per year and the mean across all configs is 50000 kgCO2 per year the relative
+         emissions value of config 1 would be 82%.
+         If config 2: 44000 kgCO2 per year its relative emissions value would be 88%.
+         Let's assume the relative cost values of config 1 and 2 are 78% and 75% respectively.
+         The compounded relative objective value (cROV) of config 1 would therefore be 160%,
+         the compounded relative objective value of config 2 would be 163%.
+         -> config 1 would be chosen as the best
+    In the rare case where multiple configurations have the exact same compounded relative objective value
+    one of them is selected at random.
+
+    The best configurations are the ones that appear first in both the cost and the emissions ranking, i.e. the
+    configurations with the lowest ``max(cost rank, emissions rank)``. This is computed for all configurations in a
+    single pass. Configurations marked in ``disqualified`` (e.g. violating a constraint) are never chosen and are
+    marked with -1 in ``Best``.
+    """
+    # rank TAC_USD and TotalCO2 (position of each configuration in the sorted objectives)
+    cost_rank = np.empty(number_of_configurations, dtype=int)
+    cost_rank[TAC_USD[np.argsort(TAC_USD[:, 1])][:, 0].astype(int)] = np.arange(number_of_configurations)
+    CO2_rank = np.empty(number_of_configurations, dtype=int)
+    CO2_rank[TotalCO2[np.argsort(TotalCO2[:, 1])][:, 0].astype(int)] = np.arange(number_of_configurations)
+    combined_rank = np.maximum(cost_rank, CO2_rank)
 
+    Best = np.zeros((number_of_configurations, 1))
+    if disqualified is not None:
+        combined_rank[disqualified] = number_of_configurations
+        Best[disqualified, 0] = -1
+    if combined_rank.min() >= number_of_configurations:
+        raise ValueError('indexBest not found, please check the ranking process or report this issue on GitHub.')
+
+    indexesSharedBest = np.where(combined_rank == combined_rank.min())[0]
+    # in case only one best ranked configuration exists choose that one
+    if len(indexesSharedBest) == 1:
+        indexBest = indexesSharedBest[0]
+    # in case different configurations have the same rank, evaluate their compounded relative objective values
     else:
-        (el_GHP_Wh, qcolddot_Wh, qhot_missing_Wh, tsup2_K) = HP.calc_Cop_GHP(T_ground_K,
-                                                                             mdot_kgpers,
-                                                                             Texit_GHP_nom_K, Tret_K)
-        q_from_GHP_Wh = QnomGHP_W - qhot_missing_Wh
-        q_load_NG_Boiler_Wh = q_load_Wh - QnomGHP_W
+        relTAC_USD = TAC_USD[:, 1] / np.mean(TAC_USD[:, 1])
+        relTotalCO2 = TotalCO2[:, 1] / np.mean(TotalCO2[:, 1])
+        cROVsSharedBest = relTAC_USD[indexesSharedBest] + relTotalCO2[indexesSharedBest]
+        locBestCROV = np.where(cROVsSharedBest == np.min(cROVsSharedBest))[0]
+        if len(locBestCROV) == 1:
+            indexBest = indexesSharedBest[locBestCROV[0]]
+        else:
+            freeChoice = random.randint(0, len(locBestCROV) - 1)
+            indexBest = indexesSharedBest[locBestCROV[freeChoice]]
+    # get the best option according to the ranking.
+    Best[indexBest][0] = 1
+    return Best, indexBest
+
+
+def calc_GHP_operation(QnomGHP_W, T_ground_K, Texit_GHP_nom_K, Tret_K, Tsup_K, mdot_kgpers, q_load_Wh):
+    """
+    Operates the ground source heat pump for every hour. All arguments are broadcast against each other, so passing
+    one nominal size per row (``QnomGHP_W`` with shape (configurations, 1)) calculates all configurations at once.
+    If the load exceeds the GHP size, the GHP runs at its nominal size and the rest is supplied by the NG boiler.
+    """
+    covered = q_load_Wh <= QnomGHP_W
+    T_sup_GHP_K = np.where(covered, Tsup_K, Texit_GHP_nom_K)
+    (el_GHP_Wh, qcolddot_Wh, qhot_missing_Wh, tsup2_K) = HP.calc_Cop_GHP(T_ground_K,
+                                                                         mdot_kgpers,
+                                                                         T_sup_GHP_K, Tret_K)
+    q_from_GHP_Wh = np.where(covered, q_load_Wh, QnomGHP_W) - qhot_missing_Wh
+    q_load_NG_Boiler_Wh = np.where(covered, 0.0, q_load_Wh - QnomGHP_W)
 
     return el_GHP_Wh, q_load_NG_Boiler_Wh, qhot_missing_Wh, tsup2_K, q_from_GHP_Wh
 
@@ -380,13 +388,12 @@ def calc_new_load(mdot_kgpers, Tsup_K, Tret_K):
     :param mdot_kgpers: mass flow
     :param Tsup_K: supply temperature
     :param Tret_K: return temperature
-    :type mdot_kgpers: float
-    :type Tsup_K: float
-    :type Tret_K: float
+    :type mdot_kgpers: np.ndarray
+    :type Tsup_K: np.ndarray
+    :type Tret_K: np.ndarray
     :return: Qload_W: load of the distribution
-    :rtype: float
+    :rtype: np.ndarray
     """
     Qload_W = mdot_kgpers * HEAT_CAPACITY_OF_WATER_JPERKGK * (Tsup_K - Tret_K)
-    if Qload_W < 0:
-        Qload_W = 0
+    Qload_W = np.where(Qload_W < 0, 0.0, Qload_W)
     return Qload_W
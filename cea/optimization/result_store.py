@@ -0,0 +1,145 @@
+"""
+Store the results of the individuals evaluated by the optimization in one file per generation (see
+:py:meth:`cea.inputlocator.InputLocator.get_optimization_generation_results_store`) instead of a dozen small csv files
+per individual.
+
+The store is a SQLite database with a row per individual and result table (e.g. the total performance or the heating
+activation pattern). The tables are stored as compressed csv, so they read back exactly as the csv files written by
+earlier versions of CEA. The slaves (running in parallel) append the results of their individual in a single
+transaction, the master reads a table for the whole generation with a single query.
+
+Use :py:func:`read_individual_result` and :py:func:`individual_result_input_file` to read the results of an
+individual - these fall back to the csv files of optimizations that were run before the store was introduced.
+"""
+
+import io
+import os
+import sqlite3
+import zlib
+
+import pandas as pd
+
+__author__ = "Daren Thomas"
+__copyright__ = "Copyright 2021, Architecture and Building Systems - ETH Zurich"
+__credits__ = ["Daren Thomas"]
+__license__ = "MIT"
+__version__ = "0.1"
+__maintainer__ = "Daren Thomas"
+__email__ = "cea@arch.ethz.ch"
+__status__ = "Production"
+
+# map the name of each table to the locator method of the csv file it replaces
+TABLES = {
+    'district_scale_heating_capacity': 'get_optimization_district_scale_heating_capacity',
+    'district_scale_cooling_capacity': 'get_optimization_district_scale_cooling_capacity',
+    'district_scale_electricity_capacity': 'get_optimization_district_scale_electricity_capacity',
+    'building_scale_heating_capacity': 'get_optimization_building_scale_heating_capacity',
+    'building_scale_cooling_capacity': 'get_optimization_building_scale_cooling_capacity',
+    'building_connectivity': 'get_optimization_slave_building_connectivity',
+    'building_scale_performance': 'get_optimization_slave_building_scale_performance',
+    'district_scale_performance': 'get_optimization_slave_district_scale_performance',
+    'total_performance': 'get_optimization_slave_total_performance',
+    'electricity_requirements': 'get_optimization_slave_electricity_requirements_data',
+    'electricity_activation_pattern': 'get_optimization_slave_electricity_activation_pattern',
+    'cooling_activation_pattern': 'get_optimization_slave_cooling_activation_pattern',
+    'heating_activation_pattern': 'get_optimization_slave_heating_activation_pattern',
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    individual INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    data BLOB NOT NULL,
+    PRIMARY KEY (individual, name)
+)
+"""
+
+
+class GenerationResultStore(object):
+    """The results of the individuals of a generation, stored at ``path``. Use as a context manager to close the
+    connection to the database."""
+
+    def __init__(self, path):
+        self.path = path
+        # the slaves of a generation write at the same time - wait for the other writers to finish
+        self._connection = sqlite3.connect(path, timeout=600)
+        with self._connection:
+            self._connection.execute(SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        self._connection.close()
+
+    def write(self, individual, tables):
+        """
+        Write the result tables of an individual (replacing earlier results of the individual)
+
+        :param int individual: the number of the individual in the generation
+        :param tables: map the name of a table (see ``TABLES``) to a DataFrame
+        :type tables: dict[str, pd.DataFrame]
+        """
+        rows = []
+        for name, df in tables.items():
+            if name not in TABLES:
+                raise ValueError("Unknown optimization result table: {name}".format(name=name))
+            csv = df.to_csv(index=False, float_format='%.3f')
+            rows.append((individual, name, zlib.compress(csv.encode('utf-8'))))
+        with self._connection:
+            self._connection.executemany("INSERT OR REPLACE INTO results (individual, name, data) VALUES (?, ?, ?)",
+                                         rows)
+
+    def read(self, name, individual):
+        """Return a result table of an individual - raises a ``KeyError`` if the store does not contain it"""
+        rows = self._connection.execute("SELECT data FROM results WHERE individual = ? AND name = ?",
+                                        (int(individual), name)).fetchall()
+        if not rows:
+            raise KeyError((name, individual))
+        return parse_table(rows[0][0])
+
+    def read_all(self, name, individuals):
+        """Return a result table for each of ``individuals``, concatenated in that order (an empty DataFrame if there
+        are no individuals, like concatenating the csv files did)"""
+        if not len(individuals):
+            return pd.DataFrame()
+        rows = self._connection.execute("SELECT individual, data FROM results WHERE name = ?", (name,)).fetchall()
+        data = dict(rows)
+        missing = [individual for individual in individuals if individual not in data]
+        if missing:
+            raise KeyError((name, missing))
+        return pd.concat([parse_table(data[individual]) for individual in individuals], ignore_index=True)
+
+    def individuals(self):
+        return [individual for individual, in
+                self._connection.execute("SELECT DISTINCT individual FROM results ORDER BY individual")]
+
+
+def parse_table(data):
+    return pd.read_csv(io.BytesIO(zlib.decompress(data)))
+
+
+def read_individual_result(locator, name, individual, generation):
+    """
+    Return the result table ``name`` of an individual. Falls back to the csv file of optimizations run before the
+    result store was introduced. As for the csv files, a ``pd.errors.EmptyDataError`` is raised for empty tables.
+    """
+    store_path = locator.get_optimization_generation_results_store(generation)
+    if os.path.exists(store_path):
+        with GenerationResultStore(store_path) as store:
+            try:
+                return store.read(name, individual)
+            except KeyError:
+                pass
+    return pd.read_csv(getattr(locator, TABLES[name])(individual, generation))
+
+
+def individual_result_input_file(locator, name, individual, generation):
+    """Return the (locator method, args) tuple of the file containing the result table ``name`` of an individual, for
+    the ``input_files`` of plots"""
+    if os.path.exists(locator.get_optimization_generation_results_store(generation)):
+        return locator.get_optimization_generation_results_store, [generation]
+    return getattr(locator, TABLES[name]), [individual, generation]
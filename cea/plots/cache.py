@@ -2,153 +2,276 @@
 Implements a cache for plot data at the project level. Cached plot data has a "path" (e.g. 'optimization/generations_data')
 and dependencies (a list of files that are used to produce that data) as well as the parameters used in that data.
 The cache object is passed to the `calc_graph` method and the plot is responsible for retrieving data from the cache.
-"""
-
-
-
 
+Entries are keyed on the path, the parameters and the *content* of the dependencies, so re-running a script that
+produces the same results does not invalidate the cache. The values are stored content-addressed in
+``{project}/.cache/plots/blobs`` (the keys in ``{project}/.cache/plots/keys`` point to them), which means that plots
+using the same data share the same entry. The size of the cache on disk (and, for the ``MemoryPlotCache``, in memory)
+is bounded - the least recently used entries are evicted first, together with the keys pointing to them.
+"""
 
+import collections
 import functools
 import hashlib
 import json
 import os
-import time
+import pickle
+import threading
+
+DEFAULT_MAX_DISK_SIZE_MB = 1024
+DEFAULT_MAX_MEMORY_SIZE_MB = 256
+
+# kinds of values stored in the cache
+KIND_DATA = 'data'  # pandas.DataFrame returned by a producer decorated with ``cached``
+KIND_PLOT_DIV = 'div'  # html of a plot
+KIND_TABLE_DIV = 'table.div'  # html of a table
+KIND_GRAPH_DATA = 'graphdata'  # plotly traces
+
+
+def serialize(kind, value):
+    """Return the bytes to store ``value`` of ``kind`` on disk"""
+    if kind == KIND_DATA:
+        return pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+    if kind == KIND_GRAPH_DATA:
+        from plotly.utils import PlotlyJSONEncoder
+        return json.dumps(value, cls=PlotlyJSONEncoder).encode('utf-8')
+    return value.encode('utf-8')
+
+
+def deserialize(kind, data):
+    """The inverse of :py:func:`serialize` (plotly traces are returned as plain dicts)"""
+    if kind == KIND_DATA:
+        return pickle.loads(data)
+    if kind == KIND_GRAPH_DATA:
+        return json.loads(data.decode('utf-8'))
+    return data.decode('utf-8')
 
-import pandas as pd
 
 class PlotCache(object):
     """A cache for plot data. Use the ``lookup`` method to retrieve data from the cache."""
 
-    def __init__(self, project):
+    def __init__(self, project, max_disk_size_mb=DEFAULT_MAX_DISK_SIZE_MB):
         """Initialize the cache from disk"""
         self.parameter_guard = {}  # data_path => set(parameters.keys()) - just a check for programming errors
         self.project = project
+        self.max_disk_size = max_disk_size_mb * 1024 * 1024
+        self._lock = threading.RLock()
+        self._file_hashes = {}  # path => (mtime_ns, size, content hash) - only re-hash files that were touched
+        self._blob_sizes = collections.OrderedDict()  # blob hash => size on disk, least recently used first
+        self._blob_keys = {}  # blob hash => set(keys pointing to the blob)
+        self._disk_size = 0
+        if project:
+            self._read_blob_sizes()
+            self._read_blob_keys()
+
+    @property
+    def _cache_folder(self):
+        return os.path.join(self.project, '.cache', 'plots')
+
+    def _key_file(self, key):
+        return os.path.join(self._cache_folder, 'keys', key[:2], key)
+
+    def _blob_file(self, blob):
+        return os.path.join(self._cache_folder, 'blobs', blob[:2], blob)
+
+    def _read_blob_sizes(self):
+        """Read the blobs stored on disk by a previous session, ordered by the last time they were used"""
+        blobs_folder = os.path.join(self._cache_folder, 'blobs')
+        blobs = []
+        for folder, _, files in os.walk(blobs_folder):
+            for blob in files:
+                if blob.endswith('.tmp'):
+                    continue
+                stat = os.stat(os.path.join(folder, blob))
+                blobs.append((stat.st_mtime, blob, stat.st_size))
+        for _, blob, size in sorted(blobs):
+            self._blob_sizes[blob] = size
+            self._disk_size += size
+
+    def _read_blob_keys(self):
+        """Read the keys stored on disk by a previous session - keys pointing to blobs that no longer exist are
+        removed"""
+        keys_folder = os.path.join(self._cache_folder, 'keys')
+        for folder, _, files in os.walk(keys_folder):
+            for key in files:
+                if key.endswith('.tmp'):
+                    continue
+                blob = self._read_key(key)
+                if blob in self._blob_sizes:
+                    self._blob_keys.setdefault(blob, set()).add(key)
+                else:
+                    self._remove_file(self._key_file(key))
 
     def _parameter_hash(self, parameters):
         return hashlib.md5(repr(sorted(parameters.items())).encode("utf-8")).hexdigest()
 
-    def _cached_data_file(self, data_path, parameters):
-        return os.path.join(self.project, '.cache', data_path, self._parameter_hash(parameters))
-
-    def _cached_div_file(self, plot):
-        data_path = os.path.join(plot.category_name, plot.id())
-        return self._cached_data_file(data_path, plot.parameters) + '.div'
+    def file_hash(self, path):
+        """Return the hash of the contents of the file at ``path``. The hash is only recalculated if the modification
+        time or size of the file changed since the last call."""
+        stat = os.stat(path)
+        with self._lock:
+            cached = self._file_hashes.get(path)
+        if cached and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+            return cached[2]
+        md5 = hashlib.md5()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                md5.update(chunk)
+        with self._lock:
+            self._file_hashes[path] = (stat.st_mtime_ns, stat.st_size, md5.hexdigest())
+        return md5.hexdigest()
+
+    def cache_key(self, kind, data_path, parameters, input_files):
+        """Return the key of an entry - a hash of the kind of value, the data path, the parameters and the contents of
+        the input files. Returns ``None`` if the input files can't be read (the value should then not be cached).
 
-    def _cached_table_file(self, plot):
-        data_path = os.path.join(plot.category_name, plot.id())
-        return self._cached_data_file(data_path, plot.parameters) + '.table.div'
+        :param input_files: A list of tuples (locator method, args) that, when applied, produce a path"""
+        try:
+            input_hashes = [self.file_hash(locator_method(*args)) for locator_method, args in input_files]
+        except Exception:
+            print('Could not read input files for cache!')
+            return None
+        return hashlib.md5(repr((kind, data_path.replace('\\', '/'), self._parameter_hash(parameters),
+                                 input_hashes)).encode('utf-8')).hexdigest()
+
+    def _lookup(self, kind, data_path, plot, producer):
+        """Return the cached value for the entry or store and return the value produced by ``producer``"""
+        key = self.cache_key(kind, data_path, plot.parameters, plot.input_files)
+        if key is None:
+            return producer()
+        blob = self._read_key(key)
+        if blob is not None:
+            try:
+                return self.load_cached_value(kind, blob)
+            except (IOError, OSError):
+                # evicted since the key was read
+                pass
+        return self.store_cached_value(kind, key, producer)
+
+    def _read_key(self, key):
+        try:
+            with open(self._key_file(key), 'r') as key_fp:
+                return key_fp.read().strip()
+        except (IOError, OSError):
+            return None
 
     def lookup(self, data_path, plot, producer):
-        cache_timestamp = self.cache_timestamp(self._cached_data_file(data_path, plot.parameters))
-        if cache_timestamp < self.newest_dependency(plot.input_files):
-            return self.store_cached_value(data_path, plot.parameters, producer)
-        return self.load_cached_value(data_path, plot.parameters)
+        return self._lookup(KIND_DATA, data_path, plot, producer)
 
     def lookup_plot_div(self, plot, producer):
         """Lookup the cache of a plot created with plot.plot_div()"""
-        div_file = self._cached_div_file(plot)
-        cache_timestamp = self.cache_timestamp(div_file)
-        if cache_timestamp < self.newest_dependency(plot.input_files):
-            plot_div = producer()
-            folder = os.path.dirname(div_file)
-            os.makedirs(folder, exist_ok=True)
-            with open(div_file, 'w') as div_fp:
-                div_fp.write(plot_div)
-        else:
-            print('Loading plot_div from cache: {div_file}'.format(div_file=div_file))
-            with open(div_file, 'r') as div_fp:
-                plot_div = div_fp.read()
-        return plot_div
+        return self._lookup(KIND_PLOT_DIV, os.path.join(plot.category_name, plot.id()), plot, producer)
 
     def lookup_table_div(self, plot, producer):
         """Lookup the cache of a table created with plot.table_div()"""
-        div_file = self._cached_table_file(plot)
-        cache_timestamp = self.cache_timestamp(div_file)
-        if cache_timestamp < self.newest_dependency(plot.input_files):
-            table_div = producer()
-            folder = os.path.dirname(div_file)
-            if not os.path.exists(folder):
-                os.makedirs(folder)
-            with open(div_file, 'w') as div_fp:
-                div_fp.write(table_div)
-        else:
-            # print('Loading table_div from cache: {div_file}'.format(div_file=div_file))
-            with open(div_file, 'r') as div_fp:
-                table_div = div_fp.read()
-        return table_div
+        return self._lookup(KIND_TABLE_DIV, os.path.join(plot.category_name, plot.id()), plot, producer)
 
     def lookup_plot_data(self, plot, producer):
         """Lookup the cache of a plotly graph data created with plot.calc_graph"""
-        from plotly.utils import PlotlyJSONEncoder
-
-        data_path = os.path.join(plot.category_name, plot.id())
-        data_file = self._cached_data_file(data_path, plot.parameters) + '.graphdata'
-        cache_timestamp = self.cache_timestamp(data_file)
-        if cache_timestamp < self.newest_dependency(plot.input_files):
-            plot_data = producer()
-            folder = os.path.dirname(data_file)
-            if not os.path.exists(folder):
-                os.makedirs(folder)
-            with open(data_file, 'w') as data_json_path:
-                data_json = json.dumps(plot_data, cls=PlotlyJSONEncoder)
-                data_json_path.write(data_json)
-        else:
-            with open(data_file, 'r') as data_json_path:
-                plot_data = json.loads(data_json_path.read())
-        return plot_data
-
-    def cache_timestamp(self, path):
-        """Return a timestamp (like ``os.path.getmtime``) to compare to. Returns 0 if there is no data in the cache"""
-        if not os.path.exists(path):
-            return 0
-        else:
-            return os.path.getmtime(path)
-
-    def newest_dependency(self, input_files):
-        """Returns the newest timestamp (``os.path.getmtime`` and ``time.time()``) of the input_files - the idea being,
-        that if the cache is newer than this, then the cache is valid.
-
-        :param input_files: A list of tuples (locator method, args) that, when applied, produce a path"""
+        return self._lookup(KIND_GRAPH_DATA, os.path.join(plot.category_name, plot.id()), plot, producer)
+
+    def store_cached_value(self, kind, key, producer):
+        """Store the value returned from producer and return it."""
+        value = producer()
+        self._store(kind, key, value)
+        return value
+
+    def _store(self, kind, key, value):
+        """Write ``value`` to its blob and point ``key`` to it. Returns the blob hash and the size of the blob."""
+        data = serialize(kind, value)
+        blob = hashlib.md5(data).hexdigest()
+        if len(data) <= self.max_disk_size:
+            self._write_file(self._blob_file(blob), data)
+            self._write_file(self._key_file(key), blob.encode('utf-8'))
+            with self._lock:
+                self._disk_size += len(data) - self._blob_sizes.pop(blob, 0)
+                self._blob_sizes[blob] = len(data)
+                self._blob_keys.setdefault(blob, set()).add(key)
+                self._evict_disk()
+        return blob, len(data)
+
+    def load_cached_value(self, kind, blob):
+        """Load a value from disk - raises an ``IOError`` if the blob was evicted"""
+        blob_file = self._blob_file(blob)
+        with open(blob_file, 'rb') as blob_fp:
+            data = blob_fp.read()
+        # mark the blob as recently used (also for the next session)
+        os.utime(blob_file, None)
+        with self._lock:
+            if blob in self._blob_sizes:
+                self._blob_sizes.move_to_end(blob)
+        return deserialize(kind, data)
+
+    def _write_file(self, path, data):
+        """Write atomically, so that concurrent readers never see half a file"""
+        folder = os.path.dirname(path)
+        os.makedirs(folder, exist_ok=True)
+        temp_path = '{path}.{pid}.{thread}.tmp'.format(path=path, pid=os.getpid(), thread=threading.get_ident())
+        with open(temp_path, 'wb') as f:
+            f.write(data)
+        os.replace(temp_path, path)
+
+    def _evict_disk(self):
+        """Remove the least recently used blobs and the keys pointing to them until the cache fits into
+        ``max_disk_size``. Keys pointing to blobs removed by another process are treated as misses."""
+        while self._disk_size > self.max_disk_size and self._blob_sizes:
+            blob, size = self._blob_sizes.popitem(last=False)
+            self._disk_size -= size
+            self._remove_file(self._blob_file(blob))
+            for key in self._blob_keys.pop(blob, ()):
+                # the key may have been pointed to another blob since
+                if self._read_key(key) == blob:
+                    self._remove_file(self._key_file(key))
+
+    @staticmethod
+    def _remove_file(path):
         try:
-            return max(os.path.getmtime(locator_method(*args)) for locator_method, args in input_files)
-        except:
-            print('Could not read input files for cache!')
-            return time.time()
-
-    def store_cached_value(self, data_path, parameters, producer):
-        """Store the Dataframe returned from producer and return it."""
-        data = producer()
-        data_folder = os.path.join(self.project, '.cache', data_path)
-        if not os.path.exists(data_folder):
-            os.makedirs(data_folder)
-        data.to_pickle(self._cached_data_file(data_path, parameters))
-        return data
-
-    def load_cached_value(self, data_path, parameters):
-        """Load a Dataframe from disk"""
-        return pd.read_pickle(self._cached_data_file(data_path, parameters))
+            os.remove(path)
+        except OSError:
+            pass
 
 
 class MemoryPlotCache(PlotCache):
-    """Extend the PlotCache to also keep a copy of the cache in memory"""
+    """Extend the PlotCache to also keep the most recently used values in memory (up to ``max_memory_size_mb``)"""
 
-    def __init__(self, project):
-        super(MemoryPlotCache, self).__init__(project)
-        self._cache = {}  # _cached_data_file -> df
+    def __init__(self, project, max_disk_size_mb=DEFAULT_MAX_DISK_SIZE_MB,
+                 max_memory_size_mb=DEFAULT_MAX_MEMORY_SIZE_MB):
+        super(MemoryPlotCache, self).__init__(project, max_disk_size_mb)
+        self.max_memory_size = max_memory_size_mb * 1024 * 1024
+        self._cache = collections.OrderedDict()  # (kind, blob) -> (value, size), least recently used first
+        self._memory_size = 0
 
-    def load_cached_value(self, data_path, parameters):
+    def load_cached_value(self, kind, blob):
         """Check memory cache before loading from disk"""
-        key = self._cached_data_file(data_path, parameters)
-        if not key in self._cache:
-            self._cache[key] = super(MemoryPlotCache, self).load_cached_value(data_path, parameters)
-        return self._cache[key]
-
-    def store_cached_value(self, data_path, parameters, producer):
+        with self._lock:
+            if (kind, blob) in self._cache:
+                self._cache.move_to_end((kind, blob))
+                return self._cache[(kind, blob)][0]
+        blob_file = self._blob_file(blob)
+        value = super(MemoryPlotCache, self).load_cached_value(kind, blob)
+        self._remember(kind, blob, value, os.path.getsize(blob_file))
+        return value
+
+    def _store(self, kind, key, value):
         """Update memory cache when storing to disk"""
-        data = super(MemoryPlotCache, self).store_cached_value(data_path, parameters, producer)
-        key = self._cached_data_file(data_path, parameters)
-        self._cache[key] = data
-        return data
+        blob, size = super(MemoryPlotCache, self)._store(kind, key, value)
+        self._remember(kind, blob, value, size)
+        return blob, size
+
+    def _remember(self, kind, blob, value, size):
+        """Keep ``value`` in memory, evicting the least recently used values. The size of the serialized value is
+        used as an estimate of its size in memory."""
+        if size > self.max_memory_size:
+            return
+        with self._lock:
+            if (kind, blob) in self._cache:
+                self._cache.move_to_end((kind, blob))
+                return
+            self._cache[(kind, blob)] = (value, size)
+            self._memory_size += size
+            while self._memory_size > self.max_memory_size:
+                _, (_, evicted_size) = self._cache.popitem(last=False)
+                self._memory_size -= evicted_size
 
 
 class NullPlotCache(PlotCache):
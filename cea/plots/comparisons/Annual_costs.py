@@ -5,6 +5,7 @@
 import plotly.graph_objs as go
 
 import cea.plots.comparisons
+from cea.optimization.result_store import individual_result_input_file
 from cea.plots.variable_naming import NAMING, COLOR
 
 __author__ = "Jimeno Fonseca"
@@ -30,7 +31,7 @@ class ComparisonsAnnualCostsPlot(cea.plots.comparisons.ComparisonsPlotBase):
                                 'Capex_a_sys_city_scale_USD',
                                 'Opex_a_sys_city_scale_USD']
         self.normalization = self.parameters['normalization']
-        self.input_files = [(x[4].get_optimization_slave_total_performance, [x[3], x[2]]) if x[2] != "today" else
+        self.input_files = [individual_result_input_file(x[4], 'total_performance', x[3], x[2]) if x[2] != "today" else
                             (x[4].get_costs_operation_file, []) for x in self.scenarios_and_systems]
         self.titley = self.calc_titles()
         self.data_clean = None
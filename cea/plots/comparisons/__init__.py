@@ -9,6 +9,7 @@ import pandas as pd
 import cea.config
 import cea.inputlocator
 import cea.plots.cache
+from cea.optimization.result_store import read_individual_result
 
 """
 Implements py:class:`cea.plots.OptimizationOverviewPlotBase` as a base class for all plots in the category "optimization-overview" and also
@@ -71,7 +72,7 @@ class ComparisonsPlotBase(cea.plots.PlotBase):
                 data_raw_df = pd.DataFrame(data_building_costs.sum(axis=0)).T
                 data_raw_df = self.normalize_data_costs(data_raw_df, self.normalization, self.analysis_fields)
             else:
-                data_raw_df = pd.read_csv(locator_scenario.get_optimization_slave_total_performance(individual, generation))
+                data_raw_df = read_individual_result(locator_scenario, 'total_performance', individual, generation)
                 data_raw_df = self.normalize_data_costs(data_raw_df, self.normalization, self.analysis_fields)
 
             data_raw_df['scenario_name'] = scenario_and_system
@@ -94,7 +95,7 @@ class ComparisonsPlotBase(cea.plots.PlotBase):
                 data_raw_df = pd.DataFrame(data_building_emissions).T
                 data_raw_df = self.normalize_data_emissions(data_raw_df, self.normalization, self.analysis_fields)
             else:
-                data_raw_df = pd.read_csv(locator_scenario.get_optimization_slave_total_performance(individual, generation))
+                data_raw_df = read_individual_result(locator_scenario, 'total_performance', individual, generation)
                 data_raw_df = self.normalize_data_emissions(data_raw_df, self.normalization, self.analysis_fields)
 
             data_raw_df['scenario_name'] = scenario_and_system
@@ -11,6 +11,7 @@ import cea.config
 import cea.inputlocator
 import cea.plots
 import cea.plots.cache
+from cea.demand.hourly_loads_store import HourlyLoadsStore
 
 """
 Implements py:class:`cea.plots.DemandPlotBase` as a base class for all plots in the category "demand" and also
@@ -127,8 +128,17 @@ class DemandPlotBase(cea.plots.PlotBase):
         return df1
 
     def _calculate_hourly_loads(self):
-        data_demand = functools.reduce(self.add_fields, (pd.read_csv(self.locator.get_demand_results_file(building))
-                                                         for building in self.buildings)).set_index('DATE')
+        """
+        Sum up the demand analysis fields of the buildings - the other fields are those of the first building. Uses
+        the hourly loads store written by the demand script if it is up to date and falls back to reading the
+        ``{building}.csv`` files.
+        """
+        store = HourlyLoadsStore.open(self.locator, self.buildings)
+        if store is None or not set(self.demand_analysis_fields) <= set(store.variables):
+            return functools.reduce(self.add_fields, (pd.read_csv(self.locator.get_demand_results_file(building))
+                                                      for building in self.buildings)).set_index('DATE')
+        data_demand = store.read_building(self.buildings[0])
+        data_demand[self.demand_analysis_fields] = store.sum(self.demand_analysis_fields, self.buildings)
         return data_demand
 
     def calculate_hourly_loads(self):
@@ -137,8 +147,11 @@ class DemandPlotBase(cea.plots.PlotBase):
         return data_demand
 
     def calculate_external_temperature(self):
-        data_path = self.locator.get_demand_results_file(self.buildings[0])
-        data = pd.read_csv(data_path)
+        store = HourlyLoadsStore.open(self.locator, self.buildings[:1])
+        if store is None:
+            data = self.locator.get_demand_results_file.read(self.buildings[0], columns=['DATE', 'T_ext_C'])
+        else:
+            data = store.sum(['T_ext_C'], self.buildings[:1])
         data = self.resample_time_data(data)
         return data
 
@@ -8,6 +8,7 @@ import pandas as pd
 import pandas.errors
 
 import cea.plots
+from cea.optimization.result_store import read_individual_result
 
 """
 Implements py:class:`cea.plots.SupplySystemPlotBase` as a base class for all plots in the category "supply-system" and also
@@ -53,33 +54,29 @@ class SupplySystemPlotBase(cea.plots.PlotBase):
             super(SupplySystemPlotBase, self).missing_input_files()
 
     def process_individual_dispatch_curve_heating(self):
-        data_path = self.locator.get_optimization_slave_heating_activation_pattern(self.individual, self.generation)
-        data = pd.read_csv(data_path)
+        data = read_individual_result(self.locator, 'heating_activation_pattern', self.individual, self.generation)
         data = self.resample_time_data(data)
         return data
 
     def process_individual_dispatch_curve_cooling(self):
-        data_path = self.locator.get_optimization_slave_cooling_activation_pattern(self.individual, self.generation)
-        data = pd.read_csv(data_path)
+        data = read_individual_result(self.locator, 'cooling_activation_pattern', self.individual, self.generation)
         data = self.resample_time_data(data)
         return data
 
     def process_individual_dispatch_curve_electricity(self):
-        data_path = self.locator.get_optimization_slave_electricity_activation_pattern(self.individual, self.generation)
-        data = pd.read_csv(data_path)
+        data = read_individual_result(self.locator, 'electricity_activation_pattern', self.individual,
+                                      self.generation)
         data = self.resample_time_data(data)
         return data
 
     def process_individual_requirements_curve_electricity(self):
-        data_path = self.locator.get_optimization_slave_electricity_requirements_data(self.individual, self.generation)
-        data = pd.read_csv(data_path)
+        data = read_individual_result(self.locator, 'electricity_requirements', self.individual, self.generation)
         data = self.resample_time_data(data)
         return data
 
     def process_individual_ramping_capacity(self):
-        data_el_exports_imports = pd.read_csv(
-            self.locator.get_optimization_slave_electricity_activation_pattern(self.individual,
-                                                                               self.generation))
+        data_el_exports_imports = read_individual_result(self.locator, 'electricity_activation_pattern',
+                                                         self.individual, self.generation)
         lenght = data_el_exports_imports.shape[0]
         ramping = []  # store how much it needs to import or export
         ramping.append(data_el_exports_imports.loc[lenght - 1, "E_GRID_directload_W"]
@@ -95,35 +92,33 @@ class SupplySystemPlotBase(cea.plots.PlotBase):
 
     def process_district_scale_capacities_kW(self):
         try:
-            heating_cap = pd.read_csv(self.locator.get_optimization_district_scale_heating_capacity(self.individual,
-                                                                                                    self.generation))
+            heating_cap = read_individual_result(self.locator, 'district_scale_heating_capacity', self.individual,
+                                                 self.generation)
         except pd.errors.EmptyDataError:
             heating_cap = pd.DataFrame()
 
         try:
-            cooling_cap = pd.read_csv(self.locator.get_optimization_district_scale_cooling_capacity(self.individual,
-                                                                                                    self.generation))
+            cooling_cap = read_individual_result(self.locator, 'district_scale_cooling_capacity', self.individual,
+                                                 self.generation)
         except pd.errors.EmptyDataError:
             cooling_cap = pd.DataFrame()
 
-        electricity_cap = pd.read_csv(self.locator.get_optimization_district_scale_electricity_capacity(self.individual,
-                                                                                                        self.generation))
+        electricity_cap = read_individual_result(self.locator, 'district_scale_electricity_capacity', self.individual,
+                                                 self.generation)
 
         district_capacities = pd.concat([heating_cap, cooling_cap, electricity_cap], axis=1, sort=False)
         return district_capacities / 1E3  # to kW
 
     def process_building_scale_capacities_kW(self):
         try:
-            heating_cap = pd.read_csv(
-                self.locator.get_optimization_building_scale_heating_capacity(self.individual,
-                                                                              self.generation)).set_index('Name')
+            heating_cap = read_individual_result(self.locator, 'building_scale_heating_capacity', self.individual,
+                                                 self.generation).set_index('Name')
         except pd.errors.EmptyDataError:
             heating_cap = pd.DataFrame()
 
         try:
-            cooling_cap = pd.read_csv(
-                self.locator.get_optimization_building_scale_cooling_capacity(self.individual,
-                                                                              self.generation)).set_index('Name')
+            cooling_cap = read_individual_result(self.locator, 'building_scale_cooling_capacity', self.individual,
+                                                 self.generation).set_index('Name')
         except pd.errors.EmptyDataError:
             cooling_cap = pd.DataFrame()
 
@@ -11,6 +11,7 @@ import json
 import cea.config
 import cea.inputlocator
 import cea.plots.supply_system
+from cea.optimization.result_store import individual_result_input_file, read_individual_result
 from cea.plots.variable_naming import get_color_array
 from cea.technologies.network_layout.main import layout_network, NetworkLayout
 from cea.utilities.standardize_coordinates import get_geographic_coordinate_system
@@ -49,7 +50,7 @@ class SupplySystemMapPlot(cea.plots.supply_system.SupplySystemPlotBase):
         self.config = cea.config.Configuration()
         self.input_files = [
             (self.locator.get_street_network, []),
-            (self.locator.get_optimization_slave_building_connectivity, [self.individual, self.generation])
+            individual_result_input_file(self.locator, 'building_connectivity', self.individual, self.generation)
         ] if self.individual != 'today' else [
             (self.locator.get_street_network, []),
             (self.locator.get_building_supply, [])
@@ -132,8 +133,8 @@ class SupplySystemMapPlot(cea.plots.supply_system.SupplySystemPlotBase):
 
         if self.individual != 'today':
             # get data from generation
-            building_connectivity = pd.read_csv(self.locator.get_optimization_slave_building_connectivity
-                                                (self.individual, self.generation))
+            building_connectivity = read_individual_result(self.locator, 'building_connectivity', self.individual,
+                                                           self.generation)
             network_name = "gen_" + str(self.generation) + "_ind_" + str(self.individual)
         else:
             building_connectivity = get_building_connectivity(self.locator)
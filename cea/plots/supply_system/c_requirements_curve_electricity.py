@@ -8,6 +8,7 @@ Show a Pareto curve plot for individuals in a given generation.
 import plotly.graph_objs as go
 
 import cea.plots.supply_system
+from cea.optimization.result_store import individual_result_input_file
 from cea.plots.variable_naming import NAMING, COLOR
 
 __author__ = "Jimeno Fonseca"
@@ -71,8 +72,8 @@ class RequirementsCurveDistrictElectricityPlot(cea.plots.supply_system.SupplySys
 
         ]
         self.analysis_field_demand = ['E_electricalnetwork_sys_req_W']
-        self.input_files = [(self.locator.get_optimization_slave_electricity_requirements_data,
-                             [self.individual, self.generation])]
+        self.input_files = [individual_result_input_file(self.locator, 'electricity_requirements', self.individual,
+                                                          self.generation)]
 
     @property
     def title(self):
@@ -8,6 +8,7 @@ Show a Pareto curve plot for individuals in a given generation.
 import plotly.graph_objs as go
 
 import cea.plots.supply_system
+from cea.optimization.result_store import individual_result_input_file
 from cea.plots.variable_naming import NAMING, COLOR
 
 __author__ = "Jimeno Fonseca"
@@ -49,8 +50,8 @@ class DispatchCurveDistrictHeatingPlot(cea.plots.supply_system.SupplySystemPlotB
         ]
 
         self.analysis_field_demand = ['Q_districtheating_sys_req_W']
-        self.input_files = [(self.locator.get_optimization_slave_heating_activation_pattern,
-                             [self.individual, self.generation])]
+        self.input_files = [individual_result_input_file(self.locator, 'heating_activation_pattern', self.individual,
+                                                          self.generation)]
 
     @property
     def title(self):
@@ -8,6 +8,7 @@ Show a Pareto curve plot for individuals in a given generation.
 import plotly.graph_objs as go
 
 import cea.plots.supply_system
+from cea.optimization.result_store import individual_result_input_file
 from cea.plots.variable_naming import NAMING, COLOR
 
 __author__ = "Jimeno Fonseca"
@@ -42,8 +43,8 @@ class DispatchCurveDistrictCoolingPlot(cea.plots.supply_system.SupplySystemPlotB
         ]
 
         self.analysis_field_demand = ['Q_districtcooling_sys_req_W']
-        self.input_files = [(self.locator.get_optimization_slave_cooling_activation_pattern,
-                             [self.individual, self.generation])]
+        self.input_files = [individual_result_input_file(self.locator, 'cooling_activation_pattern', self.individual,
+                                                          self.generation)]
 
     @property
     def title(self):
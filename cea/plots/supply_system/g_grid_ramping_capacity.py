@@ -8,6 +8,7 @@ Show a Pareto curve plot for individuals in a given generation.
 import plotly.graph_objs as go
 
 import cea.plots.supply_system
+from cea.optimization.result_store import individual_result_input_file
 from cea.plots.variable_naming import NAMING, COLOR
 
 __author__ = "Jimeno Fonseca"
@@ -31,8 +32,8 @@ class RampingCapacity(cea.plots.supply_system.SupplySystemPlotBase):
     def __init__(self, project, parameters, cache):
         super(RampingCapacity, self).__init__(project, parameters, cache)
         self.analysis_fields = ["E_GRID_ramping_W"]
-        self.input_files = [(self.locator.get_optimization_slave_electricity_requirements_data,
-                             [self.individual, self.generation])]
+        self.input_files = [individual_result_input_file(self.locator, 'electricity_requirements', self.individual,
+                                                          self.generation)]
 
     @property
     def title(self):
@@ -19,6 +19,7 @@ __status__ = "Production"
 from cea.constants import HOURS_IN_YEAR
 from cea.resources.radiation_daysim.geometry_generator import BuildingGeometry
 from cea import suppress_3rd_party_debug_loggers
+from cea.utilities import profiling
 
 suppress_3rd_party_debug_loggers()
 
@@ -110,6 +111,7 @@ def calc_sensors_zone(building_names, locator, grid_size, geometry_pickle_dir):
     sensors_code_zone = []
     sensor_intersection_zone = []
     for building_name in building_names:
+        timer = profiling.StageTimer(building_name)
         building_geometry = BuildingGeometry.load(os.path.join(geometry_pickle_dir, 'zone', building_name))
         # get sensors in the building
         sensors_dir_building, \
@@ -149,6 +151,7 @@ def calc_sensors_zone(building_names, locator, grid_size, geometry_pickle_dir):
                       'Zdir': [x[2] for x in sensors_dir_building],
                       'AREA_m2': sensors_area_building,
                       'TYPE': sensors_type_building}).to_csv(locator.get_radiation_metadata(building_name), index=None)
+        timer.lap("sensors", size=sensors_number)
 
     return sensors_coords_zone, sensors_dir_zone, sensors_total_number_list, names_zone, sensors_code_zone, sensor_intersection_zone
 
@@ -184,11 +187,13 @@ def isolation_daysim(chunk_n, cea_daysim, building_names, locator, radiance_para
                                              radiance_parameters["rad_dp"])
 
     print('Executing hourly solar isolation calculation')
+    timer = profiling.StageTimer()
     daysim_project.execute_gen_dc()
     daysim_project.execute_ds_illum()
 
     print('Reading results...')
     solar_res = daysim_project.eval_ill()
+    timer.lap("daysim simulation", size=num_sensors)
 
     # check inconsistencies and replace by max value of weather file
     print('Fixing inconsistencies, if any')
@@ -210,6 +215,7 @@ def isolation_daysim(chunk_n, cea_daysim, building_names, locator, radiance_para
                                             sensors_code_zone,
                                             sensor_intersection_zone):
         # select sensors data
+        timer = profiling.StageTimer(building_name)
         selection_of_results = solar_res[index:index + sensors_number_building]
         selection_of_results[np.array(sensor_intersection_building) == 1] = 0
         items_sensor_name_and_result = dict(zip(sensor_code_building, selection_of_results.tolist()))
@@ -220,6 +226,7 @@ def isolation_daysim(chunk_n, cea_daysim, building_names, locator, radiance_para
 
         if write_sensor_data:
             write_sensor_results(building_name, items_sensor_name_and_result, locator)
+        timer.lap("writing", size=sensors_number_building)
 
     # erase daysim folder to avoid conflicts after every iteration
     print('Removing results folder')
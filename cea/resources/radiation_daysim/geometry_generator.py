@@ -12,6 +12,7 @@ from itertools import repeat
 
 from osgeo import gdal, osr
 import geopandas as gpd
+from scipy.spatial import cKDTree
 
 import cea
 
@@ -44,6 +45,9 @@ __maintainer__ = "Daren Thomas"
 __email__ = "cea@arch.ethz.ch"
 __status__ = "Production"
 
+# buildings whose bounding boxes (lower left corners) are further apart than this are not checked for intersections
+MAX_NEIGHBOUR_DISTANCE_M = 100.0
+
 
 def identify_surfaces_type(occface_list):
     roof_list = []
@@ -205,15 +209,15 @@ def building_2d_to_3d(locator, zone_df, surroundings_df, elevation_map, config,
                                                                           on_complete=print_progress)
 
     if consider_intersections:
-        all_building_solid_list = np.append(zone_building_solid_list, surroundings_building_solid_list)
+        all_building_solid_list = list(zone_building_solid_list) + list(surroundings_building_solid_list)
+        potentially_intersecting_solids = calc_neighbouring_solids(all_building_solid_list)[:n]
     else:
-        all_building_solid_list = []
+        potentially_intersecting_solids = repeat([], n)
     geometry_3D_zone = calc_zone_geometry_multiprocessing(zone_building_names,
                                                           zone_building_solid_list,
-                                                          repeat(all_building_solid_list, n),
+                                                          potentially_intersecting_solids,
                                                           repeat(architecture_wwr_df, n),
-                                                          repeat(geometry_pickle_dir, n),
-                                                          repeat(consider_intersections, n))
+                                                          repeat(geometry_pickle_dir, n))
     return geometry_3D_zone, geometry_3D_surroundings
 
 
@@ -225,15 +229,22 @@ def print_terrain_intersection_progress(i, n, _, __):
     print("Calculation of terrain intersection for building {i} completed out of {n}".format(i=i + 1, n=n))
 
 
-def are_buildings_close_to_eachother(x_1, y_1, solid2):
-    box2 = calculate.get_bounding_box(solid2)
-    x_2 = box2[0]
-    y_2 = box2[1]
-    delta = math.sqrt((y_2 - y_1) ** 2 + (x_2 - x_1) ** 2)
-    if delta <= 100:
-        return True
-    else:
-        return False
+def calc_neighbouring_solids(building_solid_list, max_distance=MAX_NEIGHBOUR_DISTANCE_M):
+    """
+    Find the solids that are close enough to each building to merit checking for intersections, i.e. the solids
+    with the lower left corner of their bounding box within ``max_distance`` of the building's one (including the
+    building itself).
+
+    The corners are indexed once in a KD-tree, so this is O(N log N) instead of comparing every pair of buildings.
+
+    :param building_solid_list: the solids of all the buildings (zone and surroundings)
+    :return: for each building, the list of potentially intersecting solids (in the order of ``building_solid_list``)
+    """
+    if not len(building_solid_list):
+        return []
+    corners = np.array([calculate.get_bounding_box(solid)[:2] for solid in building_solid_list], dtype=float)
+    neighbours = cKDTree(corners).query_ball_point(corners, r=max_distance)
+    return [[building_solid_list[i] for i in sorted(indices)] for indices in neighbours]
 
 
 class BuildingGeometry(object):
@@ -269,8 +280,8 @@ class BuildingGeometry(object):
         return pickle_location
 
 
-def calc_building_geometry_zone(name, building_solid, all_building_solid_list, architecture_wwr_df,
-                                geometry_pickle_dir, consider_intersections):
+def calc_building_geometry_zone(name, building_solid, potentially_intersecting_solids, architecture_wwr_df,
+                                geometry_pickle_dir):
     # now get all surfaces and create windows only if the buildings are in the area of study
     window_list = []
     wall_list = []
@@ -280,15 +291,6 @@ def calc_building_geometry_zone(name, building_solid, all_building_solid_list, a
     normals_win = []
     intersect_wall = []
 
-    # check if buildings are close together and it merits to check the intersection
-    potentially_intersecting_solids = []
-    if consider_intersections:
-        box = calculate.get_bounding_box(building_solid)
-        x, y = box[0], box[1]
-        for solid in all_building_solid_list:
-            if are_buildings_close_to_eachother(x, y, solid):
-                potentially_intersecting_solids.append(solid)
-
     # identify building surfaces according to angle:
     face_list = fetch.faces_frm_solid(building_solid)
     facade_list_north, facade_list_west, \
@@ -0,0 +1,164 @@
+"""
+Remember the inputs of the last radiation calculation of each building, so that the radiation script only runs Daysim
+for the buildings whose geometry, or the geometry of their shading context, changed since (e.g. in a massing study).
+
+The fingerprint of a building is a hash of the geometry of all the buildings (zone and surroundings) within
+``radiation:shading-context-radius`` of its footprint - including the building itself - together with the terrain, the
+weather file, the Daysim parameters and the version of the CEA. The geometry of a building is its footprint, its row in
+the zone (or surroundings) geometry, its window to wall ratios and the materials of its surfaces. The fingerprints are
+stored in a SQLite database next to the radiation results (see
+:py:meth:`cea.inputlocator.InputLocator.get_radiation_fingerprints`), together with the size and modification time of
+the results files of the building. A building is skipped if neither its fingerprint nor its results files changed.
+"""
+
+import hashlib
+import json
+import sqlite3
+
+import pandas as pd
+from geopandas import GeoSeries
+
+import cea
+from cea.demand.demand_fingerprints import file_signature, hash_file, update_hash
+
+__author__ = "Daren Thomas"
+__copyright__ = "Copyright 2021, Architecture and Building Systems - ETH Zurich"
+__credits__ = ["Daren Thomas"]
+__license__ = "MIT"
+__version__ = "0.1"
+__maintainer__ = "Daren Thomas"
+__email__ = "cea@arch.ethz.ch"
+__status__ = "Production"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS buildings (
+    name TEXT PRIMARY KEY,
+    fingerprint TEXT NOT NULL,
+    result_files TEXT NOT NULL
+)
+"""
+
+# the parameters of the radiation script that change the results of a building
+RADIATION_PARAMETERS = ['use_latest_daysim_binaries', 'albedo', 'roof_grid', 'walls_grid', 'zone_geometry',
+                        'surrounding_geometry', 'consider_floors', 'consider_intersections', 'rad_ab', 'rad_ad',
+                        'rad_as', 'rad_ar', 'rad_aa', 'rad_lr', 'rad_st', 'rad_sj', 'rad_lw', 'rad_dj', 'rad_ds',
+                        'rad_dr', 'rad_dp']
+
+
+class RadiationFingerprints(object):
+    """The fingerprints of the buildings of a scenario, stored at ``path``. Use as a context manager to close the
+    connection to the database."""
+
+    def __init__(self, path):
+        self.path = path
+        self._connection = sqlite3.connect(path)
+        with self._connection:
+            self._connection.execute(SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        self._connection.close()
+
+    def is_up_to_date(self, building, fingerprint, result_files):
+        """True if the building was calculated with the same ``fingerprint`` and none of its ``result_files`` were
+        changed (or deleted) since"""
+        row = self._connection.execute("SELECT fingerprint, result_files FROM buildings WHERE name = ?",
+                                       (building,)).fetchone()
+        return row is not None and row[0] == fingerprint and row[1] == result_files_signature(result_files)
+
+    def write(self, buildings):
+        """
+        Remember the inputs and results of calculated buildings.
+
+        :param buildings: a (name, fingerprint, results files) tuple per building
+        :type buildings: list[tuple[str, str, list[str]]]
+        """
+        rows = [(building, fingerprint, result_files_signature(result_files))
+                for building, fingerprint, result_files in buildings]
+        with self._connection:
+            self._connection.executemany("INSERT OR REPLACE INTO buildings (name, fingerprint, result_files) "
+                                         "VALUES (?, ?, ?)", rows)
+
+
+def result_files_signature(result_files):
+    signatures = [file_signature(result_file) for result_file in result_files]
+    if not all(signatures):
+        # a missing file never matches
+        return ''
+    return json.dumps(signatures)
+
+
+def radiation_result_files(locator, building, write_sensor_data):
+    """The files written by the radiation script for a building"""
+    result_files = [locator.get_radiation_building(building), locator.get_radiation_metadata(building)]
+    if write_sensor_data:
+        result_files.append(locator.get_radiation_building_sensors(building))
+    return result_files
+
+
+def calc_fingerprints(locator, settings, zone_df, surroundings_df, architecture_df, surface_properties):
+    """
+    Calculate the fingerprint of the inputs of the radiation calculation of each building in the zone.
+
+    :param locator: An InputLocator to locate the terrain and weather files
+    :type locator: cea.inputlocator.InputLocator
+    :param settings: the parameters of the radiation script (``config.radiation``)
+    :param zone_df: the zone geometry
+    :type zone_df: geopandas.GeoDataFrame
+    :param surroundings_df: the surroundings geometry
+    :type surroundings_df: geopandas.GeoDataFrame
+    :param architecture_df: the architecture properties of the zone buildings (window to wall ratios), indexed by Name
+    :param surface_properties: the materials of the zone buildings (see ``reader_surface_properties``), indexed by Name
+    :return: the fingerprint of each building in the zone
+    :rtype: dict[str, str]
+    """
+    common_inputs = [cea.__version__, hash_file(locator.get_terrain()), hash_file(locator.get_weather_file()),
+                     {parameter: getattr(settings, parameter) for parameter in RADIATION_PARAMETERS}]
+
+    zone_df, surroundings_df = project_geometries(zone_df, surroundings_df)
+    # buildings of the zone that are also in the surroundings are not part of the scene twice
+    surroundings_df = surroundings_df[~surroundings_df['Name'].isin(zone_df['Name'])]
+    buildings_df = pd.concat([zone_df, surroundings_df], ignore_index=True)
+
+    building_hashes = []
+    for _, building in buildings_df.iterrows():
+        building_hash = hashlib.sha256()
+        update_hash(building_hash, [building.drop('geometry').dropna(), building.geometry.wkb,
+                                    row_or_none(architecture_df, building['Name']),
+                                    row_or_none(surface_properties, building['Name'])])
+        building_hashes.append(building_hash.hexdigest())
+
+    geometries = list(buildings_df.geometry)
+    names = list(buildings_df['Name'])
+    spatial_index = GeoSeries(geometries).sindex
+    radius = settings.shading_context_radius
+    fingerprints = {}
+    for i in range(len(zone_df)):
+        minx, miny, maxx, maxy = geometries[i].bounds
+        candidates = spatial_index.intersection((minx - radius, miny - radius, maxx + radius, maxy + radius))
+        context = sorted((names[j], building_hashes[j]) for j in candidates
+                         if geometries[i].distance(geometries[j]) <= radius)
+        fingerprint = hashlib.sha256()
+        update_hash(fingerprint, [common_inputs, names[i], context])
+        fingerprints[names[i]] = fingerprint.hexdigest()
+    return fingerprints
+
+
+def project_geometries(zone_df, surroundings_df):
+    """Make sure both geometries are in the same projected coordinate system (distances in meters)"""
+    if zone_df.crs is not None and zone_df.crs.is_geographic:
+        zone_df = zone_df.to_crs(zone_df.estimate_utm_crs())
+    if surroundings_df.crs != zone_df.crs and surroundings_df.crs is not None and zone_df.crs is not None:
+        surroundings_df = surroundings_df.to_crs(zone_df.crs)
+    return zone_df, surroundings_df
+
+
+def row_or_none(df, building):
+    if building in df.index:
+        return df.loc[building]
+    return None
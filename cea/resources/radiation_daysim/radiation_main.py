@@ -14,9 +14,9 @@ from geopandas import GeoDataFrame as gpdf
 import cea.config
 import cea.inputlocator
 from cea.datamanagement.databases_verification import verify_input_geometry_zone, verify_input_geometry_surroundings
-from cea.resources.radiation_daysim import daysim_main, geometry_generator
+from cea.resources.radiation_daysim import daysim_main, geometry_generator, radiation_fingerprints
 from cea.resources.radiation_daysim.radiance import CEADaySim
-from cea.utilities import epwreader
+from cea.utilities import epwreader, profiling
 from cea.utilities.parallel import vectorize
 
 __author__ = "Paul Neitzel, Kian Wee Chen"
@@ -56,14 +56,13 @@ def reader_surface_properties(locator):
     return surface_properties.set_index('Name').round(decimals=2)
 
 
-def radiation_singleprocessing(cea_daysim, zone_building_names, locator, settings, geometry_pickle_dir, num_processes):
+def radiation_singleprocessing(cea_daysim, list_of_building_names, locator, settings, geometry_pickle_dir,
+                               num_processes):
     weather_path = locator.get_weather_file()
     # check inconsistencies and replace by max value of weather file
     weatherfile = epwreader.epw_reader(weather_path)
     max_global = weatherfile['glohorrad_Whm2'].max()
 
-    list_of_building_names = [building_name for building_name in settings.buildings
-                              if building_name in zone_building_names]
     # get chunks of buildings to iterate
     chunks = [list_of_building_names[i:i + settings.n_buildings_in_chunk] for i in
               range(0, len(list_of_building_names),
@@ -235,21 +234,48 @@ def main(config):
     surroundings_path = locator.get_surroundings_geometry()
     print("zone: {zone_path}\nsurroundings: {surroundings_path}".format(zone_path=zone_path,
                                                                         surroundings_path=surroundings_path))
-    verify_input_geometry_zone(gpdf.from_file(zone_path))
-    verify_input_geometry_surroundings(gpdf.from_file(surroundings_path))
+    zone_df = gpdf.from_file(zone_path)
+    surroundings_df = gpdf.from_file(surroundings_path)
+    verify_input_geometry_zone(zone_df)
+    verify_input_geometry_surroundings(surroundings_df)
 
     # import material properties of buildings
     print("Getting geometry materials")
     building_surface_properties = reader_surface_properties(locator)
     building_surface_properties.to_csv(locator.get_radiation_materials())
 
+    # skip the buildings whose geometry and shading context did not change since the last calculation
+    zone_names = set(zone_df['Name'])
+    building_names = [building_name for building_name in config.radiation.buildings
+                      if building_name in zone_names]
+    with profiling.stage("fingerprints"):
+        fingerprints = radiation_fingerprints.calc_fingerprints(
+            locator, config.radiation, zone_df, surroundings_df,
+            gpdf.from_file(locator.get_building_architecture()).set_index('Name'), building_surface_properties)
+    fingerprints_store = radiation_fingerprints.RadiationFingerprints(locator.get_radiation_fingerprints())
+    if config.radiation.skip_unchanged_buildings:
+        changed_building_names = [building_name for building_name in building_names
+                                  if not fingerprints_store.is_up_to_date(
+                                      building_name, fingerprints[building_name],
+                                      radiation_fingerprints.radiation_result_files(
+                                          locator, building_name, config.radiation.write_sensor_data))]
+        if len(changed_building_names) < len(building_names):
+            print("Skipping {n} buildings with unchanged geometry and shading context".format(
+                n=len(building_names) - len(changed_building_names)))
+        building_names = changed_building_names
+    if not building_names:
+        print("The radiation of all buildings is up to date")
+        fingerprints_store.close()
+        return
+
     print("Creating 3D geometry and surfaces")
     geometry_pickle_dir = os.path.join(
         locator.get_temporary_folder(), "{}_radiation_geometry_pickle".format(config.scenario_name))
     print("Saving geometry pickle files in: {}".format(geometry_pickle_dir))
     # create geometrical faces of terrain and buildings
-    geometry_terrain, zone_building_names, surroundings_building_names = geometry_generator.geometry_main(
-        locator, config, geometry_pickle_dir)
+    with profiling.stage("geometry"):
+        geometry_terrain, zone_building_names, surroundings_building_names = geometry_generator.geometry_main(
+            locator, config, geometry_pickle_dir)
 
     # daysim_bin_directory might contain two paths (e.g. "C:\Daysim\bin;C:\Daysim\lib") - in which case, only
     # use the "bin" folder
@@ -272,8 +298,14 @@ def main(config):
     cea_daysim.execute_radfiles2daysim()
 
     time1 = time.time()
-    radiation_singleprocessing(cea_daysim, zone_building_names, locator, config.radiation, geometry_pickle_dir,
-                               num_processes=config.get_number_of_processes())
+    with profiling.stage("daysim"):
+        radiation_singleprocessing(cea_daysim, building_names, locator, config.radiation, geometry_pickle_dir,
+                                   num_processes=config.get_number_of_processes())
+    fingerprints_store.write([(building_name, fingerprints[building_name],
+                               radiation_fingerprints.radiation_result_files(locator, building_name,
+                                                                             config.radiation.write_sensor_data))
+                              for building_name in building_names])
+    fingerprints_store.close()
 
     print("Daysim simulation finished in %.2f mins" % ((time.time() - time1) / 60.0))
 
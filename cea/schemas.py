@@ -7,7 +7,6 @@ parameter allows reading in schemas from ``schemas.yml`` files defined in plugin
 import os
 import pickle
 
-import pandas as pd
 import yaml
 import warnings
 import functools
@@ -54,7 +53,7 @@ def schemas(plugins):
         # compare the dates of the two files - use the pickle if it's newer
         schemas_dict = None
         if os.path.exists(schemas_pickle) and os.path.getmtime(schemas_pickle) > os.path.getmtime(schemas_yml):
-            with open(schemas_pickle, "r") as schemas_pickle_fp:
+            with open(schemas_pickle, "rb") as schemas_pickle_fp:
                 try:
                     schemas_dict = pickle.load(schemas_pickle_fp)
                 except:
@@ -228,9 +227,48 @@ class SchemaIo(object):
         raise AttributeError("{lm}: don't know how to create a new Dataframe for file_type {file_type}".format(
             lm=self.lm, file_type=self.schema["file_type"]))
 
-    def validate(self, df):
-        """Check to make sure the Dataframe conforms to the schema"""
-        expected_columns = set(self.schema["schema"]["columns"].keys())
+    def dtypes(self, columns=None, float32=False, categorical=False):
+        """
+        Return a mapping of column name to pandas dtype, based on the ``type`` of each column in schemas.yml.
+        Only ``float`` columns (and ``string`` columns, if ``categorical`` is set) are mapped - ``int`` columns are
+        left to pandas, since an integer column with missing values can't be read as ``int64`` and other types
+        (``date``, ``boolean``, geometries) are kept as read.
+
+        :param columns: restrict the mapping to these columns (default: all columns in the schema)
+        :param bool float32: map ``float`` columns to ``float32`` instead of ``float64`` (halves the memory footprint)
+        :param bool categorical: map ``string`` columns to ``category``
+        :rtype: Dict[str, str]
+        """
+        schema_columns = self.schema["schema"]["columns"]
+        if columns is None:
+            columns = schema_columns.keys()
+        type_to_dtype = {"float": "float32" if float32 else "float64"}
+        if categorical:
+            type_to_dtype["string"] = "category"
+        return {column: type_to_dtype[schema_columns[column]["type"]] for column in columns
+                if column in schema_columns and schema_columns[column].get("type") in type_to_dtype}
+
+    def downcast(self, df, float32=False):
+        """
+        Down-cast the ``int`` columns of ``df`` to the smallest integer type that fits (only if ``float32`` is set, to
+        mirror the float down-casting done by :py:meth:`dtypes`). Columns with missing values are left untouched.
+        """
+        if not float32:
+            return df
+        import pandas as pd
+        schema_columns = self.schema["schema"]["columns"]
+        for column in df.columns:
+            if schema_columns.get(column, {}).get("type") == "int" and pd.api.types.is_integer_dtype(df[column]):
+                df[column] = pd.to_numeric(df[column], downcast="integer")
+        return df
+
+    def validate(self, df, columns=None):
+        """
+        Check to make sure the Dataframe conforms to the schema
+
+        :param columns: if only a subset of the columns was read, only check for those columns
+        """
+        expected_columns = set(self.schema["schema"]["columns"].keys() if columns is None else columns)
         found_columns = set(df.columns.values)
 
         # handle some extra cases
@@ -271,19 +309,36 @@ class SchemaIo(object):
 class CsvSchemaIo(SchemaIo):
     """Read and write csv files - and attempt to validate them."""
 
-    def read(self, *args, **kwargs):
+    def read(self, *args, columns=None, float32=False, categorical=False, **kwargs):
         """
         Open the file indicated by the locator method and return it as a Dataframe.
         args and kwargs are passed to the original (undecorated) locator method to figure out the location of the
         file.
 
+        The column types are taken from schemas.yml (see :py:meth:`SchemaIo.dtypes`). Use ``columns`` to only load
+        the columns you need - this keeps the memory footprint down when reading the results of many buildings.
+
         :param args:
+        :param columns: only read these columns (default: read all columns)
+        :param bool float32: read ``float`` columns as ``float32`` and down-cast ``int`` columns
+        :param bool categorical: read ``string`` columns as ``category``
         :param kwargs:
         :rtype: pd.DataFrame
         """
-        df = pd.read_csv(self(*args, **kwargs))
-        self.validate(df)
-        return df
+        import pandas as pd
+        path_to_csv = self(*args, **kwargs)
+        dtype = self.dtypes(columns, float32=float32, categorical=categorical)
+        try:
+            df = pd.read_csv(path_to_csv, usecols=columns, dtype=dtype)
+        except ValueError as e:
+            if columns is not None and "Usecols do not match columns" in str(e):
+                raise
+            # the file does not conform to the types in schemas.yml - fall back to letting pandas guess
+            warnings.warn("Could not read {path} with the types in schemas.yml for {lm}: {e}".format(
+                path=path_to_csv, lm=self.lm, e=e))
+            df = pd.read_csv(path_to_csv, usecols=columns)
+        self.validate(df, columns)
+        return self.downcast(df, float32=float32)
 
     def write(self, df, *args, **kwargs):
         """
@@ -300,26 +355,33 @@ class CsvSchemaIo(SchemaIo):
         df.to_csv(path_to_csv, index=False, **csv_args)
 
     def new(self):
+        import pandas as pd
         return pd.DataFrame(columns=(self.schema["schema"]["columns"].keys()))
 
 
 class DbfSchemaIo(SchemaIo):
     """Read and write .dbf files - and attempt to validate them."""
 
-    def read(self, *args, **kwargs):
+    def read(self, *args, columns=None, float32=False, categorical=False, **kwargs):
         """
         Open the file indicated by the locator method and return it as a DataFrame.
         args and kwargs are passed to the original (undecorated) locator method to figure out the location of the
         file.
 
+        See :py:meth:`CsvSchemaIo.read` for the ``columns``, ``float32`` and ``categorical`` parameters.
+
         :param args:
         :param kwargs:
         :rtype: pd.DataFrame
         """
         from cea.utilities.dbf import dbf_to_dataframe
         df = dbf_to_dataframe(self(*args, **kwargs))
-        self.validate(df)
-        return df
+        if columns is not None:
+            df = df[list(columns)]
+        self.validate(df, columns)
+        if float32 or categorical:
+            df = df.astype(self.dtypes(df.columns, float32=float32, categorical=categorical))
+        return self.downcast(df, float32=float32)
 
     def write(self, df, *args, **kwargs):
         """
@@ -164,6 +164,38 @@ def calc_Cop_boiler(q_load_Wh, Q_nom_W, T_return_to_boiler_K):
     return boiler_eff
 
 
+def calc_Cop_boiler_array(q_load_Wh, Q_nom_W, T_return_to_boiler_K):
+    """
+    Array version of :py:func:`calc_Cop_boiler`. The efficiency curves are evaluated for all time steps at once.
+    ``Q_nom_W`` can either be a single design load or one design load per row of ``q_load_Wh`` (e.g. one row per
+    supply system configuration).
+
+    :param q_load_Wh: Load of each time step
+    :type q_load_Wh: np.ndarray
+    :param Q_nom_W: Design Load of Boiler
+    :type Q_nom_W: float or np.ndarray
+    :param T_return_to_boiler_K: Return Temperature of the network to the boiler [K]
+    :type T_return_to_boiler_K: np.ndarray
+
+    :retype boiler_eff: np.ndarray
+    :returns boiler_eff: efficiency of Boiler (Lower Heating Value), in abs. numbers
+    """
+    q_load_Wh, Q_nom_W, T_return_to_boiler_K = np.broadcast_arrays(np.asarray(q_load_Wh, dtype=float),
+                                                                   np.asarray(Q_nom_W, dtype=float),
+                                                                   T_return_to_boiler_K)
+    boiler_eff = np.zeros(q_load_Wh.shape)
+    operating = (Q_nom_W > 0.0) & (q_load_Wh > 0.0)
+
+    # calculate efficiency according to partload
+    phi = q_load_Wh[operating] / Q_nom_W[operating]
+    phi = np.where(phi >= 1.0, 0.98, phi)  # avoid rounding error
+    T_return_C = T_return_to_boiler_K[operating] - 273.15
+    eff_score = eff_of_phi(phi) / eff_of_phi(1)
+    boiler_eff[operating] = eff_score * eff_of_T_return(T_return_C) / 100.0
+
+    return boiler_eff
+
+
 # investment and maintenance costs
 
 def calc_Cinv_boiler(Q_design_W, technology_type, boiler_cost_data):
@@ -108,6 +108,85 @@ def calc_chiller_main(mdot_chw_kgpers, T_chw_sup_K, T_chw_re_K, T_hw_in_C, T_gro
     return chiller_operation
 
 
+def calc_chiller_main_array(mdot_chw_kgpers, T_chw_sup_K, T_chw_re_K, T_hw_in_C, T_ground_K, absorption_chiller):
+    """
+    Array version of :py:func:`calc_chiller_main`. The chiller properties (row of the ``Absorption_chiller`` database)
+    and the number of activated chillers are selected for all time steps at once, the characteristic equations are
+    then solved for the whole time series.
+
+    :param mdot_chw_kgpers: required chilled water flow rate
+    :type mdot_chw_kgpers: np.ndarray
+    :param T_chw_sup_K: required chilled water supply temperature (outlet from the evaporator)
+    :type T_chw_sup_K: np.ndarray
+    :param T_chw_re_K: required chilled water return temperature (inlet to the evaporator)
+    :type T_chw_re_K: np.ndarray
+    :param T_hw_in_C: hot water inlet temperature to the generator
+    :type T_hw_in_C: np.ndarray
+    :param T_ground_K: ground temperature
+    :type T_ground_K: np.ndarray
+    :param AbsorptionChiller absorption_chiller: chiller properties
+    :return: a dict of arrays with the same keys as :py:func:`calc_chiller_main`
+    """
+    mdot_chw_kgpers, T_chw_sup_K, T_chw_re_K, T_hw_in_C, T_ground_K = np.broadcast_arrays(
+        np.asarray(mdot_chw_kgpers, dtype=float), T_chw_sup_K, T_chw_re_K, T_hw_in_C, T_ground_K)
+    chiller_prop = absorption_chiller.chiller_prop
+    q_chw_total_W = mdot_chw_kgpers * HEAT_CAPACITY_OF_WATER_JPERKGK * (T_chw_re_K - T_chw_sup_K)
+
+    wdot_W = np.zeros(q_chw_total_W.shape)
+    q_cw_W = np.zeros(q_chw_total_W.shape)
+    q_hw_W = np.zeros(q_chw_total_W.shape)
+    T_hw_out_C = np.full(q_chw_total_W.shape, np.nan)
+    EER = np.zeros(q_chw_total_W.shape)
+
+    operating = ~np.isclose(q_chw_total_W, 0.0)
+    if np.any(operating):
+        q_operating_W = q_chw_total_W[operating]
+        cap_min_W = chiller_prop['cap_min'].values
+        cap_max_W = chiller_prop['cap_max'].values
+        min_chiller_size_W = cap_min_W.min()
+        max_chiller_size_W = cap_max_W.max()
+
+        # get chiller property according to load (first matching row, as in calc_chiller_main)
+        in_range = (cap_min_W[:, None] <= q_operating_W[None, :]) & (cap_max_W[:, None] >= q_operating_W[None, :])
+        chiller_row = np.argmax(in_range, axis=0)
+        number_of_chillers_activated = np.ones(q_operating_W.shape)
+        q_chw_W = q_operating_W.copy()
+
+        # operate one chiller at minimum load
+        below_min = q_operating_W < min_chiller_size_W
+        chiller_row[below_min] = np.argmax(cap_min_W == min_chiller_size_W)
+        q_chw_W[below_min] = min_chiller_size_W
+
+        # distribute loads to multiple chillers operating at maximum load
+        above_max = q_operating_W > max_chiller_size_W
+        chiller_row[above_max] = np.argmax(cap_max_W == max_chiller_size_W)
+        number_of_chillers_activated[above_max] = q_operating_W[above_max] / max_chiller_size_W
+        q_chw_W[above_max] = max_chiller_size_W
+
+        input_conditions = {'T_chw_sup_K': T_chw_sup_K[operating],
+                            'T_chw_re_K': T_chw_re_K[operating],
+                            'T_hw_in_C': T_hw_in_C[operating],
+                            'T_ground_K': T_ground_K[operating],
+                            'q_chw_W': q_chw_W}
+        operating_conditions = calc_operating_conditions(absorption_chiller.select_rows(chiller_row),
+                                                         input_conditions)
+
+        # calculate chiller outputs
+        wdot_W[operating] = calc_power_demand(q_chw_W, chiller_prop) * number_of_chillers_activated
+        q_cw_W[operating] = operating_conditions['q_cw_W'] * number_of_chillers_activated
+        q_hw_W[operating] = operating_conditions['q_hw_W'] * number_of_chillers_activated
+        T_hw_out_C[operating] = operating_conditions['T_hw_out_C']
+        EER[operating] = q_operating_W / (q_hw_W[operating] + wdot_W[operating])
+
+        if np.any(T_hw_out_C[operating] < 0.0):
+            print('T_hw_out_C = ', np.nanmin(T_hw_out_C), ' incorrect condition, check absorption chiller script.')
+
+    chiller_operation = {'wdot_W': wdot_W, 'q_cw_W': q_cw_W, 'q_hw_W': q_hw_W, 'T_hw_out_C': T_hw_out_C,
+                         'q_chw_W': q_chw_total_W, 'EER': EER}
+
+    return chiller_operation
+
+
 def calc_operating_conditions(absorption_chiller, input_conditions):
     """
     Calculates chiller operating conditions at given input conditions by solving the characteristic equations and the
@@ -365,6 +444,27 @@ class AbsorptionChiller(object):
             self.a_g = chiller_prop['a_g'].values[0]
             self.e_g = chiller_prop['e_g'].values[0]
 
+    def select_rows(self, row_index):
+        """
+        Returns a copy of this chiller where the parameters of the characteristic equations are arrays holding the
+        values of the rows ``row_index`` of ``chiller_prop`` - one entry per time step. This is used to evaluate
+        :py:func:`calc_operating_conditions` for a whole time series in :py:func:`calc_chiller_main_array`.
+        """
+        selected = object.__new__(AbsorptionChiller)
+        selected.chiller_prop = self.chiller_prop
+        selected.code = self.chiller_prop['code'].values[row_index]
+        selected.m_cw_kgpers = self.chiller_prop['m_cw'].values[row_index]
+        selected.m_hw_kgpers = self.chiller_prop['m_hw'].values[row_index]
+        selected.s_e = self.chiller_prop['s_e'].values[row_index]
+        selected.r_e = self.chiller_prop['r_e'].values[row_index]
+        selected.s_g = self.chiller_prop['s_g'].values[row_index]
+        selected.r_g = self.chiller_prop['r_g'].values[row_index]
+        selected.a_e = self.chiller_prop['a_e'].values[row_index]
+        selected.e_e = self.chiller_prop['e_e'].values[row_index]
+        selected.a_g = self.chiller_prop['a_g'].values[row_index]
+        selected.e_g = self.chiller_prop['e_g'].values[row_index]
+        return selected
+
 
 def main(config):
     """
@@ -69,6 +69,34 @@ def calc_VCC(peak_cooling_load, q_chw_load_Wh, T_chw_sup_K, T_chw_re_K, T_cw_in_
     return chiller_operation
 
 
+def calc_VCC_array(peak_cooling_load, q_chw_load_Wh, T_chw_sup_K, T_chw_re_K, T_cw_in_K, VC_chiller):
+    """
+    Array version of :py:func:`calc_VCC`: the chiller plant is designed once for ``peak_cooling_load`` and then
+    operated for all time steps of ``q_chw_load_Wh`` at the same time.
+
+    :rtype chiller_operation : dict (3 x np.ndarray)
+    :return chiller_operation: electrical energy input, cooling energy input and cooling energy output of VCC
+    """
+    q_chw_load_Wh, T_chw_sup_K, T_chw_re_K, T_cw_in_K = np.broadcast_arrays(
+        np.asarray(q_chw_load_Wh, dtype=float), T_chw_sup_K, T_chw_re_K, T_cw_in_K)
+    if np.any(q_chw_load_Wh < 0.0):
+        raise ValueError('negative cooling load to VCC: ', q_chw_load_Wh.min())
+
+    wdot_W = np.zeros(q_chw_load_Wh.shape)
+    operating = q_chw_load_Wh > 0.0
+    if np.any(operating):
+        q_operating_Wh = q_chw_load_Wh[operating]
+        PLF = calc_averaged_PLF_array(peak_cooling_load, q_operating_Wh, T_chw_sup_K[operating],
+                                      T_cw_in_K[operating], VC_chiller)
+        COP = VC_chiller.g_value * T_chw_sup_K[operating] / (T_cw_in_K[operating] - T_chw_sup_K[operating]) * PLF
+        if np.any(COP < 0.0):
+            print(f'Negative COP in {np.count_nonzero(COP < 0.0)} time steps, minimum COP: {COP.min()}')
+        wdot_W[operating] = q_operating_Wh / COP
+    q_cw_W = wdot_W + q_chw_load_Wh  # heat rejected to the cold water (cw) loop
+
+    return {'wdot_W': wdot_W, 'q_cw_W': q_cw_W, 'q_chw_W': q_chw_load_Wh}
+
+
 def calc_COP(T_cw_in_K, T_chw_re_K, q_chw_load_Wh):
     A = 0.0201E-3 * q_chw_load_Wh / T_cw_in_K
     B = T_chw_re_K / T_cw_in_K
@@ -217,6 +245,70 @@ def calc_averaged_PLF(peak_cooling_load, q_chw_load_Wh, T_chw_sup_K, T_cw_in_K,
     :return float averaged_PLF: averaged part load factor over all chillers [0..1]
     """
 
+    ch_configuration_values, n_units, cooling_capacity_per_unit = design_chiller_plant(peak_cooling_load, VC_chiller)
+
+    # calculate the available capacity(dependent on conditions)
+    available_capacity_per_unit = calc_available_capacity(cooling_capacity_per_unit, ch_configuration_values['Qs'],
+                                                          T_chw_sup_K, T_cw_in_K)
+
+    # calculate the load distribution across the chillers heuristically,
+    # assuming the PLF factor is monotonously increasing with increasing PLR. Filling one chiller after the other.
+    n_chillers_filled = int(q_chw_load_Wh // available_capacity_per_unit)
+    part_load_chiller = float(divmod(q_chw_load_Wh, available_capacity_per_unit)[1])\
+                        / float(available_capacity_per_unit)
+
+    load_distribution_list = []
+    for i in range(n_chillers_filled):
+        load_distribution_list.append(1)
+    load_distribution_list.append(part_load_chiller)
+    for i in range(int(n_units) - n_chillers_filled - 1):
+        load_distribution_list.append(0)
+    load_distribution = np.array(load_distribution_list)
+
+    # calculate the weighted average PLF value
+    averaged_PLF = np.sum(calc_PLF(load_distribution, ch_configuration_values['PLFs']) *
+                          load_distribution * available_capacity_per_unit) / q_chw_load_Wh
+    return averaged_PLF
+
+
+def calc_averaged_PLF_array(peak_cooling_load, q_chw_load_Wh, T_chw_sup_K, T_cw_in_K, VC_chiller):
+    """
+    Array version of :py:func:`calc_averaged_PLF`. The chiller plant is designed once for ``peak_cooling_load`` and
+    the load distribution (completely filled chillers plus one chiller at part load) is evaluated for all time steps
+    at the same time. All values of ``q_chw_load_Wh`` must be larger than zero.
+
+    :param float peak_cooling_load: in W
+    :param np.ndarray q_chw_load_Wh: in W
+    :param np.ndarray T_chw_sup_K: in Kelvin
+    :param np.ndarray T_cw_in_K: in Kelvin
+    :param VaporCompressionChiller VC_chiller: VC_chiller object containing scale, capacity and config properties
+
+    :return np.ndarray averaged_PLF: averaged part load factor over all chillers [0..1]
+    """
+    ch_configuration_values, n_units, cooling_capacity_per_unit = design_chiller_plant(peak_cooling_load, VC_chiller)
+    available_capacity_per_unit = calc_available_capacity(cooling_capacity_per_unit, ch_configuration_values['Qs'],
+                                                          T_chw_sup_K, T_cw_in_K)
+
+    n_chillers_filled = np.floor_divide(q_chw_load_Wh, available_capacity_per_unit)
+    part_load_chiller = np.mod(q_chw_load_Wh, available_capacity_per_unit) / available_capacity_per_unit
+
+    # chillers that are switched off do not contribute to the weighted average (load of zero)
+    PLFs = ch_configuration_values['PLFs']
+    averaged_PLF = (n_chillers_filled * calc_PLF(1.0, PLFs) + calc_PLF(part_load_chiller, PLFs) * part_load_chiller) \
+                   * available_capacity_per_unit / q_chw_load_Wh
+    return averaged_PLF
+
+
+def design_chiller_plant(peak_cooling_load, VC_chiller):
+    """
+    Chooses the chiller type, the number of units and the capacity per unit of a vapor compression chiller plant
+    designed for ``peak_cooling_load``.
+
+    :param float peak_cooling_load: in W
+    :param VaporCompressionChiller VC_chiller: VC_chiller object containing scale, capacity and config properties
+    :return: configuration values (``Qs`` and ``PLFs``), number of units and the cooling capacity per unit in W
+    :rtype: tuple(dict, int, float)
+    """
     # For future implementation, a safety factor for the design capacity could be introduced.
     # As of now this would be in conflict with the master_to_slave_variables.WS_BaseVCC_size_W
     design_capacity = peak_cooling_load  # * 1.15
@@ -268,28 +360,7 @@ def calc_averaged_PLF(peak_cooling_load, q_chw_load_Wh, T_chw_sup_K, T_cw_in_K,
         raise ValueError('VC_chiller scale can only be "BUILDING" or "DISTRICT" got: {scale}'.format(
             scale=VC_chiller.scale))
 
-    # calculate the available capacity(dependent on conditions)
-    available_capacity_per_unit = calc_available_capacity(cooling_capacity_per_unit, ch_configuration_values['Qs'],
-                                                          T_chw_sup_K, T_cw_in_K)
-
-    # calculate the load distribution across the chillers heuristically,
-    # assuming the PLF factor is monotonously increasing with increasing PLR. Filling one chiller after the other.
-    n_chillers_filled = int(q_chw_load_Wh // available_capacity_per_unit)
-    part_load_chiller = float(divmod(q_chw_load_Wh, available_capacity_per_unit)[1])\
-                        / float(available_capacity_per_unit)
-
-    load_distribution_list = []
-    for i in range(n_chillers_filled):
-        load_distribution_list.append(1)
-    load_distribution_list.append(part_load_chiller)
-    for i in range(int(n_units) - n_chillers_filled - 1):
-        load_distribution_list.append(0)
-    load_distribution = np.array(load_distribution_list)
-
-    # calculate the weighted average PLF value
-    averaged_PLF = np.sum(calc_PLF(load_distribution, ch_configuration_values['PLFs']) *
-                          load_distribution * available_capacity_per_unit) / q_chw_load_Wh
-    return averaged_PLF
+    return ch_configuration_values, n_units, cooling_capacity_per_unit
 
 
 def calc_PLF(PLR, PLFs):
@@ -4,6 +4,7 @@ System Modeling: Cooling tower
 
 
 
+import numpy as np
 import pandas as pd
 from math import ceil, log
 from cea.technologies.constants import CT_MIN_PARTLOAD_RATIO
@@ -49,6 +50,27 @@ def calc_CT(q_hot_Wh, Q_nom_W):
     return el_W
 
 
+def calc_CT_array(q_hot_Wh, Q_nom_W):
+    """
+    Array version of :py:func:`calc_CT`: computes the electricity consumption of the cooling tower for a whole
+    time series (or a configuration x hour matrix) at once instead of hour by hour.
+
+    :type q_hot_Wh : np.ndarray
+    :param q_hot_Wh: heat rejected from chiller condensers
+    :type Q_nom_W : float or np.ndarray
+    :param Q_nom_W: installed CT size (must broadcast against ``q_hot_Wh``, e.g. one row per configuration)
+    :rtype el_W : np.ndarray
+    :returns el_W: electricity consumption of the cooling tower
+    """
+    q_hot_Wh, Q_nom_W = np.broadcast_arrays(np.asarray(q_hot_Wh, dtype=float), np.asarray(Q_nom_W, dtype=float))
+    el_W = np.zeros(q_hot_Wh.shape)
+    operating = (Q_nom_W > 0.0) & (q_hot_Wh > 0.0)
+    q_partload_ratio = np.maximum(q_hot_Wh[operating] / Q_nom_W[operating], CT_MIN_PARTLOAD_RATIO)
+    w_partload_factor = calc_CT_partload_factor(q_partload_ratio)
+    el_W[operating] = w_partload_factor * 0.011 * Q_nom_W[operating]  # _[B. Stephane, 2012]
+    return el_W
+
+
 def calc_CT_partload_factor(q_part_load_ratio):
     """
     Calculate the partload factor according to partload ratio.
@@ -61,8 +83,7 @@ def calc_CT_partload_factor(q_part_load_ratio):
     OPTIMAL DIMENSIONS TO MINIMIZE COSTS OR EMISSIONS. Presented at the Forth German-Austrian IBPSA Conference BauSIM,
     Berlin University of the Arts.
     """
-    if q_part_load_ratio < CT_MIN_PARTLOAD_RATIO:
-        q_part_load_ratio = CT_MIN_PARTLOAD_RATIO
+    q_part_load_ratio = np.maximum(q_part_load_ratio, CT_MIN_PARTLOAD_RATIO)
     w_partload_factor = 0.8603 * q_part_load_ratio ** 3 + 0.2045 * q_part_load_ratio ** 2 - 0.0623 * q_part_load_ratio + 0.0026
     return w_partload_factor
 
@@ -47,6 +47,21 @@ def calc_DX(mdot_kgpers, T_sup_K, T_re_K):
     return wdot_W, q_chw_W
 
 
+def calc_DX_array(mdot_kgpers, T_sup_K, T_re_K):
+    """
+    Array version of :py:func:`calc_DX` for whole time series.
+
+    :return: electricity demand and chilled water load of the DX units for every time step
+    :rtype: tuple(np.ndarray, np.ndarray)
+    """
+    mdot_kgpers, T_sup_K, T_re_K = np.broadcast_arrays(np.asarray(mdot_kgpers, dtype=float), T_sup_K, T_re_K)
+    operating = ~np.isclose(mdot_kgpers, 0.0)
+    q_chw_W = np.where(operating, mdot_kgpers * HEAT_CAPACITY_OF_WATER_JPERKGK * (T_re_K - T_sup_K), 0.0)
+    wdot_W = q_chw_W / calc_cop_DX(q_chw_W)
+
+    return wdot_W, q_chw_W
+
+
 # investment and maintenance costs
 
 def calc_Cinv_DX(Q_design_W):
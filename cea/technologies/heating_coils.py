@@ -62,7 +62,7 @@ def calc_heating_coil(Qhsf, Qhsf_0, Ta_sup_hs, Ta_re_hs, Ths_sup_0, Ths_re_0, ma
         dTm_0 = substation.calc_dTm_HEX(thi_0, tho_0, tci_0, tco_0)
         # Area heat exchange and UA_heating
         Area_HEX_heating, UA_heating = substation.calc_area_HEX(Qnom, dTm_0, U_HEAT)
-        tho, ch = np.vectorize(substation.calc_HEX_heating)(Q, UA_heating, thi, tco, tci, cc)
+        tho, ch = substation.calc_HEX_heating_array(Q, UA_heating, thi, tco, tci, cc)
 
     else:
         thi = np.nan
@@ -181,7 +181,7 @@ def calc_cooling_coil(Qcsf, Qcsf_0, Ta_sup_cs, Ta_re_cs, Tcs_sup_0, Tcs_re_0, ma
         dTm_0 = substation.calc_dTm_HEX(thi_0, tho_0, tci_0, tco_0)
         # Area heat exchange and UA_heating
         Area_HEX_cooling, UA_cooling = substation.calc_area_HEX(Qnom, dTm_0, U_COOL)
-        tco, cc = np.vectorize(substation.calc_HEX_cooling)(Q, UA_cooling, thi, tho, tci, ch)
+        tco, cc = substation.calc_HEX_cooling_array(Q, UA_cooling, thi, tho, tci, ch)
     else:
         tco = np.nan
         tci = np.nan
@@ -104,14 +104,11 @@ def calc_Cop_GHP(ground_temp_K, mdot_kgpers, T_DH_sup_K, T_re_K):
     ..[C. Montagud et al., 2014] C. Montagud, J.M. Corberan, A. Montero (2014). In situ optimization methodology for
     the water circulation pump frequency of ground source heat pump systems. Energy and Buildings
     """
-    tsup2_K = T_DH_sup_K      # tsup2 = tsup, if all load can be provided by the HP
-
-    # calculate condenser temperature
-    tcond_K = T_DH_sup_K + HP_DELTA_T_COND
-    if tcond_K > HP_MAX_T_COND:
-        #raise ModelError
-        tcond_K = HP_MAX_T_COND
-        tsup2_K = tcond_K - HP_DELTA_T_COND  # lower the supply temp if necessary, tsup2 < tsup if max load is not enough
+    # calculate condenser temperature (works for single values and for arrays of time steps)
+    tcond_K = np.minimum(T_DH_sup_K + HP_DELTA_T_COND, HP_MAX_T_COND)
+    # tsup2 = tsup, if all load can be provided by the HP,
+    # lower the supply temp if necessary, tsup2 < tsup if max load is not enough
+    tsup2_K = np.minimum(T_DH_sup_K, HP_MAX_T_COND - HP_DELTA_T_COND)
 
     # calculate evaporator temperature
     tevap_K = ground_temp_K - HP_DELTA_T_EVAP
@@ -9,13 +9,13 @@ a series of points (buildings) to the closest street
 import os
 
 from geopandas import GeoDataFrame as gdf
+from geopandas import GeoSeries
 from shapely.geometry import Point, LineString, MultiPoint, box
 from shapely.ops import split, linemerge, snap
 
 import cea.config
 import cea.inputlocator
 from cea.constants import SHAPEFILE_TOLERANCE, SNAP_TOLERANCE
-from cea.utilities.standardize_coordinates import get_projected_coordinate_system, get_geographic_coordinate_system
 
 __author__ = "Jimeno A. Fonseca"
 __copyright__ = "Copyright 2017, Architecture and Building Systems - ETH Zurich"
@@ -26,12 +26,39 @@ __maintainer__ = "Daren Thomas"
 __email__ = "cea@arch.ethz.ch"
 __status__ = "Production"
 
+# initial half-width [m] of the window searched for the street closest to a building (doubled until a street is found)
+NEAR_ANALYSIS_SEARCH_DISTANCE = 100.0
+
+
+def create_spatial_index(geometries):
+    """
+    Create a bounding box index of ``geometries`` (the ``sindex`` of geopandas) - the positions returned by
+    :py:func:`query_bounds` are the positions in ``geometries``.
+    """
+    return GeoSeries(list(geometries)).sindex
+
+
+def query_bounds(spatial_index, bounds, distance=0.0):
+    """
+    Return the (sorted) positions of the geometries in ``spatial_index`` with a bounding box that intersects ``bounds``
+    extended by ``distance`` on each side - i.e. all the geometries that can be within ``distance`` of ``bounds``.
+    """
+    minx, miny, maxx, maxy = bounds
+    return sorted(spatial_index.intersection((minx - distance, miny - distance, maxx + distance, maxy + distance)))
+
 
 def compute_intersections(lines, crs):
-    import itertools
+    lines = list(lines)
+    spatial_index = create_spatial_index(lines)
     inters = []
-    for line1, line2 in itertools.combinations(lines, 2):
-        if line1.intersects(line2):
+    for i, line1 in enumerate(lines):
+        # only the lines with overlapping bounding boxes can intersect (same order as itertools.combinations)
+        for j in query_bounds(spatial_index, line1.bounds):
+            if j <= i:
+                continue
+            line2 = lines[j]
+            if not line1.intersects(line2):
+                continue
             inter = line1.intersection(line2)
             if "Point" == inter.type:
                 inters.append(inter)
@@ -110,11 +137,14 @@ def find_isolated_endpoints(lines):
         A list of line end Points that don't touch any other line of lines
     """
 
+    lines = list(lines)
+    spatial_index = create_spatial_index(lines)
     isolated_endpoints = []
     for i, line in enumerate(lines):
-        other_lines = lines[:i] + lines[i + 1:]
         for q in [0, -1]:
             endpoint = Point(line.coords[q])
+            # only the lines with a bounding box containing the endpoint can touch it
+            other_lines = (lines[j] for j in query_bounds(spatial_index, endpoint.bounds) if j != i)
             if any(endpoint.touches(another_line)
                    for another_line in other_lines):
                 continue
@@ -179,10 +209,19 @@ def snappy_endings(lines, max_distance, crs):
     # isolated endpoints are going to snap to the closest vertex
     isolated_endpoints = find_isolated_endpoints(snapped_lines)
 
+    # the spatial indexes are built from the original geometries: querying them with a margin of the largest
+    # (accumulated) displacement of a line vertex / snapping point still returns all the candidates
+    lines_index = create_spatial_index(snapped_lines)
+    points_index = create_spatial_index(snapping_points)
+    lines_displacement = [0.0] * len(snapped_lines)
+    points_displacement = [0.0] * len(snapping_points)
+    lines_margin = points_margin = 0.0
+
     # only move isolated endpoints, one by one
     for endpoint in isolated_endpoints:
         # find all vertices within a radius of max_distance as possible
-        target = nearest_neighbor_within(snapping_points, endpoint,
+        candidates = query_bounds(points_index, endpoint.bounds, max_distance + points_margin)
+        target = nearest_neighbor_within([snapping_points[i] for i in candidates], endpoint,
                                          max_distance)
 
         # do nothing if no target point to snap to is found
@@ -190,16 +229,23 @@ def snappy_endings(lines, max_distance, crs):
             continue
 
             # find the LineString to modify within snapped_lines and update it
-        for i, snapped_line in enumerate(snapped_lines):
+        for i in query_bounds(lines_index, endpoint.bounds, lines_margin):
+            snapped_line = snapped_lines[i]
             if endpoint.touches(snapped_line):
                 snapped_lines[i] = bend_towards(snapped_line, where=endpoint,
                                                 to=target)
+                lines_displacement[i] += max(Point(a).distance(Point(b)) for a, b in
+                                             zip(snapped_line.coords, snapped_lines[i].coords))
+                lines_margin = max(lines_margin, lines_displacement[i])
                 break
 
         # also update the corresponding snapping_points
-        for i, snapping_point in enumerate(snapping_points):
+        for i in query_bounds(points_index, endpoint.bounds, points_margin):
+            snapping_point = snapping_points[i]
             if endpoint.equals(snapping_point):
                 snapping_points[i] = target
+                points_displacement[i] += snapping_point.distance(target)
+                points_margin = max(points_margin, points_displacement[i])
                 break
 
     # post-processing: remove any resulting lines of length 0
@@ -232,9 +278,18 @@ def split_line_by_nearest_points(gdf_line, gdf_points, tolerance_grid_snap, crs)
     # returns GeometryCollection
     # snap_points = snap(coords, line, tolerance)
     # snap_points._crs = crs
-    split_line = split(line, snap(snap_points, line, tolerance_grid_snap))
-    split_line._crs = crs
-    segments = [feature for feature in split_line if feature.length > 0.01]
+    snapped_points = snap(snap_points, line, tolerance_grid_snap)
+
+    # split each line separately, only with the points that can be on it (the other points do not split it)
+    lines = line.geoms if line.geom_type == 'MultiLineString' else [line]
+    points = snapped_points.geoms if snapped_points.geom_type == 'MultiPoint' else [snapped_points]
+    points = [point for point in points if not point.is_empty]
+    spatial_index = create_spatial_index(points)
+    segments = []
+    for line in lines:
+        line_points = [points[i] for i in query_bounds(spatial_index, line.bounds)]
+        features = split(line, MultiPoint(line_points)).geoms if line_points else [line]
+        segments.extend(feature for feature in features if feature.length > 0.01)
 
     gdf_segments = gdf(geometry=segments, crs=crs)
     # gdf_segments.columns = ['index', 'geometry']
@@ -269,13 +324,25 @@ def nearest_neighbor_within(others, point, max_distance):
 
 
 def near_analysis(buiding_centroids, street_network, crs):
+    lines = list(street_network.geometry)
+    spatial_index = create_spatial_index(lines)
     near_point = []
     building_name = []
     for point, name in zip(buiding_centroids.geometry, buiding_centroids.Name):
-        point._crs = crs
+        # grow the search window until it contains a street: the closest street is then at most as far away as the
+        # closest street in the window (a small margin covers the rounding of project/interpolate)
+        search_distance = NEAR_ANALYSIS_SEARCH_DISTANCE
+        candidates = query_bounds(spatial_index, point.bounds, search_distance)
+        while not candidates and lines:
+            search_distance *= 2
+            candidates = query_bounds(spatial_index, point.bounds, search_distance)
+        if candidates:
+            nearest_distance = min(point.distance(lines[i]) for i in candidates)
+            candidates = query_bounds(spatial_index, point.bounds, nearest_distance + 1e-6)
+
         distance = 10e10
-        for line in street_network.geometry:
-            line._crs = crs
+        for i in candidates:
+            line = lines[i]
             nearest_point_candidate = line.interpolate(line.project(point))
             distance_candidate = point.distance(nearest_point_candidate)
             if distance_candidate < distance:
@@ -291,12 +358,17 @@ def near_analysis(buiding_centroids, street_network, crs):
 
 
 def snap_points(points, lines, tolerance, crs):
+    point_list = list(points.geometry)
+    spatial_index = create_spatial_index(point_list)
     length = lines.shape[0]
     for i in range(length):
-        for point in points.geometry:
+        # only the points within the tolerance of the line can be snapped to it. The line changes when a point is
+        # snapped, so the candidates are looked up again for the remaining points
+        candidates = query_bounds(spatial_index, lines.loc[i, "geometry"].bounds, tolerance)
+        while candidates:
+            k = candidates.pop(0)
+            point = point_list[k]
             line = lines.loc[i, "geometry"]
-            line._crs = crs
-            point._crs = crs
             point_inline_projection = line.interpolate(line.project(point))
             point_inline_projection._crs = crs
             distance_to_line = point.distance(point_inline_projection)
@@ -316,6 +388,7 @@ def snap_points(points, lines, tolerance, crs):
                     ### Stitch together the first segment, the interpolated point, and the last segment
                     new_line = linemerge((LineString(line_1_points), LineString(line_2_points)))
                     lines.loc[i, "geometry"] = new_line
+                    candidates = [c for c in query_bounds(spatial_index, new_line.bounds, tolerance) if c > k]
 
     G = points["geometry"].apply(lambda geom: geom.wkb)
     points = points.loc[G.drop_duplicates().index]
@@ -396,16 +469,21 @@ def simplify_liness_accurracy(lines, decimals, crs):
     return df
 
 
-def calc_connectivity_network(path_streets_shp, building_centroids_df, temp_path_potential_network_shp):
+def calc_connectivity_network(path_streets_shp, building_centroids_df, temp_path_potential_network_shp=None):
     """
     This script outputs a potential network connecting a series of building points to the closest street network
     the street network is assumed to be a good path to the district heating or cooling network
 
     :param path_streets_shp: path to street shapefile
-    :param building_centroids_df: path to substations in buildings (or close by)
-    :param path_potential_network: output path shapefile
-    :return:
+    :param building_centroids_df: substations in buildings (or close by)
+    :param temp_path_potential_network_shp: (optional) path to save the potential network to (for verification
+        purposes)
+    :return: the potential network (in a projected coordinate system, with the length in ``Shape_Leng``)
+    :rtype: GeoDataFrame
     """
+    # gdal is only needed to project the streets, not by the functions preparing the network
+    from cea.utilities.standardize_coordinates import get_projected_coordinate_system, get_geographic_coordinate_system
+
     # first get the street network
     street_network = gdf.from_file(path_streets_shp)
 
@@ -420,8 +498,6 @@ def calc_connectivity_network(path_streets_shp, building_centroids_df, temp_path
 
     # create terminals/branches form street to buildings
     prototype_network = create_terminals(building_centroids_df, crs, street_network)
-    config = cea.config.Configuration()
-    locator = cea.inputlocator.InputLocator(scenario=config.scenario)
 
     # first split in intersections
     prototype_network = one_linestring_per_intersection(prototype_network.geometry.values,
@@ -435,17 +511,16 @@ def calc_connectivity_network(path_streets_shp, building_centroids_df, temp_path
     # snap these points to the lines and transform lines
     gdf_points_snapped, prototype_network = snap_points(gdf_points_snapped, prototype_network, SNAP_TOLERANCE, crs)
 
-    # save for verification purposes
-    prototype_network.to_file(locator.get_temporary_file("prototype_network.shp"), driver='ESRI Shapefile')
     # get segments
     potential_network_df = split_line_by_nearest_points(prototype_network, gdf_points_snapped, 1.0, crs)
 
     # calculate Shape_len field
     potential_network_df["Shape_Leng"] = potential_network_df["geometry"].apply(lambda x: x.length)
 
-    potential_network_df.to_file(temp_path_potential_network_shp, driver='ESRI Shapefile')
+    if temp_path_potential_network_shp:
+        potential_network_df.to_file(temp_path_potential_network_shp, driver='ESRI Shapefile')
 
-    return crs
+    return potential_network_df
 
 
 def main(config):
@@ -456,7 +531,7 @@ def main(config):
     path_connection_point_buildings_shp = locator.get_temporary_file(
         "nodes_buildings.shp")  # substation, it can be the centroid of the building
     path_potential_network = locator.get_temporary_file("potential_network.shp")  # shapefile, location of output.
-    calc_connectivity_network(path_streets_shp, path_connection_point_buildings_shp,
+    calc_connectivity_network(path_streets_shp, gdf.from_file(path_connection_point_buildings_shp),
                               path_potential_network)
 
 
@@ -26,8 +26,6 @@ def layout_network(network_layout, locator, plant_building_names=None, output_na
         plant_building_names = []
     weight_field = 'Shape_Leng'
     total_demand_location = locator.get_total_demand()
-    temp_path_potential_network_shp = locator.get_temporary_file("potential_network.shp")  # shapefile, location of output.
-    temp_path_building_centroids_shp = locator.get_temporary_file("nodes_buildings.shp")
 
     type_mat_default = network_layout.type_mat
     pipe_diameter_default = network_layout.pipe_diameter
@@ -35,13 +33,15 @@ def layout_network(network_layout, locator, plant_building_names=None, output_na
     list_district_scale_buildings = network_layout.connected_buildings
     consider_only_buildings_with_demand = network_layout.consider_only_buildings_with_demand
     allow_looped_networks = network_layout.allow_looped_networks
+    steiner_algorithm = network_layout.steiner_algorithm
 
     path_streets_shp = locator.get_street_network()  # shapefile with the stations
     path_zone_shp = locator.get_zone_geometry()
 
     # Calculate points where the substations will be located (building centroids)
+    # (the intermediate results are passed on in memory, only the final network is written to disk)
     building_centroids_df = calc_building_centroids(path_zone_shp,
-                                                    temp_path_building_centroids_shp,
+                                                    None,
                                                     list_district_scale_buildings,
                                                     plant_building_names,
                                                     consider_only_buildings_with_demand,
@@ -49,21 +49,18 @@ def layout_network(network_layout, locator, plant_building_names=None, output_na
                                                     total_demand_location)
 
     # Calculate potential network
-    crs_projected = calc_connectivity_network(path_streets_shp,
-                                              building_centroids_df,
-                                              temp_path_potential_network_shp)
+    potential_network_df = calc_connectivity_network(path_streets_shp, building_centroids_df)
+    crs_projected = potential_network_df.crs
 
     # calc minimum spanning tree and save results to disk
     path_output_edges_shp = locator.get_network_layout_edges_shapefile(type_network, output_name_network)
     path_output_nodes_shp = locator.get_network_layout_nodes_shapefile(type_network, output_name_network)
-    output_network_folder = locator.get_input_network_folder(type_network, output_name_network)
 
     disconnected_building_names = [x for x in list_district_scale_buildings if x not in list_district_scale_buildings]
 
     calc_steiner_spanning_tree(crs_projected,
-                               temp_path_potential_network_shp,
-                               output_network_folder,
-                               temp_path_building_centroids_shp,
+                               potential_network_df,
+                               building_centroids_df,
                                path_output_edges_shp,
                                path_output_nodes_shp,
                                weight_field,
@@ -74,7 +71,8 @@ def layout_network(network_layout, locator, plant_building_names=None, output_na
                                allow_looped_networks,
                                optimization_flag,
                                plant_building_names,
-                               disconnected_building_names)
+                               disconnected_building_names,
+                               steiner_algorithm)
 
 
 class NetworkLayout(object):
@@ -89,9 +87,11 @@ class NetworkLayout(object):
         self.create_plant = True
         self.allow_looped_networks = False
         self.consider_only_buildings_with_demand = False
+        self.steiner_algorithm = "mehlhorn"
 
         attributes = ["network_type", "pipe_diameter", "type_mat", "create_plant", "allow_looped_networks",
-                      "consider_only_buildings_with_demand", "connected_buildings", "disconnected_buildings"]
+                      "consider_only_buildings_with_demand", "connected_buildings", "disconnected_buildings",
+                      "steiner_algorithm"]
         for attr in attributes:
             # copy any matching attributes in network_layout (because it could be an instance of NetworkInfo)
             if hasattr(network_layout, attr):
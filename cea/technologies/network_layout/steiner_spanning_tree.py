@@ -12,7 +12,7 @@ import networkx as nx
 import pandas as pd
 from geopandas import GeoDataFrame as gdf
 from networkx.algorithms.approximation.steinertree import steiner_tree
-from shapely.geometry import LineString
+from shapely.geometry import LineString, Point
 from typing import List
 
 import cea.config
@@ -30,9 +30,8 @@ __status__ = "Production"
 
 
 def calc_steiner_spanning_tree(crs_projected,
-                               temp_path_potential_network_shp,
-                               output_network_folder,
-                               temp_path_building_centroids_shp,
+                               potential_network_df,
+                               building_centroids_df,
                                path_output_edges_shp,
                                path_output_nodes_shp,
                                weight_field,
@@ -43,15 +42,16 @@ def calc_steiner_spanning_tree(crs_projected,
                                allow_looped_networks,
                                optimization_flag,
                                plant_building_names,
-                               disconnected_building_names):
+                               disconnected_building_names,
+                               steiner_algorithm='mehlhorn'):
     """
     Calculate the minimum spanning tree of the network. Note that this function can't be run in parallel in it's
     present form.
 
     :param str crs_projected: e.g. "+proj=utm +zone=48N +ellps=WGS84 +datum=WGS84 +units=m +no_defs"
-    :param str temp_path_potential_network_shp: e.g. "TEMP/potential_network.shp"
-    :param str output_network_folder: "{general:scenario}/inputs/networks/DC"
-    :param str temp_path_building_centroids_shp: e.g. "%TEMP%/nodes_buildings.shp"
+    :param GeoDataFrame potential_network_df: the potential network (lines), see
+        :py:func:`cea.technologies.network_layout.connectivity_potential.calc_connectivity_network`
+    :param GeoDataFrame building_centroids_df: the points where the buildings connect to the network (with ``Name``)
     :param str path_output_edges_shp: "{general:scenario}/inputs/networks/DC/edges.shp"
     :param str path_output_nodes_shp: "{general:scenario}/inputs/networks/DC/nodes.shp"
     :param str weight_field: e.g. "Shape_Leng"
@@ -59,16 +59,16 @@ def calc_steiner_spanning_tree(crs_projected,
     :param float pipe_diameter_default: e.g. 150
     :param str type_network: "DC" or "DH"
     :param str total_demand_location: "{general:scenario}/outputs/data/demand/Total_demand.csv"
-    :param bool create_plant: e.g. True
     :param bool allow_looped_networks:
     :param bool optimization_flag:
     :param List[str] plant_building_names: e.g. ``['B001']``
     :param List[str] disconnected_building_names: e.g. ``['B002', 'B010', 'B004', 'B005', 'B009']``
+    :param str steiner_algorithm: the ``method`` of the ``steiner_tree`` approximation of networkx: "mehlhorn" (a
+        single shortest path search from all buildings, faster for large networks) or "kou" (the metric closure)
     :return: ``(mst_edges, mst_nodes)``
     """
-    # read shapefile into networkx format into a directed potential_network_graph, this is the potential network
-    potential_network_graph = nx.read_shp(temp_path_potential_network_shp)
-    building_nodes_graph = nx.read_shp(temp_path_building_centroids_shp)
+    # the potential network as a directed potential_network_graph (same as reading it with nx.read_shp)
+    potential_network_graph = lines_to_graph(potential_network_df)
 
     # transform to an undirected potential_network_graph
     iterator_edges = potential_network_graph.edges(data=True)
@@ -78,25 +78,24 @@ def calc_steiner_spanning_tree(crs_projected,
         y = (round(y[0], SHAPEFILE_TOLERANCE), round(y[1], SHAPEFILE_TOLERANCE))
         G.add_edge(x, y, weight=data[weight_field])
 
-    # get the building nodes and coordinates
-    iterator_nodes = building_nodes_graph.nodes(data=True)
+    # get the building nodes and coordinates (the last building wins if several share the same coordinates)
+    building_nodes = {}
+    for point, building_name in zip(building_centroids_df.geometry, building_centroids_df['Name']):
+        building_nodes[(point.x, point.y)] = building_name
     terminal_nodes_coordinates = []
     terminal_nodes_names = []
-    for coordinates, data in iterator_nodes._nodes.items():
-        building_name = data['Name']
+    for coordinates, building_name in building_nodes.items():
         if building_name in disconnected_building_names:
             print("Building {} is considered to be disconnected and it is not included".format(building_name))
         else:
             terminal_nodes_coordinates.append(
                 (round(coordinates[0], SHAPEFILE_TOLERANCE), round(coordinates[1], SHAPEFILE_TOLERANCE)))
-            terminal_nodes_names.append(data['Name'])
+            terminal_nodes_names.append(building_name)
 
     # calculate steiner spanning tree of undirected potential_network_graph
     try:
-        mst_non_directed = nx.Graph(steiner_tree(G, terminal_nodes_coordinates))
-        nx.write_shp(mst_non_directed, output_network_folder)  # need to write to disk and then import again
-        mst_nodes = gdf.from_file(path_output_nodes_shp)
-        mst_edges = gdf.from_file(path_output_edges_shp)
+        mst_non_directed = nx.Graph(steiner_tree(G, terminal_nodes_coordinates, method=steiner_algorithm))
+        mst_nodes, mst_edges = graph_to_geodataframes(mst_non_directed, crs_projected)
     except:
         raise ValueError('There was an error while creating the Steiner tree. '
                          'Check the streets.shp for isolated/disconnected streets (lines) and erase them, '
@@ -160,6 +159,39 @@ def calc_steiner_spanning_tree(crs_projected,
     mst_edges[['geometry', 'length_m', 'Type_mat', 'Name', 'Pipe_DN']].to_file(path_output_edges_shp,
                                                                                driver='ESRI Shapefile')
     mst_nodes[['geometry', 'Building', 'Name', 'Type']].to_file(path_output_nodes_shp, driver='ESRI Shapefile')
+    return mst_edges, mst_nodes
+
+
+def lines_to_graph(lines_df):
+    """
+    Create a directed graph from the lines in ``lines_df``: the nodes are the start and end points of each line and
+    the edges have the (non-geometry) fields of the lines as attributes - as ``nx.read_shp`` would after writing the
+    lines to a shapefile.
+
+    :param GeoDataFrame lines_df: the (LineString) geometries and their attributes
+    :rtype: nx.DiGraph
+    """
+    graph = nx.DiGraph()
+    fields = [field for field in lines_df.columns if field != lines_df.geometry.name]
+    for line, attributes in zip(lines_df.geometry, lines_df[fields].to_dict('records')):
+        start, end = line.coords[0][:2], line.coords[-1][:2]
+        graph.add_edge(start, end)
+        graph[start][end].update(attributes)
+    return graph
+
+
+def graph_to_geodataframes(graph, crs):
+    """
+    The nodes (points, numbered with ``FID``) and edges (straight lines with the edge attributes) of ``graph`` - as
+    ``nx.write_shp`` would write them.
+
+    :rtype: tuple(GeoDataFrame, GeoDataFrame)
+    """
+    nodes = gdf({'FID': range(graph.number_of_nodes())}, geometry=[Point(node) for node in graph.nodes()], crs=crs)
+    edges = list(graph.edges(data=True))
+    edges = gdf(pd.DataFrame([data for _, _, data in edges], index=range(len(edges))),
+                geometry=[LineString((start, end)) for start, end, _ in edges], crs=crs)
+    return nodes, edges
 
 
 def add_loops_to_network(G, mst_non_directed, new_mst_nodes, mst_edges, type_mat, pipe_dn):
@@ -314,22 +346,9 @@ def add_plant_close_to_anchor(building_anchor, new_mst_nodes, mst_edges, type_ma
 
 
 def main(config):
-    assert os.path.exists(config.scenario), 'Scenario not found: %s' % config.scenario
-    locator = cea.inputlocator.InputLocator(scenario=config.scenario)
-    weight_field = 'Shape_Leng'
-    type_mat_default = config.network_layout.type_mat
-    pipe_diameter_default = config.network_layout.pipe_diameter
-    type_network = config.network_layout.network_type
-    create_plant = config.network_layout.create_plant
-    output_substations_shp = locator.get_temporary_file("nodes_buildings.shp")
-    path_potential_network = locator.get_temporary_file("potential_network.shp")  # shapefile, location of output.
-    output_edges = locator.get_network_layout_edges_shapefile(type_network, '')
-    output_nodes = locator.get_network_layout_nodes_shapefile(type_network, '')
-    output_network_folder = locator.get_input_network_folder(type_network, '')
-    total_demand_location = locator.get_total_demand()
-    calc_steiner_spanning_tree(path_potential_network, output_network_folder, output_substations_shp, output_edges,
-                               output_nodes, weight_field, type_mat_default, pipe_diameter_default, type_network,
-                               total_demand_location, create_plant)
+    # the potential network is only calculated in memory, so run the whole network layout
+    import cea.technologies.network_layout.main
+    cea.technologies.network_layout.main.main(config)
 
 
 if __name__ == '__main__':
@@ -64,8 +64,9 @@ def calc_building_centroids(input_buildings_shp,
     # # decrease the number of units of the points
     building_centroids_df = simplify_points_accurracy(points, SHAPEFILE_TOLERANCE, points.crs)
 
-    # saving result
-    building_centroids_df.to_file(temp_path_building_centroids_shp, driver='ESRI Shapefile')
+    # saving result (optional, the network layout only uses it in memory)
+    if temp_path_building_centroids_shp:
+        building_centroids_df.to_file(temp_path_building_centroids_shp, driver='ESRI Shapefile')
 
     return building_centroids_df
 
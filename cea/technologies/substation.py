@@ -21,23 +21,53 @@ __email__ = "cea@arch.ethz.ch"
 __status__ = "Production"
 
 
+# the columns of the demand results used by the substation model
+HEATING_DEMAND_COLUMNS = ['Qhs_sys_ahu_kWh', 'Qhs_sys_aru_kWh', 'Qhs_sys_shu_kWh',
+                          'mcphs_sys_ahu_kWperC', 'mcphs_sys_aru_kWperC', 'mcphs_sys_shu_kWperC',
+                          'Ths_sys_sup_ahu_C', 'Ths_sys_sup_aru_C', 'Ths_sys_sup_shu_C',
+                          'Ths_sys_re_ahu_C', 'Ths_sys_re_aru_C', 'Ths_sys_re_shu_C',
+                          'Qww_sys_kWh', 'mcpww_sys_kWperC', 'Tww_sys_sup_C', 'Tww_sys_re_C']
+COOLING_DEMAND_COLUMNS = ['Qcs_sys_ahu_kWh', 'Qcs_sys_aru_kWh', 'Qcs_sys_scu_kWh',
+                          'mcpcs_sys_ahu_kWperC', 'mcpcs_sys_aru_kWperC', 'mcpcs_sys_scu_kWperC',
+                          'Tcs_sys_sup_ahu_C', 'Tcs_sys_sup_aru_C', 'Tcs_sys_sup_scu_C',
+                          'Tcs_sys_re_ahu_C', 'Tcs_sys_re_aru_C', 'Tcs_sys_re_scu_C',
+                          'Qcre_sys_kWh', 'mcpcre_sys_kWperC', 'Tcre_sys_sup_C', 'Tcre_sys_re_C',
+                          'Qcdata_sys_kWh', 'mcpcdata_sys_kWperC', 'Tcdata_sys_sup_C', 'Tcdata_sys_re_C']
+
+
+def read_substation_demand(locator, building_names, columns):
+    """
+    Read the demand results of each building - only the ``columns`` needed by the substation model.
+
+    :return: dict mapping building name to a DataFrame with the (hourly) demand
+    """
+    return {name: locator.get_demand_results_file.read(name, columns=columns) for name in building_names}
+
+
 # Substation model
 def substation_main_heating(locator, total_demand, buildings_name_with_heating, heating_configuration=7,
                             DHN_barcode=""):
+    """
+    Calculate the substations of the buildings connected to a district heating network (or of each building for the
+    decentralized optimization when ``DHN_barcode`` has no connected buildings).
+
+    :return: dict mapping building name to the substation results (also written to
+        ``locator.get_optimization_substations_results_file``)
+    """
+    buildings_dict = read_substation_demand(locator, buildings_name_with_heating, HEATING_DEMAND_COLUMNS)
+    substations = {}
     if DHN_barcode.count("1") > 0:  # check if there are buildings connected
         # FIRST GET THE MAXIMUM TEMPERATURE NEEDED BY THE NETWORK AT EVERY TIME STEP
-        buildings_dict = {}
         heating_system_temperatures_dict = {}
         T_DHN_supply = np.zeros(HOURS_IN_YEAR)
         for name in buildings_name_with_heating:
-            buildings_dict[name] = pd.read_csv(locator.get_demand_results_file(name))
             # calculates the building side supply and return temperatures for each unit
             Ths_supply_C, Ths_re_C = calc_temp_hex_building_side_heating(buildings_dict[name],
                                                                          heating_configuration)
 
             # compare and get the minimum hourly temperatures of the DH plant
             T_DH_supply = calc_temp_this_building_heating(Ths_supply_C)
-            T_DHN_supply = np.vectorize(calc_DH_supply)(T_DH_supply, T_DHN_supply)
+            T_DHN_supply = calc_DH_supply(T_DH_supply, T_DHN_supply)
 
             # Create two vectors for doing the calculation
             heating_system_temperatures_dict[name] = {'Ths_supply_C': Ths_supply_C,
@@ -51,27 +81,27 @@ def substation_main_heating(locator, total_demand, buildings_name_with_heating,
                                      index=False, float_format='%.3f')
 
             # calculate substation parameters per building
-            substation_model_heating(name,
-                                     buildings_dict[name],
-                                     DHN_supply['T_DH_supply_C'],
-                                     heating_system_temperatures_dict[name]['Ths_supply_C'],
-                                     heating_system_temperatures_dict[name]['Ths_return_C'],
-                                     heating_configuration, locator, DHN_barcode)
+            substations[name] = substation_model_heating(name,
+                                                         buildings_dict[name],
+                                                         DHN_supply['T_DH_supply_C'],
+                                                         heating_system_temperatures_dict[name]['Ths_supply_C'],
+                                                         heating_system_temperatures_dict[name]['Ths_return_C'],
+                                                         heating_configuration, locator, DHN_barcode)
     else:
         # CALCULATE SUBSTATIONS DURING DECENTRALIZED OPTIMIZATION
         for name in buildings_name_with_heating:
-            substation_demand = pd.read_csv(locator.get_demand_results_file(name))
+            substation_demand = buildings_dict[name]
             Ths_supply_C, Ths_return_C = calc_temp_hex_building_side_heating(substation_demand, heating_configuration)
             T_heating_system_supply = calc_temp_this_building_heating(Ths_supply_C)
-            substation_model_heating(name,
-                                     substation_demand,
-                                     T_heating_system_supply,
-                                     Ths_supply_C,
-                                     Ths_return_C,
-                                     heating_configuration, locator,
-                                     DHN_barcode)
+            substations[name] = substation_model_heating(name,
+                                                         substation_demand,
+                                                         T_heating_system_supply,
+                                                         Ths_supply_C,
+                                                         Ths_return_C,
+                                                         heating_configuration, locator,
+                                                         DHN_barcode)
 
-    return
+    return substations
 
 
 def calc_temp_this_building_heating(Tww_Ths_supply_C):
@@ -87,21 +117,27 @@ def calc_temp_hex_building_side_heating(building_demand_df, heating_configuratio
     Tww_supply = building_demand_df.Tww_sys_sup_C.values
 
     # Supply space heating at the maximum temperature between hot water and space heating
-    Ths_supply_C = np.vectorize(calc_DH_supply)(Ths_supply, Tww_supply)
+    Ths_supply_C = calc_DH_supply(Ths_supply, Tww_supply)
 
     return Ths_supply_C, Ths_return
 
 
 def substation_main_cooling(locator, total_demand, buildings_name_with_cooling,
                             cooling_configuration=['aru', 'ahu', 'scu'], DCN_barcode=""):
+    """
+    Calculate the substations of the buildings connected to a district cooling network (or of each building for the
+    decentralized optimization when ``DCN_barcode`` has no connected buildings).
+
+    :return: dict mapping building name to the substation results (also written to
+        ``locator.get_optimization_substations_results_file``)
+    """
+    buildings_dict = read_substation_demand(locator, buildings_name_with_cooling, COOLING_DEMAND_COLUMNS)
+    substations = {}
     if DCN_barcode.count("1") > 0:  # CALCULATE SUBSTATIONS DURING CENTRALIZED OPTIMIZATION
-        buildings_dict = {}
         cooling_system_temperatures_dict = {}
         T_DCN_supply_to_cs_ref = np.zeros(HOURS_IN_YEAR) + 1E6
         T_DCN_supply_to_cs_ref_data = np.zeros(HOURS_IN_YEAR) + 1E6
         for name in buildings_name_with_cooling:
-            buildings_dict[name] = pd.read_csv(locator.get_demand_results_file(name))
-
             # Calculate Temperatures of supply in the cases of (1) space cooling, refrigeration (2) and data centers
             T_supply_to_cs_ref, T_supply_to_cs_ref_data, \
                 Tcs_return_C, Tcs_supply_C = calc_temp_hex_building_side_cooling(buildings_dict[name],
@@ -112,10 +148,9 @@ def substation_main_cooling(locator, total_demand, buildings_name_with_cooling,
                                                                                                 T_supply_to_cs_ref_data)
 
             # update the DCN plant supply temperature
-            T_DCN_supply_to_cs_ref = np.vectorize(calc_DC_supply)(T_DC_supply_to_cs_ref, T_DCN_supply_to_cs_ref)
+            T_DCN_supply_to_cs_ref = calc_DC_supply(T_DC_supply_to_cs_ref, T_DCN_supply_to_cs_ref)
 
-            T_DCN_supply_to_cs_ref_data = np.vectorize(calc_DC_supply)(T_DC_supply_to_cs_ref_data,
-                                                                       T_DCN_supply_to_cs_ref_data)
+            T_DCN_supply_to_cs_ref_data = calc_DC_supply(T_DC_supply_to_cs_ref_data, T_DCN_supply_to_cs_ref_data)
 
             cooling_system_temperatures_dict[name] = {'Tcs_supply_C': Tcs_supply_C, 'Tcs_return_C': Tcs_return_C}
 
@@ -130,17 +165,17 @@ def substation_main_cooling(locator, total_demand, buildings_name_with_cooling,
             substation_demand.to_csv(locator.get_optimization_substations_total_file(DCN_barcode, 'DC'), sep=',',
                                      index=False, float_format='%.3f')
             # calculate substation parameters per building
-            substation_model_cooling(name, buildings_dict[name],
-                                     DCN_supply['T_DC_supply_to_cs_ref_C'],
-                                     DCN_supply['T_DC_supply_to_cs_ref_data_C'],
-                                     cooling_system_temperatures_dict[name]['Tcs_supply_C'],
-                                     cooling_system_temperatures_dict[name]['Tcs_return_C'],
-                                     cooling_configuration,
-                                     locator, DCN_barcode)
+            substations[name] = substation_model_cooling(name, buildings_dict[name],
+                                                         DCN_supply['T_DC_supply_to_cs_ref_C'],
+                                                         DCN_supply['T_DC_supply_to_cs_ref_data_C'],
+                                                         cooling_system_temperatures_dict[name]['Tcs_supply_C'],
+                                                         cooling_system_temperatures_dict[name]['Tcs_return_C'],
+                                                         cooling_configuration,
+                                                         locator, DCN_barcode)
     else:
         # CALCULATE SUBSTATIONS DURING DECENTRALIZED OPTIMIZATION
         for name in buildings_name_with_cooling:
-            substation_demand = pd.read_csv(locator.get_demand_results_file(name))
+            substation_demand = buildings_dict[name]
             T_supply_to_cs_ref, T_supply_to_cs_ref_data, \
             Tcs_return_C, Tcs_supply_C = calc_temp_hex_building_side_cooling(substation_demand,
                                                                              cooling_configuration)
@@ -149,15 +184,15 @@ def substation_main_cooling(locator, total_demand, buildings_name_with_cooling,
             T_DC_supply_to_cs_ref, T_DC_supply_to_cs_ref_data = calc_temp_this_building_cooling(T_supply_to_cs_ref,
                                                                                                 T_supply_to_cs_ref_data)
 
-            substation_model_cooling(name, substation_demand,
-                                     T_DC_supply_to_cs_ref,
-                                     T_DC_supply_to_cs_ref_data,
-                                     Tcs_supply_C,
-                                     Tcs_return_C,
-                                     cooling_configuration,
-                                     locator, DCN_barcode)
+            substations[name] = substation_model_cooling(name, substation_demand,
+                                                         T_DC_supply_to_cs_ref,
+                                                         T_DC_supply_to_cs_ref_data,
+                                                         Tcs_supply_C,
+                                                         Tcs_return_C,
+                                                         cooling_configuration,
+                                                         locator, DCN_barcode)
 
-    return
+    return substations
 
 
 def calc_temp_hex_building_side_cooling(building_demand_df,
@@ -175,8 +210,8 @@ def calc_temp_hex_building_side_cooling(building_demand_df,
     Tcs_supply_C = np.where(Tcs_supply != 1E6, Tcs_supply, 0)
     Tcs_return_C = np.where(Tcs_return != -1E6, Tcs_return, 0)
 
-    T_supply_to_cs_ref = np.vectorize(calc_DC_supply)(Tcs_supply, Tcref_supply)
-    T_supply_to_cs_ref_data = np.vectorize(calc_DC_supply)(T_supply_to_cs_ref, Tcdata_sys_supply)
+    T_supply_to_cs_ref = calc_DC_supply(Tcs_supply, Tcref_supply)
+    T_supply_to_cs_ref_data = calc_DC_supply(T_supply_to_cs_ref, Tcdata_sys_supply)
 
     return T_supply_to_cs_ref, T_supply_to_cs_ref_data, Tcs_return_C, Tcs_supply_C
 
@@ -214,8 +249,8 @@ def calc_compound_Tcs(building_demand_df,
         unit_1 = cooling_configuration[0]
         unit_2 = cooling_configuration[1]
 
-        Tcs_supply = np.vectorize(calc_DC_supply)(T_cs_supply_dict[unit_1], T_cs_supply_dict[unit_2])
-        Tcs_return = np.vectorize(calc_HEX_mix_2_flows)(Qcs_sys_kWh_dict[unit_1], Qcs_sys_kWh_dict[unit_2],
+        Tcs_supply = calc_DC_supply(T_cs_supply_dict[unit_1], T_cs_supply_dict[unit_2])
+        Tcs_return = calc_HEX_mix_2_flows(Qcs_sys_kWh_dict[unit_1], Qcs_sys_kWh_dict[unit_2],
                                                         mcpcs_sys_kWperC_dict[unit_1], mcpcs_sys_kWperC_dict[unit_2],
                                                         T_cs_return_dict[unit_1], T_cs_return_dict[unit_2])
     elif len(cooling_configuration) == 3:  # AHU + ARU + SCU
@@ -223,10 +258,9 @@ def calc_compound_Tcs(building_demand_df,
         unit_2 = cooling_configuration[1]
         unit_3 = cooling_configuration[2]
 
-        T_space_cooling_intermediate_1 = np.vectorize(calc_DC_supply)(T_cs_supply_dict[unit_1],
-                                                                      T_cs_supply_dict[unit_2])
-        Tcs_supply = np.vectorize(calc_DC_supply)(T_space_cooling_intermediate_1, T_cs_supply_dict[unit_3])
-        Tcs_return = np.vectorize(calc_HEX_mix_3_flows)(Qcs_sys_kWh_dict[unit_1], Qcs_sys_kWh_dict[unit_2],
+        T_space_cooling_intermediate_1 = calc_DC_supply(T_cs_supply_dict[unit_1], T_cs_supply_dict[unit_2])
+        Tcs_supply = calc_DC_supply(T_space_cooling_intermediate_1, T_cs_supply_dict[unit_3])
+        Tcs_return = calc_HEX_mix_3_flows(Qcs_sys_kWh_dict[unit_1], Qcs_sys_kWh_dict[unit_2],
                                                         Qcs_sys_kWh_dict[unit_3], mcpcs_sys_kWperC_dict[unit_1],
                                                         mcpcs_sys_kWperC_dict[unit_2], mcpcs_sys_kWperC_dict[unit_3],
                                                         T_cs_return_dict[unit_1], T_cs_return_dict[unit_2],
@@ -297,8 +331,8 @@ def substation_model_cooling(name, building, T_DC_supply_to_cs_ref_C, T_DC_suppl
         Qcre_sys_W = abs(building.Qcre_sys_kWh.values) * 1000  # in W
         Qnom_W = max(Qcre_sys_W)
         if Qnom_W > 0:
-            tho = building.Tcre_sys_sup_C + 273  # in K
-            thi = building.Tcre_sys_re_C + 273  # in K
+            tho = building.Tcre_sys_sup_C.values + 273  # in K
+            thi = building.Tcre_sys_re_C.values + 273  # in K
             ch = abs(building.mcpcre_sys_kWperC.values) * 1000  # in W/K
             index = np.where(Qcre_sys_W == Qnom_W)[0][0]
             tci_0 = tci[index]  # in K
@@ -323,8 +357,8 @@ def substation_model_cooling(name, building, T_DC_supply_to_cs_ref_C, T_DC_suppl
         Qcdata_sys_W = (abs(building.Qcdata_sys_kWh.values) * 1000)
         Qnom_W = max(Qcdata_sys_W)  # in W
         if Qnom_W > 0:
-            tho = building.Tcdata_sys_sup_C + 273  # in K
-            thi = building.Tcdata_sys_re_C + 273  # in K
+            tho = building.Tcdata_sys_sup_C.values + 273  # in K
+            thi = building.Tcdata_sys_re_C.values + 273  # in K
             ch = abs(building.mcpcdata_sys_kWperC.values) * 1000  # in W/K
             index = np.where(Qcdata_sys_W == Qnom_W)[0][0]
             tci_0 = tci[index]  # in K
@@ -339,12 +373,11 @@ def substation_model_cooling(name, building, T_DC_supply_to_cs_ref_C, T_DC_suppl
             A_hex_data = 0
 
     # calculate mix temperature of return DC
-    T_DC_return_cs_ref_C = np.vectorize(calc_HEX_mix_2_flows)(Qcs_sys_W, Qcre_sys_W, mcp_DC_cs, mcp_DC_ref,
-                                                              t_DC_return_cs, t_DC_return_ref)
-    T_DC_return_cs_ref_data_C = np.vectorize(calc_HEX_mix_3_flows)(Qcs_sys_W, Qcre_sys_W, Qcdata_sys_W,
-                                                                   mcp_DC_cs, mcp_DC_ref, mcp_DC_data,
-                                                                   t_DC_return_cs, t_DC_return_ref, t_DC_return_data,
-                                                                   )
+    T_DC_return_cs_ref_C = calc_HEX_mix_2_flows(Qcs_sys_W, Qcre_sys_W, mcp_DC_cs, mcp_DC_ref,
+                                                t_DC_return_cs, t_DC_return_ref)
+    T_DC_return_cs_ref_data_C = calc_HEX_mix_3_flows(Qcs_sys_W, Qcre_sys_W, Qcdata_sys_W,
+                                                     mcp_DC_cs, mcp_DC_ref, mcp_DC_data,
+                                                     t_DC_return_cs, t_DC_return_ref, t_DC_return_data)
     mdot_space_cooling_data_center_and_refrigeration_result_flat = (mcp_DC_cs + mcp_DC_ref + mcp_DC_data) / \
                                                                    HEAT_CAPACITY_OF_WATER_JPERKGK  # convert W/K to kg/s
     mdot_space_cooling_and_refrigeration_result_flat = (mcp_DC_cs + mcp_DC_ref) / \
@@ -409,28 +442,28 @@ def calc_compound_Ths(building_demand_df,
         Ths_supply = Ths_shu_supply
         Ths_return = Ths_shu_return
     elif heating_configuration == 4:  # AHU + ARU
-        Ths_supply = np.vectorize(calc_DH_supply)(Ths_ahu_supply, Ths_aru_supply)
-        Ths_return = np.vectorize(calc_HEX_mix_2_flows)(Qhs_sys_kWh_dict[1], Qhs_sys_kWh_dict[2],
+        Ths_supply = calc_DH_supply(Ths_ahu_supply, Ths_aru_supply)
+        Ths_return = calc_HEX_mix_2_flows(Qhs_sys_kWh_dict[1], Qhs_sys_kWh_dict[2],
                                                         mcphs_sys_kWperC_dict[1], mcphs_sys_kWperC_dict[2],
                                                         Ths_ahu_return,
                                                         Ths_aru_return)
     elif heating_configuration == 5:  # AHU + SHU
-        Ths_supply = np.vectorize(calc_DH_supply)(Ths_ahu_supply, Ths_shu_supply)
-        Ths_return = np.vectorize(calc_HEX_mix_2_flows)(Qhs_sys_kWh_dict[1], Qhs_sys_kWh_dict[3],
+        Ths_supply = calc_DH_supply(Ths_ahu_supply, Ths_shu_supply)
+        Ths_return = calc_HEX_mix_2_flows(Qhs_sys_kWh_dict[1], Qhs_sys_kWh_dict[3],
                                                         mcphs_sys_kWperC_dict[1], mcphs_sys_kWperC_dict[3],
                                                         Ths_ahu_return,
                                                         Ths_shu_return)
     elif heating_configuration == 6:  # ARU + SHU
-        Ths_supply = np.vectorize(calc_DH_supply)(Ths_aru_supply, Ths_shu_supply)
-        Ths_return = np.vectorize(calc_HEX_mix_2_flows)(Qhs_sys_kWh_dict[2], Qhs_sys_kWh_dict[3],
+        Ths_supply = calc_DH_supply(Ths_aru_supply, Ths_shu_supply)
+        Ths_return = calc_HEX_mix_2_flows(Qhs_sys_kWh_dict[2], Qhs_sys_kWh_dict[3],
                                                         mcphs_sys_kWperC_dict[2], mcphs_sys_kWperC_dict[3],
                                                         Ths_aru_return,
                                                         Ths_shu_return)
     elif heating_configuration == 7:  # AHU + ARU + SHU
-        T_hs_intermediate_1 = np.vectorize(calc_DH_supply)(Ths_ahu_supply, Ths_aru_supply)
-        Ths_supply = np.vectorize(calc_DH_supply)(T_hs_intermediate_1, Ths_shu_supply)
+        T_hs_intermediate_1 = calc_DH_supply(Ths_ahu_supply, Ths_aru_supply)
+        Ths_supply = calc_DH_supply(T_hs_intermediate_1, Ths_shu_supply)
 
-        Ths_return = np.vectorize(calc_HEX_mix_3_flows)(Qhs_sys_kWh_dict[1], Qhs_sys_kWh_dict[2], Qhs_sys_kWh_dict[3],
+        Ths_return = calc_HEX_mix_3_flows(Qhs_sys_kWh_dict[1], Qhs_sys_kWh_dict[2], Qhs_sys_kWh_dict[3],
                                                         mcphs_sys_kWperC_dict[1], mcphs_sys_kWperC_dict[2],
                                                         mcphs_sys_kWperC_dict[3],
                                                         Ths_ahu_return, Ths_aru_return, Ths_shu_return
@@ -511,8 +544,8 @@ def substation_model_heating(building_name, building_demand_df, T_DH_supply_C, T
     Qnom_W = max(Qww_sys_W)  # in W
     if Qnom_W > 0:
         thi = T_DH_supply_C + 273  # In k
-        tco = building_demand_df.Tww_sys_sup_C + 273  # in K
-        tci = building_demand_df.Tww_sys_re_C + 273  # in K
+        tco = building_demand_df.Tww_sys_sup_C.values + 273  # in K
+        tci = building_demand_df.Tww_sys_re_C.values + 273  # in K
         cc = building_demand_df.mcpww_sys_kWperC.values * 1000  # in W/K
         index = np.where(Qww_sys_W == Qnom_W)[0][0]
         thi_0 = thi[index]
@@ -528,9 +561,7 @@ def substation_model_heating(building_name, building_demand_df, T_DH_supply_C, T
         tci = np.zeros(HOURS_IN_YEAR) + 273  # in K
 
     # CALCULATE MIX IN HEAT EXCHANGERS AND RETURN TEMPERATURE
-    T_DH_return_C = np.vectorize(calc_HEX_mix_2_flows)(Qhs_sys_W, Qww_sys_W, mcp_DH_hs, mcp_DH_ww, t_DH_return_hs,
-                                                       t_DH_return_ww
-                                                       )
+    T_DH_return_C = calc_HEX_mix_2_flows(Qhs_sys_W, Qww_sys_W, mcp_DH_hs, mcp_DH_ww, t_DH_return_hs, t_DH_return_ww)
     mcp_DH = (mcp_DH_ww + mcp_DH_hs)
 
     # converting units and quantities:
@@ -553,7 +584,7 @@ def substation_model_heating(building_name, building_demand_df, T_DH_supply_C, T
                                  index=False,
                                  float_format='%.3f')
 
-    return
+    return substation_activation
 
 
 def calc_substation_cooling(Q, thi, tho, tci, ch, ch_0, Qnom, thi_0, tci_0, tho_0):
@@ -583,7 +614,7 @@ def calc_substation_cooling(Q, thi, tho, tci, ch, ch_0, Qnom, thi_0, tci_0, tho_
     dTm_0 = calc_dTm_HEX(thi_0, tho_0, tci_0, tco_0)
     # Area heat exchange and UA_heating
     Area_HEX_cooling, UA_cooling = calc_area_HEX(Qnom, dTm_0, U_COOL)
-    tco, cc = np.vectorize(calc_HEX_cooling)(Q, UA_cooling, thi, tho, tci, ch)
+    tco, cc = calc_HEX_cooling_array(Q, UA_cooling, thi, tho, tci, ch)
 
     return tco, cc, Area_HEX_cooling
 
@@ -621,7 +652,7 @@ def calc_substation_heating(Q, thi, tco, tci, cc, cc_0, Qnom, thi_0, tci_0, tco_
     dTm_0 = calc_dTm_HEX(thi_0, tho_0, tci_0, tco_0)
     # Area heat exchange and UA_heating
     Area_HEX_heating, UA_heating = calc_area_HEX(Qnom, dTm_0, U_HEAT)
-    tho, ch = np.vectorize(calc_HEX_heating)(Q, UA_heating, thi, tco, tci, cc)
+    tho, ch = calc_HEX_heating_array(Q, UA_heating, thi, tco, tci, cc)
     return tho, ch, Area_HEX_heating
 
 
@@ -709,7 +740,35 @@ def calc_HEX_cooling(Q_cooling_W, UA, thi_K, tho_K, tci_K, ch_kWperK):
     else:
         tco_C = 0.0
         cc_kWperK = 0.0
-    return np.float(tco_C), np.float(cc_kWperK)
+    return float(tco_C), float(cc_kWperK)
+
+
+@jit(nopython=True)
+def calc_HEX_cooling_loop(Q_cooling_W, UA, thi_K, tho_K, tci_K, ch_kWperK):
+    tco_C = np.empty(Q_cooling_W.shape[0])
+    cc_kWperK = np.empty(Q_cooling_W.shape[0])
+    for i in range(Q_cooling_W.shape[0]):
+        tco_C[i], cc_kWperK[i] = calc_HEX_cooling(Q_cooling_W[i], UA, thi_K[i], tho_K[i], tci_K[i], ch_kWperK[i])
+    return tco_C, cc_kWperK
+
+
+def calc_HEX_cooling_array(Q_cooling_W, UA, thi_K, tho_K, tci_K, ch_kWperK):
+    """
+    Array version of :py:func:`calc_HEX_cooling`: the NTU iteration is run for every time step in a compiled loop
+    (instead of through ``np.vectorize``). The temperatures and capacity mass flow rates can be scalars or arrays.
+
+    :return: ``tco`` and ``cc`` for every time step
+    :rtype: tuple(np.ndarray, np.ndarray)
+    """
+    shape = np.broadcast(Q_cooling_W, thi_K, tho_K, tci_K, ch_kWperK).shape
+    Q_cooling_W, thi_K, tho_K, tci_K, ch_kWperK = broadcast_float_arrays(Q_cooling_W, thi_K, tho_K, tci_K, ch_kWperK)
+    tco_C, cc_kWperK = calc_HEX_cooling_loop(Q_cooling_W, float(UA), thi_K, tho_K, tci_K, ch_kWperK)
+    return tco_C.reshape(shape), cc_kWperK.reshape(shape)
+
+
+def broadcast_float_arrays(*arrays):
+    """Broadcast the arguments to contiguous 1D float64 arrays of the same length (as used by the compiled loops)"""
+    return [np.ascontiguousarray(a, dtype=np.float64).ravel() for a in np.broadcast_arrays(*arrays)]
 
 
 @jit(nopython=True)
@@ -733,7 +792,7 @@ def calc_shell_HEX(NTU, cr):
 def calc_HEX_mix_2_flows(Q1, Q2, m1, m2, t1, t2):
     """
     This function computes the average  temperature between two vectors of heating demand.
-    In this case, domestic hotwater and space heating.
+    In this case, domestic hotwater and space heating. Works on single values and on whole time series.
 
     :param Q1: load heating
     :param Q2: load domestic hot water
@@ -746,19 +805,17 @@ def calc_HEX_mix_2_flows(Q1, Q2, m1, m2, t1, t2):
         - tavg: average out temperature.
 
     """
-    tavg = 0
-    if (m1 + m2) > 0:
-        if Q1 > 0 or Q2 > 0:
-            tavg = (t1 * m1 + t2 * m2) / (m1 + m2)
-    return np.float(tavg)
+    m = m1 + m2
+    mixing = (m > 0) & ((Q1 > 0) | (Q2 > 0))
+    tavg = np.where(mixing, (t1 * m1 + t2 * m2) / np.where(mixing, m, 1.0), 0.0)
+    return tavg
 
 
 def calc_HEX_mix_3_flows(Q1, Q2, Q3, m1, m2, m3, t1, t2, t3):
-    tavg = 0
-    if (m1 + m2 + m3) > 0:
-        if Q1 > 0 or Q2 > 0 or Q3 > 0:
-            tavg = (t1 * m1 + t2 * m2 + t3 * m3) / (m1 + m2 + m3)
-    return np.float(tavg)
+    m = m1 + m2 + m3
+    mixing = (m > 0) & ((Q1 > 0) | (Q2 > 0) | (Q3 > 0))
+    tavg = np.where(mixing, (t1 * m1 + t2 * m2 + t3 * m3) / np.where(mixing, m, 1.0), 0.0)
+    return tavg
 
 
 @jit('UniTuple(f8, 2)(f8, f8, f8, f8, f8, f8)', nopython=True)
@@ -813,7 +870,30 @@ def calc_HEX_heating(Q_heating_W, UA, thi_K, tco_K, tci_K, cc_kWperK):
     else:
         tho_C = 0
         ch_kWperK = 0
-    return np.float(tho_C), np.float(ch_kWperK)
+    return float(tho_C), float(ch_kWperK)
+
+
+@jit(nopython=True)
+def calc_HEX_heating_loop(Q_heating_W, UA, thi_K, tco_K, tci_K, cc_kWperK):
+    tho_C = np.empty(Q_heating_W.shape[0])
+    ch_kWperK = np.empty(Q_heating_W.shape[0])
+    for i in range(Q_heating_W.shape[0]):
+        tho_C[i], ch_kWperK[i] = calc_HEX_heating(Q_heating_W[i], UA, thi_K[i], tco_K[i], tci_K[i], cc_kWperK[i])
+    return tho_C, ch_kWperK
+
+
+def calc_HEX_heating_array(Q_heating_W, UA, thi_K, tco_K, tci_K, cc_kWperK):
+    """
+    Array version of :py:func:`calc_HEX_heating`: the NTU iteration is run for every time step in a compiled loop
+    (instead of through ``np.vectorize``). The temperatures and capacity mass flow rates can be scalars or arrays.
+
+    :return: ``tho`` and ``ch`` for every time step
+    :rtype: tuple(np.ndarray, np.ndarray)
+    """
+    shape = np.broadcast(Q_heating_W, thi_K, tco_K, tci_K, cc_kWperK).shape
+    Q_heating_W, thi_K, tco_K, tci_K, cc_kWperK = broadcast_float_arrays(Q_heating_W, thi_K, tco_K, tci_K, cc_kWperK)
+    tho_C, ch_kWperK = calc_HEX_heating_loop(Q_heating_W, float(UA), thi_K, tco_K, tci_K, cc_kWperK)
+    return tho_C.reshape(shape), ch_kWperK.reshape(shape)
 
 
 def calc_dTm_HEX(thi, tho, tci, tco):
@@ -862,34 +942,28 @@ def calc_area_HEX(Qnom, dTm_0, U):
 def calc_DC_supply(t_0, t_1):  # fixme: keep the correct one
     """
     This function calculates the temperature of the district cooling network according to the minimum observed
-    (different to zero) in all buildings connected to the grid.
+    (different to zero) in all buildings connected to the grid. Works on single values and on whole time series.
 
     :param t_0: last minimum temperature
     :param t_1:  current minimum temperature to evaluate
     :return: ``tmin``, new minimum temperature
     """
     # TODO: verify if this assumption makes sense
-    if isclose(t_0, 0.0):
-        if isclose(t_1, 0.0):
-            return 0.0
-        else:
-            return t_1
-    elif isclose(t_1, 0.0):
-        return t_0
-    else:
-        return min(t_0, t_1)
+    t_0, t_1 = np.asarray(t_0, dtype=float), np.asarray(t_1, dtype=float)
+    return np.where(t_0 == 0.0, t_1, np.where(t_1 == 0.0, t_0, np.where(t_1 < t_0, t_1, t_0)))
 
 
 def calc_DH_supply(t_0, t_1):
     """
     This function calculates the temperature of the district heating network according to the maximum observed
-    in all buildings connected to the grid.
+    in all buildings connected to the grid. Works on single values and on whole time series.
 
     :param t_0: last maximum temperature
     :param t_1: current maximum temperature
     :return: ``tmax``, new maximum temperature
     """
-    tmax = max(t_0, t_1)
+    t_0, t_1 = np.asarray(t_0, dtype=float), np.asarray(t_1, dtype=float)
+    tmax = np.where(t_1 > t_0, t_1, t_0)
     return tmax
 
 
@@ -92,45 +92,37 @@ def determine_building_supply_temperatures(building_names, locator, substation_s
         for system in substation_systems['heating']:
             if system == 'ww':
                 Q_substation_heating = Q_substation_heating + buildings_demands[name].Qww_sys_kWh
-                T_supply_heating_C = np.vectorize(calc_DH_supply)(T_supply_heating_C,
-                                                                  np.where(buildings_demands[name].Qww_sys_kWh > 0,
-                                                                           buildings_demands[name].Tww_sys_sup_C,
-                                                                           np.nan))
+                T_supply_heating_C = calc_DH_supply(T_supply_heating_C,
+                                                    np.where(buildings_demands[name].Qww_sys_kWh > 0,
+                                                             buildings_demands[name].Tww_sys_sup_C, np.nan))
             else:
                 Q_substation_heating = Q_substation_heating + buildings_demands[name]['Qhs_sys_' + system + '_kWh']
                 # set the building side heating supply temperature
-                T_supply_heating_C = np.vectorize(calc_DH_supply)(T_supply_heating_C,
-                                                                  np.where(buildings_demands[name][
-                                                                               'Qhs_sys_' + system + '_kWh'] > 0,
-                                                                           buildings_demands[name][
-                                                                               'Ths_sys_sup_' + system + '_C'],
-                                                                           np.nan))
+                T_supply_heating_C = calc_DH_supply(T_supply_heating_C,
+                                                    np.where(buildings_demands[name]['Qhs_sys_' + system + '_kWh'] > 0,
+                                                             buildings_demands[name]['Ths_sys_sup_' + system + '_C'],
+                                                             np.nan))
 
         Q_substation_cooling = 0
         T_supply_cooling_C = np.nan
         for system in substation_systems['cooling']:
             if system == 'data':
                 Q_substation_cooling = Q_substation_cooling + abs(buildings_demands[name].Qcdata_sys_kWh)
-                T_supply_cooling_C = np.vectorize(calc_DC_supply)(T_supply_cooling_C,
-                                                                  np.where(
-                                                                      abs(buildings_demands[name].Qcdata_sys_kWh) > 0,
-                                                                      buildings_demands[name].Tcdata_sys_sup_C,
-                                                                      np.nan))
+                T_supply_cooling_C = calc_DC_supply(T_supply_cooling_C,
+                                                    np.where(abs(buildings_demands[name].Qcdata_sys_kWh) > 0,
+                                                             buildings_demands[name].Tcdata_sys_sup_C, np.nan))
             elif system == 're':
                 Q_substation_cooling = Q_substation_cooling + abs(buildings_demands[name].Qcre_sys_kWh)
-                T_supply_cooling_C = np.vectorize(calc_DC_supply)(T_supply_cooling_C,
-                                                                  np.where(
-                                                                      abs(buildings_demands[name].Qcre_sys_kWh) > 0,
-                                                                      buildings_demands[name].Tcre_sys_sup_C,
-                                                                      np.nan))
+                T_supply_cooling_C = calc_DC_supply(T_supply_cooling_C,
+                                                    np.where(abs(buildings_demands[name].Qcre_sys_kWh) > 0,
+                                                             buildings_demands[name].Tcre_sys_sup_C, np.nan))
             else:
                 Q_substation_cooling = Q_substation_cooling + abs(buildings_demands[name]['Qcs_sys_' + system + '_kWh'])
-                T_supply_cooling_C = np.vectorize(calc_DC_supply)(T_supply_cooling_C,
-                                                                  np.where(abs(buildings_demands[name][
-                                                                                   'Qcs_sys_' + system + '_kWh']) > 0,
-                                                                           buildings_demands[name][
-                                                                               'Tcs_sys_sup_' + system + '_C'],
-                                                                           np.nan))
+                T_supply_cooling_C = calc_DC_supply(T_supply_cooling_C,
+                                                    np.where(abs(buildings_demands[name][
+                                                                     'Qcs_sys_' + system + '_kWh']) > 0,
+                                                             buildings_demands[name]['Tcs_sys_sup_' + system + '_C'],
+                                                             np.nan))
 
         # find the target substation supply temperature
         T_supply_DH_C = np.where(Q_substation_heating > 0, T_supply_heating_C + DT_HEAT, np.nan)
@@ -812,26 +804,25 @@ def calc_area_HEX(Qnom, dTm_0, U):
 def calc_DC_supply(t_0, t_1):
     """
     This function calculates the temperature of the district cooling network according to the minimum observed
-    (different to zero) in all buildings connected to the grid.
+    (different to zero) in all buildings connected to the grid. Works element-wise on whole time series, NaN (no
+    demand) is ignored.
     :param t_0: last minimum temperature
     :param t_1:  current minimum temperature to evaluate
     :return tmin: new minimum temperature
     """
-    a = np.array([t_0, t_1])
-    tmin = np.nanmin(a)
+    tmin = np.fmin(t_0, t_1)
     return tmin
 
 
 def calc_DH_supply(t_0, t_1):
     """
     This function calculates the heating temperature requirement of the building side according to the maximum
-    temperature requirement at that time-step.
+    temperature requirement at that time-step. Works element-wise on whole time series, NaN (no demand) is ignored.
     :param t_0: temperature requirement from one heating application
     :param t_1: temperature requirement from another heating application
     :return: ``tmax``: maximum temperature requirement
     """
-    a = np.array([t_0, t_1])
-    tmax = np.nanmax(a)
+    tmax = np.fmax(t_0, t_1)
     return tmax
 
 
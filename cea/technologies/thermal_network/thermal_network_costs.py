@@ -2,6 +2,8 @@
 
 
 
+import os
+
 import numpy as np
 import pandas as pd
 import cea.config
@@ -20,6 +22,7 @@ from cea.technologies.heat_exchangers import calc_Cinv_HEX_hisaka
 from cea.utilities import epwreader
 from cea.technologies.supply_systems_database import SupplySystemsDatabase
 from cea.analysis.costs.equations import calc_capex_annualized, calc_opex_annualized
+from cea.demand.hourly_loads_store import HourlyLoadsStore
 
 __author__ = "Lennart Rogenhofer, Shanshan Hsieh"
 __copyright__ = "Copyright 2015, Architecture and Building Systems - ETH Zurich"
@@ -30,6 +33,14 @@ __maintainer__ = "Daren Thomas"
 __email__ = "cea@arch.ethz.ch"
 __status__ = "Production"
 
+# the cooling systems that can be supplied by a network (in the order of the bits of ``find_supplied_systems_t``) and
+# their demand in the demand results of the buildings
+COOLING_SYSTEMS = ['ahu', 'aru', 'scu']
+COOLING_SYSTEMS_DEMAND_COLUMNS = {'ahu': 'Qcs_sys_ahu_kWh', 'aru': 'Qcs_sys_aru_kWh', 'scu': 'Qcs_sys_scu_kWh'}
+
+# the cooling demand read by ``read_cooling_demand`` - keyed by the demand results files and their modification times
+_cooling_demand_cache = {}
+
 
 class Thermal_Network(object):
     """
@@ -152,6 +163,8 @@ def calc_Ctot_cooling_plants(network_info):
     Capex_a_chiller = 0.0
     Capex_a_CT = 0.0
 
+    # read in building demand
+    cooling_demand_kWh = read_cooling_demand(network_info.locator, network_info.building_names)
 
     # calculate cost of chiller heat production and chiller capex and opex
     for plant_number in range(number_of_plants):  # iterate through all plants
@@ -162,12 +175,6 @@ def calc_Ctot_cooling_plants(network_info):
         plant_heat_yearly_kWh = plant_heat_sum_kWh_list[plant_number]
         print('Annual plant heat production:', round(plant_heat_yearly_kWh, 0), '[kWh]')
 
-        # Read in building demand
-        building_demand = {}
-        for building in network_info.building_names:
-            building_demand[building] = pd.read_csv(
-                network_info.locator.get_demand_results_file(building))
-
         Capex_a_chiller_USD = 0.0
         Opex_fixed_chiller = 0.0
         Capex_a_CT_USD = 0.0
@@ -181,8 +188,7 @@ def calc_Ctot_cooling_plants(network_info):
 
                 # check which systems are supplied by cooling plants, this is either defined by the optimization
                 # or given as a user input from config.
-                supplied_systems = find_supplied_systems_annual(network_info, building_demand,
-                                                                network_info.full_cooling_systems)
+                supplied_systems = find_supplied_systems_annual(cooling_demand_kWh, network_info.full_cooling_systems)
 
                 # calculate the COP based on the actually supplied demands.
                 COP_plant, COP_chiller = VCCModel.calc_VCC_COP(network_info.weather_data, supplied_systems, centralized=True)
@@ -190,22 +196,20 @@ def calc_Ctot_cooling_plants(network_info):
                     plant_heat_yearly_kWh) / COP_plant * 1000 * network_info.prices.ELEC_PRICE
             else:
                 # calculates operation costs with hourly simulation
-                for t in range(HOURS_IN_YEAR):
-                    #     calculate COP of plant operation in this hour based on supplied loads
-                    #     Depending on the demand of that hour, the COP will change.
-                    #     E.g. supplied systems = ahu, aru:
-                    #     t = 10 we have demand for ahu and aru, so the COP is calculated using ahu and aru
-                    #     t = 11 we only have ahu demand, so COP is calculated using ahu only
-                    #     t = 12 we only have aru demand, so COP is calculated using aru only
-                    #     ... etc.
-                    supplied_systems = find_supplied_systems_t(network_info, t, building_demand,
-                                                               network_info.full_cooling_systems)
-                    COP_plant, COP_chiller = VCCModel.calc_VCC_COP(network_info.weather_data, supplied_systems,
-                                                                   centralized=True)
-                    # calculate cost of producing cooling
-                    column_name = plant_heat_original_kWh.columns[plant_number]
-                    Opex_var_plant += abs(
-                        plant_heat_original_kWh[column_name][t]) / COP_plant * 1000 * network_info.prices.ELEC_PRICE
+                # calculate COP of plant operation in each hour based on supplied loads
+                # Depending on the demand of that hour, the COP will change.
+                # E.g. supplied systems = ahu, aru:
+                # t = 10 we have demand for ahu and aru, so the COP is calculated using ahu and aru
+                # t = 11 we only have ahu demand, so COP is calculated using ahu only
+                # t = 12 we only have aru demand, so COP is calculated using aru only
+                # ... etc.
+                supplied_systems_t = find_supplied_systems_t(cooling_demand_kWh, network_info.full_cooling_systems)
+                COP_plant_t, COP_chiller_t = calc_VCC_COP_t(network_info.weather_data, supplied_systems_t,
+                                                            centralized=True)
+                # calculate cost of producing cooling
+                column_name = plant_heat_original_kWh.columns[plant_number]
+                Opex_var_plant += np.sum(np.abs(plant_heat_original_kWh[column_name].values) / COP_plant_t) * \
+                                  1000 * network_info.prices.ELEC_PRICE
 
             # calculate equipment cost of chiller and cooling tower
 
@@ -241,7 +245,6 @@ def calc_Ctot_cs_building_scale_loads(network_info):
                 disconnected_cost = optimal_network.locator.get_optimization_building_scale_folder_building_result_heating(building)
     '''
     if network_info.network_type == 'DC':
-        supplied_systems = []
         # iterate through all possible cooling systems
         for system in network_info.full_cooling_systems:
 
@@ -251,31 +254,23 @@ def calc_Ctot_cs_building_scale_loads(network_info):
         if len(disconnected_systems) > 0:
             # check if we have any disconnected systems
             system_string = find_cooling_systems_string(disconnected_systems)
+            cooling_demand_kWh = read_cooling_demand(network_info.locator, network_info.building_names)
             # iterate through all buildings
             for building_index, building in enumerate(network_info.building_names):
                 Opex_var_system = 0.0
                 if building_index not in network_info.disconnected_buildings_index:
                     # if this building is disconnected it will be calculated separately
-                    # Read in building demand
-                    building_demand = pd.read_csv(network_info.locator.get_demand_results_file(building))
-                    if not system_string:
-                        # this means there are no disconnected loads. Shouldn't happen but is a fail-safe
-                        peak_demand_kW = 0.0
-                        disconnected_demand_t_sum = 0.0
-                    else:
-                        for system_index, system in enumerate(system_string):  # iterate through all disconnected loads
-                            # go through all systems and sum up demand values
-                            if system_index == 0:
-                                disconnected_demand_t = building_demand[system]
-                            else:
-                                disconnected_demand_t = disconnected_demand_t + building_demand[system]
-                        peak_demand_kW = disconnected_demand_t.abs().max()  # calculate peak demand of all disconnected systems
-                        disconnected_demand_t_sum = disconnected_demand_t.abs().sum()
+                    building_demand_kWh = {system: demand_kWh[building_index]
+                                           for system, demand_kWh in cooling_demand_kWh.items()}
+                    # go through all disconnected systems and sum up demand values
+                    disconnected_demand_t = np.zeros(HOURS_IN_YEAR)
+                    for system in disconnected_systems:
+                        disconnected_demand_t = disconnected_demand_t + building_demand_kWh[system]
+                    # calculate peak demand of all disconnected systems
+                    peak_demand_kW = np.abs(disconnected_demand_t).max()
+                    disconnected_demand_t_sum = np.abs(disconnected_demand_t).sum()
                     print('Calculate cost of disconnected loads in building ', building)
                     if network_info.yearly_cost_calculations:
-                        supplied_systems = find_supplied_systems_annual(network_info,
-                                                                        building_demand,
-                                                                        supplied_systems)
                         COP_chiller_system, COP_chiller = VCCModel.calc_VCC_COP(network_info.weather_data, system_string,
                                                                                 centralized=False)
                         # calculate cost of producing cooling
@@ -283,23 +278,22 @@ def calc_Ctot_cs_building_scale_loads(network_info):
                         # calculate chiller heat rejection via CT
                         Q_peak_CT_kW = calc_CT_load_from_chiller_load(COP_chiller, peak_demand_kW)
                     else:
-                        Q_CT_kW = [0] * HOURS_IN_YEAR
-                        for t in range(HOURS_IN_YEAR):
-                            # calculate COP of chiller and CT operation in this hour based on supplied loads
-                            # calculate chiller COP according to the cold water supply temperature in SG context
-                            supplied_systems = find_supplied_systems_t(network_info, t,
-                                                                       building_demand,
-                                                                       supplied_systems)
-                            if len(supplied_systems) > 0:
-                                COP_chiller_system, COP_chiller = VCCModel.calc_VCC_COP(network_info.weather_data,
-                                                                                        supplied_systems,
-                                                                                        centralized=False)
-                                # calculate cost of producing cooling
-                                Opex_var_system += abs(disconnected_demand_t[
-                                                          t]) / COP_chiller_system * 1000 * network_info.prices.ELEC_PRICE
-                                # calculate chiller heat rejection via CT
-                                Q_CT_kW[t] = calc_CT_load_from_chiller_load(COP_chiller, abs(disconnected_demand_t[t]))
-                        Q_peak_CT_kW = max(Q_CT_kW)
+                        # calculate COP of chiller and CT operation in each hour based on the disconnected loads
+                        # with a demand in that hour
+                        # calculate chiller COP according to the cold water supply temperature in SG context
+                        supplied_systems_t = find_supplied_systems_t(building_demand_kWh, disconnected_systems)
+                        COP_chiller_system_t, COP_chiller_t = calc_VCC_COP_t(network_info.weather_data,
+                                                                             supplied_systems_t, centralized=False)
+                        # hours without demand of a disconnected load don't cost anything
+                        supplied_hours = supplied_systems_t > 0
+                        disconnected_demand_abs_t = np.abs(disconnected_demand_t[supplied_hours])
+                        # calculate cost of producing cooling
+                        Opex_var_system += np.sum(disconnected_demand_abs_t / COP_chiller_system_t[supplied_hours]) * \
+                                           1000 * network_info.prices.ELEC_PRICE
+                        # calculate chiller heat rejection via CT
+                        Q_CT_kW = calc_CT_load_from_chiller_load(COP_chiller_t[supplied_hours],
+                                                                 disconnected_demand_abs_t)
+                        Q_peak_CT_kW = Q_CT_kW.max() if len(Q_CT_kW) else 0.0
 
                     # calculate disconnected systems cost of disconnected loads. Assumes that all these loads are supplied by one chiller, unless this exceeds maximum chiller capacity of database
                     Capex_a_chiller_USD, Opex_fixed_chiller, _ = VCCModel.calc_Cinv_VCC(peak_demand_kW * 1000, network_info.locator, 'CH3')
@@ -313,66 +307,82 @@ def calc_Ctot_cs_building_scale_loads(network_info):
     return dis_total, dis_opex, dis_capex
 
 
-def find_supplied_systems_t(network_info, t, building_demand, full_systems, dis_build=False):
-    '''
-    This function iterates through all buildings to find out from which loads we have a demand, and return the non zero loads.
-    :param network_info: an object storing information of the current network
-    :param t: hour we are looking at
-    :return:
-    '''
-    systems = []
-    if len(full_systems) > 0:
-        system_string = find_cooling_systems_string(
-            full_systems)  # returns string necessary for further calculations of which systems are disconnected
+def read_cooling_demand(locator, building_names):
+    """
+    Return the hourly demand of each cooling system (see ``COOLING_SYSTEMS_DEMAND_COLUMNS``) of all buildings as an array
+    (buildings x hours). The demand results are read once per process - from the hourly loads store of the demand if it
+    is up to date, else from the demand results files of the buildings.
 
-        if not dis_build:
-            # iterate through all buildings
-            for building_index, building in enumerate(network_info.building_names):
-                for system_index, system in enumerate(list(system_string)):  # iterate through all disconnected loads
-                    if network_info.full_cooling_systems[system_index] not in systems:
-                        # go through all systems and sum up demand values and sum
-                        if abs(building_demand[building][system][t]) > 0.0:
-                            if network_info.full_cooling_systems[system_index] not in systems:
-                                systems.append(network_info.full_cooling_systems[system_index])
-        else:  # disconnected buildings case
-            for system_index, system in enumerate(list(system_string)):  # iterate through all disconnected loads
-                if network_info.full_cooling_systems[system_index] not in systems:
-                    # go through all systems and sum up demand values and sum
-                    if abs(building_demand[system][t]) > 0.0:
-                        if network_info.full_cooling_systems[system_index] not in systems:
-                            systems.append(network_info.full_cooling_systems[system_index])
-    return systems
-
-
-def find_supplied_systems_annual(network_info, building_demand, full_systems, dis_build=False):
-    '''
-    This function iterates through all buildings to find out from which loads we have a demand, and return the non zero loads.
-    :param network_info: an object storing information of the current network
-    :return:
-    '''
-    systems = []
-    if len(full_systems) > 0:
-        system_string = find_cooling_systems_string(
-            full_systems)  # returns string necessary for further calculations of which systems are disconnected
+    :return: dict mapping the cooling system (ahu, aru, scu) to its hourly demand [kWh]
+    :rtype: dict[str, np.ndarray]
+    """
+    building_names = [str(building) for building in building_names]
+    demand_files = [locator.get_demand_results_file(building) for building in building_names]
+    key = tuple((demand_file, os.path.getmtime(demand_file)) for demand_file in demand_files)
+    if key not in _cooling_demand_cache:
+        store = HourlyLoadsStore.open(locator, building_names)
+        if store is not None:
+            cooling_demand_kWh = {system: store.read(column, building_names)
+                                  for system, column in COOLING_SYSTEMS_DEMAND_COLUMNS.items()}
+        else:
+            building_demand = [pd.read_csv(demand_file, usecols=list(COOLING_SYSTEMS_DEMAND_COLUMNS.values()))
+                               for demand_file in demand_files]
+            cooling_demand_kWh = {system: np.array([demand[column].values for demand in building_demand],
+                                                   dtype=np.float64).reshape(len(building_names), HOURS_IN_YEAR)
+                                  for system, column in COOLING_SYSTEMS_DEMAND_COLUMNS.items()}
+        _cooling_demand_cache.clear()
+        _cooling_demand_cache[key] = cooling_demand_kWh
+    return _cooling_demand_cache[key]
+
+
+def find_supplied_systems_t(cooling_demand_kWh, systems):
+    """
+    Find out for each hour which of the cooling ``systems`` have a demand (in any of the buildings).
+
+    :param cooling_demand_kWh: the hourly demand of each cooling system, for all buildings (buildings x hours) or for
+        a single building (see ``read_cooling_demand``)
+    :param systems: the cooling systems to check (e.g. ahu, aru)
+    :return: the systems with a demand in each hour - as a bitmask of their indices in ``COOLING_SYSTEMS``
+    :rtype: np.ndarray
+    """
+    supplied_systems_t = np.zeros(HOURS_IN_YEAR, dtype=int)
+    for system_index, system in enumerate(COOLING_SYSTEMS):
+        if system in systems:
+            demand_kWh = np.abs(cooling_demand_kWh[system]).reshape(-1, HOURS_IN_YEAR)
+            supplied_systems_t |= (demand_kWh > 0.0).any(axis=0) << system_index
+    return supplied_systems_t
+
+
+def find_supplied_systems_annual(cooling_demand_kWh, systems):
+    """
+    Return the cooling ``systems`` with a demand over the year (in any of the buildings).
+
+    :param cooling_demand_kWh: the hourly demand of each cooling system, for all buildings (buildings x hours) or for
+        a single building (see ``read_cooling_demand``)
+    :param systems: the cooling systems to check (e.g. ahu, aru)
+    """
+    return [system for system in COOLING_SYSTEMS if system in systems and
+            (np.abs(cooling_demand_kWh[system].reshape(-1, HOURS_IN_YEAR).sum(axis=1)) > 0.0).any()]
 
-        if not dis_build:
-            # iterate through all buildings
-            for building_index, building in enumerate(network_info.building_names):
-                for system_index, system in enumerate(list(system_string)):  # iterate through all disconnected loads
-                    if network_info.full_cooling_systems[system_index] not in systems:
-                        # go through all systems and sum up demand values and sum
-                        if abs(building_demand[building][system].sum()) > 0.0:
-                            if network_info.full_cooling_systems[system_index] not in systems:
-                                systems.append(network_info.full_cooling_systems[system_index])
-
-        else:  # disconnected buildings case
-            for system_index, system in enumerate(list(system_string)):  # iterate through all disconnected loads
-                if network_info.full_cooling_systems[system_index] not in systems:
-                    # go through all systems and sum up demand values and sum
-                    if abs(building_demand[system].sum()) > 0.0:
-                        if network_info.full_cooling_systems[system_index] not in systems:
-                            systems.append(network_info.full_cooling_systems[system_index])
-    return systems
+
+def calc_VCC_COP_t(weather_data, supplied_systems_t, centralized):
+    """
+    Calculate the hourly COP of the chillers supplying the cooling systems with a demand in each hour (see
+    ``VCCModel.calc_VCC_COP``) - the COP only depends on the supplied systems, so it is calculated once for each
+    combination.
+
+    :param supplied_systems_t: the systems with a demand in each hour (see ``find_supplied_systems_t``)
+    :return: hourly COP of the system and of the chiller
+    """
+    COP_system_t = np.zeros(HOURS_IN_YEAR)
+    COP_chiller_t = np.zeros(HOURS_IN_YEAR)
+    for supplied_systems in np.unique(supplied_systems_t):
+        load_types = [system for system_index, system in enumerate(COOLING_SYSTEMS)
+                      if supplied_systems & (1 << system_index)]
+        hours = supplied_systems_t == supplied_systems
+        COP_system_t[hours], COP_chiller_t[hours] = VCCModel.calc_VCC_COP(weather_data, load_types,
+                                                                          centralized=centralized)
+    return COP_system_t, COP_chiller_t
 
 
 def calc_Ctot_cs_building_scale_buildings(network_info):
@@ -386,24 +396,22 @@ def calc_Ctot_cs_building_scale_buildings(network_info):
     dis_opex = 0.0
     dis_capex = 0.0
     if len(network_info.disconnected_buildings_index) > 0:  # we have disconnected buildings
-        # Make sure files to read in exist
+        cooling_demand_kWh = read_cooling_demand(network_info.locator, network_info.building_names)
         for building_index, building in enumerate(network_info.building_names):  # iterate through all buildings
             Opex_var_system = 0.0
             if building_index in network_info.disconnected_buildings_index:  # disconnected building
-                # Read in demand of building
-                building_demand = pd.read_csv(network_info.locator.get_demand_results_file(building))
+                building_demand_kWh = {system: demand_kWh[building_index]
+                                       for system, demand_kWh in cooling_demand_kWh.items()}
                 # sum up demand of all loads
-                demand_hourly_kWh = building_demand['Qcs_sys_scu_kWh'].abs() + \
-                                    building_demand['Qcs_sys_ahu_kWh'].abs() + \
-                                    building_demand['Qcs_sys_aru_kWh'].abs()
+                demand_hourly_kWh = np.abs(building_demand_kWh['scu']) + np.abs(building_demand_kWh['ahu']) + \
+                                    np.abs(building_demand_kWh['aru'])
                 # calculate peak demand
-                peak_demand_kW = demand_hourly_kWh.abs().max()
+                peak_demand_kW = demand_hourly_kWh.max()
                 print('Calculate cost of disconnected building production at building ', building)
                 if network_info.yearly_cost_calculations:
                     demand_annual_kWh = demand_hourly_kWh.sum()
                     # calculate plant COP according to the cold water supply temperature in SG context
-                    supplied_systems = find_supplied_systems_annual(network_info, building_demand,
-                                                                    ['ahu', 'aru', 'scu'], dis_build=True)
+                    supplied_systems = find_supplied_systems_annual(building_demand_kWh, ['ahu', 'aru', 'scu'])
                     COP_chiller_system, COP_chiller = VCCModel.calc_VCC_COP(network_info.weather_data, supplied_systems,
                                                                             centralized=False)
                     # calculate cost of producing cooling
@@ -411,20 +419,16 @@ def calc_Ctot_cs_building_scale_buildings(network_info):
                     # calculate chiller heat rejection via CT
                     Q_peak_CT_kW = calc_CT_load_from_chiller_load(COP_chiller, peak_demand_kW)
                 else:
-                    Q_CT_kW = [0] * HOURS_IN_YEAR
-                    for t in range(HOURS_IN_YEAR):
-                        supplied_systems = find_supplied_systems_t(network_info, t, building_demand,
-                                                                   ['ahu', 'aru', 'scu'], dis_build=True)
-                        # calculate COP of plant operation in this hour based on supplied loads
-                        # calculate plant COP according to the cold water supply temperature in SG context
-                        COP_chiller_system, COP_chiller = VCCModel.calc_VCC_COP(network_info.weather_data, supplied_systems,
-                                                                                centralized=False)
-                        # calculate cost of producing cooling
-                        Opex_var_system += abs(demand_hourly_kWh[
-                                                  t]) / COP_chiller_system * 1000 * network_info.prices.ELEC_PRICE
-                        # calculate chiller heat rejection via CT
-                        Q_CT_kW[t] = calc_CT_load_from_chiller_load(COP_chiller, abs(demand_hourly_kWh[t]))
-                    Q_peak_CT_kW = max(Q_CT_kW)
+                    # calculate COP of plant operation in each hour based on supplied loads
+                    # calculate plant COP according to the cold water supply temperature in SG context
+                    supplied_systems_t = find_supplied_systems_t(building_demand_kWh, ['ahu', 'aru', 'scu'])
+                    COP_chiller_system_t, COP_chiller_t = calc_VCC_COP_t(network_info.weather_data, supplied_systems_t,
+                                                                         centralized=False)
+                    # calculate cost of producing cooling
+                    Opex_var_system += np.sum(demand_hourly_kWh / COP_chiller_system_t) * \
+                                       1000 * network_info.prices.ELEC_PRICE
+                    # calculate chiller heat rejection via CT
+                    Q_peak_CT_kW = calc_CT_load_from_chiller_load(COP_chiller_t, demand_hourly_kWh).max()
 
                 # calculate cost of chiller and cooling tower at building level
                 Capex_a_chiller_USD, Opex_fixed_chiller, _ = VCCModel.calc_Cinv_VCC(peak_demand_kW * 1000, network_info.locator, 'CH3')
@@ -440,9 +444,9 @@ def calc_Ctot_cs_building_scale_buildings(network_info):
 def calc_CT_load_from_chiller_load(COP_chiller, chiller_load_kW):
     """
     calculates loads of cooling towers (CT) according to chiller loads
-    :param COP_chiller: float
-    :param chiller_load_kW: float
-    :return: Q_CT_kW, float
+    :param COP_chiller: float or np.ndarray
+    :param chiller_load_kW: float or np.ndarray
+    :return: Q_CT_kW, float or np.ndarray
     """
     Q_CT_kW = chiller_load_kW * ((1 + COP_chiller) / COP_chiller)
     return Q_CT_kW
@@ -9,17 +9,23 @@ hydraulic network
 import cea.config
 import cea.inputlocator
 import cea.technologies.thermal_network.thermal_network_costs
+import cea.utilities.parallel
 from cea.technologies.thermal_network.thermal_network import ThermalNetwork, thermal_network_main
 from cea.technologies.network_layout.main import layout_network, NetworkLayout
 from cea.utilities import epwreader
 from cea.technologies.supply_systems_database import SupplySystemsDatabase
 import cea.technologies.thermal_network.thermal_network_costs as network_costs
 import os
+import hashlib
+import json
+import shutil
+import sqlite3
 import pandas as pd
 import numpy as np
 import time
 import operator
 import random
+from itertools import repeat
 
 from cea.technologies.thermal_network.thermal_network_costs import calc_network_size
 
@@ -64,6 +70,10 @@ LOAD_INDEX_AHU = 0
 LOAD_INDEX_ARU = 1
 LOOPS_INDEX = LEN_ALL_LOADS
 
+# parameters of the genetic algorithm - they change which networks are evaluated, but not the costs of a network
+SEARCH_PARAMETERS = {'possible-plant-sites', 'min-number-of-plants', 'max-number-of-plants', 'number-of-individuals',
+                     'chance-of-mutation', 'number-of-generations', 'lucky-few', 'resume'}
+
 
 class NetworkInfo(object):
     """
@@ -155,7 +165,8 @@ def thermal_network_optimization(config, locator):
     # initialize timer
     start = time.time()
 
-    # initialize object
+    # initialize object - each worker process simulates the networks in its own folder
+    locator = NetworkOptimizationLocator(locator.scenario, locator.plugins)
     network_info = NetworkInfo(locator, config)
 
     network_layout = NetworkLayout()
@@ -165,15 +176,48 @@ def thermal_network_optimization(config, locator):
     if network_info.network_type == 'DH':
         raise ValueError('This optimization procedure is not ready for district heating yet!')
 
-    # create initial population
-    print("Creating initial population.")
-    population = generate_initial_population(network_info, network_layout)
+    archive = NetworkArchive(locator.get_optimization_network_archive(network_info.network_type),
+                             calc_archive_fingerprint(config, locator))
+    try:
+        run_generations(config, network_info, network_layout, archive)
+    finally:
+        archive.close()
+        # the scratch folders of the worker processes
+        shutil.rmtree(os.path.dirname(locator.get_optimization_network_worker_folder()), ignore_errors=True)
+
+    # write values into all_individuals_list and output results
+    output_results_of_all_individuals(config, locator, network_info)
+    print('thermal_network_optimization_main() succeeded')
+    print('total time: ', time.time() - start)
+
+
+def run_generations(config, network_info, network_layout, archive):
+    """
+    Evaluate the populations of the generations of the optimization, starting with an initial population or - with
+    ``thermal-network-optimization:resume`` - with the last population started in the archive.
+
+    :param NetworkInfo network_info: Object storing network information.
+    :param NetworkArchive archive: Results of the networks evaluated so far
+    """
+    population = None
+    first_generation = 0
+    if config.thermal_network_optimization.resume:
+        first_generation, population = archive.last_population()
+        if population is not None:
+            print("Resuming optimization from generation number {generation}".format(generation=first_generation))
+    if population is None:
+        # create initial population
+        print("Creating initial population.")
+        population = generate_initial_population(network_info, network_layout)
+    network_info.generation_number = first_generation
 
     # iterate through number of generations
-    for generation_number in range(config.thermal_network_optimization.number_of_generations):
+    for generation_number in range(first_generation, config.thermal_network_optimization.number_of_generations):
         print("Running optimization for generation number {generation}".format(generation=generation_number))
+        archive.save_population(generation_number, population)
         # calculate network cost for each individual and sort by increasing cost
-        sorted_population = network_cost_calculation(population, network_info, network_layout)
+        sorted_population = network_cost_calculation(population, network_info, network_layout, archive,
+                                                     config.get_number_of_processes())
         print("Lowest cost individual: {winner}".format(winner=sorted_population[0]))
         print()
 
@@ -186,11 +230,6 @@ def thermal_network_optimization(config, locator):
         population = mutate_generation(new_generation, network_info)
         print('Finished mutation.')
 
-    # write values into all_individuals_list and output results
-    output_results_of_all_individuals(config, locator, network_info)
-    print('thermal_network_optimization_main() succeeded')
-    print('total time: ', time.time() - start)
-
 
 def output_results_of_all_individuals(config, locator, network_info):
     """
@@ -204,7 +243,7 @@ def output_results_of_all_individuals(config, locator, network_info):
     for individual in network_info.populations.keys():
         # read results from each individual
         individual_df = pd.read_csv(network_info.locate_individual_results(individual), index_col=None, header=0)
-        all_individuals_list.append(individual_df.as_matrix())
+        all_individuals_list.append(individual_df.values)
     all_individuals_array = np.vstack(all_individuals_list)
     all_individuals_df = pd.DataFrame(all_individuals_array).drop(columns=[0])
     all_individuals_df.columns = network_info.generation_info + network_info.cost_info
@@ -214,93 +253,229 @@ def output_results_of_all_individuals(config, locator, network_info):
     return np.nan
 
 
-def network_cost_calculation(population, network_info, network_layout):
+class NetworkOptimizationLocator(cea.inputlocator.InputLocator):
+    """
+    Each process evaluating individuals writes the network layout and the thermal network simulation results to its own
+    scratch folder (see ``get_optimization_network_worker_folder``), so individuals can be evaluated in parallel.
+    """
+
+    def get_thermal_network_folder(self):
+        return self.get_optimization_network_worker_folder()
+
+
+class NetworkArchive(object):
     """
-    Main function which calls the objective function and stores values
+    The results of all the networks evaluated by the optimization, keyed by ``individual_key`` (so duplicate
+    individuals are never re-calculated), and the population of each generation (to resume an interrupted run). Stored
+    in ``locator.get_optimization_network_archive(network_type)``.
+
+    The archive is only valid for the inputs and parameters it was created with (see ``calc_archive_fingerprint``): it
+    is emptied when opened with a different ``fingerprint``.
+    """
+
+    def __init__(self, path, fingerprint):
+        self.path = path
+        self._connection = sqlite3.connect(path)
+        with self._connection:
+            self._connection.execute("CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, result TEXT NOT NULL)")
+            self._connection.execute("CREATE TABLE IF NOT EXISTS populations "
+                                     "(generation INTEGER PRIMARY KEY, population TEXT NOT NULL)")
+            self._connection.execute("CREATE TABLE IF NOT EXISTS fingerprint (fingerprint TEXT NOT NULL)")
+            row = self._connection.execute("SELECT fingerprint FROM fingerprint").fetchone()
+            if row is None or row[0] != fingerprint:
+                if row is not None:
+                    print("The inputs of the optimization changed - discarding the archived networks")
+                self._connection.execute("DELETE FROM results")
+                self._connection.execute("DELETE FROM populations")
+                self._connection.execute("DELETE FROM fingerprint")
+                self._connection.execute("INSERT INTO fingerprint (fingerprint) VALUES (?)", (fingerprint,))
+
+    def close(self):
+        self._connection.close()
+
+    def __contains__(self, key):
+        return self._connection.execute("SELECT 1 FROM results WHERE key = ?", (key,)).fetchone() is not None
+
+    def get(self, key):
+        return json.loads(self._connection.execute("SELECT result FROM results WHERE key = ?", (key,)).fetchone()[0])
+
+    def add(self, key, result):
+        with self._connection:
+            self._connection.execute("INSERT OR REPLACE INTO results (key, result) VALUES (?, ?)",
+                                     (key, json.dumps(result)))
+
+    def save_population(self, generation, population):
+        """Save the population a generation starts with - forgetting the later generations of previous runs"""
+        with self._connection:
+            self._connection.execute("DELETE FROM populations WHERE generation >= ?", (generation,))
+            self._connection.execute("INSERT OR REPLACE INTO populations (generation, population) VALUES (?, ?)",
+                                     (generation, json.dumps([[int(gene) for gene in individual]
+                                                              for individual in population])))
+
+    def last_population(self):
+        """Return ``(generation, population)`` of the last generation started - or ``(0, None)`` for a new archive"""
+        row = self._connection.execute(
+            "SELECT generation, population FROM populations ORDER BY generation DESC LIMIT 1").fetchone()
+        if row is None:
+            return 0, None
+        return row[0], json.loads(row[1])
+
+
+def calc_archive_fingerprint(config, locator):
+    """
+    A hash of what the costs of a network depend on besides the network itself: the parameters of the optimization
+    (except for the ``SEARCH_PARAMETERS``) and the contents of the demand results, the weather file, the databases, the
+    street network, the zone geometry and the results of the building scale optimization.
+
+    :type config: cea.config.Configuration
+    :type locator: cea.inputlocator.InputLocator
+    """
+    fingerprint = hashlib.sha256()
+    section = config.sections['thermal-network-optimization']
+    parameters = {name: parameter.get() for name, parameter in section.parameters.items()
+                  if name not in SEARCH_PARAMETERS}
+    fingerprint.update(json.dumps(parameters, sort_keys=True, default=str).encode('utf-8'))
+
+    paths = []
+    for folder in [locator.get_demand_results_folder(), locator.get_databases_folder(),
+                   locator.get_optimization_decentralized_folder()]:
+        paths.extend(sorted(os.path.join(root, file_name) for root, _, files in os.walk(folder)
+                            for file_name in files))
+    for path in [locator.get_weather_file(), locator.get_street_network(), locator.get_zone_geometry()]:
+        # with the other files of a shapefile
+        folder, stem = os.path.dirname(path), os.path.splitext(os.path.basename(path))[0]
+        if os.path.isdir(folder):
+            paths.extend(sorted(os.path.join(folder, file_name) for file_name in os.listdir(folder)
+                                if file_name.startswith(stem + '.')))
+    for path in paths:
+        fingerprint.update(os.path.relpath(path, locator.scenario).encode('utf-8'))
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1024 * 1024), b''):
+                fingerprint.update(block)
+    return fingerprint.hexdigest()
+
+
+def individual_key(network_info, individual):
+    """
+    A canonical encoding of the network described by an individual (as translated by ``translate_individual``):
+    individuals describing the same network (e.g. differing only in genes that are not being optimized) have the same
+    key.
+    """
+    buildings = individual[LEN_INDIVIDUAL_HEADER:]
+    plant_buildings = [str(network_info.building_names[i]) for i, x in enumerate(buildings) if x == INDIVIDUAL_PLANT]
+    disconnected_buildings = [str(network_info.building_names[i]) for i, x in enumerate(buildings)
+                              if x == INDIVIDUAL_DISCONNECTED]
+    if network_info.network_type == 'DH':
+        supplied_loads = network_info.substation_heating_systems
+    elif network_info.optimize_network_loads:
+        supplied_loads = [network_info.full_cooling_systems[index] for index in range(LEN_ALL_LOADS)
+                          if individual[index] == LOAD_CONNECTED]
+    else:
+        supplied_loads = network_info.substation_cooling_systems
+    has_loops = individual[LOOPS_INDEX] == NETWORK_HAS_LOOPS if network_info.optimize_loop_branch else None
+    return json.dumps({'plant_buildings': sorted(plant_buildings),
+                       'disconnected_buildings': sorted(disconnected_buildings),
+                       'supplied_loads': sorted(supplied_loads),
+                       'has_loops': has_loops}, sort_keys=True)
+
+
+def evaluate_individual(network_info, network_layout, individual):
+    """
+    Simulate the network of an individual and calculate its costs. This is run in a worker process (see
+    ``network_cost_calculation``).
+
+    :return: the results of the individual (the columns ``generation_info`` and ``cost_info``) as a dict
+    """
+    thermal_network = ThermalNetwork(network_info.locator, "", network_info)
+    # translate barcode individual
+    building_plants, disconnected_buildings = translate_individual(network_info, individual)
+    # evaluate fitness function
+    capex_total, opex_total, total_cost, cost_storage_df = objective_function(network_info, network_layout,
+                                                                              thermal_network)
+
+    # calculate network total network_length_m and average diameter
+    network_length_m, average_pipe_diameter_m = calc_network_size(network_info)
+
+    # list supplied loads
+    # FIXME: @shanshanhsieh make sure that this is being optimized for!
+    if network_info.network_type == 'DH':
+        list_of_supplied_loads = thermal_network.substation_heating_systems
+    else:
+        list_of_supplied_loads = thermal_network.substation_cooling_systems
+
+    # store values
+    result = {column: float(cost_storage_df.loc[column][0])
+              for column in ['el_network_MWh', 'opex_plant', 'opex_pump', 'opex_hex', 'opex_dis_loads',
+                             'opex_dis_build', 'capex_network', 'capex_pump', 'capex_hex', 'capex_dis_loads',
+                             'capex_dis_build', 'capex_chiller', 'capex_CT']}
+    result['total'] = float(total_cost)
+    result['capex'] = float(capex_total)
+    result['opex'] = float(opex_total)
+    result['individual'] = str(individual)
+    result['number_of_plants'] = individual[LEN_INDIVIDUAL_HEADER:].count(INDIVIDUAL_PLANT)
+    result['has_loops'] = int(individual[LOOPS_INDEX])
+    result['plant_buildings'] = str(building_plants)
+    result['disconnected_buildings'] = str(disconnected_buildings) if disconnected_buildings != [] else 0
+    result['supplied_loads'] = ', '.join(list_of_supplied_loads)
+    result['network_length_m'] = network_length_m
+    result['avg_diam_m'] = average_pipe_diameter_m
+    return result
+
+
+def network_cost_calculation(population, network_info, network_layout, archive, processes=1):
+    """
+    Main function which calls the objective function and stores values. The individuals not found in the archive are
+    evaluated in parallel, each network only once.
+
     :param NetworkLayout network_layout:
     :param population: List containing all individuals of this generation
     :param NetworkInfo network_info: Object storing network information.
+    :param NetworkArchive archive: Results of the networks evaluated so far
+    :param int processes: Number of processes to use for evaluating the individuals
     :return: List of sorted tuples, lowest cost first. Each tuple consists of the cost, followed by the individual as a string.
     """
-    # initialize data storage and counter
+    # initialize data storage
     population_performance = {}
-    individual_number = 0
     # prepare data storage for generation_outputs_df
     generation_outputs_df = pd.DataFrame(index=list(range(network_info.number_of_individuals)),
                                          columns=network_info.generation_info + network_info.cost_info)
 
-    # iterate through all individuals
-    for individual in population:
-        thermal_network = ThermalNetwork(network_info.locator, "", network_info)
-        # verify that we have not previously evaluated this individual, saves time!
-        if not os.path.exists(network_info.locate_individual_results(individual)):
-            # initialize a dataframe for this individual
-            individual_outputs_df = pd.DataFrame(index=[0], columns=generation_outputs_df.columns)
-            # translate barcode individual
-            building_plants, disconnected_buildings = translate_individual(network_info, individual)
-            # evaluate fitness function
-            capex_total, opex_total, total_cost, cost_storage_df = objective_function(network_info, network_layout,
-                                                                                      thermal_network)
-
-            # calculate network total network_length_m and average diameter
-            network_length_m, average_pipe_diameter_m = calc_network_size(network_info)
-
-            # save total cost to dictionary
-            population_performance[total_cost] = individual
-            print('population performance ', population_performance)
-
-            # list supplied loads
-            # FIXME: @shanshanhsieh make sure that this is being optimized for!
-            if network_info.network_type == 'DH':
-                list_of_supplied_loads = thermal_network.substation_heating_systems
-            else:
-                list_of_supplied_loads = thermal_network.substation_cooling_systems
-
-            # store values
-            individual_outputs_df['total'] = total_cost
-            individual_outputs_df['capex'] = capex_total
-            individual_outputs_df['opex'] = opex_total
-            individual_outputs_df['el_network_MWh'] = cost_storage_df.loc['el_network_MWh'][0]
-            individual_outputs_df['opex_plant'] = cost_storage_df.loc['opex_plant'][0]
-            individual_outputs_df['opex_pump'] = cost_storage_df.loc['opex_pump'][0]
-            individual_outputs_df['opex_hex'] = cost_storage_df.loc['opex_hex'][0]
-            individual_outputs_df['opex_dis_loads'] = cost_storage_df.loc['opex_dis_loads'][0]
-            individual_outputs_df['opex_dis_build'] = cost_storage_df.loc['opex_dis_build'][0]
-            individual_outputs_df['capex_network'] = cost_storage_df.loc['capex_network'][0]
-            individual_outputs_df['capex_pump'] = cost_storage_df.loc['capex_pump'][0]
-            individual_outputs_df['capex_hex'] = cost_storage_df.loc['capex_hex'][0]
-            individual_outputs_df['capex_dis_loads'] = cost_storage_df.loc['capex_dis_loads'][0]
-            individual_outputs_df['capex_dis_build'] = cost_storage_df.loc['capex_dis_build'][0]
-            individual_outputs_df['capex_chiller'] = cost_storage_df.loc['capex_chiller'][0]
-            individual_outputs_df['capex_CT'] = cost_storage_df.loc['capex_CT'][0]
-            individual_outputs_df['individual'] = str(individual)
-            individual_outputs_df['number_of_plants'] = individual[LEN_INDIVIDUAL_HEADER:].count(INDIVIDUAL_PLANT)
-            individual_outputs_df['has_loops'] = individual[LOOPS_INDEX]
-            individual_outputs_df['plant_buildings'] = str(building_plants)
-            individual_outputs_df['disconnected_buildings'] = str(
-                disconnected_buildings) if disconnected_buildings != [] else 0
-            individual_outputs_df['supplied_loads'] = ', '.join(list_of_supplied_loads)
-            individual_outputs_df['network_length_m'] = network_length_m
-            individual_outputs_df['avg_diam_m'] = average_pipe_diameter_m
-
-            # save results of an unique individual
-            individual_outputs_df.to_csv(network_info.locate_individual_results(individual))
-            # add unique individual and its total costs to the populations
+    # verify that we have not previously evaluated this network, saves time!
+    keys = [individual_key(network_info, individual) for individual in population]
+    new_individuals = {}
+    for key, individual in zip(keys, population):
+        if key not in archive and key not in new_individuals:
+            new_individuals[key] = individual
+    print('Evaluating {new} new individual(s), {archived} found in archive'.format(
+        new=len(new_individuals), archived=len(population) - len(new_individuals)))
+
+    if new_individuals:
+        n = len(new_individuals)
+        results = cea.utilities.parallel.vectorize(evaluate_individual, processes)(repeat(network_info, n),
+                                                                                   repeat(network_layout, n),
+                                                                                   new_individuals.values())
+        for key, result in zip(new_individuals.keys(), results):
+            archive.add(key, result)
+
+    for individual_number, (key, individual) in enumerate(zip(keys, population)):
+        result = archive.get(key)
+        # the network may have been evaluated for an individual with a different barcode
+        result['individual'] = str(individual)
+        result['has_loops'] = individual[LOOPS_INDEX]
+        individual_outputs_df = pd.DataFrame(result, index=[0], columns=generation_outputs_df.columns)
+        # save results of an unique individual
+        individual_outputs_df.to_csv(network_info.locate_individual_results(individual))
+
+        total_cost = result['total']
+        while total_cost in population_performance.keys():  # make sure we keep correct number of individuals in the extremely unlikely event that two individuals have the same cost
+            total_cost = total_cost + 0.01
+        population_performance[total_cost] = individual
+        if str(individual) not in network_info.populations.keys():
             network_info.populations[str(individual)] = total_cost
-        else:
-            # read total cost of the individual that has been evaluated
-            individual_outputs_df = pd.read_csv(network_info.locate_individual_results(individual))
-            total_cost = individual_outputs_df['total'][0]
-            while total_cost in population_performance.keys():  # make sure we keep correct number of individuals in the extremely unlikely event that two individuals have the same cost
-                total_cost = total_cost + 0.01
-            population_performance[total_cost] = individual
-            if str(individual) not in network_info.populations.keys():
-                network_info.populations[str(individual)] = total_cost
 
         for column in generation_outputs_df.columns:
             generation_outputs_df.iloc[individual_number][column] = individual_outputs_df[column][0]
-        # iterate to next individual
-        individual_number += 1
+    print('population performance ', population_performance)
     generation_outputs_df.to_csv(network_info.locator.get_optimization_network_generation_individuals_results_file(
         network_info.network_type, network_info.generation_number))
     network_info.generation_number += 1
@@ -0,0 +1,74 @@
+"""
+Test the utilities/benchmark.py file
+"""
+
+import os
+import unittest
+
+import pandas as pd
+
+import cea.utilities.benchmark as benchmark
+
+
+def crash_step(config, script, parameters, queue):
+    """Replaces benchmark.run_step: a process that dies without reporting back"""
+    os._exit(3)
+
+
+class TestSyntheticDistrict(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.standards_df = pd.DataFrame({"STANDARD": ["STANDARD1", "STANDARD2", "STANDARD3"],
+                                         "YEAR_START": [0, 1980, 2001],
+                                         "YEAR_END": [1979, 2000, 2050]})
+
+    def test_synthetic_district(self):
+        zone_df, surroundings_df, streets_df, typology_df = benchmark.calc_synthetic_district(
+            10, ["MULTI_RES", "OFFICE"], self.standards_df, seed=42)
+        self.assertEqual(len(zone_df), 10)
+        self.assertEqual(list(zone_df["Name"]), list(typology_df["Name"]))
+        self.assertTrue(set(typology_df["1ST_USE"]) <= {"MULTI_RES", "OFFICE"})
+        self.assertTrue(set(typology_df["STANDARD"]) <= set(self.standards_df["STANDARD"]))
+
+        # buildings neither overlap each other nor the surroundings
+        all_buildings = pd.concat([zone_df.geometry, surroundings_df.geometry], ignore_index=True)
+        self.assertAlmostEqual(all_buildings.unary_union.area, all_buildings.area.sum())
+        # every building is in its own street block
+        self.assertFalse(any(streets_df.geometry.intersects(zone_df.geometry.unary_union)))
+
+    def test_synthetic_district_is_reproducible(self):
+        first = benchmark.calc_synthetic_district(7, ["MULTI_RES", "OFFICE", "RETAIL"], self.standards_df, seed=1)
+        second = benchmark.calc_synthetic_district(7, ["MULTI_RES", "OFFICE", "RETAIL"], self.standards_df, seed=1)
+        for first_df, second_df in zip(first, second):
+            pd.testing.assert_frame_equal(pd.DataFrame(first_df).astype(str), pd.DataFrame(second_df).astype(str))
+
+    def test_select_steps(self):
+        steps = [step for _, step, _, _ in benchmark.select_steps(["demand"])]
+        self.assertEqual(steps, ["radiation", "schedule-maker", "demand"])
+        self.assertRaises(ValueError, benchmark.select_steps, ["not-a-benchmark"])
+
+
+class TestCompareToBaseline(unittest.TestCase):
+    def test_compare_to_baseline(self):
+        baseline = [{"number_of_buildings": 10, "step": "demand", "wall_time_s": 10.0, "peak_rss_mb": 100.0},
+                    {"number_of_buildings": 10, "step": "radiation", "wall_time_s": 10.0, "peak_rss_mb": None}]
+        results = [{"number_of_buildings": 10, "step": "demand", "wall_time_s": 11.0, "peak_rss_mb": 200.0},
+                   {"number_of_buildings": 10, "step": "radiation", "wall_time_s": 20.0, "peak_rss_mb": 100.0},
+                   {"number_of_buildings": 50, "step": "demand", "wall_time_s": 100.0, "peak_rss_mb": 500.0}]
+        regressions = benchmark.compare_to_baseline(results, baseline, tolerance=0.25)
+        self.assertEqual([(r["step"], r["metric"]) for r in regressions],
+                         [("demand", "peak_rss_mb"), ("radiation", "wall_time_s")])
+        self.assertAlmostEqual(regressions[0]["change"], 1.0)
+
+
+
+class TestTimeStep(unittest.TestCase):
+    def test_crashed_process(self):
+        """A benchmark step that crashes is reported as a failure instead of waiting for its result forever"""
+        with self.assertRaises(RuntimeError) as context:
+            benchmark.time_step(None, "demand", {}, target=crash_step)
+        self.assertIn("exit code 3", str(context.exception))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -4,7 +4,8 @@
 import unittest
 import numpy as np
 
-from cea.technologies.chiller_vapor_compression import calc_averaged_PLF, calc_available_capacity, calc_PLF
+from cea.technologies.chiller_vapor_compression import calc_averaged_PLF, calc_averaged_PLF_array, \
+    calc_available_capacity, calc_PLF
 
 
 class TestLoadDistribution(unittest.TestCase):
@@ -33,6 +34,12 @@ class TestLoadDistribution(unittest.TestCase):
         result = calc_averaged_PLF(40000000, 25000000, 279.15, 301.15, VCC_chiller)
         self.assertAlmostEqual(0.9735208306617418, result)
 
+        # the array version must give the same results as the hourly calculation
+        q_chw_load_Wh = np.array([1000000.0, 12000000.0, 25000000.0, 40000000.0])
+        expected = [calc_averaged_PLF(40000000, q, 279.15, 301.15, VCC_chiller) for q in q_chw_load_Wh]
+        result = calc_averaged_PLF_array(40000000, q_chw_load_Wh, 279.15, 301.15, VCC_chiller)
+        np.testing.assert_allclose(expected, result)
+
     def test_calc_available_capacity(self):
         result = calc_available_capacity(13333333.3333333, self.qs, 279.15, 301.15)
         self.assertAlmostEqual(12793205.269333301, result)
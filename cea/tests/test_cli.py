@@ -0,0 +1,36 @@
+"""
+Test the ``cea`` command line interface (``cea/interfaces/cli/cli.py``)
+"""
+
+import subprocess
+import sys
+import unittest
+
+from cea.interfaces.cli.cli import parse_import_times
+
+# these libraries take a long time to import and should only be imported by the scripts that need them
+HEAVY_MODULES = ["pandas", "geopandas", "plotly", "pysal", "libpysal", "scipy", "matplotlib", "osmnx"]
+
+
+class TestCli(unittest.TestCase):
+    def test_startup_does_not_import_heavy_modules(self):
+        code = "\n".join([
+            "import sys",
+            "import cea.config, cea.scripts, cea.worker, cea.interfaces.cli.cli",
+            "config = cea.config.Configuration()",
+            "list(cea.scripts.for_interface('cli', plugins=config.plugins))",
+            "print(' '.join(sorted(m for m in sys.modules if m.split('.')[0] in {heavy})))".format(
+                heavy=set(HEAVY_MODULES))])
+        output = subprocess.check_output([sys.executable, "-c", code], universal_newlines=True)
+        self.assertEqual(output.strip(), "", "cea startup imports heavy modules: " + output)
+
+    def test_parse_import_times(self):
+        output = "\n".join([
+            "import time: self [us] | cumulative | imported package",
+            "import time:       150 |        150 |     cea.utilities",
+            "import time:      1001 |      28391 |   cea.config"])
+        self.assertEqual(parse_import_times(output), [("     cea.utilities", 150, 150), ("   cea.config", 1001, 28391)])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,172 @@
+"""
+Test the technologies/network_layout/connectivity_potential.py file: the functions using spatial indexes return the
+same streets, points and segments as comparing every geometry with every other one (as before the spatial indexes).
+"""
+
+import itertools
+import random
+import unittest
+
+import shapely
+from geopandas import GeoDataFrame as gdf
+from shapely.geometry import LineString, Point
+from shapely.ops import linemerge, snap, split
+
+from cea.constants import SNAP_TOLERANCE
+from cea.technologies.network_layout.connectivity_potential import (bend_towards, compute_intersections,
+                                                                     computer_end_points, find_isolated_endpoints,
+                                                                     near_analysis, nearest_neighbor_within,
+                                                                     snap_points, snappy_endings,
+                                                                     split_line_by_nearest_points,
+                                                                     vertices_from_lines)
+
+CRS = "EPSG:32632"
+
+# the snapping and splitting of connectivity_potential index into multi-part geometries (shapely 1.x only)
+SHAPELY_1 = shapely.__version__.startswith("1.")
+
+
+def street_layout(seed=42):
+    """A street grid (one line per block side), a diagonal street crossing it and dangling streets ending just short
+    of a crossing of the grid"""
+    rng = random.Random(seed)
+    streets = []
+    for a, b in itertools.product(range(4), range(3)):
+        streets.append(LineString([(a * 100.0, b * 100.0), (a * 100.0, b * 100.0 + 50.0),
+                                   (a * 100.0, (b + 1) * 100.0)]))
+        streets.append(LineString([(b * 100.0, a * 100.0), ((b + 1) * 100.0, a * 100.0)]))
+    streets.append(LineString([(10.0, 30.0), (290.0, 250.0)]))
+    for x, y in [(100.0, 100.0), (200.0, 200.0), (300.0, 100.0)]:
+        end = (x + rng.uniform(0.01, SNAP_TOLERANCE * 0.7), y - rng.uniform(0.01, SNAP_TOLERANCE * 0.7))
+        streets.append(LineString([(x + 30.0, y - 40.0), end]))
+    return streets
+
+
+def building_centroids(n=40, seed=42):
+    rng = random.Random(seed)
+    return gdf({"Name": ["B{i:03d}".format(i=i) for i in range(n)]},
+               geometry=[Point(rng.uniform(-20.0, 320.0), rng.uniform(-20.0, 320.0)) for _ in range(n)], crs=CRS)
+
+
+def brute_force_near_points(buildings, streets):
+    near_points = []
+    for point in buildings.geometry:
+        distance = 10e10
+        for line in streets:
+            candidate = line.interpolate(line.project(point))
+            if point.distance(candidate) < distance:
+                distance = point.distance(candidate)
+                nearest_point = candidate
+        near_points.append(nearest_point)
+    return near_points
+
+
+def brute_force_intersections(lines):
+    intersections = []
+    for line1, line2 in itertools.combinations(lines, 2):
+        if line1.intersects(line2):
+            intersection = line1.intersection(line2)
+            if intersection.geom_type == "Point":
+                intersections.append(intersection)
+            elif intersection.geom_type == "MultiPoint":
+                intersections.extend(intersection.geoms)
+    return intersections
+
+
+def brute_force_isolated_endpoints(lines):
+    isolated_endpoints = []
+    for i, line in enumerate(lines):
+        other_lines = lines[:i] + lines[i + 1:]
+        for q in [0, -1]:
+            endpoint = Point(line.coords[q])
+            if not any(endpoint.touches(other_line) for other_line in other_lines):
+                isolated_endpoints.append(endpoint)
+    return isolated_endpoints
+
+
+def brute_force_snappy_endings(lines, max_distance):
+    snapped_lines = list(lines)
+    snapping_points = vertices_from_lines(snapped_lines)
+    for endpoint in brute_force_isolated_endpoints(snapped_lines):
+        target = nearest_neighbor_within(snapping_points, endpoint, max_distance)
+        if not target:
+            continue
+        for i, snapped_line in enumerate(snapped_lines):
+            if endpoint.touches(snapped_line):
+                snapped_lines[i] = bend_towards(snapped_line, where=endpoint, to=target)
+                break
+        for i, snapping_point in enumerate(snapping_points):
+            if endpoint.equals(snapping_point):
+                snapping_points[i] = target
+                break
+    return [line for line in snapped_lines if line.length > 0]
+
+
+def brute_force_snap_points(points, lines, tolerance):
+    lines = list(lines)
+    for i in range(len(lines)):
+        for point in points:
+            line = lines[i]
+            distance_to_line = point.distance(line.interpolate(line.project(point)))
+            if (point.x, point.y) not in line.coords and distance_to_line < tolerance:
+                geometry = split(line, point.buffer(0.1)).geoms
+                line_1_points = [tuple(xy) for xy in geometry[0].coords[:-1]] + [(point.x, point.y)]
+                line_2_points = [(point.x, point.y)] + list(geometry[-1].coords[1:])
+                lines[i] = linemerge((LineString(line_1_points), LineString(line_2_points)))
+    return lines
+
+
+def brute_force_split(lines, points, tolerance):
+    line = gdf(geometry=lines, crs=CRS).geometry.unary_union
+    points = gdf(geometry=points, crs=CRS).geometry.unary_union
+    return [segment for segment in split(line, snap(points, line, tolerance)).geoms if segment.length > 0.01]
+
+
+def wkbs(geometries):
+    return [geometry.wkb for geometry in geometries]
+
+
+class TestConnectivityPotential(unittest.TestCase):
+    def test_near_analysis(self):
+        buildings = building_centroids()
+        streets = street_layout()
+        near_points = near_analysis(buildings, gdf(geometry=streets, crs=CRS), CRS)
+        self.assertEqual(list(near_points.Name), list(buildings.Name))
+        self.assertEqual(wkbs(near_points.geometry), wkbs(brute_force_near_points(buildings, streets)))
+
+    def test_compute_intersections(self):
+        streets = street_layout()
+        intersections = compute_intersections(streets, CRS)
+        self.assertGreater(len(intersections), 0)
+        self.assertEqual(wkbs(intersections.geometry), wkbs(brute_force_intersections(streets)))
+
+    def test_find_isolated_endpoints(self):
+        streets = street_layout()
+        isolated_endpoints = find_isolated_endpoints(streets)
+        self.assertGreater(len(isolated_endpoints), 0)
+        self.assertEqual(wkbs(isolated_endpoints), wkbs(brute_force_isolated_endpoints(streets)))
+
+    @unittest.skipUnless(SHAPELY_1, "connectivity_potential needs shapely 1.x to snap the streets")
+    def test_snap_and_split(self):
+        streets = street_layout()
+        snapped = snappy_endings(streets, SNAP_TOLERANCE, CRS)
+        expected_snapped = brute_force_snappy_endings(streets, SNAP_TOLERANCE)
+        self.assertEqual(wkbs(snapped.geometry), wkbs(expected_snapped))
+        # the dangling streets were snapped to the grid
+        self.assertNotEqual(wkbs(expected_snapped), wkbs(streets))
+
+        points = computer_end_points(snapped.geometry, CRS).append(
+            compute_intersections(snapped.geometry, CRS)).reset_index(drop=True)
+        expected_lines = brute_force_snap_points(list(points.geometry), expected_snapped, SNAP_TOLERANCE)
+        points, lines = snap_points(points, snapped.copy(), SNAP_TOLERANCE, CRS)
+        self.assertEqual(sorted(wkbs(lines.geometry)), sorted(set(wkbs(expected_lines))))
+        # the crossings of the diagonal street were added to the lines
+        self.assertNotEqual(sorted(wkbs(lines.geometry)), sorted(wkbs(snapped.geometry)))
+
+        segments = split_line_by_nearest_points(lines, points, 1.0, CRS)
+        expected_segments = brute_force_split(list(lines.geometry), list(points.geometry), 1.0)
+        self.assertEqual(sorted(wkbs(segments.geometry)), sorted(wkbs(expected_segments)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -5,6 +5,9 @@ Test the utilities/dbf.py file
 
 
 
+import datetime
+import os
+import struct
 import unittest
 import tempfile
 import pandas as pd
@@ -20,5 +23,64 @@ class TestDbf(unittest.TestCase):
         dbf.dataframe_to_dbf(df, dbf_path)
         assert_frame_equal(df, dbf.dbf_to_dataframe(dbf_path))
 
+    def test_roundtrip_types(self):
+        """Integers, missing values and non-ascii strings should survive the roundtrip too"""
+        df = pd.DataFrame({'Name': ['Zürich', 'B002', 'B003'], 'floors': [3, 2, 12], 'height': [9.5, np.nan, 40.0]})
+        dbf_path = tempfile.mktemp(suffix='.dbf')
+        dbf.dataframe_to_dbf(df, dbf_path)
+        assert_frame_equal(df, dbf.dbf_to_dataframe(dbf_path))
+        assert_frame_equal(df.set_index(df['Name'].values)[['floors']],
+                           dbf.dbf_to_dataframe(dbf_path, index='Name', cols=['floors']))
+
+    def test_cache(self):
+        df = pd.DataFrame({'a': ['foo', 'bar', 'baz'], 'b': np.random.randn(3)})
+        dbf_path = tempfile.mktemp(suffix='.dbf')
+        dbf.dataframe_to_dbf(df, dbf_path)
+        assert_frame_equal(df, dbf.dbf_to_dataframe(dbf_path, cache=True))
+        assert_frame_equal(df, dbf.read_dbf_cache(dbf_path))
+
+        # writing the dbf file again invalidates the cache
+        df['b'] = 1.0
+        dbf.dataframe_to_dbf(df, dbf_path)
+        self.assertIsNone(dbf.read_dbf_cache(dbf_path))
+        assert_frame_equal(df, dbf.dbf_to_dataframe(dbf_path, cache=True))
+
+    def test_cache_location_and_types(self):
+        """The cache is kept outside of the folder of the dbf file and keeps strings and dates"""
+        df = pd.DataFrame({'Name': ['B001', 'Zürich'], 'year': [2000, 2010],
+                           'date': [datetime.date(2020, 1, 31), datetime.date(2021, 6, 1)]})
+        folder = tempfile.mkdtemp()
+        dbf_path = os.path.join(folder, 'table.dbf')
+        dbf.dataframe_to_dbf(df, dbf_path, specs=[('C', 25, 0), ('N', 20, 0), ('D', 8, 0)])
+        assert_frame_equal(df, dbf.dbf_to_dataframe(dbf_path, cache=True))
+        self.assertEqual(os.listdir(folder), ['table.dbf'])
+        self.assertTrue(dbf.get_dbf_cache_path(dbf_path).endswith('.npz'))
+        assert_frame_equal(df, dbf.read_dbf_cache(dbf_path))
+
+    def test_values_too_wide(self):
+        df = pd.DataFrame({'Name': ['B001'], 'area': [1e30]})
+        with self.assertRaises(ValueError):
+            dbf.dataframe_to_dbf(df, tempfile.mktemp(suffix='.dbf'), specs=[('C', 25, 0), ('N', 20, 2)])
+
+    def test_strings_too_wide(self):
+        df = pd.DataFrame({'Name': ['B' * 256]})
+        with self.assertRaises(ValueError):
+            dbf.dataframe_to_dbf(df, tempfile.mktemp(suffix='.dbf'))
+
+    def test_deleted_records(self):
+        """Records marked as deleted are not read"""
+        df = pd.DataFrame({'Name': ['B001', 'B002', 'B003'], 'floors': [3, 2, 12]})
+        dbf_path = tempfile.mktemp(suffix='.dbf')
+        dbf.dataframe_to_dbf(df, dbf_path)
+        with open(dbf_path, 'r+b') as f:
+            _, _, _, _, _, header_length, record_length = struct.unpack(dbf.DBF_HEADER_FORMAT,
+                                                                        f.read(dbf.DBF_HEADER_SIZE))
+            f.seek(header_length + record_length)
+            f.write(b'*')
+        expected = df.drop(1).reset_index(drop=True)
+        assert_frame_equal(expected, dbf.dbf_to_dataframe(dbf_path))
+        assert_frame_equal(expected, dbf.dbf_to_dataframe(dbf_path, cache=True))
+
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
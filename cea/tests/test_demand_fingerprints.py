@@ -0,0 +1,87 @@
+"""
+Test the demand/demand_fingerprints.py file
+"""
+
+import os
+import shutil
+import tempfile
+import types
+import unittest
+
+import numpy as np
+import pandas as pd
+
+import cea.inputlocator
+from cea.demand.demand_fingerprints import DemandFingerprints, calc_fingerprint
+
+
+class TestDemandFingerprints(unittest.TestCase):
+    def setUp(self):
+        self.scenario = tempfile.mkdtemp()
+        self.locator = cea.inputlocator.InputLocator(self.scenario)
+        self.parameters = {'resolution_output': 'hourly', 'loads_output': []}
+        with open(self.locator.get_schedule_model_file('B1000'), 'w') as f:
+            f.write('DATE,Ve_lsp\n2009-01-01 00:00:00,0.5\n')
+
+    def tearDown(self):
+        shutil.rmtree(self.scenario, ignore_errors=True)
+
+    def bpr(self, U_wall=0.3):
+        return types.SimpleNamespace(name='B1000',
+                                     architecture=types.SimpleNamespace(U_wall=U_wall, U_roof=0.2),
+                                     hvac=pd.Series({'type_cs': 'HVAC_COOLING_AS3', 'Tcs_set_C': 26.0}),
+                                     building_systems={'Tcs_sup_ahu_0': 7.5},
+                                     solar=types.SimpleNamespace(I_sol=np.arange(8760, dtype=float)))
+
+    def test_fingerprint_changes_with_inputs(self):
+        fingerprint = calc_fingerprint(self.bpr(), self.locator, 'weather', self.parameters)
+        self.assertEqual(fingerprint, calc_fingerprint(self.bpr(), self.locator, 'weather', self.parameters))
+        self.assertNotEqual(fingerprint, calc_fingerprint(self.bpr(U_wall=0.4), self.locator, 'weather',
+                                                          self.parameters))
+        self.assertNotEqual(fingerprint, calc_fingerprint(self.bpr(), self.locator, 'other weather',
+                                                          self.parameters))
+        self.assertNotEqual(fingerprint, calc_fingerprint(self.bpr(), self.locator, 'weather',
+                                                          dict(self.parameters, resolution_output='monthly')))
+
+        bpr = self.bpr()
+        bpr.solar.I_sol[100] = 1.0
+        self.assertNotEqual(fingerprint, calc_fingerprint(bpr, self.locator, 'weather', self.parameters))
+
+        with open(self.locator.get_schedule_model_file('B1000'), 'w') as f:
+            f.write('DATE,Ve_lsp\n2009-01-01 00:00:00,0.6\n')
+        self.assertNotEqual(fingerprint, calc_fingerprint(self.bpr(), self.locator, 'weather', self.parameters))
+
+    def test_unchanged_buildings_keep_their_totals(self):
+        results_file = self.locator.get_demand_results_file('B1000')
+        with open(results_file, 'w') as f:
+            f.write('Name,QC_sys_kWh\nB1000,1.0\n')
+        path = self.locator.get_demand_fingerprints()
+        with DemandFingerprints(path) as store:
+            store.write([('B1000', 'abc', results_file, 'Name,QC_sys_MWhyr\nB1000,8.760\n')])
+        with DemandFingerprints(path) as store:
+            self.assertEqual(store.read_totals('B1000', 'abc', results_file), 'Name,QC_sys_MWhyr\nB1000,8.760\n')
+            self.assertIsNone(store.read_totals('B1000', 'def', results_file))
+            self.assertIsNone(store.read_totals('B1001', 'abc', self.locator.get_demand_results_file('B1001')))
+
+            # the results were overwritten (e.g. by a calculation without the fingerprints)
+            with open(results_file, 'w') as f:
+                f.write('Name,QC_sys_kWh\nB1000,2.0\n')
+            os.utime(results_file, ns=(0, 0))
+            self.assertIsNone(store.read_totals('B1000', 'abc', results_file))
+
+    def test_full_year_totals(self):
+        """The totals of the full year are kept for the typical days, as long as the inputs don't change"""
+        path = self.locator.get_demand_fingerprints()
+        with DemandFingerprints(path) as store:
+            store.write_full_year([('B1000', 'abc', 'Name,QC_sys_MWhyr\nB1000,8.760\n')])
+            # a calculation of typical days does not replace them
+            store.write([('B1000', 'typical', self.locator.get_demand_results_file('B1000'),
+                          'Name,QC_sys_MWhyr\nB1000,9.000\n')])
+        with DemandFingerprints(path) as store:
+            self.assertEqual(store.read_full_year('B1000', 'abc'), 'Name,QC_sys_MWhyr\nB1000,8.760\n')
+            self.assertIsNone(store.read_full_year('B1000', 'def'))
+            self.assertIsNone(store.read_full_year('B1001', 'abc'))
+
+
+if __name__ == '__main__':
+    unittest.main()
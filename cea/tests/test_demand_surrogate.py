@@ -0,0 +1,133 @@
+"""
+Test the demand/demand_surrogate.py file
+"""
+
+import os
+import shutil
+import tempfile
+import types
+import unittest
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+
+import cea.inputlocator
+from cea.demand.demand_surrogate import (ANNUAL_TARGETS, DemandSurrogate, END_USES, MONTHS, calc_validation_report,
+                                         read_monthly_demand, simulate_targets, train_surrogate)
+
+
+def make_buildings(n, seed=0):
+    random = np.random.RandomState(seed)
+    features = pd.DataFrame({'GFA_m2': random.uniform(500.0, 5000.0, n),
+                             'U_wall': random.uniform(0.2, 1.5, n),
+                             'HDD_Kd': np.full(n, 3000.0),
+                             'class_hs': random.choice(['RADIATOR', 'FLOOR'], n)},
+                            index=pd.Index(['B%04d' % i for i in range(n)], name='Name'))
+    heating = 20.0 + 60.0 * features['U_wall'] + 10.0 * (features['class_hs'] == 'FLOOR')
+    targets = pd.DataFrame({'QH_sys_MWhyr': heating + random.normal(0.0, 1.0, n),
+                            'E_sys_MWhyr': 40.0 + random.normal(0.0, 1.0, n)}, index=features.index)
+    return features, targets
+
+
+class TestDemandSurrogate(unittest.TestCase):
+    def test_train_and_predict(self):
+        features, targets = make_buildings(60)
+        model, prediction, std = train_surrogate(features, targets)
+        report = calc_validation_report(targets, prediction, std, features['GFA_m2'])
+        self.assertGreater(report.loc['QH_sys_MWhyr', 'r2'], 0.95)
+        self.assertLess(abs(report.loc['QH_sys_MWhyr', 'error_total_%']), 2.0)
+        self.assertGreater(report.loc['QH_sys_MWhyr', 'coverage_95_%'], 80.0)
+
+        new_features, new_targets = make_buildings(10, seed=1)
+        new_prediction, new_std = model.predict(new_features)
+        np.testing.assert_allclose(new_prediction['QH_sys_MWhyr'], new_targets['QH_sys_MWhyr'], atol=5.0)
+        self.assertTrue((new_std.values > 0.0).all())
+
+    def test_training_domain(self):
+        features, targets = make_buildings(30)
+        model = DemandSurrogate.fit(features, targets, alpha=1.0)
+        self.assertTrue(model.in_domain(features).all())
+
+        new_features = features.iloc[:4].copy()
+        new_features.iloc[1, new_features.columns.get_loc('U_wall')] = 3.0
+        new_features.iloc[2, new_features.columns.get_loc('HDD_Kd')] = 2000.0
+        new_features.iloc[3, new_features.columns.get_loc('class_hs')] = 'CEILING'
+        self.assertEqual(list(model.in_domain(new_features)), [True, False, False, False])
+
+        # the uncertainty grows outside the training domain
+        _, std = model.predict(new_features.iloc[:2])
+        self.assertGreater(std.iloc[1, 0], std.iloc[0, 0])
+
+    def test_json(self):
+        features, targets = make_buildings(20)
+        model = DemandSurrogate.fit(features, targets, alpha=1.0)
+        folder = tempfile.mkdtemp()
+        try:
+            path = os.path.join(folder, 'demand_surrogate_model.json')
+            model.to_json(path)
+            loaded = DemandSurrogate.from_json(path)
+        finally:
+            shutil.rmtree(folder, ignore_errors=True)
+        pd.testing.assert_frame_equal(model.predict(features)[0], loaded.predict(features)[0])
+        pd.testing.assert_series_equal(model.in_domain(features), loaded.in_domain(features))
+
+
+class TestReadMonthlyDemand(unittest.TestCase):
+    def setUp(self):
+        self.scenario = tempfile.mkdtemp()
+        self.locator = cea.inputlocator.InputLocator(self.scenario)
+
+    def tearDown(self):
+        shutil.rmtree(self.scenario, ignore_errors=True)
+
+    def test_hourly_and_monthly_results(self):
+        hourly = pd.DataFrame({'DATE': pd.date_range('2009-01-01', periods=8760, freq='H').astype(str)})
+        for end_use in END_USES:
+            hourly[end_use + '_kWh'] = 1.0
+        hourly.to_csv(self.locator.get_demand_results_file('B1000'), index=False)
+        monthly = read_monthly_demand(self.locator, 'B1000')
+        self.assertAlmostEqual(monthly.loc['january', 'QH_sys'], 31 * 24 / 1000.0)
+        self.assertAlmostEqual(monthly.loc['february', 'E_sys'], 28 * 24 / 1000.0)
+
+        monthly_results = pd.DataFrame({'Month': MONTHS, 'Name': 'B1001'})
+        for end_use in END_USES:
+            monthly_results[end_use + '_MWhyr'] = 2.0
+        monthly_results.to_csv(self.locator.get_demand_results_file('B1001'), index=False)
+        self.assertEqual(list(read_monthly_demand(self.locator, 'B1001')['Qww_sys']), [2.0] * 12)
+
+        hourly.drop(columns=['QC_sys_kWh']).to_csv(self.locator.get_demand_results_file('B1002'), index=False)
+        with self.assertRaises(ValueError):
+            read_monthly_demand(self.locator, 'B1002')
+
+    def test_simulate_targets(self):
+        """The buildings outside the training domain are simulated without changing the config or the totals"""
+        config = types.SimpleNamespace(demand=types.SimpleNamespace(buildings=['B1000', 'B1001', 'B1002']))
+        with open(self.locator.get_total_demand(), 'w') as f:
+            f.write('Name,QH_sys_MWhyr\nB1000,1.0\nB1001,2.0\nB1002,3.0\n')
+        for building in ['B1001', 'B1002']:
+            open(self.locator.get_radiation_building(building), 'w').close()
+
+        def demand_calculation(locator, demand_config, write_totals=True):
+            self.assertFalse(write_totals)
+            for building in demand_config.demand.buildings:
+                totals = pd.DataFrame({'Name': [building]})
+                for target in ANNUAL_TARGETS:
+                    totals[target] = 10.0
+                totals.to_csv(locator.get_temporary_file('%sT.csv' % building), index=False)
+                pd.DataFrame({'Month': MONTHS, **{end_use + '_MWhyr': 1.0 for end_use in END_USES}}).to_csv(
+                    locator.get_demand_results_file(building), index=False)
+
+        with mock.patch('cea.demand.demand_main.demand_calculation', demand_calculation):
+            targets = simulate_targets(self.locator, config, ['B1001', 'B1002'],
+                                       pd.Series(1000.0, index=['B1000', 'B1001', 'B1002']))
+        self.assertEqual(list(targets.index), ['B1001', 'B1002'])
+        self.assertEqual(list(targets['QH_sys_MWhyr']), [10.0, 10.0])
+        self.assertEqual(list(targets['E_sys_january_MWh']), [1.0, 1.0])
+        self.assertEqual(config.demand.buildings, ['B1000', 'B1001', 'B1002'])
+        with open(self.locator.get_total_demand()) as f:
+            self.assertEqual(f.read(), 'Name,QH_sys_MWhyr\nB1000,1.0\nB1001,2.0\nB1002,3.0\n')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+"""
+Test the utilities/epwreader.py file
+"""
+
+import math
+import os
+import pickle
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+import cea.inputlocator
+from cea.utilities import epwreader
+
+
+class TestEpwReader(unittest.TestCase):
+    def setUp(self):
+        self.cache_folder = epwreader.CACHE_FOLDER
+        epwreader.CACHE_FOLDER = tempfile.mkdtemp()
+        epwreader._weather_cache.clear()
+        self.weather_path = cea.inputlocator.InputLocator(None).get_weather('Zug_inducity_2009')
+
+    def tearDown(self):
+        shutil.rmtree(epwreader.CACHE_FOLDER, ignore_errors=True)
+        epwreader.CACHE_FOLDER = self.cache_folder
+        epwreader._weather_cache.clear()
+
+    def test_cache_matches_epw_file(self):
+        parsed = epwreader.epw_reader(self.weather_path)
+        self.assertEqual(len(os.listdir(epwreader.CACHE_FOLDER)), 1)
+
+        # a new process reads the cache on disk
+        epwreader._weather_cache.clear()
+        cached = epwreader.epw_reader(self.weather_path)
+        pd.testing.assert_frame_equal(cached, parsed)
+        pd.testing.assert_frame_equal(cached, epwreader.parse_epw(self.weather_path))
+
+        # callers get their own copy
+        cached['drybulb_C'] = 0.0
+        self.assertFalse((epwreader.epw_reader(self.weather_path)['drybulb_C'] == 0.0).all())
+
+    def test_derived_variables_are_vectorised(self):
+        weather_data = epwreader.epw_reader(self.weather_path)
+        for hour in [0, 1000, 5000]:
+            row = weather_data.iloc[hour]
+            Tw = row.drybulb_C * math.atan(0.151977 * ((row.relhum_percent + 8.313659) ** 0.5)) + math.atan(
+                row.drybulb_C + row.relhum_percent) - math.atan(row.relhum_percent - 1.676331) + (
+                         0.00391838 * (row.relhum_percent ** (3 / 2))) * math.atan(
+                0.023101 * row.relhum_percent) - 4.686035
+            self.assertAlmostEqual(row.wetbulb_C, Tw)
+            self.assertAlmostEqual(epwreader.calc_skytemp(row.drybulb_C, row.dewpoint_C, row.opaqskycvr_tenths),
+                                   row.skytemp_C)
+
+    def test_pickle_sends_path(self):
+        weather_data = epwreader.epw_reader(self.weather_path, columns=['year', 'drybulb_C'])
+        self.assertLess(len(pickle.dumps(weather_data)), 1000)
+        pd.testing.assert_frame_equal(pickle.loads(pickle.dumps(weather_data)), weather_data)
+
+        # changed weather data is pickled with the data
+        weather_data['drybulb_C'] = np.zeros(len(weather_data))
+        unpickled = pickle.loads(pickle.dumps(weather_data))
+        self.assertTrue((unpickled['drybulb_C'] == 0.0).all())
+
+        # ... no matter how it was changed
+        for change in [lambda df: df.loc.__setitem__((0, 'drybulb_C'), 99.0),
+                       lambda df: df.iloc.__setitem__((1, 1), 99.0),
+                       lambda df: df.clip(upper=0.0, inplace=True),
+                       lambda df: df.rename(columns={'year': 'Year'}, inplace=True)]:
+            weather_data = epwreader.epw_reader(self.weather_path, columns=['year', 'drybulb_C'])
+            change(weather_data)
+            pd.testing.assert_frame_equal(pickle.loads(pickle.dumps(weather_data)), pd.DataFrame(weather_data))
+
+    def test_cache_keeps_text_columns(self):
+        weather_data = pd.DataFrame({'drybulb_C': [1.5, 2.5], 'presweathcodes': ['999999999', '92999999']})
+        cache_path = os.path.join(epwreader.CACHE_FOLDER, 'weather.npy')
+        epwreader.write_weather_cache(cache_path, weather_data)
+        cached = epwreader.read_weather_cache(cache_path)
+        self.assertEqual(list(cached['presweathcodes']), ['999999999', '92999999'])
+        self.assertEqual(list(cached['drybulb_C']), [1.5, 2.5])
+
+
+if __name__ == '__main__':
+    unittest.main()
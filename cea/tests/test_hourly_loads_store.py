@@ -0,0 +1,71 @@
+"""
+Test the demand/hourly_loads_store.py file
+"""
+
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+import numpy as np
+import pandas as pd
+
+import cea.inputlocator
+import cea.plots.cache
+from cea.demand.hourly_loads_store import HourlyLoadsStore, write_hourly_loads_store
+from cea.plots.demand import DemandPlotBase
+
+BUILDINGS = ['B1000', 'B1001', 'B1002']
+
+
+class TestHourlyLoadsStore(unittest.TestCase):
+    def setUp(self):
+        self.project = tempfile.mkdtemp()
+        self.locator = cea.inputlocator.InputLocator(os.path.join(self.project, 'scenario'))
+        self.plot = DemandPlotBase(self.project, {'buildings': BUILDINGS, 'scenario-name': 'scenario'},
+                                   cea.plots.cache.NullPlotCache())
+        self.plot.buildings = BUILDINGS  # there is no zone to check the buildings against
+        dates = pd.date_range('2005-01-01', periods=24, freq='H').astype(str)
+        for i, building in enumerate(BUILDINGS):
+            hourly_df = pd.DataFrame({field: np.arange(24) * (i + 1) + j * 0.5
+                                      for j, field in enumerate(self.plot.demand_analysis_fields)}, index=dates)
+            hourly_df.insert(0, 'Name', building)
+            hourly_df['T_ext_C'] = 20.0 + i
+            hourly_df.to_csv(self.locator.get_demand_results_file(building), index_label='DATE', float_format='%.3f')
+
+    def tearDown(self):
+        shutil.rmtree(self.project, ignore_errors=True)
+
+    def test_store_matches_csv_files(self):
+        write_hourly_loads_store(self.locator, BUILDINGS)
+        store = HourlyLoadsStore.open(self.locator, BUILDINGS)
+        self.assertEqual(store.buildings, BUILDINGS)
+
+        building_df = store.read_building('B1001')
+        csv_df = pd.read_csv(self.locator.get_demand_results_file('B1001')).set_index('DATE')
+        pd.testing.assert_frame_equal(building_df, csv_df, check_dtype=False)
+
+        summed_df = store.sum(['GRID_kWh', 'T_ext_C'], ['B1000', 'B1002'])
+        self.assertTrue(np.allclose(summed_df['GRID_kWh'].values, np.arange(24) * 4 + 2 * 13 * 0.5))
+        self.assertTrue(np.allclose(summed_df['T_ext_C'].values, 42.0))
+
+    def test_plot_reads_store(self):
+        from_csv = self.plot._calculate_hourly_loads()
+        write_hourly_loads_store(self.locator, BUILDINGS)
+        from_store = self.plot._calculate_hourly_loads()
+        pd.testing.assert_frame_equal(from_store, from_csv, check_dtype=False)
+
+    def test_outdated_store_is_not_used(self):
+        write_hourly_loads_store(self.locator, BUILDINGS[:2])
+        self.assertIsNotNone(HourlyLoadsStore.open(self.locator, BUILDINGS[:2]))
+        self.assertIsNone(HourlyLoadsStore.open(self.locator, BUILDINGS))
+
+        # a building was simulated again after the store was written
+        future = time.time() + 10
+        os.utime(self.locator.get_demand_results_file('B1000'), (future, future))
+        self.assertIsNone(HourlyLoadsStore.open(self.locator, BUILDINGS[:2]))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,8 +2,10 @@
 
 
 import unittest
+import copy
 import os
 import pickle
+import tempfile
 import cea.inputlocator
 
 class TestInputLocator(unittest.TestCase):
@@ -36,3 +38,44 @@ class TestInputLocator(unittest.TestCase):
         locator = pickle.loads(pickle.dumps(self.locator))
         self.assertEqual(locator.scenario, self.locator.scenario)
         self.assertEqual(locator.get_total_demand(), self.locator.get_total_demand())
+
+
+class TestLazyInputLocator(unittest.TestCase):
+
+    def test_locator_methods_wrapped_on_access(self):
+        locator = cea.inputlocator.InputLocator(tempfile.mkdtemp())
+        self.assertNotIn("get_total_demand", locator.__dict__)
+        self.assertTrue(hasattr(locator.get_total_demand, "read"))
+        self.assertIn("get_total_demand", locator.__dict__)
+        # locator methods only defined in schemas.yml
+        self.assertIn("PV_results", dir(locator))
+        self.assertEqual(locator.PV_results(building="B001"), os.path.join(
+            locator.scenario, "outputs", "data", "potentials", "solar", "B001_PV.csv"))
+
+    def test_unpickled_locators_are_reused(self):
+        """Unpickling the same locator in a worker process (``repeat(locator, n)``) should only restore it once"""
+        original = cea.inputlocator.InputLocator(tempfile.mkdtemp())
+        pickled = pickle.dumps(original)
+        locator = pickle.loads(pickled)
+        self.assertIs(locator, pickle.loads(pickled))
+        self.assertEqual(locator.get_total_demand(), original.get_total_demand())
+
+    def test_restored_locators_are_bounded(self):
+        locators = [cea.inputlocator.InputLocator(tempfile.mkdtemp())
+                    for _ in range(cea.inputlocator.MAX_RESTORED_LOCATORS + 1)]
+        first = pickle.loads(pickle.dumps(locators[0]))
+        for locator in locators[1:]:
+            pickle.loads(pickle.dumps(locator))
+        # the least recently used locator was dropped
+        self.assertIsNot(first, pickle.loads(pickle.dumps(locators[0])))
+
+    def test_copies_are_independent(self):
+        locator = pickle.loads(pickle.dumps(cea.inputlocator.InputLocator(tempfile.mkdtemp())))
+        for copy_function in [copy.copy, copy.deepcopy]:
+            locator_copy = copy_function(locator)
+            self.assertIsNot(locator_copy, locator)
+            self.assertIsNot(copy_function(locator), locator_copy)
+            locator_copy.scenario = tempfile.mkdtemp()
+            self.assertNotEqual(locator.scenario, locator_copy.scenario)
+            self.assertEqual(locator_copy.get_total_demand(), os.path.join(
+                locator_copy.scenario, "outputs", "data", "demand", "Total_demand.csv"))
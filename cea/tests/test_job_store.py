@@ -0,0 +1,203 @@
+"""
+Test the interfaces/dashboard/job_store.py file
+"""
+
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+
+from cea.interfaces.dashboard.job_store import (JobStore, WorkerPool, JOB_STATE_PENDING, JOB_STATE_STARTED,
+                                                JOB_STATE_SUCCESS, JOB_STATE_ERROR, TRUNCATED_OUTPUT_MESSAGE)
+from cea.worker import start_thread
+
+
+class SleepingWorkerPool(WorkerPool):
+    """Instead of running the job, the workers just sleep"""
+    def __init__(self, store, number_of_workers):
+        super(SleepingWorkerPool, self).__init__(store, number_of_workers)
+        self.started = []
+
+    def start_worker(self, jobid):
+        self.started.append(jobid)
+        return subprocess.Popen([sys.executable, "-c", "import time; time.sleep(60)"])
+
+
+class TestJobStore(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.path = os.path.join(self.folder, 'cea-jobs.sqlite')
+        self.store = JobStore(self.path, max_output_size_kb=1, max_jobs=2)
+
+    def tearDown(self):
+        self.store.close()
+        shutil.rmtree(self.folder, ignore_errors=True)
+
+    def test_jobs_survive_restart(self):
+        running = self.store.new_job('demand', {'buildings': ['B1000']})
+        queued = self.store.new_job('radiation', None)
+        self.store.queue(queued.id)
+        self.store.set_state(running.id, JOB_STATE_STARTED)
+        self.store.append_output(running.id, 'simulating B1000\n')
+        self.store.close()
+
+        self.store = JobStore(self.path, max_output_size_kb=1, max_jobs=2)
+        self.store.recover()
+        self.assertEqual(self.store.get(running.id).state, JOB_STATE_ERROR)
+        self.assertEqual(self.store.get(running.id).parameters, {'buildings': ['B1000']})
+        self.assertEqual(self.store.read_output(running.id), 'simulating B1000\n')
+        self.assertEqual(self.store.next_queued().id, queued.id)
+        self.assertRaises(KeyError, self.store.get, 1000)
+
+    def test_output_is_rotated(self):
+        job = self.store.new_job('demand', None)
+        for i in range(200):
+            self.store.append_output(job.id, 'line {i:04d}\n'.format(i=i))
+        output = self.store.read_output(job.id)
+        self.assertTrue(output.startswith(TRUNCATED_OUTPUT_MESSAGE))
+        self.assertTrue(output.endswith('line 0199\n'))
+        self.assertLessEqual(len(output) - len(TRUNCATED_OUTPUT_MESSAGE), 1024)
+
+    def test_history_is_pruned(self):
+        jobs = [self.store.new_job('demand', None) for _ in range(3)]
+        for job in jobs:
+            self.store.set_state(job.id, JOB_STATE_SUCCESS)
+        self.store.new_job('demand', None)
+        self.assertEqual([job.id for job in self.store.list()], [jobs[1].id, jobs[2].id, jobs[2].id + 1])
+
+    def test_queue_priorities(self):
+        low = self.store.new_job('demand', None)
+        high = self.store.new_job('radiation', None, priority=10)
+        self.store.queue(low.id)
+        self.store.queue(high.id)
+        self.assertEqual(self.store.next_queued().id, high.id)
+        self.assertEqual(self.store.next_queued(running=[high.id]).id, low.id)
+        self.store.set_state(low.id, JOB_STATE_SUCCESS)
+        self.assertIsNone(self.store.next_queued(running=[high.id]))
+
+
+class TestWorkerPool(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.store = JobStore(os.path.join(self.folder, 'cea-jobs.sqlite'))
+        self.pool = SleepingWorkerPool(self.store, number_of_workers=2)
+
+    def tearDown(self):
+        self.pool.shutdown()
+        self.store.close()
+        shutil.rmtree(self.folder, ignore_errors=True)
+
+    def test_number_of_workers_is_bounded(self):
+        jobs = [self.store.new_job('demand', None) for _ in range(4)]
+        for job in jobs:
+            self.pool.submit(job.id)
+        self.assertEqual(self.pool.started, [jobs[0].id, jobs[1].id])
+
+        self.store.set_state(jobs[0].id, JOB_STATE_SUCCESS)
+        self.pool.finished(jobs[0].id)
+        self.assertEqual(self.pool.started, [jobs[0].id, jobs[1].id, jobs[2].id])
+
+    def test_output_is_read_from_pipe(self):
+        output = []
+        self.pool.on_output = lambda jobid, msg: output.append((jobid, msg))
+        popen = subprocess.Popen([sys.executable, "-c", "for i in range(1000): print('line', i)"],
+                                 stdout=subprocess.PIPE)
+        self.pool.read_output(1, popen.stdout)
+        popen.wait()
+        self.assertTrue(all(jobid == 1 for jobid, _ in output))
+        self.assertLess(len(output), 1000)
+        self.assertEqual(''.join(msg for _, msg in output).splitlines(), ['line {i}'.format(i=i) for i in range(1000)])
+
+    def test_output_is_flushed_when_job_finishes(self):
+        """The output of a worker arrives before the end of its job is reported, even if the worker is still running"""
+        output = []
+        self.pool.on_output = lambda jobid, msg: output.append(msg)
+        popen = subprocess.Popen([sys.executable, "-u", "-c",
+                                  "import time; from cea.worker import release_pipe\n"
+                                  "for i in range(1000): print('line', i)\n"
+                                  "release_pipe(); time.sleep(10)"],
+                                 stdout=subprocess.PIPE)
+        self.pool.worker_processes[1] = popen
+        self.pool.output_readers[1] = start_thread(self.pool.read_output, 1, popen.stdout)
+        self.pool.finished(1)
+        self.assertIsNone(popen.poll())
+        self.assertEqual(''.join(output).splitlines(), ['line {i}'.format(i=i) for i in range(1000)])
+        popen.kill()
+        popen.wait()
+
+    def test_dead_worker_is_reaped(self):
+        jobs = [self.store.new_job('demand', None) for _ in range(3)]
+        for job in jobs:
+            self.pool.submit(job.id)
+        self.pool.worker_processes[jobs[0].id].kill()
+        self.pool.worker_processes[jobs[0].id].wait()
+        self.pool.schedule()
+        self.assertEqual(self.store.get(jobs[0].id).state, JOB_STATE_ERROR)
+        self.assertEqual(self.store.get(jobs[2].id).state, JOB_STATE_PENDING)
+        self.assertEqual(self.pool.started, [job.id for job in jobs])
+
+
+class StreamingWorkerPool(WorkerPool):
+    """The workers write a line and then keep the pipe open without writing anything else"""
+    def worker_command(self, jobid):
+        return [sys.executable, "-u", "-c", "import time; print('simulating B1000'); time.sleep(60)"]
+
+
+def available_async_modes():
+    """The async modes of Flask-SocketIO to test the server with - the dashboard uses gevent if it is installed"""
+    modes = ["threading"]
+    try:
+        import gevent  # noqa: F401
+        modes.append("gevent")
+    except ImportError:
+        pass
+    return modes
+
+
+class TestServerWhileStreaming(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.store = JobStore(os.path.join(self.folder, 'cea-jobs.sqlite'))
+
+    def tearDown(self):
+        self.store.close()
+        shutil.rmtree(self.folder, ignore_errors=True)
+
+    def test_requests_are_served_while_a_job_streams_output(self):
+        """Reading the pipe of a worker that is quiet must not block the server (e.g. the gevent hub)"""
+        from flask import Flask
+        from flask_socketio import SocketIO
+
+        for async_mode in available_async_modes():
+            with self.subTest(async_mode=async_mode):
+                app = Flask(__name__)
+                socketio = SocketIO(app, async_mode=async_mode)
+                app.add_url_rule('/ping', 'ping', lambda: 'pong')
+                output = []
+
+                def on_output(jobid, msg):
+                    output.append(msg)
+                    socketio.emit("cea-worker-message", {"message": msg, "jobid": jobid})
+
+                pool = StreamingWorkerPool(self.store, number_of_workers=1, on_output=on_output,
+                                           sleep=socketio.sleep)
+                try:
+                    t0 = time.time()
+                    pool.submit(self.store.new_job('demand', None).id)
+                    while not output and time.time() - t0 < 10.0:
+                        socketio.sleep(0.05)  # let the server run its other tasks
+                    self.assertEqual(''.join(output), 'simulating B1000\n')
+                    socketio.sleep(0.1)
+                    response = app.test_client().get('/ping')
+                    self.assertEqual(response.data, b'pong')
+                    # the worker keeps its pipe open for a minute
+                    self.assertLess(time.time() - t0, 10.0)
+                finally:
+                    pool.shutdown()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,132 @@
+"""
+Test the plots/cache.py file
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import pandas as pd
+
+import cea.plots.cache
+
+
+class FakePlot(object):
+    """The parts of a PlotBase used by the cache"""
+    category_name = 'fake-category'
+
+    def __init__(self, input_path, parameters=None):
+        self.input_path = input_path
+        self.parameters = parameters or {'buildings': ['B1000']}
+        self.input_files = [(lambda: self.input_path, ())]
+
+    def id(self):
+        return 'fake-plot'
+
+
+class TestPlotCache(unittest.TestCase):
+    def setUp(self):
+        self.project = tempfile.mkdtemp()
+        self.input_path = os.path.join(self.project, 'input.csv')
+        self.write_input('a,b\n1,2\n')
+        self.calls = 0
+
+    def tearDown(self):
+        shutil.rmtree(self.project, ignore_errors=True)
+
+    def write_input(self, contents):
+        with open(self.input_path, 'w') as f:
+            f.write(contents)
+
+    def producer(self, size=10):
+        self.calls += 1
+        return pd.DataFrame({'value': range(size)})
+
+    def test_touching_inputs_keeps_entry(self):
+        cache = cea.plots.cache.PlotCache(self.project)
+        plot = FakePlot(self.input_path)
+        first = cache.lookup('fake-category/data', plot, self.producer)
+        # re-running a script that produces the same results
+        self.write_input('a,b\n1,2\n')
+        os.utime(self.input_path, (0, 0))
+        second = cea.plots.cache.PlotCache(self.project).lookup('fake-category/data', plot, self.producer)
+        self.assertEqual(self.calls, 1)
+        pd.testing.assert_frame_equal(first, second)
+
+    def test_changed_inputs_invalidate_entry(self):
+        cache = cea.plots.cache.PlotCache(self.project)
+        plot = FakePlot(self.input_path)
+        cache.lookup('fake-category/data', plot, self.producer)
+        self.write_input('a,b\n1,3\n')
+        cache.lookup('fake-category/data', plot, self.producer)
+        self.assertEqual(self.calls, 2)
+
+    def test_changed_parameters_invalidate_entry(self):
+        cache = cea.plots.cache.PlotCache(self.project)
+        cache.lookup('fake-category/data', FakePlot(self.input_path), self.producer)
+        cache.lookup('fake-category/data', FakePlot(self.input_path, {'buildings': ['B1001']}), self.producer)
+        self.assertEqual(self.calls, 2)
+
+    def test_same_values_share_blob(self):
+        cache = cea.plots.cache.PlotCache(self.project)
+        cache.lookup('fake-category/data', FakePlot(self.input_path), self.producer)
+        cache.lookup('fake-category/other-data', FakePlot(self.input_path), self.producer)
+        self.assertEqual(self.calls, 2)
+        self.assertEqual(len(cache._blob_sizes), 1)
+
+    def test_disk_size_is_bounded(self):
+        cache = cea.plots.cache.PlotCache(self.project, max_disk_size_mb=1)
+        plot = FakePlot(self.input_path)
+        for i in range(4):
+            cache.lookup('fake-category/data-{i}'.format(i=i), plot, lambda: self.producer(50000 + i))
+        self.assertLessEqual(cache._disk_size, cache.max_disk_size)
+        self.assertLess(len(cache._blob_sizes), 4)
+
+        # the oldest entry was evicted, the newest one is still there
+        cache.lookup('fake-category/data-3', plot, lambda: self.producer(50003))
+        self.assertEqual(self.calls, 4)
+        cache.lookup('fake-category/data-0', plot, lambda: self.producer(50000))
+        self.assertEqual(self.calls, 5)
+
+        # the size on disk is remembered between sessions
+        self.assertEqual(cea.plots.cache.PlotCache(self.project, max_disk_size_mb=1)._disk_size, cache._disk_size)
+
+    def count_keys(self):
+        return sum(len(files) for _, _, files in os.walk(os.path.join(self.project, '.cache', 'plots', 'keys')))
+
+    def test_evicted_blobs_remove_their_keys(self):
+        cache = cea.plots.cache.PlotCache(self.project, max_disk_size_mb=1)
+        plot = FakePlot(self.input_path)
+        for i in range(4):
+            cache.lookup('fake-category/data-{i}'.format(i=i), plot, lambda: self.producer(50000 + i))
+            # a second key pointing to the same blob
+            cache.lookup('fake-category/copy-{i}'.format(i=i), plot, lambda: self.producer(50000 + i))
+        self.assertEqual(self.count_keys(), 2 * len(cache._blob_sizes))
+
+        # keys left behind by an earlier version (or a crash) are swept when the cache is opened
+        blob = next(iter(cache._blob_sizes))
+        os.remove(cache._blob_file(blob))
+        cache = cea.plots.cache.PlotCache(self.project, max_disk_size_mb=1)
+        self.assertEqual(self.count_keys(), 2 * len(cache._blob_sizes))
+
+    def test_memory_size_is_bounded(self):
+        cache = cea.plots.cache.MemoryPlotCache(self.project, max_memory_size_mb=1)
+        plot = FakePlot(self.input_path)
+        for i in range(4):
+            cache.lookup('fake-category/data-{i}'.format(i=i), plot, lambda: self.producer(50000 + i))
+        self.assertLessEqual(cache._memory_size, cache.max_memory_size)
+        self.assertLess(len(cache._cache), 4)
+        # evicted from memory, but still on disk
+        cache.lookup('fake-category/data-0', plot, lambda: self.producer(50000))
+        self.assertEqual(self.calls, 4)
+
+    def test_plot_div(self):
+        cache = cea.plots.cache.MemoryPlotCache(self.project)
+        plot = FakePlot(self.input_path)
+        self.assertEqual(cache.lookup_plot_div(plot, lambda: '<div></div>'), '<div></div>')
+        self.assertEqual(cea.plots.cache.PlotCache(self.project).lookup_plot_div(plot, lambda: None), '<div></div>')
+
+
+if __name__ == '__main__':
+    unittest.main()
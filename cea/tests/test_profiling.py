@@ -0,0 +1,60 @@
+"""
+Test the utilities/profiling.py file
+"""
+
+import os
+import tempfile
+import unittest
+
+import pandas as pd
+
+from cea.utilities import parallel, profiling
+
+
+def profiled_square(building_name, x):
+    timer = profiling.StageTimer(building_name)
+    with profiling.stage("square", building_name, size=x):
+        result = x * x
+    timer.lap("lap", size=x)
+    return result
+
+
+class TestProfiling(unittest.TestCase):
+    def tearDown(self):
+        profiling.enable(False)
+        profiling.pop_records()
+
+    def test_disabled(self):
+        profiling.enable(False)
+        self.assertEqual(profiled_square("B1000", 3), 9)
+        self.assertEqual(profiling.pop_records(), [])
+
+    def test_stages(self):
+        profiling.enable()
+        profiled_square("B1000", 3)
+        records = profiling.pop_records()
+        self.assertEqual([(r["stage"], r["building"], r["size"]) for r in records],
+                         [("square", "B1000", 3), ("lap", "B1000", 3)])
+        self.assertTrue(all(r["wall_time_s"] >= 0.0 and r["rss_mb"] > 0.0 for r in records))
+        self.assertEqual(profiling.pop_records(), [])
+
+    def test_vectorize_collects_worker_records(self):
+        profiling.enable()
+        buildings = ["B{}".format(i) for i in range(4)]
+        result = parallel.vectorize(profiled_square, processes=2)(buildings, range(4))
+        self.assertEqual(result, [0, 1, 4, 9])
+        records = profiling.pop_records()
+        self.assertEqual(sorted(r["building"] for r in records if r["stage"] == "square"), buildings)
+
+    def test_write_timing_file(self):
+        profiling.enable()
+        profiled_square("B1000", 3)
+        timing_file = os.path.join(tempfile.mkdtemp(), "timing", "demand_timing.csv")
+        profiling.write_timing_file(profiling.pop_records(), timing_file)
+        timing_df = pd.read_csv(timing_file)
+        self.assertEqual(list(timing_df.columns), profiling.TIMING_COLUMNS)
+        self.assertEqual(sorted(timing_df["stage"]), ["lap", "square"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+"""
+Test the resources/radiation_daysim/radiation_fingerprints.py file
+"""
+
+import os
+import shutil
+import tempfile
+import types
+import unittest
+
+import pandas as pd
+from geopandas import GeoDataFrame
+from shapely.geometry import box
+
+import cea.inputlocator
+from cea.resources.radiation_daysim.radiation_fingerprints import (RadiationFingerprints, RADIATION_PARAMETERS,
+                                                                   calc_fingerprints)
+
+UTM_ZONE_32N = 'EPSG:32632'
+
+
+class TestRadiationFingerprints(unittest.TestCase):
+    def setUp(self):
+        self.scenario = tempfile.mkdtemp()
+        self.locator = cea.inputlocator.InputLocator(self.scenario)
+        for path in [self.locator.get_terrain(), self.locator.get_weather_file()]:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'w') as f:
+                f.write('data')
+        self.settings = types.SimpleNamespace(shading_context_radius=100.0,
+                                              **{parameter: 1 for parameter in RADIATION_PARAMETERS})
+        # B1000 and B1001 are neighbours, B1002 is 1 km away
+        self.zone_df = GeoDataFrame({'Name': ['B1000', 'B1001', 'B1002'], 'height_ag': [10.0, 10.0, 10.0],
+                                     'floors_ag': [3, 3, 3]},
+                                    geometry=[box(0, 0, 20, 20), box(50, 0, 70, 20), box(1000, 0, 1020, 20)],
+                                    crs=UTM_ZONE_32N)
+        self.surroundings_df = GeoDataFrame({'Name': ['B2000'], 'height_ag': [20.0], 'floors_ag': [6]},
+                                            geometry=[box(1050, 0, 1070, 20)], crs=UTM_ZONE_32N)
+        self.architecture_df = pd.DataFrame({'Name': ['B1000', 'B1001', 'B1002'], 'wwr_south': [0.4, 0.4, 0.4]})
+        self.surface_properties = pd.DataFrame({'Name': ['B1000', 'B1001', 'B1002'], 'G_win': [0.5, 0.5, 0.5]})
+
+    def tearDown(self):
+        shutil.rmtree(self.scenario, ignore_errors=True)
+
+    def fingerprints(self):
+        return calc_fingerprints(self.locator, self.settings, self.zone_df, self.surroundings_df,
+                                 self.architecture_df.set_index('Name'), self.surface_properties.set_index('Name'))
+
+    def changed(self, fingerprints):
+        new_fingerprints = self.fingerprints()
+        return sorted(building for building in fingerprints if fingerprints[building] != new_fingerprints[building])
+
+    def test_changes_affect_the_shading_context(self):
+        fingerprints = self.fingerprints()
+        self.assertEqual(self.changed(fingerprints), [])
+
+        self.zone_df.loc[0, 'height_ag'] = 30.0
+        self.assertEqual(self.changed(fingerprints), ['B1000', 'B1001'])
+
+        fingerprints = self.fingerprints()
+        self.surroundings_df.loc[0, 'geometry'] = box(1050, 0, 1080, 20)
+        self.assertEqual(self.changed(fingerprints), ['B1002'])
+
+        fingerprints = self.fingerprints()
+        self.architecture_df.loc[1, 'wwr_south'] = 0.6
+        self.assertEqual(self.changed(fingerprints), ['B1000', 'B1001'])
+
+        fingerprints = self.fingerprints()
+        self.settings.rad_ab = 2
+        self.assertEqual(self.changed(fingerprints), ['B1000', 'B1001', 'B1002'])
+
+    def test_geographic_coordinates_are_projected(self):
+        self.zone_df = self.zone_df.to_crs('EPSG:4326')
+        fingerprints = self.fingerprints()
+        # the shading context is still measured in meters
+        self.zone_df.loc[0, 'height_ag'] = 30.0
+        self.assertEqual(self.changed(fingerprints), ['B1000', 'B1001'])
+
+    def test_results_must_be_unchanged(self):
+        result_file = self.locator.get_radiation_building('B1000')
+        with open(result_file, 'w') as f:
+            f.write('Date,roofs_top_kW\n')
+        with RadiationFingerprints(self.locator.get_radiation_fingerprints()) as store:
+            store.write([('B1000', 'abc', [result_file])])
+            self.assertTrue(store.is_up_to_date('B1000', 'abc', [result_file]))
+            self.assertFalse(store.is_up_to_date('B1000', 'def', [result_file]))
+            self.assertFalse(store.is_up_to_date('B1000', 'abc', [result_file,
+                                                                 self.locator.get_radiation_metadata('B1000')]))
+            os.remove(result_file)
+            self.assertFalse(store.is_up_to_date('B1000', 'abc', [result_file]))
+
+
+if __name__ == '__main__':
+    unittest.main()
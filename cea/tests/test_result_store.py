@@ -0,0 +1,65 @@
+"""
+Test the optimization/result_store.py file
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import pandas as pd
+
+import cea.inputlocator
+from cea.optimization.result_store import GenerationResultStore, read_individual_result
+
+
+def total_performance(individual):
+    return pd.DataFrame({'Capex_total_sys_USD': [1000.5 * individual], 'GHG_sys_tonCO2': [12.25 + individual]})
+
+
+class TestGenerationResultStore(unittest.TestCase):
+    def setUp(self):
+        self.scenario = tempfile.mkdtemp()
+        self.locator = cea.inputlocator.InputLocator(self.scenario)
+        self.path = self.locator.get_optimization_generation_results_store(1)
+
+    def tearDown(self):
+        shutil.rmtree(self.scenario, ignore_errors=True)
+
+    def test_results_read_back_as_csv(self):
+        with GenerationResultStore(self.path) as store:
+            store.write(0, {'total_performance': total_performance(0), 'heating_activation_pattern': pd.DataFrame()})
+        with GenerationResultStore(self.path) as store:
+            pd.testing.assert_frame_equal(store.read('total_performance', 0), total_performance(0))
+            self.assertRaises(KeyError, store.read, 'total_performance', 1)
+            self.assertEqual(store.individuals(), [0])
+        # empty tables behave like the empty csv files
+        self.assertRaises(pd.errors.EmptyDataError, read_individual_result, self.locator,
+                          'heating_activation_pattern', 0, 1)
+
+    def test_read_all_keeps_order(self):
+        with GenerationResultStore(self.path) as store:
+            for individual in range(3):
+                store.write(individual, {'total_performance': total_performance(individual)})
+            # results of an individual are replaced when it is evaluated again
+            store.write(1, {'total_performance': total_performance(10)})
+            performance = store.read_all('total_performance', [2, 0, 1])
+        expected = pd.concat([total_performance(i) for i in [2, 0, 10]], ignore_index=True)
+        pd.testing.assert_frame_equal(performance, expected)
+
+    def test_read_all_without_individuals(self):
+        with GenerationResultStore(self.path) as store:
+            store.write(0, {'total_performance': total_performance(0)})
+            self.assertTrue(store.read_all('total_performance', []).empty)
+            self.assertTrue(store.read_all('total_performance', range(0)).empty)
+
+    def test_fall_back_to_csv(self):
+        csv_path = self.locator.get_optimization_slave_total_performance(3, 1)
+        total_performance(3).to_csv(csv_path, index=False)
+        self.assertFalse(os.path.exists(self.path))
+        pd.testing.assert_frame_equal(read_individual_result(self.locator, 'total_performance', 3, 1),
+                                      total_performance(3))
+
+
+if __name__ == '__main__':
+    unittest.main()
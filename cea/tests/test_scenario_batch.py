@@ -0,0 +1,147 @@
+"""
+Test the utilities/scenario_batch.py file
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import pandas as pd
+
+import cea.config
+import cea.inputlocator
+import cea.schemas
+from cea.utilities.dbf import dataframe_to_dbf, dbf_to_dataframe
+from cea.utilities.scenario_batch import (Factor, apply_table_factors, calc_folder_writers, create_variant_scenario,
+                                          find_affected_scripts, sample_variants, variant_values)
+from cea.workflows.workflow import set_parameter
+
+SCRIPTS = ['radiation', 'schedule-maker', 'demand', 'emissions', 'system-costs']
+
+
+class TestSampleVariants(unittest.TestCase):
+    def test_sample_variants(self):
+        factors = [Factor({'parameter': 'demand:use-dynamic-infiltration-calculation', 'values': [True, False]}),
+                   Factor({'table': 'get_building_architecture', 'column': 'wwr_south', 'range': [0.2, 0.6]}),
+                   Factor({'table': 'get_building_internal', 'column': 'El_Wm2', 'scale': [0.8, 1.2],
+                           'name': 'El'}),
+                   Factor({'parameter': 'schedule-maker:buildings', 'range': [1, 5]})]
+        samples = sample_variants(factors, 20, 42)
+        self.assertEqual(list(samples.columns), ['demand:use-dynamic-infiltration-calculation',
+                                                 'get_building_architecture:wwr_south', 'El',
+                                                 'schedule-maker:buildings'])
+        self.assertEqual(len(samples), 20)
+        self.assertEqual(set(samples['demand:use-dynamic-infiltration-calculation']), {True, False})
+        self.assertTrue(samples['get_building_architecture:wwr_south'].between(0.2, 0.6).all())
+        self.assertTrue(samples['El'].between(0.8, 1.2).all())
+        self.assertTrue(all(isinstance(value, int) for value in samples['schedule-maker:buildings']))
+        # the latin hypercube covers each tenth of the range twice
+        self.assertEqual(sorted(((samples['El'] - 0.8) / 0.04).astype(int)), sorted(list(range(10)) * 2))
+        pd.testing.assert_frame_equal(samples, sample_variants(factors, 20, 42))
+
+    def test_variant_values_keep_integers(self):
+        factors = [Factor({'parameter': 'demand:typical-days', 'range': [4, 12]}),
+                   Factor({'table': 'get_building_internal', 'column': 'El_Wm2', 'scale': [0.8, 1.2]})]
+        samples = sample_variants(factors, 5, 42)
+        config = cea.config.Configuration(cea.config.DEFAULT_CONFIG)
+        for variant, values in variant_values(samples).items():
+            self.assertIsInstance(values['get_building_internal:El_Wm2'], float)
+            set_parameter(config, config.get_parameter('demand:typical-days'), values['demand:typical-days'])
+            self.assertEqual(config.demand.typical_days, samples.loc[variant, 'demand:typical-days'])
+
+    def test_invalid_factors(self):
+        for factor in [{'column': 'El_Wm2', 'range': [0.0, 1.0]},
+                       {'table': 'get_building_internal', 'range': [0.0, 1.0]},
+                       {'table': 'get_building_internal', 'column': 'El_Wm2'},
+                       {'table': 'get_building_internal', 'column': 'El_Wm2', 'range': [0.0, 0.5, 1.0]},
+                       {'parameter': 'demand:buildings', 'scale': [0.5, 1.0]}]:
+            with self.assertRaises(ValueError):
+                Factor(factor)
+
+
+class TestAffectedScripts(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.config = cea.config.Configuration(cea.config.DEFAULT_CONFIG)
+        cls.schemas = cea.schemas.schemas(plugins=[])
+
+    def affected(self, factor):
+        return find_affected_scripts(self.config, SCRIPTS, [Factor(factor)], self.schemas)
+
+    def test_find_affected_scripts(self):
+        self.assertEqual(self.affected({'table': 'get_building_internal', 'column': 'El_Wm2', 'scale': [0.8, 1.2]}),
+                         ['schedule-maker', 'demand', 'emissions', 'system-costs'])
+        self.assertEqual(self.affected({'parameter': 'demand:use-dynamic-infiltration-calculation',
+                                        'values': [True, False]}),
+                         ['demand', 'emissions', 'system-costs'])
+        self.assertEqual(self.affected({'table': 'get_building_architecture', 'column': 'wwr_south',
+                                        'range': [0.2, 0.6]}), SCRIPTS)
+        with self.assertRaises(ValueError):
+            self.affected({'table': 'get_unknown_table', 'column': 'x', 'range': [0.0, 1.0]})
+
+
+class TestCreateVariantScenario(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.base = os.path.join(self.folder, 'base')
+        self.variant = os.path.join(self.folder, 'batch', 'variant-000')
+        self.locator = cea.inputlocator.InputLocator(self.base)
+        self.files = [self.locator.get_building_internal(), self.locator.get_radiation_building('B1000'),
+                      self.locator.get_demand_results_file('B1000'), os.path.join(self.locator.get_timing_folder(),
+                                                                                  'demand.txt')]
+        for path in self.files[1:]:
+            if not os.path.exists(os.path.dirname(path)):
+                os.makedirs(os.path.dirname(path))
+            with open(path, 'w') as f:
+                f.write('base')
+        os.makedirs(os.path.dirname(self.files[0]))
+        dataframe_to_dbf(pd.DataFrame({'Name': ['B1000', 'B1001'], 'El_Wm2': [10.0, 20.0]}), self.files[0])
+        self.folder_writers = calc_folder_writers(cea.schemas.schemas(plugins=[]), SCRIPTS)
+
+    def tearDown(self):
+        shutil.rmtree(self.folder, ignore_errors=True)
+
+    def variant_path(self, path):
+        return os.path.join(self.variant, os.path.relpath(path, self.base))
+
+    def test_create_variant_scenario(self):
+        create_variant_scenario(self.base, self.variant, ['schedule-maker', 'demand', 'emissions', 'system-costs'],
+                                self.folder_writers)
+        internal, radiation, demand, timing = self.files
+        # the inputs and the radiation are shared with the base scenario
+        self.assertTrue(os.path.samefile(internal, self.variant_path(internal)))
+        self.assertTrue(os.path.samefile(radiation, self.variant_path(radiation)))
+        # the demand is recalculated, the timing folder is also written by the radiation script
+        self.assertFalse(os.path.exists(self.variant_path(demand)))
+        self.assertTrue(os.path.exists(self.variant_path(timing)))
+        self.assertFalse(os.path.samefile(timing, self.variant_path(timing)))
+
+        # the variant is re-created from scratch
+        with open(self.variant_path(timing), 'w') as f:
+            f.write('variant')
+        create_variant_scenario(self.base, self.variant, ['demand'], self.folder_writers)
+        with open(self.variant_path(timing)) as f:
+            self.assertEqual(f.read(), 'base')
+
+    def test_hidden_folders(self):
+        hidden = os.path.join(self.base, '.cache', 'demand.txt')
+        os.makedirs(os.path.dirname(hidden))
+        with open(hidden, 'w') as f:
+            f.write('base')
+        create_variant_scenario(self.base, self.variant, ['demand'], dict(self.folder_writers, **{'.cache': {'demand'}}))
+        self.assertFalse(os.path.exists(self.variant_path(hidden)))
+
+    def test_apply_table_factors(self):
+        create_variant_scenario(self.base, self.variant, ['schedule-maker', 'demand'], self.folder_writers)
+        factors = [Factor({'table': 'get_building_internal', 'column': 'El_Wm2', 'scale': [0.5, 1.5],
+                           'buildings': ['B1001'], 'name': 'El'})]
+        apply_table_factors(cea.inputlocator.InputLocator(self.variant), factors, {'El': 0.5})
+        internal = self.files[0]
+        self.assertEqual(list(dbf_to_dataframe(self.variant_path(internal))['El_Wm2']), [10.0, 10.0])
+        self.assertEqual(list(dbf_to_dataframe(internal)['El_Wm2']), [10.0, 20.0])
+        self.assertFalse(os.path.samefile(internal, self.variant_path(internal)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -236,6 +236,26 @@ class TestSchemas(unittest.TestCase):
                         print(
                             "Error in column {col_label}:\n{message}\n".format(col_label=col_label, message=e))
 
+    def test_read_typed_column_subset(self):
+        import tempfile
+        import numpy as np
+        import pandas as pd
+
+        scenario = tempfile.mkdtemp()
+        locator = cea.inputlocator.InputLocator(scenario)
+        df = pd.DataFrame({"Name": ["B001", "B002"], "GFA_m2": [100, 250], "QH_sys_MWhyr": [1.5, 2.5],
+                           "Af_m2": [90.0, 200.0]})
+        df.to_csv(locator.get_total_demand(), index=False)
+
+        result = locator.get_total_demand.read(columns=["Name", "GFA_m2"])
+        self.assertEqual(list(result.columns), ["Name", "GFA_m2"])
+        self.assertEqual(result["GFA_m2"].dtype, np.float64)  # GFA_m2 is a float in schemas.yml
+
+        result = locator.get_total_demand.read(columns=["Name", "QH_sys_MWhyr"], float32=True, categorical=True)
+        self.assertEqual(result["QH_sys_MWhyr"].dtype, np.float32)
+        self.assertEqual(result["Name"].dtype.name, "category")
+        self.assertEqual(list(result["Name"]), ["B001", "B002"])
+
 
 def extract_locator_methods(locator):
     """Return the list of locator methods that point to files"""
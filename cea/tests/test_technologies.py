@@ -12,8 +12,9 @@ import os
 import cea.inputlocator
 import cea.examples
 import cea.config
-from cea.technologies.cooling_tower import calc_CT_partload_factor, calc_CT
+from cea.technologies.cooling_tower import calc_CT_partload_factor, calc_CT, calc_CT_array
 from cea.technologies.storage_tank_pcm import Storage_tank_PCM
+from cea.technologies import substation
 
 
 class TestColdPcmThermalStorage(unittest.TestCase):
@@ -137,6 +138,116 @@ class TestCoolingTower(unittest.TestCase):
         reference_results = json.loads(config.get('test_cooling_tower', 'expected_results'))
         np.testing.assert_allclose(el_W, reference_results)
 
+    def test_calc_CT_array(self):
+        """Make sure the array version gives the same results, also for several configurations at once."""
+        q_hot_Wh = np.arange(0.0, 1E6, 1E5)
+        Q_nom_W = max(q_hot_Wh)
+        el_W = calc_CT_array(q_hot_Wh, Q_nom_W)
+
+        config = configparser.ConfigParser()
+        config.read(get_test_config_path())
+        reference_results = json.loads(config.get('test_cooling_tower', 'expected_results'))
+        np.testing.assert_allclose(el_W, reference_results)
+
+        el_W = calc_CT_array(np.vstack([q_hot_Wh, q_hot_Wh]), np.array([[Q_nom_W], [0.0]]))
+        np.testing.assert_allclose(el_W[0], reference_results)
+        np.testing.assert_allclose(el_W[1], 0.0)
+
+
+class TestSubstation(unittest.TestCase):
+    def test_calc_HEX_heating_array(self):
+        """Make sure the compiled loop gives the same results as the scalar heat exchanger model."""
+        Q_W = np.array([0.0, 1E3, 5E3, 1E4])
+        thi_K = np.array([343.0, 343.0, 338.0, 353.0])
+        tco_K = 333.0
+        tci_K = np.array([313.0, 313.0, 308.0, 303.0])
+        cc_kWperK = Q_W / (tco_K - tci_K)
+        tho, ch = substation.calc_HEX_heating_array(Q_W, 800.0, thi_K, tco_K, tci_K, cc_kWperK)
+        for i in range(len(Q_W)):
+            expected = substation.calc_HEX_heating(Q_W[i], 800.0, thi_K[i], tco_K, tci_K[i], cc_kWperK[i])
+            np.testing.assert_allclose((tho[i], ch[i]), expected)
+
+    def test_supply_and_mix_temperatures(self):
+        """The network temperatures ignore buildings without demand (zero temperatures)."""
+        np.testing.assert_array_equal(substation.calc_DC_supply(np.array([0.0, 0.0, 8.0, 8.0]),
+                                                                np.array([0.0, 6.0, 0.0, 10.0])),
+                                      [0.0, 6.0, 8.0, 8.0])
+        np.testing.assert_array_equal(substation.calc_DH_supply(np.array([0.0, 70.0]), np.array([60.0, 60.0])),
+                                      [60.0, 70.0])
+        t_mix = substation.calc_HEX_mix_2_flows(np.array([0.0, 1.0, 1.0]), np.array([0.0, 0.0, 1.0]),
+                                                np.array([0.0, 1.0, 1.0]), np.array([0.0, 0.0, 3.0]),
+                                                np.array([0.0, 40.0, 40.0]), np.array([0.0, 0.0, 20.0]))
+        np.testing.assert_allclose(t_mix, [0.0, 40.0, 25.0])
+
+    def test_substation_matrix_supply_temperatures(self):
+        """The network temperatures of the substation matrix ignore the hours without demand (NaN)."""
+        from cea.technologies.thermal_network import substation_matrix
+        t_0 = np.array([np.nan, np.nan, 8.0, 8.0])
+        t_1 = np.array([np.nan, 6.0, np.nan, 10.0])
+        np.testing.assert_array_equal(substation_matrix.calc_DC_supply(t_0, t_1), [np.nan, 6.0, 8.0, 8.0])
+        np.testing.assert_array_equal(substation_matrix.calc_DH_supply(t_0, t_1), [np.nan, 6.0, 8.0, 10.0])
+        np.testing.assert_array_equal(substation_matrix.calc_DH_supply(np.nan, t_1), t_1)
+
+
+class TestSteinerTree(unittest.TestCase):
+    def test_steiner_tree_methods(self):
+        """Both approximations of networkx connect the terminals through the shortest paths."""
+        import networkx as nx
+        from networkx.algorithms.approximation import steiner_tree
+        for method in ['mehlhorn', 'kou']:
+            G = nx.grid_2d_graph(5, 5)
+            nx.set_edge_attributes(G, 1.0, 'weight')
+            terminals = [(0, 0), (4, 0), (2, 4)]
+            tree = nx.Graph(steiner_tree(G, terminals, method=method))
+            self.assertTrue(nx.is_tree(tree))
+            self.assertTrue(all(terminal in tree for terminal in terminals))
+            self.assertTrue(all(degree > 1 for node, degree in tree.degree() if node not in terminals))
+            self.assertLessEqual(tree.size(weight='weight'), 2 * 8.0)  # the optimal tree is 8.0 long
+
+            G = nx.path_graph(5)
+            G.add_edges_from([(2, 5), (5, 6), (0, 6)], weight=10.0)
+            nx.set_edge_attributes(G, {(u, v): 1.0 for u, v in nx.path_graph(5).edges}, 'weight')
+            tree = steiner_tree(G, [0, 4], method=method)
+            self.assertEqual(sorted(tuple(sorted(edge)) for edge in tree.edges), [(0, 1), (1, 2), (2, 3), (3, 4)])
+
+    def test_lines_to_graph_round_trip(self):
+        """The potential network is passed to the Steiner tree as a graph and back as nodes and edges"""
+        import networkx as nx
+        from geopandas import GeoDataFrame
+        from shapely.geometry import LineString, Point
+        from cea.technologies.network_layout.steiner_spanning_tree import lines_to_graph, graph_to_geodataframes
+
+        lines = GeoDataFrame({'Shape_Leng': [10.0, 5.0, 7.0, 3.0], 'Name': ['A', 'B', 'C', 'D']},
+                             geometry=[LineString([(0.0, 0.0), (10.0, 0.0)]),
+                                       LineString([(10.0, 0.0), (10.0, 5.0)]),
+                                       # only the end points of a line are nodes
+                                       LineString([(10.0, 5.0), (12.0, 3.0), (15.0, 5.0)]),
+                                       # the last of two lines between the same nodes is kept
+                                       LineString([(10.0, 0.0), (10.0, 5.0)])], crs='EPSG:32632')
+        graph = lines_to_graph(lines)
+        self.assertIsInstance(graph, nx.DiGraph)
+        # the lines sharing an end point share the node
+        self.assertEqual(list(graph.nodes), [(0.0, 0.0), (10.0, 0.0), (10.0, 5.0), (15.0, 5.0)])
+        self.assertEqual(list(graph.edges(data=True)),
+                         [((0.0, 0.0), (10.0, 0.0), {'Shape_Leng': 10.0, 'Name': 'A'}),
+                          ((10.0, 0.0), (10.0, 5.0), {'Shape_Leng': 3.0, 'Name': 'D'}),
+                          ((10.0, 5.0), (15.0, 5.0), {'Shape_Leng': 7.0, 'Name': 'C'})])
+
+        # the layout converts it to a weighted, undirected graph before calculating the Steiner tree
+        tree = nx.Graph()
+        for start, end, data in graph.edges(data=True):
+            tree.add_edge(start, end, weight=data['Shape_Leng'])
+        nodes, edges = graph_to_geodataframes(tree, 'EPSG:32632')
+        self.assertEqual(list(nodes['FID']), [0, 1, 2, 3])
+        self.assertEqual([point.coords[0] for point in nodes.geometry], list(tree.nodes))
+        self.assertTrue(all(isinstance(point, Point) for point in nodes.geometry))
+        self.assertEqual(list(edges.columns), ['weight', 'geometry'])
+        self.assertEqual(list(edges['weight']), [10.0, 3.0, 7.0])
+        self.assertEqual([list(line.coords) for line in edges.geometry],
+                         [[(0.0, 0.0), (10.0, 0.0)], [(10.0, 0.0), (10.0, 5.0)], [(10.0, 5.0), (15.0, 5.0)]])
+        self.assertEqual(nodes.crs, edges.crs)
+        self.assertEqual(list(edges.index), [0, 1, 2])
+
 
 def get_test_config_path():
     """return the path to the test data configuration file (``cea/tests/test_schedules.config``)"""
@@ -0,0 +1,123 @@
+"""
+Test the technologies/thermal_network/thermal_network_costs.py file
+"""
+
+import os
+import shutil
+import tempfile
+import types
+import unittest
+
+import numpy as np
+import pandas as pd
+
+import cea
+import cea.inputlocator
+import cea.technologies.chiller_vapor_compression as VCCModel
+import cea.technologies.cooling_tower as CTModel
+import cea.technologies.thermal_network.thermal_network_costs as thermal_network_costs
+from cea.constants import HOURS_IN_YEAR
+from cea.demand.hourly_loads_store import write_hourly_loads_store
+from cea.utilities import epwreader
+
+
+class TestThermalNetworkCosts(unittest.TestCase):
+    def setUp(self):
+        self.scenario = tempfile.mkdtemp()
+        self.locator = cea.inputlocator.InputLocator(self.scenario)
+        self.building_names = ['B1000', 'B1001']
+        hours = np.arange(HOURS_IN_YEAR)
+        # B1000 has an ahu demand in the first half of the year, B1001 an scu demand in the even hours
+        demand = {'B1000': {'Qcs_sys_ahu_kWh': np.where(hours < 4380, 10.0, 0.0),
+                            'Qcs_sys_aru_kWh': np.zeros(HOURS_IN_YEAR),
+                            'Qcs_sys_scu_kWh': np.zeros(HOURS_IN_YEAR)},
+                  'B1001': {'Qcs_sys_ahu_kWh': np.zeros(HOURS_IN_YEAR),
+                            'Qcs_sys_aru_kWh': np.zeros(HOURS_IN_YEAR),
+                            'Qcs_sys_scu_kWh': np.where(hours % 2 == 0, -5.0, 0.0)}}
+        dates = pd.date_range('2021-01-01', periods=HOURS_IN_YEAR, freq='H').astype(str)
+        for building in self.building_names:
+            pd.DataFrame(dict(demand[building], DATE=dates)).to_csv(self.locator.get_demand_results_file(building),
+                                                                    index=False)
+
+    def tearDown(self):
+        shutil.rmtree(self.scenario, ignore_errors=True)
+        thermal_network_costs._cooling_demand_cache.clear()
+
+    def test_read_cooling_demand(self):
+        cooling_demand_kWh = thermal_network_costs.read_cooling_demand(self.locator, self.building_names)
+        self.assertEqual(cooling_demand_kWh['ahu'].shape, (2, HOURS_IN_YEAR))
+        self.assertEqual(cooling_demand_kWh['ahu'][0].sum(), 43800.0)
+        self.assertEqual(cooling_demand_kWh['scu'][1].sum(), -21900.0)
+        self.assertEqual(cooling_demand_kWh['ahu'].dtype, np.float64)
+        # the demand is only read once
+        self.assertIs(thermal_network_costs.read_cooling_demand(self.locator, self.building_names),
+                      cooling_demand_kWh)
+
+        # the same demand is read from the hourly loads store
+        write_hourly_loads_store(self.locator, self.building_names)
+        thermal_network_costs._cooling_demand_cache.clear()
+        stored_demand_kWh = thermal_network_costs.read_cooling_demand(self.locator, self.building_names)
+        self.assertIsNot(stored_demand_kWh, cooling_demand_kWh)
+        for system in ['ahu', 'aru', 'scu']:
+            self.assertEqual(stored_demand_kWh[system].dtype, np.float64)
+            np.testing.assert_array_equal(stored_demand_kWh[system], cooling_demand_kWh[system])
+
+    def test_supplied_systems(self):
+        cooling_demand_kWh = thermal_network_costs.read_cooling_demand(self.locator, self.building_names)
+        supplied_systems_t = thermal_network_costs.find_supplied_systems_t(cooling_demand_kWh, ['ahu', 'aru', 'scu'])
+        self.assertEqual(list(supplied_systems_t[[0, 1, 4380, 4381]]), [0b101, 0b001, 0b100, 0b000])
+        self.assertEqual(thermal_network_costs.find_supplied_systems_annual(cooling_demand_kWh, ['aru', 'scu']),
+                         ['scu'])
+
+        # the COP is calculated for the supplied systems of each hour
+        weather_data = epwreader.epw_reader(self.locator.get_weather('Zug_inducity_2009'))
+        COP_system_t, COP_chiller_t = thermal_network_costs.calc_VCC_COP_t(weather_data, supplied_systems_t,
+                                                                           centralized=True)
+        for hour, load_types in [(0, ['ahu', 'scu']), (1, ['ahu']), (4380, ['scu'])]:
+            COP_system, COP_chiller = VCCModel.calc_VCC_COP(weather_data, load_types, centralized=True)
+            self.assertAlmostEqual(COP_system_t[hour], COP_system)
+            self.assertAlmostEqual(COP_chiller_t[hour], COP_chiller)
+
+    def test_building_scale_loads(self):
+        """The costs of the cooling loads that are not supplied by the network (ahu and aru here)"""
+        shutil.copytree(os.path.join(os.path.dirname(cea.__file__), 'databases', 'SG', 'components'),
+                        os.path.join(self.locator.get_databases_folder(), 'components'))
+        weather_data = epwreader.epw_reader(self.locator.get_weather('Zug_inducity_2009'))
+        network_info = types.SimpleNamespace(network_type='DC', locator=self.locator,
+                                             building_names=self.building_names, disconnected_buildings_index=[],
+                                             full_cooling_systems=['ahu', 'aru', 'scu'],
+                                             substation_cooling_systems=['scu'], yearly_cost_calculations=True,
+                                             weather_data=weather_data, prices=types.SimpleNamespace(ELEC_PRICE=2e-4))
+
+        # B1000 has a peak demand of 10 kW of the disconnected loads, B1001 has none
+        capex_chiller, opex_fixed_chiller, _ = VCCModel.calc_Cinv_VCC(10.0 * 1000, self.locator, 'CH3')
+        no_capex_chiller, no_opex_fixed_chiller, _ = VCCModel.calc_Cinv_VCC(0.0, self.locator, 'CH3')
+        no_capex_CT, no_opex_fixed_CT, _ = CTModel.calc_Cinv_CT(0.0, self.locator, 'CT1')
+
+        COP_system, COP_chiller = VCCModel.calc_VCC_COP(weather_data, ['Qcs_sys_ahu_kWh', 'Qcs_sys_aru_kWh'],
+                                                        centralized=False)
+        Q_peak_CT_kW = thermal_network_costs.calc_CT_load_from_chiller_load(COP_chiller, 10.0)
+        capex_CT, opex_fixed_CT, _ = CTModel.calc_Cinv_CT(Q_peak_CT_kW * 1000, self.locator, 'CT1')
+        opex = (43800.0 / COP_system * 1000 * 2e-4 + opex_fixed_chiller + opex_fixed_CT
+                + no_opex_fixed_chiller + no_opex_fixed_CT)
+        capex = capex_chiller + capex_CT + no_capex_chiller + no_capex_CT
+        dis_total, dis_opex, dis_capex = thermal_network_costs.calc_Ctot_cs_building_scale_loads(network_info)
+        self.assertAlmostEqual(dis_opex, opex)
+        self.assertAlmostEqual(dis_capex, capex)
+        self.assertAlmostEqual(dis_total, opex + capex)
+
+        # the hourly calculation costs the hours with a demand of the disconnected loads (only the ahu of B1000)
+        network_info.yearly_cost_calculations = False
+        COP_system, COP_chiller = VCCModel.calc_VCC_COP(weather_data, ['ahu'], centralized=False)
+        Q_peak_CT_kW = thermal_network_costs.calc_CT_load_from_chiller_load(COP_chiller, 10.0)
+        capex_CT, opex_fixed_CT, _ = CTModel.calc_Cinv_CT(Q_peak_CT_kW * 1000, self.locator, 'CT1')
+        opex = (43800.0 / COP_system * 1000 * 2e-4 + opex_fixed_chiller + opex_fixed_CT
+                + no_opex_fixed_chiller + no_opex_fixed_CT)
+        capex = capex_chiller + capex_CT + no_capex_chiller + no_capex_CT
+        dis_total, dis_opex, dis_capex = thermal_network_costs.calc_Ctot_cs_building_scale_loads(network_info)
+        self.assertAlmostEqual(dis_opex, opex)
+        self.assertAlmostEqual(dis_capex, capex)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+"""
+Test the archive of the thermal network optimization (technologies/thermal_network/thermal_network_optimization.py)
+"""
+
+import os
+import shutil
+import tempfile
+import types
+import unittest
+
+from cea.technologies.thermal_network.thermal_network_optimization import NetworkArchive, individual_key
+
+
+class TestNetworkArchive(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.path = os.path.join(self.folder, 'DC_archive.sqlite')
+        self.network_info = types.SimpleNamespace(building_names=['B1000', 'B1001', 'B1002'], network_type='DC',
+                                                  optimize_network_loads=False, optimize_loop_branch=False,
+                                                  substation_cooling_systems=['ahu', 'aru', 'scu'],
+                                                  full_cooling_systems=['ahu', 'aru', 'scu'])
+
+    def tearDown(self):
+        shutil.rmtree(self.folder, ignore_errors=True)
+
+    def test_individual_key(self):
+        # the loads and loops genes are not optimized, so these individuals describe the same network
+        key = individual_key(self.network_info, [1, 1, 1, 0, 0, 1, 1, 0, 2])
+        self.assertEqual(key, individual_key(self.network_info, [0, 0, 1, 0, 0, 0, 1, 0, 2]))
+        self.assertNotEqual(key, individual_key(self.network_info, [1, 1, 1, 0, 0, 1, 0, 1, 2]))
+
+        self.network_info.optimize_loop_branch = True
+        self.assertNotEqual(individual_key(self.network_info, [1, 1, 1, 0, 0, 1, 1, 0, 2]),
+                            individual_key(self.network_info, [1, 1, 1, 0, 0, 0, 1, 0, 2]))
+
+    def test_archive_survives_restart(self):
+        archive = NetworkArchive(self.path, 'inputs-a')
+        archive.add('network-a', {'total': 100.0, 'plant_buildings': "['B1000']"})
+        archive.save_population(0, [[1, 1, 1, 0, 0, 1, 1, 0, 2]])
+        archive.save_population(1, [[1, 1, 1, 0, 0, 1, 0, 1, 2]])
+        archive.close()
+
+        archive = NetworkArchive(self.path, 'inputs-a')
+        self.assertIn('network-a', archive)
+        self.assertNotIn('network-b', archive)
+        self.assertEqual(archive.get('network-a'), {'total': 100.0, 'plant_buildings': "['B1000']"})
+        self.assertEqual(archive.last_population(), (1, [[1, 1, 1, 0, 0, 1, 0, 1, 2]]))
+
+        # a new run forgets the populations of the previous run
+        archive.save_population(0, [[1, 1, 1, 0, 0, 0, 0, 1, 2]])
+        self.assertEqual(archive.last_population(), (0, [[1, 1, 1, 0, 0, 0, 0, 1, 2]]))
+        archive.close()
+
+    def test_archive_is_emptied_when_inputs_change(self):
+        archive = NetworkArchive(self.path, 'inputs-a')
+        archive.add('network-a', {'total': 100.0})
+        archive.save_population(0, [[1, 1, 1, 0, 0, 1, 1, 0, 2]])
+        archive.close()
+
+        archive = NetworkArchive(self.path, 'inputs-b')
+        self.assertNotIn('network-a', archive)
+        self.assertEqual(archive.last_population(), (0, None))
+        archive.add('network-a', {'total': 120.0})
+        archive.close()
+
+        archive = NetworkArchive(self.path, 'inputs-b')
+        self.assertEqual(archive.get('network-a'), {'total': 120.0})
+        archive.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+"""
+Test the utilities/typical_days.py file
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from cea.constants import DAYS_IN_YEAR, HOURS_IN_YEAR
+from cea.demand.thermal_loads import expand_typical_days
+from cea.utilities.typical_days import TypicalDays, calc_errors, cluster_typical_days, compare_totals
+
+
+class TestTypicalDays(unittest.TestCase):
+    def setUp(self):
+        hours = np.arange(HOURS_IN_YEAR)
+        random = np.random.RandomState(42)
+        self.profiles = pd.DataFrame({
+            'drybulb_C': 10.0 - 10.0 * np.cos(2 * np.pi * hours / HOURS_IN_YEAR) - 5.0 * np.cos(
+                2 * np.pi * hours / 24) + random.normal(0.0, 1.0, HOURS_IN_YEAR),
+            'people_p': np.tile(np.r_[np.zeros(8), np.ones(10), np.zeros(6)], DAYS_IN_YEAR)})
+
+    def test_cluster_typical_days(self):
+        typical_days = cluster_typical_days(self.profiles, 12, extreme_days=[('drybulb_C', 'max'),
+                                                                             ('drybulb_C', 'min')])
+        self.assertEqual(len(typical_days), 12)
+        self.assertEqual(typical_days.weights.sum(), DAYS_IN_YEAR)
+        # the hottest and the coldest hour of the year are kept
+        self.assertIn(self.profiles['drybulb_C'].idxmax() // 24, typical_days.days)
+        self.assertIn(self.profiles['drybulb_C'].idxmin() // 24, typical_days.days)
+        errors = calc_errors(self.profiles, typical_days)
+        self.assertAlmostEqual(errors.loc['drybulb_C', 'error_peak_%'], 0.0)
+        self.assertLess(abs(errors.loc['drybulb_C', 'error_total_%']), 5.0)
+        self.assertAlmostEqual(errors.loc['people_p', 'rmse_%'], 0.0)
+
+        with self.assertRaises(ValueError):
+            cluster_typical_days(self.profiles, 2, extreme_days=[('drybulb_C', 'max'), ('drybulb_C', 'min')])
+        with self.assertRaises(ValueError):
+            cluster_typical_days(self.profiles.iloc[:24], 2)
+
+    def test_full_year(self):
+        typical_days = cluster_typical_days(self.profiles, DAYS_IN_YEAR)
+        self.assertEqual(len(typical_days), DAYS_IN_YEAR)
+        self.assertEqual(typical_days.simulation_periods(), [(0, HOURS_IN_YEAR)])
+        errors = calc_errors(self.profiles, typical_days)
+        self.assertTrue((errors[['error_total_%', 'error_peak_%', 'rmse_%']].abs() < 1e-9).all().all())
+
+    def test_expand_and_simulation_periods(self):
+        assignment = np.full(DAYS_IN_YEAR, 10)
+        assignment[200:] = 11
+        assignment[300:] = 300
+        typical_days = TypicalDays(assignment)
+        self.assertEqual(list(typical_days.weights), [200, 100, 65])
+        # the warm-up of day 11 overlaps day 10
+        self.assertEqual(typical_days.simulation_periods(), [(216, 288), (7176, 7224)])
+        self.assertEqual(len(typical_days.simulation_hours()), 72 + 48)
+
+        values = np.arange(HOURS_IN_YEAR, dtype=float)
+        expanded = typical_days.expand(values)
+        self.assertEqual(expanded[0], 240.0)
+        self.assertEqual(expanded[200 * 24 + 5], 11 * 24 + 5.0)
+        self.assertEqual(expanded[-1], 300 * 24 + 23.0)
+        expanded = typical_days.expand(pd.Series(values, name='Q'))
+        self.assertEqual(expanded.name, 'Q')
+
+    def test_csv(self):
+        folder = tempfile.mkdtemp()
+        try:
+            path = os.path.join(folder, 'typical_days.csv')
+            typical_days = cluster_typical_days(self.profiles, 8)
+            typical_days.to_csv(path)
+            self.assertEqual(list(TypicalDays.from_csv(path).assignment), list(typical_days.assignment))
+        finally:
+            shutil.rmtree(folder, ignore_errors=True)
+
+    def test_compare_totals(self):
+        full_year = pd.DataFrame({'QH_sys_MWhyr': [100.0, 50.0, 0.0]}, index=['B1000', 'B1001', 'B1002'])
+        typical_days = pd.DataFrame({'QH_sys_MWhyr': [110.0, 45.0]}, index=['B1000', 'B1001'])
+        errors = compare_totals(full_year, typical_days, ['QH_sys_MWhyr'])
+        self.assertAlmostEqual(errors.loc['QH_sys_MWhyr', 'error_%'], 5 / 150 * 100)
+        self.assertAlmostEqual(errors.loc['QH_sys_MWhyr', 'mean_absolute_error_buildings_%'], 10.0)
+
+    def test_expand_rc_loop_outputs(self):
+        """Only the values calculated by the RC loop for the typical days are expanded to the whole year"""
+        assignment = np.full(DAYS_IN_YEAR, 10)
+        assignment[200:] = 200
+        typical_days = TypicalDays(assignment)
+        hours = typical_days.simulation_hours()
+        T_ext = np.arange(HOURS_IN_YEAR, dtype=float)
+        tsd = {'T_ext': T_ext, 'Qcs': np.full(HOURS_IN_YEAR, np.nan), 'm_ve_inf': np.ones(HOURS_IN_YEAR),
+               'Af': 100.0}
+        tsd_before_rc_loop = {key: np.array(value) for key, value in tsd.items() if key != 'Af'}
+        # the RC loop
+        for t in hours:
+            tsd['Qcs'][t] = -t
+            tsd['m_ve_inf'][t] = 2.0
+        tsd['T_int'] = np.zeros(HOURS_IN_YEAR)
+        tsd['T_int'][hours] = 20.0
+
+        expanded = expand_typical_days(tsd, typical_days, tsd_before_rc_loop)
+        np.testing.assert_array_equal(expanded['T_ext'], T_ext)
+        self.assertEqual(expanded['Af'], 100.0)
+        np.testing.assert_array_equal(expanded['Qcs'], -typical_days.representative_hours())
+        np.testing.assert_array_equal(expanded['m_ve_inf'], np.full(HOURS_IN_YEAR, 2.0))
+        np.testing.assert_array_equal(expanded['T_int'], np.full(HOURS_IN_YEAR, 20.0))
+
+
+if __name__ == '__main__':
+    unittest.main()
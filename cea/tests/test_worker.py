@@ -0,0 +1,39 @@
+"""
+Test the worker.py file
+"""
+
+import threading
+import time
+import unittest
+
+from cea.worker import StreamBatcher
+
+
+class TestStreamBatcher(unittest.TestCase):
+    def test_writes_are_coalesced(self):
+        batches = []
+        batcher = StreamBatcher(batches.append, interval=10.0, max_size=1000)
+        for i in range(1000):
+            batcher.write('{i:04d}\n'.format(i=i))
+        batcher.close()
+        self.assertEqual(''.join(batches), ''.join('{i:04d}\n'.format(i=i) for i in range(1000)))
+        self.assertLessEqual(len(batches), 6)
+
+    def test_output_is_sent_after_interval(self):
+        sent = threading.Event()
+        batcher = StreamBatcher(lambda msg: sent.set(), interval=0.1)
+        batcher.write('simulating B1000\n')
+        self.assertTrue(sent.wait(5.0))
+        batcher.close()
+
+    def test_slow_send_does_not_block_writes(self):
+        batcher = StreamBatcher(lambda msg: time.sleep(0.5), interval=0.0)
+        t0 = time.time()
+        for i in range(100):
+            batcher.write('simulating B{i}\n'.format(i=i))
+        self.assertLess(time.time() - t0, 0.5)
+        batcher.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
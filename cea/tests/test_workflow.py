@@ -0,0 +1,142 @@
+"""
+Test the dependency graph and the skipping of unchanged steps of workflows/workflow.py
+"""
+
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+import cea.config
+import cea.inputlocator
+import cea.schemas
+import cea.scripts
+import cea.workflows.workflow
+from cea.workflows.workflow import WorkflowStep, calc_dependencies, calc_resume_step, plan_steps, run_parallel
+
+
+def log_run_step(config, py_script):
+    """Replaces the scripts in the parallel workflow tests: log the start and end time of the script"""
+    start = time.time()
+    time.sleep(0.5)
+    with open(os.path.join(config.scenario, 'log.txt'), 'a') as log:
+        log.write('{script},{start},{end}\n'.format(script=py_script, start=start, end=time.time()))
+    if os.path.exists(os.path.join(config.scenario, 'fail-' + py_script)):
+        raise ValueError('failed')
+
+
+class TestWorkflow(unittest.TestCase):
+    def setUp(self):
+        self.project = tempfile.mkdtemp()
+        self.scenario = os.path.join(self.project, 'scenario')
+        os.makedirs(self.scenario)
+        self.config = cea.config.Configuration(cea.config.DEFAULT_CONFIG)
+        with self.config.ignore_restrictions():
+            self.config.project = self.project
+            self.config.scenario_name = 'scenario'
+            self.config.multiprocessing = True
+            self.config.number_of_cpus_to_keep_free = 0
+
+    def tearDown(self):
+        shutil.rmtree(self.project, ignore_errors=True)
+
+    def test_dependencies(self):
+        workflow = [{'script': 'radiation'}, {'script': 'photovoltaic'},
+                    {'script': 'solar-collector', 'parameters': {'type-scpanel': 'FP'}},
+                    {'script': 'solar-collector', 'parameters': {'type-scpanel': 'ET'}},
+                    {'config': '.', 'general:scenario-name': 'other'},
+                    {'script': 'schedule-maker'}, {'script': 'demand'}, {'script': 'emissions'},
+                    {'script': 'system-costs'}]
+        steps = plan_steps(self.config, workflow)
+        self.assertEqual([step.config.solar.type_scpanel for step in steps[2:4]], ['FP', 'ET'])
+        self.assertEqual(steps[4].config.scenario_name, 'other')
+        self.assertEqual(calc_dependencies(steps), {0: set(), 1: {0}, 2: {0}, 3: {0, 2}, 5: set(), 6: {5},
+                                                    7: {6}, 8: {6}})
+
+    def test_skip_unchanged(self):
+        locator = cea.inputlocator.InputLocator(self.scenario)
+        with open(locator.get_total_demand(), 'w') as f:
+            f.write('Name,GFA_m2\nB1000,100.0\n')
+
+        def emissions_step():
+            return WorkflowStep(0, cea.scripts.by_name('emissions', plugins=[]), self.config,
+                                cea.schemas.schemas(plugins=[]))
+
+        step = emissions_step()
+        self.assertFalse(step.is_unchanged())
+        with open(locator.get_lca_operation(), 'w') as f:
+            f.write('Name,GHG_sys_tonCO2\nB1000,1.0\n')
+        step.record()
+        self.assertTrue(emissions_step().is_unchanged())
+
+        # the same contents written again
+        time.sleep(0.01)
+        with open(locator.get_total_demand(), 'w') as f:
+            f.write('Name,GFA_m2\nB1000,100.0\n')
+        self.assertTrue(emissions_step().is_unchanged())
+
+        with self.config.ignore_restrictions():
+            self.config.emissions.year_to_calculate = 2050
+        self.assertFalse(emissions_step().is_unchanged())
+        with self.config.ignore_restrictions():
+            self.config.emissions.year_to_calculate = 2020
+        self.assertTrue(emissions_step().is_unchanged())
+
+        with open(locator.get_lca_operation(), 'w') as f:
+            f.write('Name,GHG_sys_tonCO2\nB1000,2.0\n')
+        self.assertFalse(emissions_step().is_unchanged())
+
+    @mock.patch('multiprocessing.cpu_count', return_value=4)
+    @mock.patch('cea.workflows.workflow.run_step', log_run_step)
+    def test_run_parallel(self, _):
+        workflow = [{'script': 'radiation'}, {'script': 'photovoltaic'}, {'script': 'photovoltaic-thermal'},
+                    {'script': 'demand'}, {'script': 'emissions'}]
+        open(os.path.join(self.scenario, 'fail-demand'), 'w').close()
+        with self.assertRaises(RuntimeError):
+            run_parallel(self.config, workflow, skip_unchanged=False)
+
+        with open(os.path.join(self.scenario, 'log.txt')) as log:
+            runs = {script: (float(start), float(end)) for script, start, end in
+                    (line.strip().split(',') for line in log)}
+        # the emissions depend on the failed demand
+        self.assertEqual(set(runs.keys()), {'radiation', 'photovoltaic', 'photovoltaic_thermal', 'demand'})
+        after_radiation = [runs[script] for script in ['photovoltaic', 'photovoltaic_thermal', 'demand']]
+        self.assertGreaterEqual(min(start for start, _ in after_radiation), runs['radiation'][1])
+        # the steps after the radiation run at the same time
+        self.assertLess(max(start for start, _ in after_radiation), min(end for _, end in after_radiation))
+
+    def test_calc_resume_step(self):
+        workflow = [{'config': '.', 'general:scenario-name': 'scenario'}, {'script': 'radiation'},
+                    {'script': 'photovoltaic'}, {'config': '.', 'general:multiprocessing': False},
+                    {'script': 'demand'}]
+        self.assertEqual(calc_resume_step(workflow, set()), 0)
+        self.assertEqual(calc_resume_step(workflow, {2, 4}), 0)
+        self.assertEqual(calc_resume_step(workflow, {1, 2}), 3)
+        self.assertEqual(calc_resume_step(workflow, {1, 2, 4}), 4)
+        self.assertIsNone(calc_resume_step([{'script': 'radiation'}], set()))
+
+    @mock.patch('multiprocessing.cpu_count', return_value=4)
+    @mock.patch('cea.workflows.workflow.run_step', log_run_step)
+    def test_resume_parallel_workflow(self, _):
+        """A failed parallel workflow is resumed after the steps that completed before the first failed step"""
+        workflow_yml = os.path.join(self.project, 'workflow.yml')
+        resume_yml = os.path.join(self.project, 'resume.yml')
+        with open(workflow_yml, 'w') as f:
+            f.write('- script: radiation\n- script: demand\n- script: photovoltaic\n- script: emissions\n')
+        open(os.path.join(self.scenario, 'fail-demand'), 'w').close()
+        cea.workflows.workflow.write_resume_info(resume_yml, {}, workflow_yml, 3)  # left by an earlier run
+        with self.config.ignore_restrictions():
+            self.config.workflow.workflow = workflow_yml
+            self.config.workflow.resume_file = resume_yml
+            self.config.workflow.parallel = True
+            self.config.workflow.skip_unchanged = False
+        with self.assertRaises(RuntimeError):
+            cea.workflows.workflow.main(self.config)
+        # the photovoltaic step completed, but after the failed demand
+        self.assertEqual(cea.workflows.workflow.read_resume_info(resume_yml, workflow_yml)[workflow_yml], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
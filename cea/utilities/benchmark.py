@@ -0,0 +1,434 @@
+"""
+Regression benchmarks for the City Energy Analyst.
+
+``cea benchmark`` creates synthetic districts of a configurable size from the bundled databases (a grid of rectangular
+buildings with a mix of use types, a ring of surrounding buildings and a street grid), runs the major scripts on each
+of them and records the wall time and peak memory (RSS) of every script. The results are written to
+``benchmark_results.json`` / ``benchmark_results.csv`` in the benchmark folder and compared against a stored baseline
+so that scaling improvements don't silently regress.
+
+Every script is run in a fresh (spawned) process, so the peak memory of one script does not hide the peak memory of
+the next one. The peak RSS is measured with :py:mod:`resource` and therefore only reported on Linux / macOS.
+"""
+
+import copy
+import csv
+import datetime
+import json
+import math
+import multiprocessing
+import os
+import shutil
+import time
+import traceback
+from queue import Empty
+
+import numpy as np
+import pandas as pd
+
+import cea.config
+import cea.inputlocator
+from cea.datamanagement.databases_verification import COLUMNS_ZONE_TYPOLOGY
+from cea.utilities.dbf import dataframe_to_dbf
+
+__author__ = "Daren Thomas"
+__copyright__ = "Copyright 2021, Architecture and Building Systems - ETH Zurich"
+__credits__ = ["Daren Thomas"]
+__license__ = "MIT"
+__version__ = "0.1"
+__maintainer__ = "Daren Thomas"
+__email__ = "cea@arch.ethz.ch"
+__status__ = "Production"
+
+# the synthetic districts are placed in Zug, so that they fit the CH databases and the bundled weather file
+SYNTHETIC_DISTRICT_LATITUDE = 47.17
+SYNTHETIC_DISTRICT_LONGITUDE = 8.52
+SYNTHETIC_DISTRICT_DATABASES = "CH"
+SYNTHETIC_DISTRICT_WEATHER = "Zug-inducity_1990_2010_TMY"
+
+BLOCK_SIZE_M = 50.0  # distance between the centres of two neighbouring buildings (one building per street block)
+FOOTPRINT_SIZE_RANGE_M = (12.0, 30.0)  # range of the width / depth of the synthetic building footprints
+FLOORS_AG_RANGE = (2, 8)  # range of floors above ground (inclusive)
+FLOOR_HEIGHT_M = 3.0
+YEAR_RANGE = (1950, 2020)  # range of construction years (inclusive)
+
+QUEUE_POLL_INTERVAL_S = 1.0  # how often to check if the process of a benchmark step is still alive
+
+# (benchmark, step name, script, parameters) - the steps are run in this order. a benchmark is timed as the sum of its
+# steps, but every step is recorded individually. steps of benchmarks that were not selected are still run if a
+# selected benchmark depends on them.
+BENCHMARK_STEPS = [
+    ("radiation", "radiation", "radiation", {}),
+    ("schedule-maker", "schedule-maker", "schedule-maker", {}),
+    ("demand", "demand", "demand", {}),
+    ("thermal-network", "network-layout", "network-layout", {"network_type": "DH"}),
+    ("thermal-network", "thermal-network", "thermal-network", {"network_type": "DH", "network_model": "simplified"}),
+    ("optimization", "water-body-potential", "water-body-potential", {}),
+    ("optimization", "sewage-potential", "sewage-potential", {}),
+    ("optimization", "shallow-geothermal-potential", "shallow-geothermal-potential", {}),
+    ("optimization", "photovoltaic", "photovoltaic", {}),
+    ("optimization", "solar-collector-FP", "solar-collector", {"type_scpanel": "FP"}),
+    ("optimization", "solar-collector-ET", "solar-collector", {"type_scpanel": "ET"}),
+    ("optimization", "photovoltaic-thermal-FP", "photovoltaic-thermal", {"type_scpanel": "FP"}),
+    ("optimization", "photovoltaic-thermal-ET", "photovoltaic-thermal", {"type_scpanel": "ET"}),
+    ("optimization", "decentralized", "decentralized", {}),
+    ("optimization", "optimization", "optimization", {"network_type": "DH", "number_of_generations": 1,
+                                                      "population_size": 4}),
+]
+BENCHMARKS = ["radiation", "schedule-maker", "demand", "thermal-network", "optimization"]
+
+RESULT_FIELDS = ["number_of_buildings", "benchmark", "step", "wall_time_s", "peak_rss_mb"]
+
+
+class BenchmarkRegression(Exception):
+    """Raised when the benchmark results are slower or use more memory than the baseline"""
+
+
+def calc_synthetic_district(number_of_buildings, use_types, standards_df, seed):
+    """
+    Create the geometry and typology of a synthetic district: ``number_of_buildings`` rectangular buildings on a
+    (roughly) square grid, each one in its own street block, surrounded by a ring of surrounding buildings. The
+    footprints, heights, construction years and use types are drawn from ``seed``, so the same arguments always produce
+    the same district.
+
+    The geometries are returned in a local metric coordinate system with the origin at the south-west corner of the
+    district, see :py:func:`create_synthetic_district` for the projection to the scenario coordinate system.
+
+    :param int number_of_buildings: number of buildings in the zone
+    :param list[str] use_types: use types to mix (assigned at random with equal probability, one per building)
+    :param pd.DataFrame standards_df: the STANDARD_DEFINITION sheet of the construction standards database
+    :param int seed: seed of the random number generator
+    :return: zone (GeoDataFrame), surroundings (GeoDataFrame), streets (GeoDataFrame), typology (DataFrame)
+    """
+    from geopandas import GeoDataFrame as Gdf
+    from shapely.geometry import LineString, Polygon
+
+    if number_of_buildings < 1:
+        raise ValueError("A synthetic district needs at least one building, got {}".format(number_of_buildings))
+    if not use_types:
+        raise ValueError("A synthetic district needs at least one use type")
+
+    random_generator = np.random.RandomState(seed)
+    columns = int(math.ceil(math.sqrt(number_of_buildings)))
+    rows = int(math.ceil(number_of_buildings / float(columns)))
+
+    def footprint(column, row):
+        width, depth = random_generator.uniform(*FOOTPRINT_SIZE_RANGE_M, size=2)
+        x = (column + 0.5) * BLOCK_SIZE_M - width / 2.0
+        y = (row + 0.5) * BLOCK_SIZE_M - depth / 2.0
+        return Polygon([(x, y), (x + width, y), (x + width, y + depth), (x, y + depth)])
+
+    def heights(count):
+        floors_ag = random_generator.randint(FLOORS_AG_RANGE[0], FLOORS_AG_RANGE[1] + 1, size=count)
+        return floors_ag, floors_ag * FLOOR_HEIGHT_M
+
+    # zone
+    zone_cells = [(i % columns, i // columns) for i in range(number_of_buildings)]
+    zone_names = ["B{:04d}".format(i + 1000) for i in range(number_of_buildings)]
+    zone_geometry = [footprint(column, row) for column, row in zone_cells]
+    floors_ag, height_ag = heights(number_of_buildings)
+    floors_bg = random_generator.randint(0, 2, size=number_of_buildings)
+    zone_df = Gdf({"Name": zone_names,
+                   "floors_bg": floors_bg,
+                   "floors_ag": floors_ag,
+                   "height_bg": floors_bg * FLOOR_HEIGHT_M,
+                   "height_ag": height_ag,
+                   "REFERENCE": "synthetic"}, geometry=zone_geometry)
+
+    # surroundings - a ring of buildings one block around the zone
+    surroundings_cells = [(column, row) for column in range(-1, columns + 1) for row in range(-1, rows + 1)
+                          if not (0 <= column < columns and 0 <= row < rows)]
+    surroundings_geometry = [footprint(column, row) for column, row in surroundings_cells]
+    floors_ag, height_ag = heights(len(surroundings_cells))
+    surroundings_df = Gdf({"Name": ["S{:04d}".format(i + 1000) for i in range(len(surroundings_cells))],
+                           "floors_ag": floors_ag,
+                           "height_ag": height_ag,
+                           "REFERENCE": "synthetic"}, geometry=surroundings_geometry)
+
+    # streets - a grid along the borders of the street blocks of the zone
+    x_max, y_max = columns * BLOCK_SIZE_M, rows * BLOCK_SIZE_M
+    streets_geometry = ([LineString([(column * BLOCK_SIZE_M, 0.0), (column * BLOCK_SIZE_M, y_max)])
+                         for column in range(columns + 1)] +
+                        [LineString([(0.0, row * BLOCK_SIZE_M), (x_max, row * BLOCK_SIZE_M)])
+                         for row in range(rows + 1)])
+    streets_df = Gdf({"Name": ["street{}".format(i) for i in range(len(streets_geometry))]}, geometry=streets_geometry)
+
+    # typology
+    years = random_generator.randint(YEAR_RANGE[0], YEAR_RANGE[1] + 1, size=number_of_buildings)
+    typology_df = pd.DataFrame({"Name": zone_names,
+                                "STANDARD": [calc_standard(standards_df, year) for year in years],
+                                "YEAR": years,
+                                "1ST_USE": random_generator.choice(use_types, size=number_of_buildings),
+                                "1ST_USE_R": 1.0,
+                                "2ND_USE": "NONE",
+                                "2ND_USE_R": 0.0,
+                                "3RD_USE": "NONE",
+                                "3RD_USE_R": 0.0,
+                                "REFERENCE": "synthetic"})
+
+    return zone_df, surroundings_df, streets_df, typology_df
+
+
+def calc_standard(standards_df, year):
+    """Return the construction standard (e.g. ``STANDARD3``) the construction ``year`` falls into"""
+    in_range = (standards_df["YEAR_START"] <= year) & (standards_df["YEAR_END"] >= year)
+    return standards_df[in_range]["STANDARD"].values[0]
+
+
+def to_scenario_coordinates(gdf, crs):
+    """
+    Move a GeoDataFrame in local metric coordinates (see :py:func:`calc_synthetic_district`) to the location of the
+    synthetic districts and project it to ``crs``. Like the zone-helper, the geometries are first placed in geographic
+    coordinates and then projected.
+    """
+    from shapely.affinity import scale, translate
+    from cea.utilities.standardize_coordinates import get_geographic_coordinate_system
+
+    metres_per_degree_lat = 110540.0
+    metres_per_degree_lon = 111320.0 * math.cos(math.radians(SYNTHETIC_DISTRICT_LATITUDE))
+    geometry = gdf.geometry.apply(lambda g: translate(scale(g, xfact=1.0 / metres_per_degree_lon,
+                                                            yfact=1.0 / metres_per_degree_lat, origin=(0, 0)),
+                                                      xoff=SYNTHETIC_DISTRICT_LONGITUDE,
+                                                      yoff=SYNTHETIC_DISTRICT_LATITUDE))
+    gdf = gdf.set_geometry(geometry)
+    gdf.crs = get_geographic_coordinate_system()
+    return gdf.to_crs(crs)
+
+
+def create_synthetic_district(config, number_of_buildings, use_types, seed):
+    """
+    Create a synthetic scenario ``district-{number_of_buildings}`` in the benchmark folder and prepare its inputs
+    (databases, archetypes, weather and terrain) so that the benchmark steps can be run on it.
+
+    :param cea.config.Configuration config: the benchmark configuration (``general:project`` already set to the
+                                            benchmark folder)
+    :return: the configuration of the synthetic scenario
+    :rtype: cea.config.Configuration
+    """
+    import cea.api
+    from cea.utilities.standardize_coordinates import get_projected_coordinate_system
+
+    config = copy.deepcopy(config)
+    scenario_name = "district-{}".format(number_of_buildings)
+    if not os.path.exists(os.path.join(config.general.project, scenario_name)):
+        os.makedirs(os.path.join(config.general.project, scenario_name))
+    config.general.scenario_name = scenario_name
+    locator = cea.inputlocator.InputLocator(config.scenario)
+    print("Creating synthetic district with {} buildings in {}".format(number_of_buildings, config.scenario))
+
+    cea.api.data_initializer(config=config, databases_path=SYNTHETIC_DISTRICT_DATABASES,
+                             databases=["archetypes", "assemblies", "components"])
+
+    standards_df = pd.read_excel(locator.get_database_construction_standards(), sheet_name="STANDARD_DEFINITION")
+    zone_df, surroundings_df, streets_df, typology_df = calc_synthetic_district(number_of_buildings, use_types,
+                                                                                standards_df, seed)
+    crs = get_projected_coordinate_system(SYNTHETIC_DISTRICT_LATITUDE, SYNTHETIC_DISTRICT_LONGITUDE)
+    locator.ensure_parent_folder_exists(locator.get_zone_geometry())
+    to_scenario_coordinates(zone_df, crs).to_file(locator.get_zone_geometry())
+    to_scenario_coordinates(surroundings_df, crs).to_file(locator.get_surroundings_geometry())
+    to_scenario_coordinates(streets_df, crs).to_file(locator.get_street_network())
+    locator.ensure_parent_folder_exists(locator.get_building_typology())
+    dataframe_to_dbf(typology_df[COLUMNS_ZONE_TYPOLOGY + ["REFERENCE"]], locator.get_building_typology())
+
+    cea.api.archetypes_mapper(config=config,
+                              input_databases=["comfort", "architecture", "air-conditioning", "internal-loads",
+                                               "supply", "schedules"],
+                              buildings=[])
+    cea.api.weather_helper(config=config, weather=SYNTHETIC_DISTRICT_WEATHER)
+    cea.api.terrain_helper(config=config)
+    return config
+
+
+def run_step(config, script, parameters, queue):
+    """
+    Run a single benchmark step - this is the target of the spawned process. The wall time and the peak RSS (of this
+    process and its workers) are put on the ``queue``, or the traceback if the script failed.
+    """
+    import cea.api
+
+    try:
+        t0 = time.perf_counter()
+        getattr(cea.api, script.replace("-", "_"))(config=config, **parameters)
+        wall_time_s = time.perf_counter() - t0
+        queue.put({"wall_time_s": wall_time_s, "peak_rss_mb": calc_peak_rss_mb()})
+    except BaseException:
+        queue.put({"error": traceback.format_exc()})
+
+
+def calc_peak_rss_mb():
+    """
+    Peak resident set size of the current process and of its (terminated) child processes in MB, or ``None`` if the
+    platform doesn't provide :py:mod:`resource`.
+    """
+    try:
+        import resource
+    except ImportError:
+        return None
+    import sys
+    peak_rss = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+                   resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    # ru_maxrss is in kilobytes on linux and in bytes on macOS
+    return peak_rss / (1024.0 * 1024.0) if sys.platform == "darwin" else peak_rss / 1024.0
+
+
+def time_step(config, script, parameters, target=run_step):
+    """
+    Run ``script`` with ``parameters`` in a fresh process and return the wall time and peak RSS. A process that dies
+    without reporting back (e.g. a segfault or killed for running out of memory) is reported as a failed step.
+
+    :rtype: dict
+    """
+    context = multiprocessing.get_context("spawn")
+    queue = context.Queue()
+    process = context.Process(target=target, args=(config, script, parameters, queue))
+    process.start()
+    result = None
+    while result is None:
+        try:
+            result = queue.get(timeout=QUEUE_POLL_INTERVAL_S)
+        except Empty:
+            if not process.is_alive():
+                # the result may have been put on the queue just before the process exited
+                try:
+                    result = queue.get(timeout=QUEUE_POLL_INTERVAL_S)
+                except Empty:
+                    result = {"error": "The process crashed (exit code {exitcode})".format(
+                        exitcode=process.exitcode)}
+    process.join()
+    if "error" in result:
+        raise RuntimeError("Benchmark step {script} failed:\n{error}".format(script=script, error=result["error"]))
+    return result
+
+
+def select_steps(benchmarks):
+    """Return the steps needed to run ``benchmarks`` - all steps up to the last step of a selected benchmark"""
+    unknown = set(benchmarks) - set(BENCHMARKS)
+    if unknown:
+        raise ValueError("Unknown benchmarks: {}".format(", ".join(sorted(unknown))))
+    last_step = max(i for i, step in enumerate(BENCHMARK_STEPS) if step[0] in benchmarks)
+    return BENCHMARK_STEPS[:last_step + 1]
+
+
+def run_benchmarks(config, numbers_of_buildings, use_types, benchmarks, seed):
+    """
+    Create a synthetic district for each size in ``numbers_of_buildings`` and time the steps of ``benchmarks`` on it.
+
+    :return: one record (see :py:data:`RESULT_FIELDS`) per district size and step
+    :rtype: list[dict]
+    """
+    results = []
+    for number_of_buildings in numbers_of_buildings:
+        scenario_config = create_synthetic_district(config, number_of_buildings, use_types, seed)
+        for benchmark, step, script, parameters in select_steps(benchmarks):
+            print("Benchmark {benchmark} ({n} buildings): {step}".format(benchmark=benchmark, n=number_of_buildings,
+                                                                         step=step))
+            result = time_step(scenario_config, script, parameters)
+            results.append({"number_of_buildings": number_of_buildings,
+                            "benchmark": benchmark,
+                            "step": step,
+                            "wall_time_s": result["wall_time_s"],
+                            "peak_rss_mb": result["peak_rss_mb"]})
+    return results
+
+
+def compare_to_baseline(results, baseline, tolerance):
+    """
+    Compare benchmark ``results`` to the ``baseline`` results. A step regresses if its wall time or its peak RSS
+    exceeds the baseline by more than ``tolerance`` (relative). Steps missing in the baseline are not compared.
+
+    :param list[dict] results: the results of :py:func:`run_benchmarks`
+    :param list[dict] baseline: results of a previous run
+    :param float tolerance: relative increase tolerated (e.g. 0.25 for 25%)
+    :return: one record per regression with the metric, the baseline value, the new value and the relative change
+    :rtype: list[dict]
+    """
+    baseline_lookup = {(record["number_of_buildings"], record["step"]): record for record in baseline}
+    regressions = []
+    for record in results:
+        key = (record["number_of_buildings"], record["step"])
+        if key not in baseline_lookup:
+            continue
+        for metric in ["wall_time_s", "peak_rss_mb"]:
+            baseline_value = baseline_lookup[key].get(metric)
+            value = record.get(metric)
+            if not baseline_value or value is None:
+                continue
+            change = (value - baseline_value) / baseline_value
+            if change > tolerance:
+                regressions.append({"number_of_buildings": record["number_of_buildings"],
+                                    "step": record["step"],
+                                    "metric": metric,
+                                    "baseline": baseline_value,
+                                    "value": value,
+                                    "change": change})
+    return regressions
+
+
+def write_results(results, benchmark_folder):
+    """Write the results to ``benchmark_results.json`` and ``benchmark_results.csv`` in ``benchmark_folder``"""
+    json_path = os.path.join(benchmark_folder, "benchmark_results.json")
+    with open(json_path, "w") as json_fp:
+        json.dump({"created": datetime.datetime.now().isoformat(), "results": results}, json_fp, indent=2)
+    with open(os.path.join(benchmark_folder, "benchmark_results.csv"), "w", newline="") as csv_fp:
+        writer = csv.DictWriter(csv_fp, fieldnames=RESULT_FIELDS)
+        writer.writeheader()
+        writer.writerows(results)
+    return json_path
+
+
+def read_baseline(baseline_path):
+    """Read the results stored by :py:func:`write_results`"""
+    with open(baseline_path, "r") as baseline_fp:
+        return json.load(baseline_fp)["results"]
+
+
+def print_results(results):
+    print("")
+    print("{:>10} {:<30} {:>12} {:>12}".format("buildings", "step", "time [s]", "peak [MB]"))
+    for record in results:
+        peak_rss_mb = record["peak_rss_mb"]
+        print("{:>10} {:<30} {:>12.1f} {:>12}".format(record["number_of_buildings"], record["step"],
+                                                       record["wall_time_s"],
+                                                       "-" if peak_rss_mb is None else "{:.0f}".format(peak_rss_mb)))
+
+
+def main(config):
+    """
+    Run the benchmarks configured in the ``benchmark`` section and compare them to the baseline.
+
+    :param config:
+    :type config: cea.config.Configuration
+    :return:
+    """
+    benchmark_folder = config.benchmark.benchmark_folder
+    numbers_of_buildings = [int(n) for n in config.benchmark.number_of_buildings]
+    baseline_path = config.benchmark.baseline
+    if not os.path.exists(benchmark_folder):
+        os.makedirs(benchmark_folder)
+
+    benchmark_config = copy.deepcopy(config)
+    benchmark_config.general.project = benchmark_folder
+    results = run_benchmarks(benchmark_config, numbers_of_buildings, config.benchmark.use_types,
+                             config.benchmark.benchmarks, config.benchmark.random_seed)
+    results_path = write_results(results, benchmark_folder)
+    print_results(results)
+    print("Benchmark results written to {}".format(results_path))
+
+    if not baseline_path:
+        return
+    if config.benchmark.update_baseline or not os.path.exists(baseline_path):
+        shutil.copyfile(results_path, baseline_path)
+        print("Baseline written to {}".format(baseline_path))
+        return
+
+    regressions = compare_to_baseline(results, read_baseline(baseline_path), config.benchmark.tolerance)
+    for regression in regressions:
+        print("REGRESSION ({number_of_buildings} buildings) {step}: {metric} {baseline:.1f} -> {value:.1f} "
+              "(+{change:.0%})".format(**regression))
+    if regressions:
+        raise BenchmarkRegression("{} benchmark regressions compared to {}".format(len(regressions), baseline_path))
+    print("No regressions compared to {}".format(baseline_path))
+
+
+if __name__ == '__main__':
+    main(cea.config.Configuration())
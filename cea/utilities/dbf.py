@@ -2,16 +2,16 @@
 A collection of utility functions for working with ``*.DBF`` (dBase database) files.
 """
 
-import numpy as np
-import pandas as pd
+import datetime
+import hashlib
 import os
-import cea.config
+import struct
+import tempfile
 
-# import PySAL without the warning
-import warnings
+import numpy as np
+import pandas as pd
 
-warnings.filterwarnings("ignore", category=UserWarning)
-import pysal.lib
+import cea.config
 
 __author__ = "Clayton Miller"
 __copyright__ = "Copyright 2017, Architecture and Building Systems - ETH Zurich"
@@ -31,10 +31,19 @@ TYPE_MAPPING = {
     str: ('C', 25, 0),
     np.bool_: ('L', 1, 0)}
 
+DBF_HEADER_FORMAT = '<BBBBLHH20x'  # version, year, month, day, number of records, header length, record length
+DBF_FIELD_FORMAT = '<11sc4xBB14x'  # name, type, size, decimals
+DBF_HEADER_SIZE = struct.calcsize(DBF_HEADER_FORMAT)
+DBF_FIELD_SIZE = struct.calcsize(DBF_FIELD_FORMAT)
+WHITESPACE = np.frombuffer(b' \t\n\r\x0b\x0c\0', dtype=np.uint8)
+
 
 def dataframe_to_dbf(df, dbf_path, specs=None):
     """Given a pandas Dataframe, write a dbase database to ``dbf_path``.
 
+    The records are formatted column by column and written in one go, using the same fixed-width layout as
+    ``pysal.lib.io`` (which was used before).
+
     :type df: pandas.Dataframe
     :type dbf_path: str
     :param specs: A list of column specifications for the dbase table. Each column is specified by a tuple (datatype,
@@ -45,39 +54,212 @@ def dataframe_to_dbf(df, dbf_path, specs=None):
     if specs is None:
         types = [type(df[i].iloc[0]) for i in df.columns]
         specs = [TYPE_MAPPING[t] for t in types]
+    specs = list(specs)
 
-    # handle case of strings that are longer than 25 characters (e.g. for the "Name" column)
-    for i in range(len(specs)):
+    columns = []
+    for i, column in enumerate(df.columns):
         t, l, d = specs[i]  # type, length, decimals
+        values = df[column].values
         if t == 'C':
-            l = max(l, df[df.columns[i]].apply(len).max())
-            specs[i] = t, l, d
-
-    dbf = pysal.lib.io.open(dbf_path, 'w', 'dbf')
-    dbf.header = list(df.columns)
-    dbf.field_spec = specs
-    for row in range(len(df)):
-        dbf.write(df.iloc[row])
-    dbf.close()
+            # handle case of strings that are longer than 25 characters (e.g. for the "Name" column)
+            values = np.char.encode(np.array([str(v) if v is not None else '' for v in values], dtype=str), 'utf-8')
+            l = max(l, np.char.str_len(values).max() if len(values) else 0)
+            if l > 255:
+                raise ValueError('Values of column {column} are too wide for a dbf field (at most 255 bytes)'.format(
+                    column=column))
+            values = np.char.ljust(values, l, fillchar=b' ')
+        elif t in ('N', 'F'):
+            values = np.char.encode(np.char.mod('%{l}.{d}f'.format(l=l, d=d), values.astype(float)), 'ascii')
+            if len(values) and np.char.str_len(values).max() > l:
+                raise ValueError('Values of column {column} are too wide for a dbf field of size {l}'.format(
+                    column=column, l=l))
+        elif t == 'D':
+            values = np.array([v.strftime('%Y%m%d').encode() for v in values], dtype='S8')
+        elif t == 'L':
+            values = np.array([str(v)[0].upper().encode() for v in values], dtype='S1')
+        else:
+            raise ValueError('Unsupported dbf field type {t} for column {column}'.format(t=t, column=column))
+        specs[i] = t, l, d
+        columns.append(values)
+
+    records = np.empty(len(df), dtype=[('deletion_flag', 'S1')] + [
+        ('f{i}'.format(i=i), 'S{l}'.format(l=l)) for i, (t, l, d) in enumerate(specs)])
+    records['deletion_flag'] = b' '
+    for i, values in enumerate(columns):
+        records['f{i}'.format(i=i)] = values
+
+    today = datetime.date.today()
+    with open(dbf_path, 'wb') as dbf:
+        dbf.write(struct.pack(DBF_HEADER_FORMAT, 3, today.year - 1900, today.month, today.day, len(df),
+                              len(specs) * DBF_FIELD_SIZE + DBF_HEADER_SIZE + 1, records.dtype.itemsize))
+        for name, (t, l, d) in zip(df.columns, specs):
+            dbf.write(struct.pack(DBF_FIELD_FORMAT, str(name).encode().ljust(11, b'\0'), t.encode(), l, d))
+        dbf.write(b'\r')
+        dbf.write(records.tobytes())
+        dbf.write(b'\x1a')
+    if os.path.exists(get_dbf_cache_path(dbf_path)):
+        # don't rely on the modification time alone to invalidate the cached copy
+        os.remove(get_dbf_cache_path(dbf_path))
     return dbf_path
 
 
-def dbf_to_dataframe(dbf_path, index=None, cols=None, include_index=False):
-    dbf = pysal.lib.io.open(dbf_path)
-    if cols:
-        if include_index:
-            cols.append(index)
-        vars_to_read = cols
+def read_dbf_header(dbf):
+    """
+    Read the header of a dbase file (opened in binary mode) and return the number of records and the field specs
+    as a list of (name, type, size, decimals) tuples.
+    """
+    _, _, _, _, number_of_records, header_length, _ = struct.unpack(DBF_HEADER_FORMAT, dbf.read(DBF_HEADER_SIZE))
+    number_of_fields = (header_length - DBF_HEADER_SIZE - 1) // DBF_FIELD_SIZE
+    fields = []
+    for _ in range(number_of_fields):
+        name, t, l, d = struct.unpack(DBF_FIELD_FORMAT, dbf.read(DBF_FIELD_SIZE))
+        fields.append((name.decode().replace('\0', ''), t.decode(), l, d))
+    dbf.seek(header_length)
+    return number_of_records, fields
+
+
+def parse_dbf_field(values, t, d):
+    """
+    Convert the raw (fixed-width bytes) values of a dbase field to a numpy array, using the field type ``t`` and
+    number of decimals ``d``. Missing numbers are returned as NaN, fields with zero decimals as integers if possible.
+    """
+    if t in ('N', 'F'):
+        try:
+            if t == 'N' and not d:
+                return values.astype(np.int64)
+            return values.astype(np.float64)
+        except ValueError:
+            # missing (or otherwise unreadable) values
+            numbers = pd.to_numeric(pd.Series(np.char.strip(values, b' \0')).str.decode('ascii', errors='replace'),
+                                    errors='coerce')
+            if t == 'N' and not d:
+                # integer fields with fractional values in them are treated as missing
+                numbers[numbers != np.floor(numbers)] = np.nan
+            return numbers.values
+    elif t == 'D':
+        dates = pd.to_datetime(pd.Series(values).str.decode('ascii', errors='replace'), format='%Y%m%d',
+                               errors='coerce')
+        return dates.dt.date.where(dates.notnull(), None).values
+    elif t == 'L':
+        return np.where(np.isin(values, [b'Y', b'y', b'T', b't']), 'T',
+                        np.where(np.isin(values, [b'N', b'n', b'F', b'f']), 'F', '?')).astype(object)
+    return decode_dbf_strings(values)
+
+
+def decode_dbf_strings(values):
+    """Decode a fixed-width bytes array of dbase strings, stripping the padding at the end of each string"""
+    if not len(values):
+        return values.astype(str).astype(object)
+    width = values.dtype.itemsize
+    chars = np.frombuffer(values.tobytes(), dtype=np.uint8).reshape(len(values), width).copy()
+    # null out the trailing whitespace - numpy drops trailing NUL bytes from bytes arrays
+    padding = np.logical_and.accumulate(np.isin(chars[:, ::-1], WHITESPACE), axis=1)[:, ::-1]
+    chars[padding] = 0
+    values = chars.view('S{width}'.format(width=width)).ravel()
+    if (chars < 128).all():
+        return values.astype(str).astype(object)
+    return np.char.decode(values, 'utf-8').astype(object)
+
+
+def dbf_to_dataframe(dbf_path, index=None, cols=None, include_index=False, cache=False):
+    """
+    Read a dbase database into a DataFrame. The fixed-width records are read into a numpy record array in one go
+    and each column is converted based on its field type (see :py:func:`parse_dbf_field`).
+
+    :param str dbf_path: path to the ``*.dbf`` file
+    :param str index: name of the column to use as the index
+    :param cols: only read these columns
+    :type cols: list[str]
+    :param bool include_index: also read the ``index`` column as a column (only applies to ``cols``)
+    :param bool cache: keep a binary copy of the table in the temporary folder (see :py:func:`get_dbf_cache_path`) and
+        use that as long as the ``*.dbf`` file is not changed. Use this for tables that are read many times.
+    :rtype: pd.DataFrame
+    """
+    if cols and include_index:
+        cols.append(index)
+
+    if cache:
+        df = read_dbf_cache(dbf_path)
+        if df is None:
+            df = dbf_to_dataframe(dbf_path)
+            write_dbf_cache(dbf_path, df)
     else:
-        vars_to_read = dbf.header
-    data = dict([(var, dbf.by_col(var)) for var in vars_to_read])
+        with open(dbf_path, 'rb') as dbf:
+            number_of_records, fields = read_dbf_header(dbf)
+            dtype = [('deletion_flag', 'S1')] + [('f{i}'.format(i=i), 'S{l}'.format(l=l))
+                                                for i, (name, t, l, d) in enumerate(fields)]
+            records = np.fromfile(dbf, dtype=dtype, count=number_of_records)
+        # skip the records marked as deleted
+        records = records[records['deletion_flag'] != b'*']
+        # only convert the columns we need
+        names_to_read = set(cols) | {index} if cols else {field[0] for field in fields}
+        df = pd.DataFrame({name: parse_dbf_field(records['f{i}'.format(i=i)], t, d)
+                           for i, (name, t, l, d) in enumerate(fields) if name in names_to_read},
+                          columns=[field[0] for field in fields if field[0] in names_to_read])
+
+    index_values = df[index].values if index else None
+    if cols:
+        df = df[cols]
     if index:
-        index = dbf.by_col(index)
-        dbf.close()
-        return pd.DataFrame(data, index=index)
-    else:
-        dbf.close()
-        return pd.DataFrame(data)
+        df = df.set_index(pd.Index(index_values))
+    return df
+
+
+def get_dbf_cache_path(dbf_path):
+    """The cached copy of a dbf file is kept in the temporary folder (not next to the inputs of the scenario)"""
+    path_hash = hashlib.sha256(os.path.normcase(os.path.abspath(dbf_path)).encode('utf-8')).hexdigest()
+    return os.path.join(tempfile.gettempdir(), 'cea-dbf-cache', path_hash + '.npz')
+
+
+def read_dbf_cache(dbf_path):
+    """Return the cached copy of ``dbf_path`` or None if there is none or it is out of date"""
+    cache_path = get_dbf_cache_path(dbf_path)
+    if not os.path.exists(cache_path):
+        return None
+    stat = os.stat(dbf_path)
+    try:
+        with np.load(cache_path, allow_pickle=False) as cache:
+            if tuple(cache['__key__']) != (stat.st_size, stat.st_mtime_ns):
+                return None
+            columns = {}
+            for i, (name, kind) in enumerate(zip(cache['__columns__'], cache['__kinds__'])):
+                values = cache['c{i}'.format(i=i)]
+                if kind == 'str':
+                    values = values.astype(object)
+                elif kind == 'date':
+                    values = np.array([None if np.isnat(v) else v.astype(datetime.date) for v in values],
+                                      dtype=object)
+                columns[str(name)] = values
+    except (OSError, KeyError, ValueError):
+        return None
+    return pd.DataFrame(columns, columns=list(columns.keys()))
+
+
+def write_dbf_cache(dbf_path, df):
+    """Write the columns of ``df`` as plain arrays (no pickles) - tables with other objects than strings and dates
+    are not cached"""
+    arrays, kinds = {}, []
+    for i, column in enumerate(df.columns):
+        values = df[column].values
+        kind = ''
+        if values.dtype == object:
+            if all(isinstance(v, str) for v in values):
+                values, kind = np.array(values, dtype=str), 'str'
+            elif all(v is None or isinstance(v, datetime.date) for v in values):
+                values, kind = np.array(values, dtype='datetime64[D]'), 'date'
+            else:
+                return
+        arrays['c{i}'.format(i=i)] = values
+        kinds.append(kind)
+    stat = os.stat(dbf_path)
+    cache_path = get_dbf_cache_path(dbf_path)
+    if not os.path.exists(os.path.dirname(cache_path)):
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    temporary_path = '{cache_path}.{pid}.npz'.format(cache_path=cache_path[:-len('.npz')], pid=os.getpid())
+    np.savez(temporary_path, __key__=np.array([stat.st_size, stat.st_mtime_ns], dtype=np.int64),
+             __columns__=np.array([str(c) for c in df.columns], dtype=str), __kinds__=np.array(kinds, dtype=str),
+             **arrays)
+    os.replace(temporary_path, cache_path)
 
 
 def xls_to_dbf(input_file, output_path, output_file_name):
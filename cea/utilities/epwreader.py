@@ -1,11 +1,16 @@
 """
 Energyplus file reader
-"""
 
+The parsed weather data is cached, so each weather file is parsed only once: in memory for the lifetime of the process
+and on disk (in a numpy file, keyed on the content of the weather file), so the other processes - e.g. the workers of
+:py:mod:`cea.utilities.parallel` - load the parsed data instead of parsing the weather file again.
+"""
 
+import hashlib
+import os
+import tempfile
 
 import pandas as pd
-import math
 import cea.inputlocator
 import numpy as np
 from cea.constants import BOLTZMANN, KELVIN_OFFSET, HOURS_IN_YEAR
@@ -22,6 +27,40 @@ __status__ = "Production"
 
 from cea.utilities.date import get_date_range_hours_from_year
 
+# bump this when changing the columns computed by ``parse_epw`` or the format of the cache to invalidate it
+CACHE_VERSION = 2
+CACHE_FOLDER = os.path.join(tempfile.gettempdir(), 'cea-weather-cache')
+
+# weather_path -> (mtime, size, weather data) of the weather files read by this process
+_weather_cache = {}
+
+
+class WeatherDataFrame(pd.DataFrame):
+    """
+    The weather data returned by :py:func:`epw_reader`. When pickled (e.g. when passed to a worker process with
+    ``itertools.repeat``) only the path to the weather file is sent and the worker reads the weather data from the cache
+    - unless the weather data was changed in any way, then it is pickled as a plain DataFrame. Frames derived from it
+    (``weather_data[['drybulb_C']]``, ``weather_data.copy()``) are plain DataFrames.
+    """
+    _metadata = ['weather_path', 'weather_columns']
+    weather_path = None
+    weather_columns = None
+
+    def __reduce_ex__(self, protocol):
+        if self.weather_path is None or not self.is_unchanged():
+            return pd.DataFrame, (pd.DataFrame(self),)
+        return epw_reader, (self.weather_path, self.weather_columns)
+
+    def is_unchanged(self):
+        """True, if the data is still the same as the (cached) data of the weather file"""
+        try:
+            weather_data = load_weather(self.weather_path)
+        except (IOError, OSError):
+            return False
+        if self.weather_columns is not None:
+            weather_data = weather_data[self.weather_columns]
+        return pd.DataFrame(self).equals(weather_data)
+
 
 def epw_to_dataframe(weather_path):
     epw_labels = ['year', 'month', 'day', 'hour', 'minute', 'datasource', 'drybulb_C', 'dewpoint_C', 'relhum_percent',
@@ -35,7 +74,73 @@ def epw_to_dataframe(weather_path):
     return df
 
 
-def epw_reader(weather_path):
+def epw_reader(weather_path, columns=None):
+    """
+    Read the weather data of an epw file, with the derived variables (e.g. the wet bulb and sky temperatures).
+
+    :param weather_path: path to the epw file
+    :param columns: optionally, return only these columns
+    :type columns: list[str]
+    :rtype: WeatherDataFrame
+    """
+    weather_data = load_weather(weather_path)
+    if columns is not None:
+        weather_data = weather_data[columns]
+    weather_data = WeatherDataFrame(weather_data, copy=True)
+    weather_data.weather_path = weather_path
+    weather_data.weather_columns = columns
+    return weather_data
+
+
+def load_weather(weather_path):
+    """
+    Return the parsed weather data of ``weather_path`` - from the cache of this process, from the cache on disk or by
+    parsing the file, in that order. The returned DataFrame is shared, use :py:func:`epw_reader` to get a copy.
+    """
+    stat = os.stat(weather_path)
+    if weather_path in _weather_cache:
+        mtime, size, weather_data = _weather_cache[weather_path]
+        if (mtime, size) == (stat.st_mtime, stat.st_size):
+            return weather_data
+
+    with open(weather_path, 'rb') as f:
+        content_hash = hashlib.sha256(f.read()).hexdigest()
+    cache_path = os.path.join(CACHE_FOLDER, '{content_hash}-v{version}.npy'.format(content_hash=content_hash,
+                                                                                  version=CACHE_VERSION))
+    try:
+        weather_data = read_weather_cache(cache_path)
+    except (IOError, OSError, ValueError):
+        weather_data = parse_epw(weather_path)
+        write_weather_cache(cache_path, weather_data)
+
+    _weather_cache[weather_path] = (stat.st_mtime, stat.st_size, weather_data)
+    return weather_data
+
+
+def read_weather_cache(cache_path):
+    records = np.load(cache_path, allow_pickle=False)
+    return pd.DataFrame({name: records[name] for name in records.dtype.names})
+
+
+def write_weather_cache(cache_path, weather_data):
+    """Write the weather data as a numpy record array - the cache is optional, so failing to write it is ignored"""
+    records = weather_data.to_records(index=False)
+    # make sure the records can be loaded without pickle (e.g. text columns in some epw files), sized to fit the text
+    records = records.astype([(name, records[name].astype(str).dtype if records.dtype[name] == object
+                               else records.dtype[name]) for name in records.dtype.names])
+    tmp_path = '{cache_path}.{pid}.tmp'.format(cache_path=cache_path, pid=os.getpid())
+    try:
+        if not os.path.exists(CACHE_FOLDER):
+            os.makedirs(CACHE_FOLDER)
+        with open(tmp_path, 'wb') as f:
+            np.save(f, records, allow_pickle=False)
+        os.replace(tmp_path, cache_path)
+    except (IOError, OSError):
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def parse_epw(weather_path):
     epw_data = epw_to_dataframe(weather_path)
 
     year = epw_data["year"][0]
@@ -59,9 +164,9 @@ def epw_reader(weather_path):
 
     epw_data['ratio_diffhout'] = epw_data['difhorrad_Whm2'] / epw_data['glohorrad_Whm2']
     epw_data['ratio_diffhout'] = epw_data['ratio_diffhout'].replace(np.inf, np.nan)
-    epw_data['wetbulb_C'] = np.vectorize(calc_wetbulb)(epw_data['drybulb_C'], epw_data['relhum_percent'])
-    epw_data['skytemp_C'] = np.vectorize(calc_skytemp)(epw_data['drybulb_C'], epw_data['dewpoint_C'],
-                                                       epw_data['opaqskycvr_tenths'])
+    epw_data['wetbulb_C'] = calc_wetbulb(epw_data['drybulb_C'].values, epw_data['relhum_percent'].values)
+    epw_data['skytemp_C'] = calc_skytemp(epw_data['drybulb_C'].values, epw_data['dewpoint_C'].values,
+                                         epw_data['opaqskycvr_tenths'].values)
 
     return epw_data
 
@@ -77,9 +182,11 @@ def calc_skytemp(Tdrybulb, Tdewpoint, N):
     :param Tdewpoint: Wet bulb temperature [C]
     :param N: opaque skycover in [tenths], minimum is 0, maximum is 10 see: http://glossary.ametsoc.org/wiki/Sky_cover
     :return: sky temperature [C]
+
+    Works on scalars and numpy arrays.
     """
 
-    sky_e = (0.787 + 0.764 * math.log((Tdewpoint + KELVIN_OFFSET) / KELVIN_OFFSET)) * (
+    sky_e = (0.787 + 0.764 * np.log((Tdewpoint + KELVIN_OFFSET) / KELVIN_OFFSET)) * (
             1 + 0.0224 * N - 0.0035 * N ** 2 + 0.00028 * N ** 3)
     hor_IR = sky_e * BOLTZMANN * (Tdrybulb + KELVIN_OFFSET) ** 4
     sky_T = ((hor_IR / BOLTZMANN) ** 0.25) - KELVIN_OFFSET
@@ -88,8 +195,15 @@ def calc_skytemp(Tdrybulb, Tdewpoint, N):
 
 
 def calc_wetbulb(Tdrybulb, RH):
-    Tw = Tdrybulb * math.atan(0.151977 * ((RH + 8.313659) ** (0.5))) + math.atan(Tdrybulb + RH) - math.atan(
-        RH - 1.676331) + (0.00391838 * (RH ** (3 / 2))) * math.atan(0.023101 * RH) - 4.686035
+    """
+    Wet bulb temperature after Stull (2011), works on scalars and numpy arrays
+
+    :param Tdrybulb: Dry bulb temperature [C]
+    :param RH: relative humidity [%]
+    :return: wet bulb temperature [C]
+    """
+    Tw = Tdrybulb * np.arctan(0.151977 * ((RH + 8.313659) ** (0.5))) + np.arctan(Tdrybulb + RH) - np.arctan(
+        RH - 1.676331) + (0.00391838 * (RH ** (3 / 2))) * np.arctan(0.023101 * RH) - 4.686035
 
     return Tw  # wetbulb temperature in C
 
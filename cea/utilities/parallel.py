@@ -18,6 +18,7 @@ import sys
 import logging
 from itertools import repeat
 from cea.utilities.workerstream import stream_from_queue, QueueWorkerStream
+from cea.utilities import profiling
 
 __author__ = "Daren Thomas"
 __copyright__ = "Copyright 2019, Architecture and Building Systems - ETH Zurich"
@@ -86,14 +87,20 @@ def __multiprocess_wrapper(func, processes, on_complete):
                 repeat(queue, n),
                 repeat(on_complete, n),
                 repeat(i_queue, n),
-                repeat(n, n)] + args
+                repeat(n, n),
+                repeat(profiling.is_enabled(), n)] + args
         args = zip(*args)
 
         map_result = pool.map_async(__apply_func_with_worker_stream, args)
 
         while not map_result.ready():
             stream_from_queue(queue)
-        result = map_result.get()
+
+        # collect the stages recorded by the workers (see cea.utilities.profiling)
+        result = []
+        for func_result, records in map_result.get():
+            result.append(func_result)
+            profiling.add_records(records)
 
         pool.close()
         pool.join()
@@ -111,7 +118,8 @@ def __apply_func_with_worker_stream(args):
     Call func, using ``queue`` to redirect stdout and stderr, with a tuple of args because multiprocessing.Pool.map
     only accepts one argument for the function.
 
-    This function is called _inside_ a separate process.
+    This function is called _inside_ a separate process. The stages recorded by ``func`` (see
+    ``cea.utilities.profiling``) are returned together with the result.
     """
 
     # set up logging
@@ -121,7 +129,9 @@ def __apply_func_with_worker_stream(args):
     suppress_3rd_party_debug_loggers()
 
     # unpack the arguments
-    func, queue, on_complete, i_queue, n, args = args[0], args[1], args[2], args[3], args[4], args[5:]
+    func, queue, on_complete, i_queue, n, profiling_enabled, args = (args[0], args[1], args[2], args[3], args[4],
+                                                                     args[5], args[6:])
+    profiling.enable(profiling_enabled)
 
     # set up printing to stderr and stdout to go through the queue
     sys.stdout = QueueWorkerStream('stdout', queue)
@@ -133,7 +143,7 @@ def __apply_func_with_worker_stream(args):
     if on_complete:
         on_complete(i_queue.get(), n, args, result)
 
-    return result
+    return result, profiling.pop_records()
 
 
 def single_process_wrapper(func, on_complete):
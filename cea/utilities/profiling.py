@@ -0,0 +1,170 @@
+"""
+Timing and memory instrumentation of the CEA scripts.
+
+Scripts mark the stages of their work with the :py:func:`stage` context manager, optionally for a single building::
+
+    with profiling.stage("read inputs", building_name):
+        schedules, tsd = initialize_inputs(bpr, weather_data, locator)
+
+When the ``general:profiling`` parameter is off, :py:func:`stage` does nothing. When it is on, each stage records its
+wall time, CPU time and the memory (RSS) of the process at the end of the stage. :py:func:`profile_script` (used by
+``cea.api`` and the ``cea`` command) switches the recording on and writes the records to the timing file of the script
+(see :py:meth:`cea.inputlocator.InputLocator.get_timing_file`) when the script is done.
+
+Records made inside the workers of :py:func:`cea.utilities.parallel.vectorize` are sent back to the parent process
+together with the results, so the timing file contains the stages of all buildings, whichever process ran them.
+"""
+
+import contextlib
+import os
+import time
+
+__author__ = "Daren Thomas"
+__copyright__ = "Copyright 2021, Architecture and Building Systems - ETH Zurich"
+__credits__ = ["Daren Thomas"]
+__license__ = "MIT"
+__version__ = "0.1"
+__maintainer__ = "Daren Thomas"
+__email__ = "cea@arch.ethz.ch"
+__status__ = "Production"
+
+TIMING_COLUMNS = ["stage", "building", "size", "process", "start", "wall_time_s", "cpu_time_s", "rss_mb"]
+
+# the state of the current process - workers of cea.utilities.parallel.vectorize get their own copy
+_enabled = False
+_records = []
+
+
+def enable(enabled=True):
+    """Switch the recording of stages on (or off) for the current process"""
+    global _enabled
+    _enabled = enabled
+
+
+def is_enabled():
+    return _enabled
+
+
+def pop_records():
+    """Return the stages recorded so far in this process and start a new list of records"""
+    global _records
+    records, _records = _records, []
+    return records
+
+
+def add_records(records):
+    """Add stages recorded in another process (e.g. a worker of ``vectorize``)"""
+    _records.extend(records)
+
+
+@contextlib.contextmanager
+def stage(name, building=None, size=None):
+    """
+    Record the wall time, CPU time and memory of the enclosed block as the stage ``name``.
+
+    :param str name: name of the stage, e.g. "read inputs"
+    :param str building: name of the building the stage is run for (``None`` for stages of the whole scenario)
+    :param int size: optional measure of the size of the work done in the stage (e.g. the number of sensors), to
+                     help explaining outliers
+    """
+    if not _enabled:
+        yield
+        return
+
+    start = time.time()
+    wall_time = time.perf_counter()
+    cpu_time = time.process_time()
+    try:
+        yield
+    finally:
+        _records.append({"stage": name,
+                         "building": building,
+                         "size": size,
+                         "process": os.getpid(),
+                         "start": start,
+                         "wall_time_s": time.perf_counter() - wall_time,
+                         "cpu_time_s": time.process_time() - cpu_time,
+                         "rss_mb": calc_rss_mb()})
+
+
+class StageTimer(object):
+    """
+    Lap timer for a sequence of stages that would be awkward to wrap in :py:func:`stage` blocks - each call to
+    :py:meth:`lap` records the time since the previous lap (or since the timer was created) as a stage::
+
+        timer = profiling.StageTimer(building_name)
+        schedules, tsd = initialize_inputs(bpr, weather_data, locator)
+        timer.lap("read inputs")
+    """
+
+    def __init__(self, building=None):
+        self.building = building
+        self._start()
+
+    def _start(self):
+        if _enabled:
+            self.start = time.time()
+            self.wall_time = time.perf_counter()
+            self.cpu_time = time.process_time()
+
+    def lap(self, name, size=None):
+        if not _enabled:
+            return
+        _records.append({"stage": name,
+                         "building": self.building,
+                         "size": size,
+                         "process": os.getpid(),
+                         "start": self.start,
+                         "wall_time_s": time.perf_counter() - self.wall_time,
+                         "cpu_time_s": time.process_time() - self.cpu_time,
+                         "rss_mb": calc_rss_mb()})
+        self._start()
+
+
+def calc_rss_mb():
+    """Resident set size of the current process in MB"""
+    import psutil
+    return psutil.Process().memory_info().rss / (1024.0 * 1024.0)
+
+
+@contextlib.contextmanager
+def profile_script(script_name, config):
+    """
+    Record the stages of the script ``script_name`` if ``general:profiling`` is set and write them to the timing file
+    of the script in the scenario. The whole script is recorded as the stage "total".
+
+    Scripts can be nested (e.g. a workflow running other scripts) - each script writes only its own stages.
+    """
+    with config.ignore_restrictions():
+        enabled = config.profiling
+        scenario = config.scenario
+    if not enabled:
+        yield
+        return
+
+    was_enabled = _enabled
+    outer_records = pop_records()
+    enable()
+    try:
+        with stage("total"):
+            yield
+    finally:
+        records = pop_records()
+        enable(was_enabled)
+        add_records(outer_records)
+        if os.path.exists(scenario):
+            import cea.inputlocator
+            timing_file = cea.inputlocator.InputLocator(scenario).get_timing_file(script_name)
+            write_timing_file(records, timing_file)
+            print("Timing of {script} written to {timing_file}".format(script=script_name, timing_file=timing_file))
+
+
+def write_timing_file(records, timing_file):
+    """Write the recorded stages to ``timing_file``, sorted by their start time"""
+    import pandas as pd
+
+    folder = os.path.dirname(timing_file)
+    if not os.path.exists(folder):
+        os.makedirs(folder)
+    timing_df = pd.DataFrame(records, columns=TIMING_COLUMNS).sort_values("start")
+    timing_df.to_csv(timing_file, index=False, float_format="%.6f")
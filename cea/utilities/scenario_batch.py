@@ -0,0 +1,408 @@
+"""
+Run a parameter study (e.g. an uncertainty or sensitivity analysis) on variants of a base scenario.
+
+``cea scenario-batch`` reads a batch file (YAML) with the scripts to run and the parameter space - config parameters
+and columns of input tables - samples ``scenario-batch:samples`` variants from it with a latin hypercube and runs the
+scripts on each variant (in parallel, with ``general:multiprocessing``). The key indicators of each variant (the sums
+over the buildings of the demand, emissions and costs) are collected in ``batch_results.csv`` in the batch folder,
+together with the sampled values of the parameters (``batch_samples.csv``). Example of a batch file::
+
+    scripts:
+      - schedule-maker
+      - demand
+      - emissions
+      - script: system-costs
+        parameters:
+          capital: true
+    parameters:
+      - parameter: demand:use-dynamic-infiltration-calculation
+        values: [true, false]
+      - table: get_building_architecture  # a locator method of the input table (dbf, shp or csv)
+        column: wwr_south
+        range: [0.2, 0.6]  # set the column to a value between 0.2 and 0.6
+      - table: get_building_internal
+        column: El_Wm2
+        scale: [0.8, 1.2]  # multiply the column by a factor between 0.8 and 1.2
+        buildings: [B1000, B1001]  # only vary these buildings (default: all)
+
+The variants share the unchanged artefacts of the base scenario: the scripts affected by the parameters are found with
+the ``created_by`` / ``used_by`` entries of ``schemas.yml`` (a script is affected if it uses a varied table or config
+parameter, or a file created by an affected script). Only the affected scripts are run on the variants, the folders of
+the base scenario no affected script writes to (e.g. the geometry, the weather, the databases and the radiation when
+only the internal loads vary) are hard-linked into the variants instead of copied. The folders written by the affected
+scripts start empty, folders also written by other scripts are copied. The base scenario itself is run first (see
+``scenario-batch:run-base``), so that the shared artefacts are up to date.
+"""
+
+import copy
+import os
+import shutil
+import traceback
+
+import numpy as np
+import pandas as pd
+import yaml
+
+import cea.config
+import cea.inputlocator
+import cea.schemas
+import cea.scripts
+from cea.utilities.dbf import dataframe_to_dbf, dbf_to_dataframe
+from cea.utilities.latin_hypercube import lhs
+
+__author__ = "Daren Thomas"
+__copyright__ = "Copyright 2021, Architecture and Building Systems - ETH Zurich"
+__credits__ = ["Daren Thomas"]
+__license__ = "MIT"
+__version__ = "0.1"
+__maintainer__ = "Daren Thomas"
+__email__ = "cea@arch.ethz.ch"
+__status__ = "Production"
+
+# (locator method, columns) - the indicators of a scenario are the sums of these columns over the buildings
+INDICATORS = [
+    ("get_total_demand", ["GFA_m2", "QH_sys_MWhyr", "QC_sys_MWhyr", "Qww_sys_MWhyr", "E_sys_MWhyr", "GRID_MWhyr",
+                          "QH_sys0_kW", "QC_sys0_kW", "E_sys0_kW"]),
+    ("get_lca_operation", ["GHG_sys_tonCO2"]),
+    ("get_lca_embodied", ["GHG_sys_embodied_tonCO2"]),
+    ("get_costs_operation_file", ["Capex_a_sys_building_scale_USD", "Opex_a_sys_building_scale_USD",
+                                  "Capex_a_sys_district_scale_USD", "Opex_a_sys_district_scale_USD"]),
+]
+
+BASE = "base"
+
+
+class Factor(object):
+    """A parameter of the batch: a config parameter (``parameter``) or a column of an input table (``table`` and
+    ``column``), varied over a list of ``values``, a ``range`` or by a ``scale`` factor"""
+
+    def __init__(self, factor_dict):
+        if ("parameter" in factor_dict) == ("table" in factor_dict):
+            raise ValueError("A batch parameter needs either a parameter or a table: {}".format(factor_dict))
+        if "table" in factor_dict and "column" not in factor_dict:
+            raise ValueError("A batch parameter of a table needs a column: {}".format(factor_dict))
+        variations = [key for key in ["values", "range", "scale"] if key in factor_dict]
+        if len(variations) != 1:
+            raise ValueError("A batch parameter needs one of values, range or scale: {}".format(factor_dict))
+        if "parameter" in factor_dict and variations[0] == "scale":
+            raise ValueError("Config parameters can't be scaled: {}".format(factor_dict))
+        self.parameter = factor_dict.get("parameter")
+        self.table = factor_dict.get("table")
+        self.column = factor_dict.get("column")
+        self.buildings = factor_dict.get("buildings")
+        self.variation = variations[0]
+        self.bounds = list(factor_dict[self.variation])
+        if self.variation != "values" and len(self.bounds) != 2:
+            raise ValueError("The {variation} of a batch parameter needs two values: {factor}".format(
+                variation=self.variation, factor=factor_dict))
+        self.label = factor_dict.get("name", self.parameter or "{table}:{column}".format(table=self.table,
+                                                                                      column=self.column))
+
+    def value(self, u):
+        """The value of the factor for a sample ``u`` in [0, 1)"""
+        if self.variation == "values":
+            return self.bounds[min(int(u * len(self.bounds)), len(self.bounds) - 1)]
+        low, high = self.bounds
+        value = low + u * (high - low)
+        if all(isinstance(bound, int) and not isinstance(bound, bool) for bound in self.bounds):
+            return int(round(value))
+        return float(value)
+
+
+def read_batch_file(batch_file):
+    """
+    Read the scripts (a list of (script, parameters) tuples) and the factors of a batch file
+
+    :rtype: tuple[list[tuple[str, dict]], list[Factor]]
+    """
+    if not batch_file or not os.path.exists(batch_file):
+        raise cea.ConfigError("Batch file not found: {}".format(batch_file))
+    with open(batch_file, "r") as batch_fp:
+        batch = yaml.safe_load(batch_fp)
+    scripts = [(step, {}) if isinstance(step, str) else (step["script"], step.get("parameters", {}))
+               for step in batch.get("scripts", [])]
+    factors = [Factor(factor_dict) for factor_dict in batch.get("parameters", [])]
+    if not scripts:
+        raise ValueError("The batch file {} does not list any scripts".format(batch_file))
+    if not factors:
+        raise ValueError("The batch file {} does not list any parameters".format(batch_file))
+    return scripts, factors
+
+
+def sample_variants(factors, samples, seed):
+    """Sample the values of the factors for ``samples`` variants with a latin hypercube
+
+    :rtype: pd.DataFrame
+    """
+    np.random.seed(seed)
+    design = lhs(len(factors), samples=samples, criterion="maximin")
+    return pd.DataFrame([[factor.value(u) for factor, u in zip(factors, row)] for row in design],
+                        index=pd.Index(["variant-{:03d}".format(i) for i in range(samples)], name="variant"),
+                        columns=[factor.label for factor in factors])
+
+
+def variant_values(samples):
+    """The values of the factors of each variant (by variant name), keeping the type of each factor (a row of
+    ``samples`` turns integers into floats if other factors are floats)
+
+    :rtype: dict[str, dict]
+    """
+    return samples.to_dict("index")
+
+
+def find_affected_scripts(config, scripts, factors, schemas):
+    """
+    The scripts (of ``scripts``, in order) whose results change with the factors: the scripts using a varied table or
+    config parameter, and the scripts using a file created by an affected script.
+
+    :param scripts: the names of the scripts of the batch
+    :param schemas: the contents of ``schemas.yml`` (see :py:func:`cea.schemas.schemas`)
+    :rtype: list[str]
+    """
+    varied_parameters = {factor.parameter for factor in factors if factor.parameter}
+    changed_files = {factor.table for factor in factors if factor.table}
+    unknown = changed_files - set(schemas.keys())
+    if unknown:
+        raise ValueError("Unknown input tables (locator methods): {}".format(", ".join(sorted(unknown))))
+
+    affected = set()
+    changed = True
+    while changed:
+        changed = False
+        for script_name in scripts:
+            if script_name in affected:
+                continue
+            script = cea.scripts.by_name(script_name, plugins=config.plugins)
+            script_parameters = {parameter.fqname for _, parameter in config.matching_parameters(script.parameters)}
+            uses_changed_file = any(py_name(script_name) in schemas[lm]["used_by"] for lm in changed_files)
+            if script_parameters & varied_parameters or uses_changed_file:
+                affected.add(script_name)
+                changed_files.update(lm for lm in schemas if py_name(script_name) in schemas[lm]["created_by"])
+                changed = True
+    return [script_name for script_name in scripts if script_name in affected]
+
+
+def py_name(script_name):
+    """schemas.yml refers to the scripts with underscores"""
+    return script_name.replace("-", "_")
+
+
+def calc_folder_writers(schemas, scripts):
+    """The scripts of the batch (``scripts``) writing to each folder of a scenario (relative, with ``/``), according
+    to schemas.yml"""
+    batch_scripts = {py_name(script_name) for script_name in scripts}
+    folder_writers = {}
+    for lm in schemas:
+        folder = os.path.dirname(schemas[lm]["file_path"])
+        folder_writers.setdefault(folder, set()).update(batch_scripts.intersection(schemas[lm]["created_by"]))
+    return folder_writers
+
+
+def writers_of(folder, folder_writers):
+    """The scripts writing to ``folder`` - or to its closest parent folder known to schemas.yml"""
+    while folder:
+        if folder in folder_writers:
+            return folder_writers[folder]
+        folder = os.path.dirname(folder)
+    return set()
+
+
+def create_variant_scenario(base_scenario, variant_scenario, affected_scripts, folder_writers):
+    """
+    Create a variant of the base scenario: the files of the folders no affected script writes to are hard-linked
+    (shared with the base scenario), the folders only written by affected scripts are left empty and the folders
+    written by both affected and other scripts are copied.
+    """
+    affected = {py_name(script_name) for script_name in affected_scripts}
+    if os.path.exists(variant_scenario):
+        shutil.rmtree(variant_scenario)
+    for root, _, files in os.walk(base_scenario):
+        folder = os.path.relpath(root, base_scenario).replace(os.sep, "/")
+        if folder == ".":
+            folder = ""
+        writers = writers_of(folder, folder_writers)
+        if writers & affected and writers <= affected:
+            continue
+        share = shutil.copy2 if writers & affected else link_file
+        variant_folder = os.path.join(variant_scenario, os.path.relpath(root, base_scenario))
+        if not os.path.exists(variant_folder):
+            os.makedirs(variant_folder)
+        for file_name in files:
+            # databases (e.g. the workflow step hashes) are written in place, they can't be shared
+            copy_file = shutil.copy2 if file_name.endswith(".sqlite") else share
+            copy_file(os.path.join(root, file_name), os.path.join(variant_folder, file_name))
+
+
+def link_file(source, destination):
+    """Hard-link ``source`` to ``destination``, copy it if the file system doesn't support hard links"""
+    try:
+        os.link(source, destination)
+    except OSError:
+        shutil.copy2(source, destination)
+
+
+def apply_table_factors(locator, factors, values):
+    """Write the varied input tables of a variant - as new files, so the hard-linked files of the base scenario are
+    not changed"""
+    tables = {}
+    for factor in factors:
+        if factor.table:
+            tables.setdefault(factor.table, []).append(factor)
+    for table, table_factors in tables.items():
+        path = getattr(locator, table)()
+        df = read_table(path)
+        for factor in table_factors:
+            if factor.column not in df.columns:
+                raise ValueError("Column {column} not found in {path}".format(column=factor.column, path=path))
+            rows = df["Name"].isin(factor.buildings) if factor.buildings else slice(None)
+            if factor.variation == "scale":
+                df.loc[rows, factor.column] = df.loc[rows, factor.column] * values[factor.label]
+            else:
+                df.loc[rows, factor.column] = values[factor.label]
+        unlink_table(path)
+        write_table(df, path)
+
+
+def read_table(path):
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".dbf":
+        return dbf_to_dataframe(path)
+    elif extension == ".shp":
+        import geopandas
+        return geopandas.read_file(path)
+    elif extension == ".csv":
+        return pd.read_csv(path)
+    raise ValueError("Only dbf, shp and csv input tables can be varied: {}".format(path))
+
+
+def write_table(df, path):
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".dbf":
+        dataframe_to_dbf(df, path)
+    elif extension == ".shp":
+        df.to_file(path)
+    else:
+        df.to_csv(path, index=False)
+
+
+def unlink_table(path):
+    """Remove the (hard-linked) files of a table - including the other files of a shapefile"""
+    folder, file_name = os.path.split(path)
+    stem = os.path.splitext(file_name)[0]
+    for other in os.listdir(folder):
+        if other.startswith(stem + "."):
+            os.remove(os.path.join(folder, other))
+
+
+def collect_indicators(locator):
+    """The key indicators of a scenario (see :py:data:`INDICATORS`) - the results that do not exist are skipped
+
+    :rtype: dict
+    """
+    indicators = {}
+    for lm, columns in INDICATORS:
+        path = getattr(locator, lm)()
+        if not os.path.exists(path):
+            continue
+        df = pd.read_csv(path)
+        for column in columns:
+            if column in df.columns and column not in indicators:
+                indicators[column] = df[column].sum()
+    return indicators
+
+
+def run_scripts(config, scripts):
+    """Run the ``scripts`` (a list of (script, parameters) tuples) on the scenario of ``config``"""
+    import cea.api
+
+    for script_name, parameters in scripts:
+        getattr(cea.api, py_name(script_name))(config=config, **{py_name(k): v for k, v in parameters.items()})
+        config.restricted_to = None
+
+
+def run_variant(config, variant_scenario, scripts, factors, values, affected_scripts, folder_writers):
+    """
+    Create a variant of the base scenario (``general:scenario`` of ``config``), run the affected scripts on it and
+    return its indicators (or the error, so the other variants still run).
+
+    :rtype: dict
+    """
+    from cea.workflows.workflow import set_parameter
+
+    try:
+        create_variant_scenario(config.scenario, variant_scenario, affected_scripts, folder_writers)
+        variant_config = copy.deepcopy(config)
+        with variant_config.ignore_restrictions():
+            variant_config.scenario = variant_scenario
+            variant_config.multiprocessing = False  # the variants already run in parallel
+        for factor in factors:
+            if factor.parameter:
+                set_parameter(variant_config, variant_config.get_parameter(factor.parameter), values[factor.label])
+        locator = cea.inputlocator.InputLocator(variant_scenario)
+        apply_table_factors(locator, factors, values)
+        run_scripts(variant_config, [(script_name, parameters) for script_name, parameters in scripts
+                                     if script_name in affected_scripts])
+        return collect_indicators(locator)
+    except Exception:
+        return {"error": traceback.format_exc()}
+
+
+def print_variant_completed(i, n, args, result):
+    status = "failed" if "error" in result else "completed"
+    print("Variant {variant} {status} ({i}/{n})".format(variant=os.path.basename(args[1]), status=status, i=i + 1,
+                                                       n=n))
+
+
+def main(config):
+    """
+    Run the batch configured in the ``scenario-batch`` section on the scenario.
+
+    :param config:
+    :type config: cea.config.Configuration
+    """
+    import cea.utilities.parallel
+
+    base_scenario = os.path.normpath(os.path.abspath(config.scenario))
+    batch_folder = config.scenario_batch.batch_folder
+    if os.path.normpath(os.path.abspath(batch_folder)).startswith(base_scenario + os.sep):
+        raise ValueError("The batch folder can't be inside the base scenario: {}".format(batch_folder))
+    if not os.path.exists(batch_folder):
+        os.makedirs(batch_folder)
+
+    scripts, factors = read_batch_file(config.scenario_batch.batch_file)
+    schemas = cea.schemas.schemas(config.plugins)
+    script_names = [script_name for script_name, _ in scripts]
+    affected_scripts = find_affected_scripts(config, script_names, factors, schemas)
+    print("Scripts run on each variant: {}".format(", ".join(affected_scripts)))
+    shared_scripts = [script_name for script_name in script_names if script_name not in affected_scripts]
+    if shared_scripts:
+        print("Scripts whose results are shared with the base scenario: {}".format(", ".join(shared_scripts)))
+
+    samples = sample_variants(factors, config.scenario_batch.samples, config.scenario_batch.random_seed)
+    samples.to_csv(os.path.join(batch_folder, "batch_samples.csv"))
+
+    if config.scenario_batch.run_base:
+        run_scripts(copy.deepcopy(config), scripts)
+    base_indicators = collect_indicators(cea.inputlocator.InputLocator(base_scenario))
+
+    n = len(samples)
+    variant_scenarios = [os.path.join(batch_folder, variant) for variant in samples.index]
+    run = cea.utilities.parallel.vectorize(run_variant, config.get_number_of_processes(),
+                                           on_complete=print_variant_completed)
+    values = variant_values(samples)
+    results = run([config] * n, variant_scenarios, [scripts] * n, [factors] * n,
+                  [values[variant] for variant in samples.index], [affected_scripts] * n,
+                  [calc_folder_writers(schemas, script_names)] * n)
+
+    results_df = pd.concat([pd.DataFrame([base_indicators], index=pd.Index([BASE], name="variant")),
+                            samples.join(pd.DataFrame(results, index=samples.index))])
+    results_path = os.path.join(batch_folder, "batch_results.csv")
+    results_df.to_csv(results_path)
+    failed = [variant for variant, result in zip(samples.index, results) if "error" in result]
+    for variant in failed:
+        print("Variant {variant} failed:\n{error}".format(variant=variant, error=results_df.loc[variant, "error"]))
+    print("Batch results written to {}".format(results_path))
+
+
+if __name__ == '__main__':
+    main(cea.config.Configuration())
@@ -0,0 +1,179 @@
+"""
+Reduce a year of hourly time series to a few typical days, for screening runs of the hourly models.
+
+The days of the year are clustered by their hourly profiles (e.g. weather and occupancy) with Ward's hierarchical
+clustering and each cluster is represented by its medoid - the day closest to the mean of the cluster. The days with
+the extreme values of selected profiles (e.g. the hottest and the coldest hour) are kept as typical days of their own,
+so the peaks survive the reduction. The weight of a typical day is the number of days of the year it represents.
+
+A model that only runs on the typical days (see :py:meth:`TypicalDays.simulation_hours`) reconstructs a full year of
+hourly results with :py:meth:`TypicalDays.expand`, so annual totals are the weighted sums of the typical days and the
+peaks are the peaks of the typical days. Use :py:func:`calc_errors` and :py:func:`compare_totals` to check the
+reduction against the full year.
+"""
+
+import numpy as np
+import pandas as pd
+from scipy.cluster.hierarchy import fcluster, linkage
+
+from cea.constants import DAYS_IN_YEAR, HOURS_IN_YEAR
+
+__author__ = "Daren Thomas"
+__copyright__ = "Copyright 2021, Architecture and Building Systems - ETH Zurich"
+__credits__ = ["Daren Thomas"]
+__license__ = "MIT"
+__version__ = "0.1"
+__maintainer__ = "Daren Thomas"
+__email__ = "cea@arch.ethz.ch"
+__status__ = "Production"
+
+HOURS_IN_DAY = 24
+
+# hours simulated before each typical day to warm up the state of a model (e.g. the thermal mass of a building)
+HOURS_WARM_UP = 24
+
+
+class TypicalDays(object):
+    """The typical days of a year: ``assignment`` maps each day of the year to the day of the year that represents
+    it."""
+
+    def __init__(self, assignment):
+        self.assignment = np.asarray(assignment, dtype=int)
+        if len(self.assignment) != DAYS_IN_YEAR:
+            raise ValueError('Expected a typical day for each of the {n} days of the year'.format(n=DAYS_IN_YEAR))
+        self.days, self.weights = np.unique(self.assignment, return_counts=True)
+
+    def __len__(self):
+        return len(self.days)
+
+    def representative_hours(self):
+        """For each hour of the year, the hour of the typical day representing it"""
+        return (self.assignment[:, np.newaxis] * HOURS_IN_DAY + np.arange(HOURS_IN_DAY)).ravel()
+
+    def expand(self, values):
+        """Reconstruct a year of hourly values from the values of the typical days (the other hours are ignored)"""
+        if isinstance(values, pd.Series):
+            return pd.Series(values.values[self.representative_hours()], index=values.index, name=values.name)
+        return values[self.representative_hours()]
+
+    def simulation_hours(self, warm_up_hours=HOURS_WARM_UP):
+        """The hours to simulate (in order): the hours of the typical days, each preceded by ``warm_up_hours``"""
+        return [hour for start, stop in self.simulation_periods(warm_up_hours) for hour in range(start, stop)]
+
+    def simulation_periods(self, warm_up_hours=HOURS_WARM_UP):
+        """The (start, stop) hours of the periods to simulate - consecutive typical days share a period"""
+        periods = []
+        for day in self.days:
+            start = max(day * HOURS_IN_DAY - warm_up_hours, 0)
+            stop = (day + 1) * HOURS_IN_DAY
+            if periods and start <= periods[-1][1]:
+                periods[-1] = (periods[-1][0], stop)
+            else:
+                periods.append((start, stop))
+        return periods
+
+    def to_csv(self, path):
+        pd.DataFrame({'day': np.arange(DAYS_IN_YEAR), 'typical_day': self.assignment,
+                      'weight': self.weights[np.searchsorted(self.days, self.assignment)]}).to_csv(path, index=False)
+
+    @classmethod
+    def from_csv(cls, path):
+        return cls(pd.read_csv(path).sort_values('day')['typical_day'].values)
+
+
+def cluster_typical_days(profiles, number_of_days, extreme_days=None):
+    """
+    Cluster the days of the year by their hourly ``profiles``.
+
+    :param profiles: the hourly profiles to cluster (a column per variable) - the columns are normalized, so they have
+        the same importance
+    :type profiles: pd.DataFrame
+    :param int number_of_days: the number of typical days (including the extreme days)
+    :param extreme_days: keep the day with the highest (``max``) or lowest (``min``) hourly value of a column as a
+        typical day of its own, e.g. ``[('drybulb_C', 'max'), ('drybulb_C', 'min')]``
+    :type extreme_days: list[tuple[str, str]]
+    :rtype: TypicalDays
+    """
+    if len(profiles) != HOURS_IN_YEAR:
+        raise ValueError('Expected hourly profiles for a year ({n} hours)'.format(n=HOURS_IN_YEAR))
+    if number_of_days >= DAYS_IN_YEAR:
+        return TypicalDays(np.arange(DAYS_IN_YEAR))
+
+    hourly_values = profiles.values.astype(float)
+    daily_values = hourly_values.reshape(DAYS_IN_YEAR, HOURS_IN_DAY, -1)
+
+    extremes = []
+    for column, extreme in extreme_days or []:
+        daily_column = daily_values[:, :, profiles.columns.get_loc(column)]
+        day = int(np.argmax(daily_column.max(axis=1)) if extreme == 'max' else np.argmin(daily_column.min(axis=1)))
+        if day not in extremes:
+            extremes.append(day)
+    if number_of_days <= len(extremes):
+        raise ValueError('{n} typical days are not enough to keep the {e} extreme days'.format(n=number_of_days,
+                                                                                          e=len(extremes)))
+
+    # normalize each column to [0, 1]
+    minimum = hourly_values.min(axis=0)
+    value_range = hourly_values.max(axis=0) - minimum
+    value_range[value_range == 0.0] = 1.0
+    features = ((hourly_values - minimum) / value_range).reshape(DAYS_IN_YEAR, -1)
+
+    other_days = np.array([day for day in range(DAYS_IN_YEAR) if day not in extremes])
+    labels = fcluster(linkage(features[other_days], method='ward'), t=number_of_days - len(extremes),
+                      criterion='maxclust')
+
+    assignment = np.arange(DAYS_IN_YEAR)
+    for label in np.unique(labels):
+        cluster = other_days[labels == label]
+        distance = ((features[cluster] - features[cluster].mean(axis=0)) ** 2).sum(axis=1)
+        assignment[cluster] = cluster[np.argmin(distance)]
+    return TypicalDays(assignment)
+
+
+def calc_errors(profiles, typical_days):
+    """
+    The error of the typical days in representing the hourly ``profiles`` of the year, for each column: the relative
+    error of the annual total and of the peak and the root mean square error of the hours, relative to the range.
+
+    :rtype: pd.DataFrame
+    """
+    expanded = pd.DataFrame({column: typical_days.expand(profiles[column].values) for column in profiles.columns},
+                            index=profiles.index)
+    value_range = (profiles.max() - profiles.min()).replace(0.0, np.nan)
+    return pd.DataFrame({'total': profiles.sum(),
+                         'total_typical_days': expanded.sum(),
+                         'error_total_%': relative_error(expanded.sum(), profiles.sum()),
+                         'peak': profiles.max(),
+                         'peak_typical_days': expanded.max(),
+                         'error_peak_%': relative_error(expanded.max(), profiles.max()),
+                         'rmse_%': ((expanded - profiles) ** 2).mean() ** 0.5 / value_range * 100.0})
+
+
+def compare_totals(full_year, typical_days, columns):
+    """
+    Compare the yearly results of each building (a row per building, e.g. ``Total_demand.csv``) calculated with the
+    typical days against those of a full year: the relative error of the sum over all buildings and the mean absolute
+    relative error of the buildings.
+
+    :param full_year: the results of the full year, indexed by building
+    :type full_year: pd.DataFrame
+    :param typical_days: the results of the typical days, indexed by building
+    :type typical_days: pd.DataFrame
+    :param columns: the columns to compare
+    :rtype: pd.DataFrame
+    """
+    buildings = full_year.index.intersection(typical_days.index)
+    full_year = full_year.loc[buildings, columns]
+    typical_days = typical_days.loc[buildings, columns]
+    building_errors = relative_error(typical_days, full_year).abs()
+    return pd.DataFrame({'full_year': full_year.sum(),
+                         'typical_days': typical_days.sum(),
+                         'error_%': relative_error(typical_days.sum(), full_year.sum()),
+                         'mean_absolute_error_buildings_%': building_errors.mean()})
+
+
+def relative_error(value, reference):
+    """Relative error in percent - NaN where the reference is zero"""
+    if isinstance(reference, (pd.Series, pd.DataFrame)):
+        reference = reference.replace(0.0, np.nan)
+    return (value - reference) / reference * 100.0
@@ -1,6 +1,8 @@
 """
 cea-worker: a worker-process that uses the /server/jobs/ api to figure out what needs to be loaded to
-complete a job. All output is wired through the /server/streams/ api.
+complete a job. All output is wired through the /server/streams/ api - or, with ``--transport pipe``, written to STDOUT
+for the server that started the worker to read. Either way, the output is sent in batches from a background thread, so
+scripts that print a lot are not slowed down by the server.
 
 In the future, (Dataframe-) file reading / writing will happen through a /server/data api.
 
@@ -10,7 +12,9 @@ integer argument, the jobid, that is used to fetch all other information from th
 as an URL for locating the /server/jobs api.
 """
 
+import os
 import sys
+import time
 import requests
 import traceback
 import queue
@@ -31,69 +35,136 @@ __status__ = "Production"
 suppress_3rd_party_debug_loggers()
 
 
-def consume_nowait(q, msg):
+# output is sent in batches: at the latest STREAM_FLUSH_INTERVAL seconds after it was written or as soon as it exceeds
+# STREAM_FLUSH_SIZE characters
+STREAM_FLUSH_INTERVAL = 0.5
+STREAM_FLUSH_SIZE = 64 * 1024
+
+TRANSPORT_HTTP = "http"  # post the output to the /server/streams/ api
+TRANSPORT_PIPE = "pipe"  # write the output to STDOUT, the server reads it from the pipe (see WorkerPool)
+
+
+def start_thread(target, *args):
+    """Run ``target(*args)`` in a daemon OS thread - the tasks block on reads and queues, so they must not run as
+    greenlets of the server (which runs with gevent and does not monkeypatch the standard library)"""
+    thread = threading.Thread(target=target, args=args)
+    thread.daemon = True
+    thread.start()
+    return thread
+
+
+class StreamBatcher(object):
     """
-    Read from queue as much as possible and concatenate the results to ``msg``, returning that.
-    If an ``EOFError`` is read from the queue, put it back and return the ``msg`` so far.
+    Collect written strings in a queue and pass them on to ``send`` from a background thread, coalesced on time and
+    size thresholds, so writing never blocks on ``send``.
     """
-    if not q.empty():
-        messages = [msg]
-        try:
-            msg = q.get_nowait()
-            while not msg is EOFError:
+
+    def __init__(self, send, interval=STREAM_FLUSH_INTERVAL, max_size=STREAM_FLUSH_SIZE):
+        self.send = send
+        self.interval = interval
+        self.max_size = max_size
+        self.queue = queue.Queue()
+        self.closed = False
+        self.thread = start_thread(self.run)
+
+    def write(self, msg):
+        if msg:
+            self.queue.put_nowait(msg)
+
+    def close(self):
+        """Send sentinel that we're done writing and wait for the remaining output to be sent"""
+        if not self.closed:
+            self.closed = True
+            self.queue.put(EOFError)
+            self.thread.join()
+
+    def run(self):
+        """Send batches until a sentinel (the EOFError class object) is read."""
+        done = False
+        while not done:
+            msg = self.queue.get(block=True, timeout=None)  # block until first message
+            if msg is EOFError:
+                return
+            messages = [msg]
+            size = len(msg)
+            deadline = time.time() + self.interval
+            while size < self.max_size:
+                try:
+                    msg = self.queue.get(block=True, timeout=max(0.0, deadline - time.time()))
+                except queue.Empty:
+                    break
+                if msg is EOFError:
+                    done = True
+                    break
                 messages.append(msg)
-                msg = q.get_nowait()
-            # msg is now EOFError, put it back
-            q.put(EOFError)
-        except queue.Empty:
-            # we have read all there is in the queue for now
-            pass
-        finally:
-            msg = ''.join(messages)
-    return msg
+                size += len(msg)
+            try:
+                self.send(''.join(messages))
+            except Exception:
+                # losing output is better than failing the job
+                traceback.print_exc(file=sys.__stderr__)
 
 
-def stream_poster(jobid, server, queue):
-    """Post items from queue until a sentinel (the EOFError class object) is read."""
-    msg = queue.get(block=True, timeout=None)  # block until first message
+def http_sender(jobid, server):
+    """Return a function that posts output to the /server/streams/ api, reusing the connection"""
+    session = requests.Session()
+    url = "{server}/streams/write/{jobid}".format(**locals())
 
-    while not msg is EOFError:
-        msg = consume_nowait(queue, msg)
-        requests.put("{server}/streams/write/{jobid}".format(**locals()), data=msg)
-        msg = queue.get(block=True, timeout=None)  # block until next message
+    def send(msg):
+        session.put(url, data=msg.encode("utf-8"))
+
+    return send
 
 
 class JobServerStream(object):
     """A File-like object for capturing STDOUT and STDERR form cea-worker processes on the server."""
 
-    def __init__(self, jobid, server, stream):
-        self.jobid = jobid
-        self.server = server
+    def __init__(self, batcher, stream):
+        self.batcher = batcher
         self.stream = stream  # keep the original STDOUT around for debugging purposes
-        self.queue = queue.Queue()
-        self.stream_poster = threading.Thread(target=stream_poster, args=[jobid, server, self.queue])
-        self.stream_poster.start()
 
     def close(self):
-        """Send sentinel that we're done writing"""
-        self.queue.put(EOFError)
-        self.stream_poster.join()
+        self.batcher.close()
 
     def write(self, str):
-        self.queue.put_nowait(str)
+        self.batcher.write(str)
         print("cea-worker: {str}".format(**locals()), end='', file=self.stream)
 
     def isatty(self):
         return False
 
     def flush(self):
+        # output is sent in batches by the StreamBatcher
         pass
 
 
-def configure_streams(jobid, server):
-    """Capture STDOUT and STDERR writes and post them to the /server/"""
-    sys.stdout = JobServerStream(jobid, server, sys.stdout)
-    sys.stderr = JobServerStream(jobid, server, sys.stderr)
+def configure_streams(jobid, server, transport=TRANSPORT_HTTP):
+    """Capture STDOUT and STDERR writes and post them to the /server/ (with the pipe transport, the server reads the
+    output of the worker process directly)"""
+    if transport == TRANSPORT_HTTP:
+        batcher = StreamBatcher(http_sender(jobid, server))
+        sys.stdout = JobServerStream(batcher, sys.stdout)
+        sys.stderr = JobServerStream(batcher, sys.stderr)
+
+
+def close_streams():
+    """Make sure all the output was sent"""
+    for stream in (sys.stdout, sys.stderr):
+        if isinstance(stream, JobServerStream):
+            stream.close()
+        else:
+            stream.flush()
+
+
+def release_pipe():
+    """Close STDOUT and STDERR of the worker process (pipe transport), so the server reads the end of the output before
+    the end of the job is reported"""
+    sys.stdout.flush()
+    sys.stderr.flush()
+    devnull = os.open(os.devnull, os.O_WRONLY)
+    os.dup2(devnull, sys.__stdout__.fileno())
+    os.dup2(devnull, sys.__stderr__.fileno())
+    os.close(devnull)
 
 
 def fetch_job(jobid, server):
@@ -136,22 +207,27 @@ def post_error(exc, jobid, server):
     requests.post("{server}/jobs/error/{jobid}".format(**locals()), data=exc)
 
 
-def worker(config, jobid, server):
+def worker(config, jobid, server, transport=TRANSPORT_HTTP):
     """This is the main logic of the cea-worker."""
     print("Running cea-worker with jobid: {jobid}, url: {server}".format(**locals()))
     job = fetch_job(jobid, server)
+    exc = None
     try:
-        configure_streams(jobid, server)
+        configure_streams(jobid, server, transport)
         post_started(jobid, server)
         run_job(config, job, server)
-        post_success(jobid, server)
     except Exception:
         exc = traceback.format_exc()
         print(exc, file=sys.stderr)
-        post_error(exc, jobid, server)
     finally:
-        sys.stdout.close()
-        sys.stderr.close()
+        # send all the output before reporting the end of the job
+        close_streams()
+        if transport == TRANSPORT_PIPE:
+            release_pipe()
+    if exc is None:
+        post_success(jobid, server)
+    else:
+        post_error(exc, jobid, server)
 
 
 def main(config=None):
@@ -160,7 +236,7 @@ def main(config=None):
     default_url = config.worker.url
 
     args = parse_arguments(default_url)
-    worker(config, args.jobid, args.url)
+    worker(config, args.jobid, args.url, args.transport)
 
 
 def parse_arguments(default_url):
@@ -168,6 +244,8 @@ def parse_arguments(default_url):
     parser = argparse.ArgumentParser()
     parser.add_argument("jobid", type=int, help="Job id to run - use 0 to run the next job", default=0)
     parser.add_argument("-u", "--url", type=str, help="URL of the CEA server api", default=default_url)
+    parser.add_argument("-t", "--transport", choices=[TRANSPORT_HTTP, TRANSPORT_PIPE], default=TRANSPORT_HTTP,
+                        help="How to send the output of the job to the server")
     args = parser.parse_args()
     return args
 
@@ -1,14 +1,32 @@
 """
 Run a workflow.yml file - this is like a cea-aware "batch" file for running multiple cea scripts including parameters.
 ``cea workflow`` can also pick up from previous (failed?) runs, which can help in debugging.
+
+With ``workflow:parallel``, the steps are run as a dependency graph instead of one after the other: a step waits for
+the earlier steps that write the files it reads, read the files it writes or write the same files (according to the
+``created_by`` / ``used_by`` entries of ``schemas.yml`` and the ``input-files`` of ``scripts.yml``). Independent steps
+(e.g. the solar potentials after the radiation, the emissions and the costs after the demand) run at the same time,
+sharing the CPUs of ``general:multiprocessing`` / ``general:number-of-cpus-to-keep-free``.
+
+With ``workflow:skip-unchanged``, a step is skipped if its parameters and the contents of its input files are the same
+as the last time it was run on the scenario and its output files were not changed since (see :py:class:`StepHashes`).
 """
 
+import copy
+import hashlib
+import inspect
+import json
+import multiprocessing
+import multiprocessing.connection
 import os
+import sqlite3
 import sys
 import datetime
+import cea
 import cea.config
 import cea.inputlocator
 import cea.api
+import cea.schemas
 import cea.scripts
 import yaml
 import tempfile
@@ -61,6 +79,8 @@ def main(config):
     resume_yml = config.workflow.resume_file
     resume_mode_on = config.workflow.resume
     trace_input = config.workflow.trace_input
+    parallel = config.workflow.parallel
+    skip_unchanged = config.workflow.skip_unchanged
 
     set_up_environment_variables(config)
 
@@ -73,6 +93,11 @@ def main(config):
     with open(workflow_yml, 'r') as workflow_fp:
         workflow = yaml.safe_load(workflow_fp)
 
+    if parallel and not (resume_mode_on or trace_input):
+        run_parallel(config, workflow, skip_unchanged,
+                     on_resume_step=lambda i: write_resume_info(resume_yml, resume_dict, workflow_yml, i))
+        return
+
     for i, step in enumerate(workflow):
         if "script" in step:
             if resume_mode_on and i <= resume_step:
@@ -80,7 +105,7 @@ def main(config):
                 print("Skipping workflow step {i}: script={script}".format(i=i, script=step["script"]))
                 write_resume_info(resume_yml, resume_dict, workflow_yml, i)
                 continue
-            do_script_step(config, i, step, trace_input)
+            do_script_step(config, i, step, trace_input, skip_unchanged)
         elif "config" in step:
             config = do_config_step(config, step)
         else:
@@ -156,7 +181,7 @@ def set_parameter(config, parameter, value):
         parameter.set(parameter.decode(expanded_value))
 
 
-def do_script_step(config, i, step, trace_input):
+def do_script_step(config, i, step, trace_input, skip_unchanged=False):
     """Run a script based on the step's "script" and "parameters" (optional) keys."""
     script = cea.scripts.by_name(step["script"], plugins=config.plugins)
     print("")
@@ -174,9 +199,334 @@ def do_script_step(config, i, step, trace_input):
 
     if trace_input:
         run_with_trace(config, py_script, **py_parameters)
+    elif skip_unchanged:
+        apply_step_parameters(config, script, py_parameters)
+        workflow_step = WorkflowStep(i, script, config, cea.schemas.schemas(config.plugins))
+        if workflow_step.is_unchanged():
+            print("Skipping workflow step {i}: script={script} (unchanged)".format(i=i, script=script.name))
+            return
+        run(config, py_script, **py_parameters)
+        workflow_step.record()
     else:
         run(config, py_script, **py_parameters)
 
 
+def apply_step_parameters(config, script, py_parameters):
+    """Set the parameters of a step on the config - like :py:mod:`cea.api` does when running the script, the parameters
+    are kept for the following steps"""
+    with config.ignore_restrictions():
+        for _, parameter in config.matching_parameters(script.parameters):
+            if parameter.py_name in py_parameters:
+                parameter.set(py_parameters[parameter.py_name])
+
+
+# parameters that don't change the results of a script
+RESOURCE_PARAMETERS = {"general:multiprocessing", "general:number-of-cpus-to-keep-free"}
+
+
+class WorkflowStep(object):
+    """
+    A script step of a workflow with the config it is run with, the locator methods it reads (``inputs``) and writes
+    (``outputs``) and the hashes used to skip it if nothing changed.
+
+    :param int index: the index of the step in the workflow
+    :param script: the script of the step
+    :type script: cea.scripts.CeaScript
+    :param config: the config to run the script with (including the parameters of the step)
+    :type config: cea.config.Configuration
+    :param dict schemas: the contents of ``schemas.yml`` (see :py:func:`cea.schemas.schemas`)
+    """
+
+    def __init__(self, index, script, config, schemas):
+        self.index = index
+        self.script = script
+        self.config = config
+        self.schemas = schemas
+        self.scenario = os.path.normcase(os.path.abspath(config.get("general:scenario")))
+        py_script = script.name.replace("-", "_")
+        self.outputs = {lm for lm in schemas if py_script in schemas[lm].get("created_by", [])}
+        self.inputs = ({lm for lm in schemas if py_script in schemas[lm].get("used_by", [])}
+                       | {locator_spec[0] for locator_spec in script.input_files}) - self.outputs
+        self.fingerprint = None
+
+    def __repr__(self):
+        return "<workflow step {index}: {script}>".format(index=self.index, script=self.script.name)
+
+    @property
+    def declared(self):
+        """False if the files of the script are unknown (it can't be run in parallel or skipped)"""
+        return bool(self.inputs or self.outputs)
+
+    def files(self, locator_methods):
+        return {(self.scenario, lm) for lm in locator_methods}
+
+    def depends_on(self, other):
+        """True if this step needs to wait for ``other`` (an earlier step) to complete"""
+        if not self.declared or not other.declared:
+            return True
+        return bool(self.files(self.inputs) & other.files(other.outputs)
+                    or self.files(self.outputs) & other.files(other.inputs)
+                    or self.files(self.outputs) & other.files(other.outputs))
+
+    @property
+    def uses_multiprocessing(self):
+        return any(parameter.fqname == "general:multiprocessing" and parameter.get()
+                   for _, parameter in self.config.matching_parameters(self.script.parameters))
+
+    def parameter_values(self):
+        return {parameter.fqname: parameter.get()
+                for _, parameter in self.config.matching_parameters(self.script.parameters)
+                if parameter.fqname not in RESOURCE_PARAMETERS}
+
+    def key(self):
+        """Identifies the step in the :py:class:`StepHashes` of the scenario: the script and its parameters"""
+        return "{script}:{parameters}".format(script=self.script.name, parameters=hash_values(self.parameter_values()))
+
+    def is_unchanged(self):
+        """True if the step was run with the same inputs and its outputs were not changed since"""
+        if not self.declared or not self.outputs or any(lm not in self.schemas for lm in self.inputs):
+            return False
+        locator = cea.inputlocator.InputLocator(self.scenario, self.config.plugins)
+        with StepHashes(locator.get_workflow_step_hashes()) as step_hashes:
+            self.fingerprint = hash_values([cea.__version__, self.script.name, self.parameter_values(),
+                                            step_hashes.hash_locator_methods(locator, self.inputs, self.schemas)])
+            outputs = step_hashes.hash_locator_methods(locator, self.outputs, self.schemas)
+            return step_hashes.read(self.key()) == (self.fingerprint, hash_values(outputs))
+
+    def record(self):
+        """Remember the inputs and outputs of the step after running it"""
+        if self.fingerprint is None:
+            return
+        locator = cea.inputlocator.InputLocator(self.scenario, self.config.plugins)
+        with StepHashes(locator.get_workflow_step_hashes()) as step_hashes:
+            outputs = step_hashes.hash_locator_methods(locator, self.outputs, self.schemas)
+            step_hashes.write(self.key(), self.fingerprint, hash_values(outputs))
+
+
+class StepHashes(object):
+    """The hashes of the workflow steps run on a scenario, stored at ``path``: the hash of the inputs and parameters
+    and the hash of the outputs of each step. The hashes of the contents of the files are cached by their size and
+    modification time. Use as a context manager to close the connection to the database."""
+
+    def __init__(self, path):
+        self.path = path
+        self._connection = sqlite3.connect(path)
+        with self._connection:
+            self._connection.execute("CREATE TABLE IF NOT EXISTS steps (key TEXT PRIMARY KEY, fingerprint TEXT NOT NULL,"
+                                     " outputs TEXT NOT NULL)")
+            self._connection.execute("CREATE TABLE IF NOT EXISTS files (path TEXT PRIMARY KEY, signature TEXT NOT NULL,"
+                                     " hash TEXT NOT NULL)")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        self._connection.close()
+
+    def read(self, key):
+        """Return the (fingerprint, outputs) hashes of the last run of a step - or ``None``"""
+        row = self._connection.execute("SELECT fingerprint, outputs FROM steps WHERE key = ?", (key,)).fetchone()
+        return tuple(row) if row else None
+
+    def write(self, key, fingerprint, outputs):
+        with self._connection:
+            self._connection.execute("INSERT OR REPLACE INTO steps (key, fingerprint, outputs) VALUES (?, ?, ?)",
+                                     (key, fingerprint, outputs))
+
+    def hash_file(self, path):
+        """The hash of the contents of a file - only read again if its size or modification time changed"""
+        stat = os.stat(path)
+        signature = "{size}:{mtime}".format(size=stat.st_size, mtime=stat.st_mtime_ns)
+        row = self._connection.execute("SELECT signature, hash FROM files WHERE path = ?", (path,)).fetchone()
+        if row and row[0] == signature:
+            return row[1]
+        file_hash = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                file_hash.update(block)
+        with self._connection:
+            self._connection.execute("INSERT OR REPLACE INTO files (path, signature, hash) VALUES (?, ?, ?)",
+                                     (path, signature, file_hash.hexdigest()))
+        return file_hash.hexdigest()
+
+    def hash_locator_methods(self, locator, locator_methods, schemas):
+        """The hashes of the files of each locator method (relative paths), see :py:func:`locator_method_files`"""
+        return {lm: {os.path.relpath(path, locator.scenario): self.hash_file(path)
+                     for path in locator_method_files(locator, lm, schemas)}
+                for lm in sorted(locator_methods)}
+
+
+def locator_method_files(locator, lm, schemas):
+    """
+    The files of a locator method in a scenario: the file returned by the method (with the other files of a shapefile)
+    or - for the methods with arguments (e.g. the results per building) - all the files of its folder.
+    """
+    method = getattr(locator, lm)
+    if len(inspect.signature(method).parameters) == 0:
+        path = method()
+        if os.path.isdir(path):
+            return sorted(os.path.join(root, file_name) for root, _, files in os.walk(path) for file_name in files)
+        folder, file_name = os.path.split(path)
+        stem = os.path.splitext(file_name)[0]
+        if not os.path.isdir(folder):
+            return []
+        return sorted(os.path.join(folder, other) for other in os.listdir(folder) if other.startswith(stem + "."))
+    folder = os.path.join(locator.scenario, os.path.dirname(schemas[lm]["file_path"]))
+    if not os.path.isdir(folder):
+        return []
+    return sorted(os.path.join(folder, other) for other in os.listdir(folder)
+                  if os.path.isfile(os.path.join(folder, other)))
+
+
+def hash_values(values):
+    return hashlib.sha256(json.dumps(values, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+def plan_steps(config, workflow):
+    """
+    The script steps of a workflow, each with a copy of the config as it would be when running the workflow one step
+    after the other (the config steps and the parameters of the earlier script steps applied).
+
+    :rtype: list[WorkflowStep]
+    """
+    schemas = cea.schemas.schemas(config.plugins)
+    steps = []
+    for i, step in enumerate(workflow):
+        if "script" in step:
+            script = cea.scripts.by_name(step["script"], plugins=config.plugins)
+            py_parameters = {k.replace("-", "_"): v for k, v in step.get("parameters", {}).items()}
+            apply_step_parameters(config, script, py_parameters)
+            step_config = copy.deepcopy(config)
+            step_config.restricted_to = None
+            steps.append(WorkflowStep(i, script, step_config, schemas))
+        elif "config" in step:
+            config = do_config_step(config, step)
+        else:
+            raise ValueError("Invalid step configuration: {i} - {step}".format(i=i, step=step))
+    return steps
+
+
+def calc_dependencies(steps):
+    """The earlier steps each step needs to wait for
+
+    :rtype: dict[int, set[int]]
+    """
+    return {step.index: {other.index for other in steps[:position] if step.depends_on(other)}
+            for position, step in enumerate(steps)}
+
+
+def claim_cpus(step, free, ready):
+    """The number of CPUs to run a step with - a fair share of the ``free`` CPUs for the ``ready`` steps if the script
+    uses multiprocessing. The config of the step is updated to use that many processes."""
+    if not step.uses_multiprocessing:
+        return 1
+    claim = max(1, min(step.config.get_number_of_processes(), free // ready))
+    with step.config.ignore_restrictions():
+        step.config.multiprocessing = claim > 1
+        step.config.number_of_cpus_to_keep_free = max(0, multiprocessing.cpu_count() - claim)
+    return claim
+
+
+def calc_resume_step(workflow, completed):
+    """The index of the last step of the workflow up to which all the script steps completed (``None`` if the first
+    script step did not complete) - the step to resume after, as written by the sequential workflow"""
+    resume_step = None
+    for i, step in enumerate(workflow):
+        if "script" in step and i not in completed:
+            break
+        resume_step = i
+    return resume_step
+
+
+def run_step(config, py_script):
+    """Run a step of a parallel workflow (in its own process)"""
+    run(config, py_script)
+
+
+def run_parallel(config, workflow, skip_unchanged, on_resume_step=None):
+    """
+    Run the script steps of a workflow as a dependency graph: each step runs in its own process as soon as the steps
+    it depends on completed, within the CPUs of ``general:multiprocessing`` / ``general:number-of-cpus-to-keep-free``.
+    The steps depending on a failed step are not run.
+
+    :param on_resume_step: called with the index of the last step up to which all the steps completed, whenever it
+                           advances (see :py:func:`calc_resume_step`), to write the resume file
+    """
+    steps = plan_steps(config, workflow)
+    dependencies = calc_dependencies(steps)
+    budget = config.get_number_of_processes()
+    print("Running {n} workflow steps with up to {budget} CPUs".format(n=len(steps), budget=budget))
+
+    pending = list(steps)
+    running = {}  # sentinel => (step, process, claimed CPUs)
+    completed, failed = set(), set()
+    free = budget
+    resume_step = None
+
+    def complete(step):
+        nonlocal resume_step
+        completed.add(step.index)
+        i = calc_resume_step(workflow, completed)
+        if on_resume_step and i is not None and i != resume_step:
+            resume_step = i
+            on_resume_step(i)
+    try:
+        while pending or running:
+            ready = []
+            for step in list(pending):
+                if dependencies[step.index] & failed:
+                    print("Not running workflow step {i}: script={script} (depends on a failed step)".format(
+                        i=step.index, script=step.script.name))
+                    pending.remove(step)
+                    failed.add(step.index)
+                elif dependencies[step.index] <= completed:
+                    if skip_unchanged and step.fingerprint is None and step.is_unchanged():
+                        print("Skipping workflow step {i}: script={script} (unchanged)".format(
+                            i=step.index, script=step.script.name))
+                        pending.remove(step)
+                        complete(step)
+                    else:
+                        ready.append(step)
+            for position, step in enumerate(ready):
+                if free < 1:
+                    break
+                claim = claim_cpus(step, free, len(ready) - position)
+                print("Starting workflow step {i}: script={script} ({claim} CPUs)".format(
+                    i=step.index, script=step.script.name, claim=claim))
+                process = multiprocessing.Process(target=run_step, name="workflow-step-{i}".format(i=step.index),
+                                                  args=(step.config, step.script.name.replace("-", "_")))
+                process.start()
+                running[process.sentinel] = (step, process, claim)
+                pending.remove(step)
+                free -= claim
+            if not running:
+                # the remaining steps were skipped or depend on failed steps
+                continue
+            for sentinel in multiprocessing.connection.wait(list(running.keys())):
+                step, process, claim = running.pop(sentinel)
+                process.join()
+                free += claim
+                if process.exitcode == 0:
+                    print("Completed workflow step {i}: script={script}".format(i=step.index, script=step.script.name))
+                    if skip_unchanged:
+                        step.record()
+                    complete(step)
+                else:
+                    print("Failed workflow step {i}: script={script}".format(i=step.index, script=step.script.name))
+                    failed.add(step.index)
+    finally:
+        for step, process, _ in running.values():
+            process.terminate()
+            process.join()
+
+    if failed:
+        raise RuntimeError("Workflow steps failed or not run: {steps}".format(
+            steps=", ".join("{i} ({script})".format(i=step.index, script=step.script.name)
+                            for step in steps if step.index in failed)))
+
+
 if __name__ == '__main__':
     main(cea.config.Configuration())